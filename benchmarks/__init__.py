@@ -0,0 +1,6 @@
+"""
+Offline benchmark and load-test harness.
+
+Runs the real ``src`` components against deterministic local fakes
+(see ``benchmarks.fakes``) so results are reproducible without Azure.
+"""
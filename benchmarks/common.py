@@ -0,0 +1,81 @@
+"""
+Shared helpers for benchmark result collection and reporting.
+"""
+import json
+import math
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered)) - 1
+    return ordered[max(0, min(len(ordered) - 1, rank))]
+
+
+def summarize_latencies(values: list[float]) -> dict:
+    """Summarize latencies (seconds) as milliseconds."""
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(max(values) * 1000, 3),
+    }
+
+
+def git_revision() -> str | None:
+    """Current git commit, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(config: dict | None = None) -> dict:
+    """Metadata recorded with every result file."""
+    return {
+        "commit": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": config or {},
+    }
+
+
+def write_results(path: str | Path, results: dict) -> None:
+    """Write results as pretty-printed JSON."""
+    Path(path).write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n")
+
+
+def compare_results(baseline: dict, current: dict, prefix: str = "") -> list[str]:
+    """
+    Compare two result trees and describe numeric changes.
+
+    Returns:
+        list[str]: One line per numeric metric, e.g. ``query.p99_ms: 120 -> 95 (-20.8%)``
+    """
+    lines = []
+    for key, value in current.items():
+        name = f"{prefix}{key}"
+        old = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict):
+            lines.extend(compare_results(old or {}, value, f"{name}."))
+        elif isinstance(value, (int, float)) and isinstance(old, (int, float)):
+            change = ((value - old) / old * 100) if old else 0.0
+            lines.append(f"{name}: {old} -> {value} ({change:+.1f}%)")
+    return lines
@@ -0,0 +1,189 @@
+"""
+Recall of reduced embedding dimensions against full-dimension search.
+
+Embeds a sample of indexed chunks and queries once at the model's native
+size, then shortens every vector to each candidate size (leading
+dimensions, renormalized; identical to the API ``dimensions`` parameter
+for text-embedding-3 models) and reports per size:
+
+- recall@k of exact cosine search against full-dimension exact search
+- vector storage per document under the configured index profile
+
+The smallest size meeting ``--min-recall`` is printed as
+``EMBEDDING_DIMENSIONS`` / ``EMBEDDING_DIMENSIONS_MODE`` settings. Changing
+the size needs a new index (python -m src.reindex).
+
+Models without Matryoshka training (text-embedding-ada-002) lose recall
+quickly when truncated; only shorten text-embedding-3 vectors.
+
+Usage:
+    python -m benchmarks.dimension_eval --queries queries.jsonl
+    python -m benchmarks.dimension_eval --jsonl docs.jsonl --deployment text-embedding-3-large \\
+        --dimensions 256,512,1024,3072 --min-recall 0.95
+"""
+import argparse
+import random
+import re
+import sys
+from collections.abc import Iterable
+
+from src.embedding import EmbeddingService, TextChunker, truncate_embedding
+from src.index_profile import IndexProfile, get_index_profile
+
+from .common import run_metadata, write_results
+from .index_sweep import exact_top_k
+
+DEFAULT_DIMENSIONS = "256,384,512,768,1024,1536,3072"
+
+
+def evaluate(
+    corpus: list[list[float]],
+    queries: list[list[float]],
+    dimensions: Iterable[int],
+    k: int = 10,
+    profile: IndexProfile | None = None,
+) -> list[dict]:
+    """
+    Recall@k of truncated vectors against the full vectors.
+
+    Args:
+        corpus: Full-dimension chunk embeddings
+        queries: Full-dimension query embeddings
+        dimensions: Candidate sizes (sizes above the native size are skipped)
+        k: Results per query
+        profile: Index profile for storage estimates (INDEX_PROFILE if None)
+
+    Returns:
+        list[dict]: One row per size, smallest first
+    """
+    profile = profile or get_index_profile()
+    native = len(corpus[0])
+    full = [truncate_embedding(v, native) for v in corpus]
+    truth = [set(exact_top_k(full, truncate_embedding(q, native), k)) for q in queries]
+    full_bytes = sum(profile.vector_bytes(native).values())
+
+    rows = []
+    for size in sorted({d for d in dimensions if 0 < d <= native}):
+        shortened = [truncate_embedding(v, size) for v in corpus]
+        hits = sum(
+            len(expected.intersection(exact_top_k(shortened, truncate_embedding(q, size), k)))
+            for q, expected in zip(queries, truth)
+        )
+        bytes_per_vector = sum(profile.vector_bytes(size).values())
+        rows.append({
+            "dimensions": size,
+            "recall": round(hits / (k * len(queries)), 4),
+            "bytes_per_vector": bytes_per_vector,
+            "storage_ratio": round(bytes_per_vector / full_bytes, 3),
+        })
+    return rows
+
+
+def recommend_dimensions(rows: list[dict], min_recall: float) -> dict | None:
+    """Smallest size meeting the recall target."""
+    eligible = [r for r in rows if r["recall"] >= min_recall]
+    return min(eligible, key=lambda r: r["dimensions"]) if eligible else None
+
+
+def sample_chunks(
+    jsonl: str | None,
+    index_name: str | None,
+    size: int,
+    seed: int,
+) -> list[str]:
+    """
+    Chunk texts to evaluate on.
+
+    Documents from ``jsonl`` are chunked with the configured chunker;
+    otherwise chunk content is read from the index.
+    """
+    if jsonl:
+        from src.config import get_settings
+        from src.reindex import iter_jsonl_documents
+
+        settings = get_settings()
+        chunker = TextChunker(settings.chunk_size, settings.chunk_overlap)
+        texts = [
+            chunk["text"]
+            for doc in iter_jsonl_documents(jsonl)
+            for chunk in chunker.chunk_text(doc.get("content", ""))
+        ]
+    else:
+        from src.clients import get_search_client
+
+        results = get_search_client(index_name).search(search_text="*", select=["content"], top=size)
+        texts = [r["content"] for r in results if r.get("content")]
+    rng = random.Random(seed)
+    return rng.sample(texts, min(size, len(texts)))
+
+
+def sample_queries(path: str | None, chunks: list[str], size: int, seed: int) -> list[str]:
+    """Most frequent logged queries, or the first sentence of sampled chunks."""
+    if path:
+        from src.warm_cache import iter_log_queries, mine_queries
+
+        return [query for query, _ in mine_queries(iter_log_queries(path), top_n=size)]
+    rng = random.Random(seed)
+    picked = rng.sample(chunks, min(size, len(chunks)))
+    return [re.split(r"(?<=[.!?。])\s*", text.strip(), maxsplit=1)[0] for text in picked]
+
+
+def _ints(spec: str) -> list[int]:
+    return [int(v) for v in spec.split(",") if v]
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Recall of reduced embedding dimensions")
+    parser.add_argument("--deployment", help="Embedding deployment (default: AZURE_OPENAI_DEPLOYMENT_EMBEDDING)")
+    parser.add_argument("--dimensions", default=DEFAULT_DIMENSIONS, help="Candidate sizes")
+    parser.add_argument("--jsonl", help="Documents to chunk instead of reading chunks from the index")
+    parser.add_argument("--index", help="Index or alias to sample (default: AZURE_SEARCH_INDEX)")
+    parser.add_argument("--queries", help="Query log (JSONL or one query per line)")
+    parser.add_argument("--sample", type=int, default=1000, help="Chunks to search over")
+    parser.add_argument("--query-count", type=int, default=100, help="Queries to evaluate")
+    parser.add_argument("--k", type=int, default=10, help="Results per query (recall@k)")
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Result JSON path")
+    args = parser.parse_args(argv)
+
+    chunks = sample_chunks(args.jsonl, args.index, args.sample, args.seed)
+    queries = sample_queries(args.queries, chunks, args.query_count, args.seed)
+    if not chunks or not queries:
+        print("No chunks or queries to evaluate", file=sys.stderr)
+        return 1
+
+    # Native vectors once; every candidate size is a prefix of them
+    service = EmbeddingService(args.deployment, dimensions_mode="native")
+    corpus = service.embed_batch(chunks)
+    query_vectors = service.embed_batch(queries)
+
+    rows = evaluate(corpus, query_vectors, _ints(args.dimensions), k=args.k)
+
+    print(f"{len(chunks)} chunks, {len(queries)} queries, native size {len(corpus[0])}")
+    print(f"{'dims':>5} {'recall@' + str(args.k):>9} {'bytes/vec':>9} {'storage':>8}")
+    for row in rows:
+        print(f"{row['dimensions']:>5} {row['recall']:>9.3f} {row['bytes_per_vector']:>9} "
+              f"{row['storage_ratio']:>8.0%}")
+
+    best = recommend_dimensions(rows, args.min_recall)
+    if best is None:
+        print(f"\nNo size reached recall {args.min_recall}")
+    else:
+        print(f"\nRecommended (recall {best['recall']}, {best['storage_ratio']:.0%} of full storage):")
+        print(f"  EMBEDDING_DIMENSIONS={best['dimensions']}")
+        print("  EMBEDDING_DIMENSIONS_MODE=api")
+
+    if args.output:
+        write_results(args.output, {
+            "meta": run_metadata(vars(args)),
+            "native_dimensions": len(corpus[0]),
+            "rows": rows,
+            "recommended": best,
+        })
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
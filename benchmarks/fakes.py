@@ -0,0 +1,732 @@
+"""
+Deterministic local stand-ins for Azure services.
+
+Provides in-process fakes for:
+- Azure OpenAI embeddings and chat completions (latency, streaming, 429 injection)
+- Azure AI Search (in-memory index with keyword/vector/hybrid scoring)
+- Azure Blob Storage (in-memory containers)
+
+Usage:
+    with FakeAzure(FakeConfig(rate_limit_probability=0.05)).install():
+        pipeline = RAGPipeline()
+        pipeline.query("...")
+"""
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import openai
+
+
+@dataclass
+class FakeConfig:
+    """Latency and fault-injection settings for the fakes (milliseconds)."""
+
+    embedding_dimensions: int = 1536
+    embedding_latency_ms: float = 25.0
+    embedding_per_input_ms: float = 0.5
+    chat_ttft_ms: float = 350.0
+    chat_token_interval_ms: float = 12.0
+    chat_completion_tokens: int = 150
+    search_latency_ms: float = 30.0
+    upload_latency_ms: float = 40.0
+    blob_latency_ms: float = 5.0
+    # Blobs per list_blobs page (the service default is 5000)
+    blob_page_size: int = 5000
+    rate_limit_probability: float = 0.0
+    retry_after_seconds: float = 1.0
+    latency_scale: float = 1.0
+    seed: int = 42
+
+
+class _Latency:
+    """Sleeps scaled by the configured latency factor."""
+
+    def __init__(self, config: FakeConfig):
+        self.config = config
+
+    def sleep(self, milliseconds: float) -> None:
+        delay = milliseconds * self.config.latency_scale / 1000
+        if delay > 0:
+            time.sleep(delay)
+
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokenize(text: str) -> list[str]:
+    """Lowercase word tokens; CJK runs are split into character bigrams."""
+    tokens = []
+    for word in _TOKEN_PATTERN.findall(text.lower()):
+        if word.isascii() or len(word) < 2:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i : i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def fake_embedding(text: str, dimensions: int = 1536) -> list[float]:
+    """
+    Deterministic feature-hashed embedding.
+
+    Texts sharing words get similar vectors, so vector search over the
+    fake index returns meaningful neighbours.
+    """
+    vector = [0.0] * dimensions
+    for token in _tokenize(text) or [""]:
+        digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        for shift in (0, 21, 42):
+            index = (value >> shift) % dimensions
+            sign = 1.0 if (value >> (shift + 20)) & 1 else -1.0
+            vector[index] += sign
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+# === Azure OpenAI ===
+
+
+class _RateLimiter:
+    """Seeded 429 injection shared by the OpenAI fakes."""
+
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.injected = 0
+
+    def maybe_raise(self, path: str) -> None:
+        if self.config.rate_limit_probability <= 0:
+            return
+        with self._lock:
+            hit = self._random.random() < self.config.rate_limit_probability
+            if hit:
+                self.injected += 1
+        if hit:
+            request = httpx.Request("POST", f"https://fake.openai.azure.com{path}")
+            response = httpx.Response(
+                429,
+                request=request,
+                headers={"retry-after": str(self.config.retry_after_seconds)},
+            )
+            raise openai.RateLimitError(
+                "Rate limit exceeded (injected)", response=response, body=None
+            )
+
+
+class _FakeEmbeddings:
+    def __init__(self, owner: "FakeOpenAI"):
+        self._owner = owner
+
+    def create(self, model: str, input, dimensions: int | None = None, **kwargs):
+        from src.embedding import truncate_embedding
+
+        owner = self._owner
+        owner.rate_limiter.maybe_raise("/embeddings")
+        texts = [input] if isinstance(input, str) else list(input)
+        owner.latency.sleep(
+            owner.config.embedding_latency_ms
+            + owner.config.embedding_per_input_ms * len(texts)
+        )
+        vectors = [fake_embedding(t, owner.config.embedding_dimensions) for t in texts]
+        if dimensions:
+            # Shortened like text-embedding-3: leading dimensions, renormalized
+            vectors = [truncate_embedding(v, dimensions) for v in vectors]
+        with owner._lock:
+            owner.embedding_calls += 1
+            owner.embedded_texts += len(texts)
+        return SimpleNamespace(
+            data=[SimpleNamespace(index=i, embedding=v) for i, v in enumerate(vectors)],
+            usage=SimpleNamespace(
+                prompt_tokens=sum(len(t.split()) for t in texts),
+                total_tokens=sum(len(t.split()) for t in texts),
+            ),
+        )
+
+
+class _FakeChatCompletions:
+    def __init__(self, owner: "FakeOpenAI"):
+        self._owner = owner
+
+    def create(
+        self,
+        model: str,
+        messages: list[dict],
+        max_tokens: int | None = None,
+        stream: bool = False,
+        stream_options: dict | None = None,
+        **kwargs,
+    ):
+        owner = self._owner
+        owner.rate_limiter.maybe_raise("/chat/completions")
+        with owner._lock:
+            owner.chat_calls += 1
+
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+        completion_tokens = min(
+            owner.config.chat_completion_tokens, max_tokens or owner.config.chat_completion_tokens
+        )
+        words = [f"word{i % 97}" for i in range(completion_tokens)]
+        usage = SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+
+        if not stream:
+            owner.latency.sleep(
+                owner.config.chat_ttft_ms
+                + owner.config.chat_token_interval_ms * completion_tokens
+            )
+            return SimpleNamespace(
+                choices=[
+                    SimpleNamespace(
+                        message=SimpleNamespace(content=" ".join(words)),
+                        finish_reason="stop",
+                    )
+                ],
+                usage=usage,
+            )
+
+        include_usage = bool(stream_options and stream_options.get("include_usage"))
+        return self._stream(words, usage if include_usage else None)
+
+    def _stream(self, words: list[str], usage):
+        owner = self._owner
+        owner.latency.sleep(owner.config.chat_ttft_ms)
+        for i, word in enumerate(words):
+            if i:
+                owner.latency.sleep(owner.config.chat_token_interval_ms)
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))],
+                usage=None,
+            )
+        if usage is not None:
+            yield SimpleNamespace(choices=[], usage=usage)
+
+
+class FakeOpenAI:
+    """Stand-in for ``openai.AzureOpenAI``."""
+
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.latency = _Latency(config)
+        self.rate_limiter = _RateLimiter(config)
+        self._lock = threading.Lock()
+        self.embedding_calls = 0
+        self.embedded_texts = 0
+        self.chat_calls = 0
+        self.embeddings = _FakeEmbeddings(self)
+        self.chat = SimpleNamespace(completions=_FakeChatCompletions(self))
+
+
+# === Azure AI Search ===
+
+
+@lru_cache(maxsize=256)
+def _parsed_filter(expression: str):
+    from src.search_planner import parse_filter
+
+    # The fake index accepts any field; the planner validates against the schema
+    return parse_filter(expression, fields=None)
+
+
+def _evaluate(document: dict, node) -> bool:
+    from src.search_planner import BoolOp, Comparison, Not, SearchIn
+
+    match node:
+        case BoolOp("and", operands):
+            return all(_evaluate(document, o) for o in operands)
+        case BoolOp("or", operands):
+            return any(_evaluate(document, o) for o in operands)
+        case Not(operand):
+            return not _evaluate(document, operand)
+        case SearchIn(field, values):
+            return str(document.get(field)) in values
+        case Comparison(field, op, expected):
+            actual = document.get(field)
+            match op:
+                case "eq":
+                    return actual == expected
+                case "ne":
+                    return actual != expected
+            if actual is None or expected is None:
+                return False
+            return {
+                "gt": actual > expected,
+                "ge": actual >= expected,
+                "lt": actual < expected,
+                "le": actual <= expected,
+            }[op]
+    raise ValueError(f"Unsupported filter node: {node!r}")
+
+
+def matches_filter(document: dict, expression: str | None) -> bool:
+    """Evaluate an OData filter (parsed by src.search_planner) against a document."""
+    if not expression or not expression.strip():
+        return True
+    return _evaluate(document, _parsed_filter(expression.strip()))
+
+
+class FakeSearchResults:
+    """Iterable search results with facets and count, like SearchItemPaged."""
+
+    def __init__(self, items: list[dict], facets: dict | None, count: int):
+        self._items = items
+        self._facets = facets
+        self._count = count
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def get_facets(self) -> dict | None:
+        return self._facets
+
+    def get_count(self) -> int:
+        return self._count
+
+
+class FakeIndex:
+    """In-memory document store shared by clients of the same index."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.documents: dict[str, dict] = {}
+        self.lock = threading.Lock()
+        self.schema = None
+
+
+class FakeSearchClient:
+    """Stand-in for ``azure.search.documents.SearchClient``."""
+
+    def __init__(self, index: FakeIndex | None, config: FakeConfig, resolve=None):
+        self._index = index
+        # Alias-aware clients look their index up on every request
+        self._resolve = resolve
+        self.config = config
+        self.latency = _Latency(config)
+        self.search_calls = 0
+
+    @property
+    def index(self) -> FakeIndex:
+        return self._resolve() if self._resolve else self._index
+
+    @property
+    def _index_name(self) -> str:
+        return self.index.name
+
+    # --- document operations ---
+
+    def _write(self, documents: list[dict], action: str) -> list:
+        self.latency.sleep(self.config.upload_latency_ms)
+        results = []
+        with self.index.lock:
+            for doc in documents:
+                key = doc["id"]
+                existing = self.index.documents.get(key)
+                succeeded = True
+                match action:
+                    case "upload":
+                        self.index.documents[key] = dict(doc)
+                    case "merge":
+                        if existing is None:
+                            succeeded = False
+                        else:
+                            existing.update(doc)
+                    case "mergeOrUpload":
+                        if existing is None:
+                            self.index.documents[key] = dict(doc)
+                        else:
+                            existing.update(doc)
+                    case "delete":
+                        self.index.documents.pop(key, None)
+                results.append(
+                    SimpleNamespace(
+                        key=key,
+                        succeeded=succeeded,
+                        status_code=200 if succeeded else 404,
+                        error_message=None if succeeded else "Document not found",
+                    )
+                )
+        return results
+
+    def upload_documents(self, documents: list[dict], **kwargs) -> list:
+        return self._write(documents, "upload")
+
+    def merge_documents(self, documents: list[dict], **kwargs) -> list:
+        return self._write(documents, "merge")
+
+    def merge_or_upload_documents(self, documents: list[dict], **kwargs) -> list:
+        return self._write(documents, "mergeOrUpload")
+
+    def delete_documents(self, documents: list[dict], **kwargs) -> list:
+        return self._write(documents, "delete")
+
+    def index_documents(self, batch, **kwargs) -> list:
+        results = []
+        for action in batch.actions:
+            doc = dict(action.additional_properties or {})
+            doc.pop("@search.action", None)
+            results.extend(self._write([doc], str(action.action_type)))
+        return results
+
+    def get_document(self, key: str, selected_fields: list[str] | None = None, **kwargs) -> dict:
+        self.latency.sleep(self.config.search_latency_ms / 3)
+        doc = self.index.documents.get(key)
+        if doc is None:
+            from azure.core.exceptions import ResourceNotFoundError
+
+            raise ResourceNotFoundError(f"Document '{key}' not found")
+        return self._project(doc, selected_fields)
+
+    def get_document_count(self, **kwargs) -> int:
+        return len(self.index.documents)
+
+    # --- queries ---
+
+    @staticmethod
+    def _project(doc: dict, select: list[str] | None) -> dict:
+        if not select:
+            return dict(doc)
+        return {field: doc.get(field) for field in select}
+
+    def search(
+        self,
+        search_text: str | None = None,
+        *,
+        vector_queries: list | None = None,
+        filter: str | None = None,
+        select: list[str] | None = None,
+        top: int | None = None,
+        skip: int | None = None,
+        facets: list[str] | None = None,
+        include_total_count: bool | None = None,
+        vector_filter_mode: str | None = None,
+        **kwargs,
+    ) -> FakeSearchResults:
+        """
+        Score documents in memory.
+
+        Scores are kept on a 0..1 scale (keyword scores normalised to the
+        best match, vector scores as ``1 / (2 - cosine)``) so that the
+        pipeline's default score threshold behaves sensibly. With
+        ``vector_filter_mode="postFilter"`` the k nearest neighbors are
+        taken from the whole index and filtered afterwards, so selective
+        filters can leave fewer than k vector hits.
+        """
+        self.latency.sleep(self.config.search_latency_ms)
+        self.search_calls += 1
+
+        index = self.index
+        with index.lock:
+            documents = list(index.documents.values())
+        candidates = [d for d in documents if matches_filter(d, filter)]
+        vector_candidates = documents if vector_filter_mode == "postFilter" else candidates
+        allowed = {d["id"] for d in candidates}
+
+        keyword_scores: dict[str, float] = {}
+        if search_text and search_text.strip() != "*":
+            terms = set(_tokenize(search_text))
+            for doc in candidates:
+                doc_tokens = _tokenize(str(doc.get("content", "")))
+                if doc_tokens:
+                    hits = sum(1 for t in doc_tokens if t in terms)
+                    if hits:
+                        keyword_scores[doc["id"]] = hits / math.sqrt(len(doc_tokens))
+            best = max(keyword_scores.values(), default=0.0) or 1.0
+            keyword_scores = {k: v / best for k, v in keyword_scores.items()}
+
+        vector_scores: dict[str, float] = {}
+        weights = []
+        for query in vector_queries or []:
+            field = query.fields
+            weight = getattr(query, "weight", None) or 1.0
+            weights.append(weight)
+            k = query.k_nearest_neighbors or top or 50
+            scored = []
+            for doc in vector_candidates:
+                vector = doc.get(field)
+                if vector:
+                    cosine = sum(a * b for a, b in zip(query.vector, vector))
+                    scored.append((1.0 / (2.0 - cosine), doc["id"]))
+            scored.sort(reverse=True)
+            for score, key in scored[:k]:
+                if key in allowed:
+                    vector_scores[key] = max(vector_scores.get(key, 0.0), score * weight)
+
+        if vector_queries and keyword_scores:
+            total_weight = 1.0 + max(weights)
+            scores = {
+                k: (keyword_scores.get(k, 0.0) + vector_scores.get(k, 0.0)) / total_weight
+                for k in set(keyword_scores) | set(vector_scores)
+            }
+        elif vector_queries:
+            scores = vector_scores
+        elif search_text and search_text.strip() != "*":
+            scores = keyword_scores
+        else:
+            scores = {d["id"]: 1.0 for d in candidates}
+
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        start = skip or 0
+        end = start + top if top is not None else None
+        page = ranked[start:end]
+
+        items = []
+        for key, score in page:
+            item = self._project(index.documents[key], select)
+            item["@search.score"] = score
+            items.append(item)
+
+        facet_results = None
+        if facets:
+            facet_results = {}
+            for spec in facets:
+                field, _, options = spec.partition(",")
+                limit = 10
+                if options.startswith("count:"):
+                    limit = int(options.split(":", 1)[1])
+                counts: dict = {}
+                for doc in candidates:
+                    value = doc.get(field)
+                    if value is not None:
+                        counts[value] = counts.get(value, 0) + 1
+                ordered = sorted(counts.items(), key=lambda kv: -kv[1])[:limit]
+                facet_results[field] = [{"value": v, "count": c} for v, c in ordered]
+
+        return FakeSearchResults(items, facet_results, len(scores))
+
+
+class FakeSearchIndexClient:
+    """Stand-in for ``azure.search.documents.indexes.SearchIndexClient``."""
+
+    def __init__(self, owner: "FakeAzure"):
+        self._owner = owner
+
+    def create_or_update_index(self, index, **kwargs):
+        self._owner.get_index(index.name).schema = index
+        return index
+
+    def create_index(self, index, **kwargs):
+        return self.create_or_update_index(index)
+
+    def get_index(self, name: str, **kwargs):
+        from azure.core.exceptions import ResourceNotFoundError
+
+        index = self._owner.indexes.get(name)
+        if index is None or index.schema is None:
+            raise ResourceNotFoundError(f"Index '{name}' not found")
+        return index.schema
+
+    def delete_index(self, index, **kwargs) -> None:
+        from azure.core.exceptions import HttpResponseError
+
+        name = index if isinstance(index, str) else index.name
+        if name in self._owner.aliases.values():
+            raise HttpResponseError(f"Index '{name}' is referenced by an alias")
+        self._owner.indexes.pop(name, None)
+
+    def list_index_names(self, **kwargs) -> list[str]:
+        return [name for name, index in self._owner.indexes.items() if index.schema is not None]
+
+    # --- aliases (one index per alias, resolved on every request) ---
+
+    def create_or_update_alias(self, alias, **kwargs):
+        from azure.core.exceptions import HttpResponseError
+
+        existing = self._owner.indexes.get(alias.name)
+        if existing is not None and existing.schema is not None:
+            raise HttpResponseError(f"'{alias.name}' is already used by an index")
+        self._owner.aliases[alias.name] = alias.indexes[0]
+        return alias
+
+    def get_alias(self, name: str, **kwargs):
+        from azure.core.exceptions import ResourceNotFoundError
+        from azure.search.documents.indexes.models import SearchAlias
+
+        if name not in self._owner.aliases:
+            raise ResourceNotFoundError(f"Alias '{name}' not found")
+        return SearchAlias(name=name, indexes=[self._owner.aliases[name]])
+
+    def delete_alias(self, alias, **kwargs) -> None:
+        self._owner.aliases.pop(alias if isinstance(alias, str) else alias.name, None)
+
+    def get_index_statistics(self, index_name: str, **kwargs):
+        from azure.search.documents.indexes.models import GetIndexStatisticsResult
+
+        index = self._owner.get_index(index_name)
+        size = sum(len(str(d)) for d in index.documents.values())
+        return GetIndexStatisticsResult({
+            "documentCount": len(index.documents),
+            "storageSize": size,
+            "vectorIndexSize": sum(
+                len(d.get("content_vector") or []) * 4 for d in index.documents.values()
+            ),
+        })
+
+
+# === Blob Storage ===
+
+
+class _FakeDownloader:
+    def __init__(self, data: bytes, chunk_size: int = 4 * 1024 * 1024):
+        self._data = data
+        self._chunk_size = chunk_size
+        self.size = len(data)
+
+    def readall(self) -> bytes:
+        return self._data
+
+    def chunks(self):
+        for i in range(0, len(self._data), self._chunk_size):
+            yield self._data[i : i + self._chunk_size]
+
+
+class _FakeBlobPages:
+    """Page iterator of ``list_blobs(...).by_page()``; tokens are list offsets."""
+
+    def __init__(self, items: list, per_page: int, continuation_token: str | None):
+        self._items = items
+        self._per_page = per_page
+        self.continuation_token = continuation_token
+
+    def __iter__(self):
+        start = int(self.continuation_token or 0)
+        while start < len(self._items):
+            end = start + self._per_page
+            self.continuation_token = str(end) if end < len(self._items) else None
+            yield iter(self._items[start:end])
+            start = end
+
+
+class _FakeBlobListing(list):
+    """Result of ``list_blobs``: iterable, or paged with continuation tokens."""
+
+    def __init__(self, items: list, per_page: int):
+        super().__init__(items)
+        self._per_page = per_page
+
+    def by_page(self, continuation_token: str | None = None) -> _FakeBlobPages:
+        return _FakeBlobPages(list(self), self._per_page, continuation_token)
+
+
+class FakeBlobClient:
+    def __init__(self, container: "FakeContainerClient", name: str):
+        self._container = container
+        self.blob_name = name
+
+    def download_blob(self, **kwargs) -> _FakeDownloader:
+        self._container.latency.sleep(self._container.config.blob_latency_ms)
+        return _FakeDownloader(self._container.blobs[self.blob_name])
+
+
+class FakeContainerClient:
+    """Stand-in for ``azure.storage.blob.ContainerClient``."""
+
+    def __init__(self, name: str, config: FakeConfig):
+        self.container_name = name
+        self.config = config
+        self.latency = _Latency(config)
+        self.blobs: dict[str, bytes] = {}
+
+    def upload_blob(self, name: str, data: bytes | str, overwrite: bool = False, **kwargs):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.blobs[name] = data
+
+    def list_blobs(self, name_starts_with: str | None = None, results_per_page: int | None = None, **kwargs):
+        return _FakeBlobListing(
+            [
+                SimpleNamespace(name=name, size=len(data))
+                for name, data in sorted(self.blobs.items())
+                if name.startswith(name_starts_with or "")
+            ],
+            results_per_page or self.config.blob_page_size,
+        )
+
+    def get_blob_client(self, blob: str) -> FakeBlobClient:
+        return FakeBlobClient(self, blob)
+
+
+class FakeBlobServiceClient:
+    """Stand-in for ``azure.storage.blob.BlobServiceClient``."""
+
+    def __init__(self, owner: "FakeAzure"):
+        self._owner = owner
+
+    def get_container_client(self, container: str) -> FakeContainerClient:
+        return self._owner.get_container(container)
+
+
+# === Installation ===
+
+
+class FakeAzure:
+    """
+    Owns all fake services and patches them into the ``src`` modules.
+
+    Indexes and containers are shared by every client created while
+    installed, just like the real services.
+    """
+
+    def __init__(self, config: FakeConfig | None = None):
+        self.config = config or FakeConfig()
+        self.openai = FakeOpenAI(self.config)
+        self.indexes: dict[str, FakeIndex] = {}
+        self.aliases: dict[str, str] = {}
+        self.containers: dict[str, FakeContainerClient] = {}
+        self._lock = threading.Lock()
+
+    def get_index(self, name: str) -> FakeIndex:
+        with self._lock:
+            if name not in self.indexes:
+                self.indexes[name] = FakeIndex(name)
+            return self.indexes[name]
+
+    def get_container(self, name: str) -> FakeContainerClient:
+        with self._lock:
+            if name not in self.containers:
+                self.containers[name] = FakeContainerClient(name, self.config)
+            return self.containers[name]
+
+    def resolve(self, name: str) -> FakeIndex:
+        """Index behind a name (aliases are followed)."""
+        return self.get_index(self.aliases.get(name, name))
+
+    def search_client(self, endpoint=None, index_name: str = "", credential=None, **kwargs):
+        return FakeSearchClient(None, self.config, resolve=lambda: self.resolve(index_name))
+
+    def openai_client(self, *args, **kwargs) -> FakeOpenAI:
+        return self.openai
+
+    @contextmanager
+    def install(self):
+        """Patch Azure/OpenAI client constructors used by ``src.clients``."""
+        from src.clients import reset_clients
+        from src.embedding import get_embedding_service
+
+        targets = {
+            "openai.AzureOpenAI": self.openai_client,
+            "azure.search.documents.SearchClient": self.search_client,
+            "azure.search.documents.indexes.SearchIndexClient": lambda *a, **k: FakeSearchIndexClient(self),
+            "azure.storage.blob.BlobServiceClient": lambda *a, **k: FakeBlobServiceClient(self),
+        }
+        with ExitStack() as stack:
+            for target, replacement in targets.items():
+                stack.enter_context(patch(target, replacement))
+            # Shared clients are cached per process; rebuild them against the fakes
+            reset_clients()
+            get_embedding_service.cache_clear()
+            stack.callback(get_embedding_service.cache_clear)
+            stack.callback(reset_clients)
+            yield self
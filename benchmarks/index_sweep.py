@@ -0,0 +1,354 @@
+"""
+Offline recall-vs-latency sweep for vector index profiles.
+
+Runs a local, pure-Python HNSW backend that mimics the service's vector
+search pipeline (quantized graph traversal, oversampling, rescoring with
+full-precision originals) over a synthetic clustered corpus or exported
+embeddings, and reports per configuration:
+
+- recall@k against exact float32 cosine search
+- distance evaluations per query (the latency proxy that carries over
+  to the service; Python wall time is reported but is not representative)
+- vector storage per document (``IndexProfile.vector_bytes``)
+
+The cheapest configuration meeting ``--min-recall`` is printed as
+``INDEX_PROFILE`` / ``INDEX_PROFILE_OVERRIDES`` settings, so parameters
+can be chosen before paying for an index rebuild.
+
+Usage:
+    python -m benchmarks.index_sweep
+    python -m benchmarks.index_sweep --docs 5000 --dims 128 --m 4,8 --ef-search 100,200,500
+    python -m benchmarks.index_sweep --vectors exported.jsonl --min-recall 0.98 --output sweep.json
+"""
+import argparse
+import heapq
+import json
+import math
+import operator
+import random
+import struct
+import sys
+import time
+from dataclasses import asdict, replace
+
+from src.index_profile import PROFILES, IndexProfile
+
+from .common import run_metadata, write_results
+
+
+def _dot(a: list[float], b: list[float]) -> float:
+    return sum(map(operator.mul, a, b))
+
+
+def _normalize(vector: list[float]) -> list[float]:
+    norm = math.sqrt(_dot(vector, vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def _to_half(vector: list[float]) -> list[float]:
+    """Round-trip through float16."""
+    return list(struct.unpack(f"{len(vector)}e", struct.pack(f"{len(vector)}e", *vector)))
+
+
+def synthetic_corpus(docs: int, queries: int, dims: int, clusters: int, seed: int):
+    """Clustered unit vectors plus queries drawn near corpus points."""
+    rng = random.Random(seed)
+    centers = [[rng.gauss(0, 1) for _ in range(dims)] for _ in range(clusters)]
+    corpus = [
+        _normalize([c + rng.gauss(0, 0.6) for c in rng.choice(centers)]) for _ in range(docs)
+    ]
+    query_vectors = [
+        _normalize([v + rng.gauss(0, 0.3) for v in rng.choice(corpus)]) for _ in range(queries)
+    ]
+    return corpus, query_vectors
+
+
+def load_vectors(path: str, queries: int, seed: int):
+    """Exported embeddings (JSONL with a ``vector`` field); queries sampled from them."""
+    with open(path) as f:
+        vectors = [_normalize(json.loads(line)["vector"]) for line in f if line.strip()]
+    rng = random.Random(seed)
+    return vectors, rng.sample(vectors, min(queries, len(vectors)))
+
+
+class _Encoder:
+    """Vector representation used for graph traversal under a profile."""
+
+    def __init__(self, profile: IndexProfile, corpus: list[list[float]]):
+        self.compression = profile.compression
+        if self.compression == "scalar":
+            dims = len(corpus[0])
+            self.low = [min(v[i] for v in corpus) for i in range(dims)]
+            high = [max(v[i] for v in corpus) for i in range(dims)]
+            self.scale = [(h - lo) / 255 or 1.0 for h, lo in zip(high, self.low)]
+
+    def encode(self, vector: list[float]):
+        match self.compression:
+            case "binary":
+                return sum(1 << i for i, v in enumerate(vector) if v > 0)
+            case "scalar":
+                # int8 codes, dequantized for scoring
+                return [
+                    lo + round((v - lo) / s) * s for v, lo, s in zip(vector, self.low, self.scale)
+                ]
+        return vector
+
+    def similarity(self, a, b) -> float:
+        if self.compression == "binary":
+            return -((a ^ b).bit_count())
+        return _dot(a, b)
+
+
+class LocalHNSW:
+    """Minimal HNSW graph (insert + layered greedy/beam search)."""
+
+    def __init__(self, similarity, m: int, ef_construction: int, seed: int = 42):
+        self.similarity = similarity
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construction = ef_construction
+        self.level_scale = 1 / math.log(m)
+        self.items: list = []
+        self.layers: list[dict[int, list[int]]] = []
+        self.entry: int | None = None
+        self.evaluations = 0
+        self._random = random.Random(seed)
+
+    def _sim(self, a, node: int) -> float:
+        self.evaluations += 1
+        return self.similarity(a, self.items[node])
+
+    def _search_layer(self, query, entries: list[int], ef: int, layer: int) -> list[tuple[float, int]]:
+        visited = set(entries)
+        scored = [(self._sim(query, e), e) for e in entries]
+        candidates = [(-s, n) for s, n in scored]
+        heapq.heapify(candidates)
+        best = list(scored)
+        heapq.heapify(best)
+        while best and len(best) > ef:
+            heapq.heappop(best)
+        links = self.layers[layer]
+        while candidates:
+            negative, node = heapq.heappop(candidates)
+            if len(best) >= ef and -negative < best[0][0]:
+                break
+            for neighbor in links.get(node, ()):
+                if neighbor in visited:
+                    continue
+                visited.add(neighbor)
+                score = self._sim(query, neighbor)
+                if len(best) < ef or score > best[0][0]:
+                    heapq.heappush(candidates, (-score, neighbor))
+                    heapq.heappush(best, (score, neighbor))
+                    if len(best) > ef:
+                        heapq.heappop(best)
+        return sorted(best, reverse=True)
+
+    def _select(self, scored: list[tuple[float, int]], limit: int) -> list[int]:
+        """Neighbor selection heuristic: skip candidates closer to a kept neighbor
+        than to the base node, so links also bridge between clusters."""
+        selected: list[int] = []
+        for score, node in scored:
+            item = self.items[node]
+            if all(self.similarity(item, self.items[kept]) < score for kept in selected):
+                selected.append(node)
+                if len(selected) == limit:
+                    break
+        return selected
+
+    def add(self, item) -> None:
+        node = len(self.items)
+        self.items.append(item)
+        level = int(-math.log(1.0 - self._random.random()) * self.level_scale)
+        top = len(self.layers) - 1
+        while len(self.layers) <= level:
+            self.layers.append({})
+        for layer in range(level + 1):
+            self.layers[layer][node] = []
+        if self.entry is None:
+            self.entry = node
+            return
+
+        entries = [self.entry]
+        for layer in range(top, level, -1):
+            entries = [self._search_layer(item, entries, 1, layer)[0][1]]
+        for layer in range(min(level, top), -1, -1):
+            found = self._search_layer(item, entries, self.ef_construction, layer)
+            limit = self.m0 if layer == 0 else self.m
+            neighbors = self._select(found, self.m)
+            self.layers[layer][node] = neighbors
+            for neighbor in neighbors:
+                links = self.layers[layer][neighbor]
+                links.append(node)
+                if len(links) > limit:
+                    anchor = self.items[neighbor]
+                    scored = sorted(((self.similarity(anchor, self.items[n]), n) for n in links), reverse=True)
+                    links[:] = self._select(scored, limit)
+            entries = [n for _, n in found]
+        if level > top:
+            self.entry = node
+
+    def search(self, query, k: int, ef: int) -> list[int]:
+        if self.entry is None:
+            return []
+        entries = [self.entry]
+        for layer in range(len(self.layers) - 1, 0, -1):
+            entries = [self._search_layer(query, entries, 1, layer)[0][1]]
+        return [n for _, n in self._search_layer(query, entries, max(ef, k), 0)[:k]]
+
+
+class LocalVectorIndex:
+    """Local stand-in for the service's vector index under one profile."""
+
+    def __init__(self, profile: IndexProfile, corpus: list[list[float]], seed: int = 42):
+        self.profile = profile
+        self.encoder = _Encoder(profile, corpus)
+        # Full-precision originals as stored by the profile's vector type
+        self.originals = [_to_half(v) for v in corpus] if profile.vector_type == "half" else corpus
+        start = time.perf_counter()
+        self.graph = LocalHNSW(self.encoder.similarity, profile.hnsw_m, profile.ef_construction, seed)
+        for vector in self.originals:
+            self.graph.add(self.encoder.encode(vector))
+        self.build_seconds = time.perf_counter() - start
+
+    def search(self, query: list[float], k: int, ef_search: int, oversampling: float) -> list[int]:
+        """Approximate top-k (graph search, then rescoring when compressed)."""
+        rescore = self.profile.compression != "none" and self.profile.rescore
+        fetch = math.ceil(k * oversampling) if rescore else k
+        candidates = self.graph.search(self.encoder.encode(query), fetch, ef_search)
+        if not rescore:
+            return candidates[:k]
+        return sorted(candidates, key=lambda n: _dot(query, self.originals[n]), reverse=True)[:k]
+
+
+def exact_top_k(corpus: list[list[float]], query: list[float], k: int) -> list[int]:
+    return heapq.nlargest(k, range(len(corpus)), key=lambda n: _dot(query, corpus[n]))
+
+
+def sweep(
+    corpus: list[list[float]],
+    queries: list[list[float]],
+    profiles: list[IndexProfile],
+    m_values: list[int],
+    ef_search_values: list[int],
+    oversampling_values: list[float],
+    k: int = 10,
+    seed: int = 42,
+) -> list[dict]:
+    """
+    Measure recall and cost for every profile/parameter combination.
+
+    Returns:
+        list[dict]: One row per configuration
+    """
+    truth = [set(exact_top_k(corpus, q, k)) for q in queries]
+    dims = len(corpus[0])
+    rows = []
+    for base in profiles:
+        for m in m_values:
+            index = LocalVectorIndex(replace(base, hnsw_m=m), corpus, seed)
+            rescored = base.compression != "none" and base.rescore
+            for ef_search in ef_search_values:
+                for oversampling in oversampling_values if rescored else [base.oversampling]:
+                    profile = replace(index.profile, ef_search=ef_search, oversampling=oversampling)
+                    index.graph.evaluations = 0
+                    hits = 0
+                    start = time.perf_counter()
+                    for query, expected in zip(queries, truth):
+                        hits += len(expected.intersection(index.search(query, k, ef_search, oversampling)))
+                    elapsed = time.perf_counter() - start
+                    rows.append({
+                        "profile": asdict(profile),
+                        "recall": round(hits / (k * len(queries)), 4),
+                        "evaluations_per_query": round(index.graph.evaluations / len(queries), 1),
+                        "query_ms": round(elapsed / len(queries) * 1000, 3),
+                        "bytes_per_vector": sum(profile.vector_bytes(dims).values()),
+                        "build_s": round(index.build_seconds, 2),
+                    })
+    return rows
+
+
+def recommend(rows: list[dict], min_recall: float) -> dict | None:
+    """Cheapest configuration (evaluations, then storage) meeting the recall target."""
+    eligible = [r for r in rows if r["recall"] >= min_recall]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda r: (r["evaluations_per_query"], r["bytes_per_vector"]))
+
+
+def profile_settings(profile: dict) -> dict:
+    """INDEX_PROFILE / INDEX_PROFILE_OVERRIDES reproducing a swept profile."""
+    base = asdict(PROFILES[profile["name"]])
+    overrides = ",".join(
+        f"{key}={str(value).lower() if isinstance(value, bool) else value}"
+        for key, value in profile.items()
+        if key != "name" and value != base[key]
+    )
+    return {"INDEX_PROFILE": profile["name"], "INDEX_PROFILE_OVERRIDES": overrides}
+
+
+def _ints(spec: str) -> list[int]:
+    return [int(v) for v in spec.split(",") if v]
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Recall vs latency sweep for index profiles")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="Profile presets to sweep")
+    parser.add_argument("--m", default="4,8", help="HNSW m values")
+    parser.add_argument("--ef-search", default="100,200,500", help="HNSW efSearch values")
+    parser.add_argument("--oversampling", default="2,4,10", help="Rescoring oversampling values")
+    parser.add_argument("--docs", type=int, default=2000, help="Synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--dims", type=int, default=64, help="Synthetic vector dimensions")
+    parser.add_argument("--clusters", type=int, default=40, help="Synthetic topic clusters")
+    parser.add_argument("--vectors", help="JSONL of exported embeddings instead of synthetic data")
+    parser.add_argument("--k", type=int, default=10, help="Results per query (recall@k)")
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Result JSON path")
+    args = parser.parse_args(argv)
+
+    if args.vectors:
+        corpus, queries = load_vectors(args.vectors, args.queries, args.seed)
+    else:
+        corpus, queries = synthetic_corpus(args.docs, args.queries, args.dims, args.clusters, args.seed)
+
+    rows = sweep(
+        corpus,
+        queries,
+        [PROFILES[name] for name in args.profiles.split(",")],
+        _ints(args.m),
+        _ints(args.ef_search),
+        [float(v) for v in args.oversampling.split(",")],
+        k=args.k,
+        seed=args.seed,
+    )
+
+    print(f"{'profile':<8} {'m':>2} {'efSearch':>8} {'oversample':>10} {'recall':>7} "
+          f"{'evals/q':>8} {'ms/q':>7} {'bytes/vec':>9}")
+    for row in rows:
+        p = row["profile"]
+        print(f"{p['name']:<8} {p['hnsw_m']:>2} {p['ef_search']:>8} {p['oversampling']:>10} "
+              f"{row['recall']:>7.3f} {row['evaluations_per_query']:>8.0f} {row['query_ms']:>7.2f} "
+              f"{row['bytes_per_vector']:>9.0f}")
+
+    best = recommend(rows, args.min_recall)
+    if best is None:
+        print(f"\nNo configuration reached recall {args.min_recall}")
+    else:
+        print(f"\nRecommended (recall {best['recall']}, {best['evaluations_per_query']:.0f} evals/query):")
+        for key, value in profile_settings(best["profile"]).items():
+            print(f"  {key}={value}")
+
+    if args.output:
+        write_results(args.output, {
+            "meta": run_metadata(vars(args)),
+            "rows": rows,
+            "recommended": best,
+        })
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""
+Open-loop load generator for the FastAPI service.
+
+Drives ``/query`` and ``/query/stream`` at fixed Poisson arrival rates
+(arrivals do not wait for earlier responses, so queueing shows up as
+latency instead of silently lowering the offered load) and reports
+throughput, latency percentiles, TTFT and error rates against SLOs.
+
+Targets:
+- in-process (default): ``src.api:app`` served by uvicorn on a local
+  port with the local fakes installed
+- over HTTP: any running deployment via ``--url``
+
+Usage:
+    python -m benchmarks.loadtest --rates 2,5,10 --duration 30
+    python -m benchmarks.loadtest --url http://localhost:8000 --rates 20 --stream-ratio 0.8
+    python -m benchmarks.loadtest --rates 5,10,20,40 --slo-p99-ms 3000 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+import httpx
+
+from .common import percentile, run_metadata, summarize_latencies, write_results
+from .fakes import FakeAzure, FakeConfig
+from .run import synthetic_corpus, synthetic_questions
+
+_SESSION_PATTERN = re.compile(r"session_id['\"]?\s*:\s*['\"]([^'\"]+)['\"]")
+
+
+@dataclass
+class LoadProfile:
+    """Traffic shape for one load stage."""
+
+    rate: float
+    duration: float = 30.0
+    stream_ratio: float = 0.5
+    session_reuse: float = 0.3
+    top_k: int = 5
+    search_mode: str = "auto"
+    timeout: float = 60.0
+    seed: int = 42
+
+
+@dataclass
+class SLO:
+    """Latency/error objectives; None disables a check."""
+
+    p99_ms: float | None = None
+    ttft_p99_ms: float | None = None
+    error_rate: float | None = 0.01
+
+
+@dataclass
+class RequestRecord:
+    """Outcome of a single request."""
+
+    kind: str
+    latency: float
+    ttft: float | None = None
+    status: int | None = None
+    error: str | None = None
+
+
+@dataclass
+class StageResult:
+    """Aggregated outcome of one load stage."""
+
+    profile: LoadProfile
+    wall_seconds: float
+    records: list[RequestRecord] = field(default_factory=list)
+
+    def summary(self, slo: SLO) -> dict:
+        ok = [r for r in self.records if r.error is None]
+        errors = [r for r in self.records if r.error is not None]
+        latencies = [r.latency for r in ok]
+        ttfts = [r.ttft for r in ok if r.ttft is not None]
+        error_rate = len(errors) / len(self.records) if self.records else 0.0
+
+        status_counts: dict[str, int] = {}
+        for r in self.records:
+            key = str(r.status) if r.status is not None else (r.error or "error").split(":")[0]
+            status_counts[key] = status_counts.get(key, 0) + 1
+
+        violations = []
+        if slo.p99_ms is not None and latencies and percentile(latencies, 99) * 1000 > slo.p99_ms:
+            violations.append("p99_latency")
+        if slo.ttft_p99_ms is not None and ttfts and percentile(ttfts, 99) * 1000 > slo.ttft_p99_ms:
+            violations.append("p99_ttft")
+        if slo.error_rate is not None and error_rate > slo.error_rate:
+            violations.append("error_rate")
+
+        return {
+            "offered_rps": self.profile.rate,
+            "requests": len(self.records),
+            "throughput_rps": round(len(ok) / self.wall_seconds, 3) if self.wall_seconds else 0.0,
+            "error_rate": round(error_rate, 4),
+            "status_counts": status_counts,
+            "latency": summarize_latencies(latencies),
+            "latency_query": summarize_latencies([r.latency for r in ok if r.kind == "query"]),
+            "latency_stream": summarize_latencies([r.latency for r in ok if r.kind == "stream"]),
+            "ttft": summarize_latencies(ttfts),
+            "slo_violations": violations,
+            "slo_met": not violations,
+        }
+
+
+class LoadGenerator:
+    """Issues open-loop traffic against a base URL."""
+
+    def __init__(self, base_url: str, questions: list[str]):
+        self.base_url = base_url.rstrip("/")
+        self.questions = questions
+        self._sessions: list[str] = []
+
+    def _pick_session(self, rng: random.Random, reuse: float) -> str | None:
+        if self._sessions and rng.random() < reuse:
+            return rng.choice(self._sessions)
+        return None
+
+    def _remember_session(self, session_id: str | None) -> None:
+        if session_id and session_id not in self._sessions:
+            self._sessions.append(session_id)
+            # Keep the pool bounded so reuse targets recently active sessions
+            if len(self._sessions) > 256:
+                self._sessions.pop(0)
+
+    async def _query(self, client: httpx.AsyncClient, payload: dict) -> RequestRecord:
+        start = time.perf_counter()
+        response = await client.post(f"{self.base_url}/query", json=payload)
+        latency = time.perf_counter() - start
+        if response.status_code != 200:
+            return RequestRecord("query", latency, status=response.status_code,
+                                 error=f"http_{response.status_code}")
+        self._remember_session(response.json().get("session_id"))
+        return RequestRecord("query", latency, status=200)
+
+    async def _stream(self, client: httpx.AsyncClient, payload: dict) -> RequestRecord:
+        start = time.perf_counter()
+        ttft = None
+        error = None
+        async with client.stream("POST", f"{self.base_url}/query/stream", json=payload) as response:
+            if response.status_code != 200:
+                await response.aread()
+                return RequestRecord("stream", time.perf_counter() - start,
+                                     status=response.status_code,
+                                     error=f"http_{response.status_code}")
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                data = line[6:]
+                if data.startswith("[ERROR]"):
+                    error = "stream_error"
+                elif data == "[DONE]":
+                    continue
+                elif (match := _SESSION_PATTERN.search(data)) is not None:
+                    self._remember_session(match.group(1))
+                elif ttft is None:
+                    ttft = time.perf_counter() - start
+        return RequestRecord("stream", time.perf_counter() - start, ttft=ttft,
+                             status=200, error=error)
+
+    async def _one(self, client, rng: random.Random, profile: LoadProfile) -> RequestRecord:
+        payload = {
+            "question": rng.choice(self.questions),
+            "top_k": profile.top_k,
+            "search_mode": profile.search_mode,
+        }
+        session_id = self._pick_session(rng, profile.session_reuse)
+        if session_id:
+            payload["session_id"] = session_id
+        streaming = rng.random() < profile.stream_ratio
+        kind = "stream" if streaming else "query"
+        start = time.perf_counter()
+        try:
+            if streaming:
+                return await self._stream(client, payload)
+            return await self._query(client, payload)
+        except httpx.HTTPError as e:
+            return RequestRecord(kind, time.perf_counter() - start,
+                                 error=f"{type(e).__name__}: {e}")
+
+    async def run_stage(self, profile: LoadProfile) -> StageResult:
+        """Run one open-loop stage and collect per-request records."""
+        rng = random.Random(profile.seed)
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+        async with httpx.AsyncClient(timeout=profile.timeout, limits=limits) as client:
+            tasks = []
+            start = time.perf_counter()
+            next_arrival = 0.0
+            while next_arrival < profile.duration:
+                delay = start + next_arrival - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(self._one(client, rng, profile)))
+                next_arrival += rng.expovariate(profile.rate)
+            records = await asyncio.gather(*tasks)
+            wall = time.perf_counter() - start
+        return StageResult(profile, wall, list(records))
+
+
+@contextmanager
+def serve_in_process(config: FakeConfig, num_documents: int = 100):
+    """
+    Serve ``src.api:app`` with fakes installed on a free local port.
+
+    Yields:
+        tuple: (base_url, FakeAzure)
+    """
+    import uvicorn
+
+    fake = FakeAzure(config)
+    with fake.install():
+        from src.api import app
+        from src.indexer import DocumentIngestionPipeline
+
+        # Seed the fake index without simulated latency
+        scale = config.latency_scale
+        config.latency_scale = 0.0
+        DocumentIngestionPipeline().ingest_documents(
+            synthetic_corpus(num_documents, sentences_per_document=40, seed=config.seed)
+        )
+        config.latency_scale = scale
+
+        server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="on")
+        )
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError("In-process server failed to start")
+            time.sleep(0.05)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        try:
+            yield f"http://127.0.0.1:{port}", fake
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+
+def run_load_test(
+    base_url: str,
+    profiles: list[LoadProfile],
+    slo: SLO,
+) -> list[dict]:
+    """Run stages in order and return their summaries."""
+    generator = LoadGenerator(base_url, synthetic_questions(200, seed=profiles[0].seed))
+    summaries = []
+    for profile in profiles:
+        result = asyncio.run(generator.run_stage(profile))
+        summary = result.summary(slo)
+        summaries.append(summary)
+        print(
+            f"rate={profile.rate:>6.1f} rps  thr={summary['throughput_rps']:>6.2f} rps  "
+            f"p50={summary['latency'].get('p50_ms', 0):>8.1f}ms  "
+            f"p99={summary['latency'].get('p99_ms', 0):>8.1f}ms  "
+            f"ttft_p99={summary['ttft'].get('p99_ms', 0):>8.1f}ms  "
+            f"err={summary['error_rate']:.2%}  slo={'ok' if summary['slo_met'] else 'FAIL'}"
+        )
+    return summaries
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point. Exits non-zero when any stage violates the SLO."""
+    parser = argparse.ArgumentParser(description="Load test the RAG API")
+    parser.add_argument("--url", help="Target base URL (default: in-process app with fakes)")
+    parser.add_argument("--rates", default="2,5,10", help="Comma-separated arrival rates (rps)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per stage")
+    parser.add_argument("--stream-ratio", type=float, default=0.5)
+    parser.add_argument("--session-reuse", type=float, default=0.3)
+    parser.add_argument("--search-mode", default="auto")
+    parser.add_argument("--slo-p99-ms", type=float)
+    parser.add_argument("--slo-ttft-p99-ms", type=float)
+    parser.add_argument("--slo-error-rate", type=float, default=0.01)
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Fake service latency multiplier (in-process only)")
+    parser.add_argument("--rate-limit-probability", type=float, default=0.0,
+                        help="Injected 429 probability (in-process only)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON report to this path")
+    args = parser.parse_args(argv)
+
+    profiles = [
+        LoadProfile(
+            rate=float(rate),
+            duration=args.duration,
+            stream_ratio=args.stream_ratio,
+            session_reuse=args.session_reuse,
+            search_mode=args.search_mode,
+            seed=args.seed,
+        )
+        for rate in args.rates.split(",")
+    ]
+    slo = SLO(
+        p99_ms=args.slo_p99_ms,
+        ttft_p99_ms=args.slo_ttft_p99_ms,
+        error_rate=args.slo_error_rate,
+    )
+
+    if args.url:
+        target = args.url
+        summaries = run_load_test(args.url, profiles, slo)
+    else:
+        config = FakeConfig(
+            latency_scale=args.latency_scale,
+            rate_limit_probability=args.rate_limit_probability,
+            seed=args.seed,
+        )
+        with serve_in_process(config) as (base_url, _):
+            target = "in-process"
+            summaries = run_load_test(base_url, profiles, slo)
+
+    sustainable = [s["offered_rps"] for s in summaries if s["slo_met"]]
+    report = {
+        "meta": run_metadata({"target": target, "slo": asdict(slo)}),
+        "stages": summaries,
+        "max_sustainable_rps": max(sustainable) if sustainable else None,
+    }
+    print(f"max sustainable rate within SLO: {report['max_sustainable_rps']}")
+    if args.output:
+        write_results(args.output, report)
+    else:
+        print(json.dumps(report["stages"], indent=2))
+
+    return 0 if all(s["slo_met"] for s in summaries) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
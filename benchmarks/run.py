@@ -0,0 +1,235 @@
+"""
+Offline benchmark suite for the RAG pipeline.
+
+Runs chunking, embedding, ingestion and query benchmarks against the
+local fakes and writes a JSON result file that can be compared across
+commits.
+
+Usage:
+    python -m benchmarks.run --output bench_output.json
+    python -m benchmarks.run --quick --compare bench_baseline.json
+    python -m benchmarks.run --latency-scale 0   # CPU-only, no simulated I/O
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from dataclasses import asdict
+
+from .common import compare_results, run_metadata, summarize_latencies, write_results
+from .fakes import FakeAzure, FakeConfig
+
+_WORDS = (
+    "azure search index vector hybrid query embedding chunk token context "
+    "retrieval semantic ranking latency throughput pipeline document storage "
+    "container identity network cache model deployment quota region scale"
+).split()
+_JA_PHRASES = [
+    "セマンティック検索を有効化する",
+    "インデックスのスキーマを更新する",
+    "ベクトル検索の精度を向上させる",
+    "マネージドIDで認証する",
+]
+_CATEGORIES = ["azure", "openai", "search", "security"]
+
+
+def synthetic_corpus(
+    num_documents: int,
+    sentences_per_document: int,
+    seed: int = 42,
+) -> list[dict]:
+    """Generate a deterministic mixed English/Japanese corpus."""
+    rng = random.Random(seed)
+    documents = []
+    for i in range(num_documents):
+        sentences = []
+        for _ in range(sentences_per_document):
+            if rng.random() < 0.2:
+                sentences.append(rng.choice(_JA_PHRASES) + "。")
+            else:
+                words = rng.choices(_WORDS, k=rng.randint(8, 20))
+                sentences.append(" ".join(words).capitalize() + ".")
+        documents.append({
+            "id": f"bench-{i:05d}",
+            "content": " ".join(sentences),
+            "metadata": {
+                "source": f"bench/doc-{i:05d}.md",
+                "category": _CATEGORIES[i % len(_CATEGORIES)],
+                "title": f"Benchmark document {i}",
+            },
+        })
+    return documents
+
+
+def synthetic_questions(num_questions: int, seed: int = 7) -> list[str]:
+    """Generate deterministic questions overlapping the corpus vocabulary."""
+    rng = random.Random(seed)
+    questions = []
+    for _ in range(num_questions):
+        if rng.random() < 0.3:
+            questions.append(rng.choice(_JA_PHRASES) + "方法は？")
+        else:
+            questions.append("How do I " + " ".join(rng.choices(_WORDS, k=5)) + "?")
+    return questions
+
+
+def bench_chunking(corpus: list[dict]) -> dict:
+    """Measure TextChunker throughput (CPU only)."""
+    from src.config import get_settings
+    from src.embedding import TextChunker
+
+    settings = get_settings()
+    chunker = TextChunker(settings.chunk_size, settings.chunk_overlap)
+
+    start = time.perf_counter()
+    chunks = 0
+    tokens = 0
+    for doc in corpus:
+        for chunk in chunker.chunk_text(doc["content"]):
+            chunks += 1
+            tokens += chunk["token_count"]
+    elapsed = time.perf_counter() - start
+
+    return {
+        "documents": len(corpus),
+        "chunks": chunks,
+        "seconds": round(elapsed, 4),
+        "documents_per_second": round(len(corpus) / elapsed, 2),
+        "chunks_per_second": round(chunks / elapsed, 2),
+        "tokens_per_second": round(tokens / elapsed, 2),
+    }
+
+
+def bench_embedding(fake: FakeAzure, corpus: list[dict]) -> dict:
+    """Measure chunk + embed throughput through DocumentProcessor."""
+    from src.embedding import DocumentProcessor
+
+    processor = DocumentProcessor()
+    calls_before = fake.openai.embedding_calls
+
+    start = time.perf_counter()
+    chunks = 0
+    for doc in corpus:
+        chunks += len(processor.process_document(doc["id"], doc["content"], doc["metadata"]))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "documents": len(corpus),
+        "chunks": chunks,
+        "embedding_calls": fake.openai.embedding_calls - calls_before,
+        "seconds": round(elapsed, 4),
+        "chunks_per_second": round(chunks / elapsed, 2),
+    }
+
+
+def bench_ingestion(fake: FakeAzure, corpus: list[dict]) -> dict:
+    """Measure end-to-end ingestion (chunk + embed + upload)."""
+    from src.indexer import DocumentIngestionPipeline
+
+    pipeline = DocumentIngestionPipeline()
+
+    start = time.perf_counter()
+    result = pipeline.ingest_documents(corpus)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "documents": len(corpus),
+        "succeeded": result["succeeded"],
+        "failed": result["failed"],
+        "seconds": round(elapsed, 4),
+        "documents_per_second": round(len(corpus) / elapsed, 2),
+        "chunks_per_second": round(result["succeeded"] / elapsed, 2),
+    }
+
+
+def bench_query(questions: list[str], stream: bool) -> dict:
+    """Measure query latency (and time-to-first-token when streaming)."""
+    from src.rag_pipeline import RAGPipeline
+
+    pipeline = RAGPipeline()
+    latencies: list[float] = []
+    ttfts: list[float] = []
+    errors = 0
+
+    for question in questions:
+        start = time.perf_counter()
+        try:
+            if stream:
+                first = None
+                for _ in pipeline.query(question=question, stream=True):
+                    if first is None:
+                        first = time.perf_counter() - start
+                if first is not None:
+                    ttfts.append(first)
+            else:
+                pipeline.query(question=question)
+        except Exception:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+    result = {
+        "requests": len(questions),
+        "errors": errors,
+        "latency": summarize_latencies(latencies),
+    }
+    if stream:
+        result["ttft"] = summarize_latencies(ttfts)
+    return result
+
+
+def run_suite(config: FakeConfig, quick: bool = False) -> dict:
+    """Run every benchmark against a fresh set of fakes."""
+    num_documents = 20 if quick else 200
+    num_questions = 10 if quick else 100
+
+    corpus = synthetic_corpus(num_documents, sentences_per_document=60, seed=config.seed)
+    questions = synthetic_questions(num_questions, seed=config.seed)
+    fake = FakeAzure(config)
+
+    results = {"chunking": bench_chunking(corpus)}
+    with fake.install():
+        results["embedding"] = bench_embedding(fake, corpus)
+        results["ingestion"] = bench_ingestion(fake, corpus)
+        results["query"] = bench_query(questions, stream=False)
+        results["query_stream"] = bench_query(questions, stream=True)
+    results["injected_rate_limits"] = fake.openai.rate_limiter.injected
+
+    return {"meta": run_metadata(asdict(config) | {"quick": quick}), "results": results}
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Offline RAG benchmark suite")
+    parser.add_argument("--output", default="bench_output.json", help="Result JSON path")
+    parser.add_argument("--compare", help="Baseline result JSON to compare against")
+    parser.add_argument("--quick", action="store_true", help="Small corpus for smoke runs")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplier for simulated service latency (0 = CPU only)")
+    parser.add_argument("--rate-limit-probability", type=float, default=0.0,
+                        help="Probability of an injected 429 per OpenAI call")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    config = FakeConfig(
+        latency_scale=args.latency_scale,
+        rate_limit_probability=args.rate_limit_probability,
+        seed=args.seed,
+    )
+    report = run_suite(config, quick=args.quick)
+    write_results(args.output, report)
+    print(json.dumps(report["results"], indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nComparison against {args.compare} ({baseline['meta'].get('commit')}):")
+        for line in compare_results(baseline["results"], report["results"]):
+            print(f"  {line}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
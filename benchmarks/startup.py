@@ -0,0 +1,161 @@
+"""
+Startup-time benchmark for the FastAPI service.
+
+Each run starts a fresh interpreter (so import and client initialization
+costs are not hidden by module caching) that serves ``src.api:app`` with
+the local fakes installed, and reports:
+
+- import_ms: ``import src.api``
+- ready_ms: start of ``import src.api`` until uvicorn accepts connections
+  (lifespan done); installing the fakes is excluded
+- first_query_ms: latency of the first ``POST /query``
+- rss_ready_mb / rss_peak_mb: resident set at readiness and peak after the query
+
+Runs are repeated per warm-up mode (``RAG_WARMUP``) and summarized by median.
+
+Usage:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --modes lazy,background,eager --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from .common import run_metadata, write_results
+
+_MODES = ("lazy", "background", "eager")
+
+
+def _rss_mb() -> float:
+    """Current resident set in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def child(latency_scale: float) -> dict:
+    """Measure one cold start in this (fresh) process."""
+    import uvicorn
+
+    from .fakes import FakeAzure, FakeConfig
+
+    fake = FakeAzure(FakeConfig(latency_scale=latency_scale))
+    with fake.install():
+        start = time.perf_counter()
+        from src.api import app
+
+        import_ms = (time.perf_counter() - start) * 1000
+
+        server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="on")
+        )
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError("In-process server failed to start")
+            time.sleep(0.001)
+        ready_ms = (time.perf_counter() - start) * 1000
+        rss_ready = _rss_mb()
+
+        import httpx
+
+        port = server.servers[0].sockets[0].getsockname()[1]
+        query_start = time.perf_counter()
+        response = httpx.post(
+            f"http://127.0.0.1:{port}/query",
+            json={"question": "How do I configure hybrid search?"},
+            timeout=60,
+        )
+        first_query_ms = (time.perf_counter() - query_start) * 1000
+
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    return {
+        "import_ms": round(import_ms, 1),
+        "ready_ms": round(ready_ms, 1),
+        "first_query_ms": round(first_query_ms, 1),
+        "first_query_status": response.status_code,
+        "rss_ready_mb": round(rss_ready, 1),
+        "rss_peak_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def run_mode(mode: str, runs: int, latency_scale: float) -> dict:
+    """Run ``runs`` cold starts with RAG_WARMUP=mode and summarize."""
+    env = dict(os.environ, RAG_WARMUP=mode)
+    samples = []
+    for _ in range(runs):
+        spawned = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child",
+             "--latency-scale", str(latency_scale)],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        sample = json.loads(proc.stdout.strip().splitlines()[-1])
+        sample["process_ms"] = round((time.perf_counter() - spawned) * 1000, 1)
+        samples.append(sample)
+
+    numeric = [k for k, v in samples[0].items() if isinstance(v, float)]
+    return {
+        "runs": runs,
+        "median": {k: round(statistics.median(s[k] for s in samples), 1) for k in numeric},
+        "statuses": sorted({s["first_query_status"] for s in samples}),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Measure API cold start")
+    parser.add_argument("--modes", default=",".join(_MODES), help="Comma-separated RAG_WARMUP modes")
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts per mode")
+    parser.add_argument("--latency-scale", type=float, default=0.0,
+                        help="Fake service latency multiplier (0 isolates CPU/init cost)")
+    parser.add_argument("--output", help="Write JSON report to this path")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(child(args.latency_scale)))
+        return 0
+
+    report = {
+        "meta": run_metadata({"runs": args.runs, "latency_scale": args.latency_scale}),
+        "modes": {},
+    }
+    for mode in args.modes.split(","):
+        result = run_mode(mode, args.runs, args.latency_scale)
+        report["modes"][mode] = result
+        median = result["median"]
+        print(
+            f"{mode:<10} import={median['import_ms']:>7.1f}ms  ready={median['ready_ms']:>7.1f}ms  "
+            f"first_query={median['first_query_ms']:>7.1f}ms  "
+            f"rss_ready={median['rss_ready_mb']:>6.1f}MiB  rss_peak={median['rss_peak_mb']:>6.1f}MiB"
+        )
+
+    if args.output:
+        write_results(args.output, report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
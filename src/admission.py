@@ -0,0 +1,361 @@
+"""
+Admission control for Azure OpenAI chat calls.
+
+Features:
+- Token-bucket budgets for tokens per minute (TPM) and requests per minute (RPM)
+- Priority queues (interactive ahead of standard ahead of batch)
+- Fast load shedding with Retry-After once queue wait would exceed a deadline
+- Reservations sized by the expected completion (running average of
+  observed completions) rather than max_tokens; the difference to actual
+  usage is refunded or charged after the call completes
+- Back-off after upstream 429 responses
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from functools import lru_cache
+
+from .config import get_settings
+from .telemetry import get_metrics
+
+
+# Weight of each observed completion in the expected completion size
+COMPLETION_SMOOTHING = 0.1
+
+
+class Priority(IntEnum):
+    """Request priority (lower value is served first)."""
+
+    INTERACTIVE = 0
+    STANDARD = 1
+    BATCH = 2
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of queued."""
+
+    def __init__(self, retry_after: float, reason: str = "LLM capacity exhausted"):
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(f"{reason}; retry after {math.ceil(retry_after)}s")
+
+
+class TokenBucket:
+    """
+    Continuously refilling token bucket.
+
+    A rate of 0 disables the bucket (always admits).
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 60.0, now: float | None = None):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds) if per_minute else 0.0
+        self.level = self.capacity
+        self._updated = time.monotonic() if now is None else now
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def refill(self, now: float) -> None:
+        if self.enabled:
+            self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def seconds_until(self, amount: float) -> float:
+        """Seconds until ``amount`` is available (assumes refill was called)."""
+        if not self.enabled:
+            return 0.0
+        return max(0.0, amount - self.level) / self.rate
+
+    def consume(self, amount: float) -> None:
+        if self.enabled:
+            self.level -= amount
+
+    def refund(self, amount: float) -> None:
+        if self.enabled:
+            self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    sequence: int
+    tokens: int = field(compare=False)
+
+
+@dataclass
+class AdmissionTicket:
+    """Reservation handed out by the controller."""
+
+    tokens: int
+    priority: Priority
+    wait_seconds: float
+
+
+class AdmissionController:
+    """
+    Process-wide admission controller for LLM calls.
+
+    Every request reserves ``estimated prompt tokens + expected completion``
+    from the TPM bucket and one request from the RPM bucket; release()
+    settles the reservation against actual usage. Requests queue in
+    priority order (FIFO within a priority); a request whose estimated
+    queue wait exceeds its deadline is rejected immediately so callers
+    can return 429 with Retry-After instead of timing out later.
+    """
+
+    def __init__(
+        self,
+        tokens_per_minute: int,
+        requests_per_minute: int,
+        burst_seconds: float = 60.0,
+        deadlines: dict[Priority, float] | None = None,
+        expected_completion_tokens: int = 500,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize controller.
+
+        Args:
+            tokens_per_minute: TPM budget (0 disables the token bucket)
+            requests_per_minute: RPM budget (0 disables the request bucket)
+            burst_seconds: Seconds of budget that may be spent in a burst
+            deadlines: Maximum queue wait per priority in seconds
+            expected_completion_tokens: Completion size reserved until
+                actual completions have been observed
+            clock: Monotonic clock in seconds (injectable for tests)
+        """
+        self._clock = clock
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds, clock())
+        self.requests = TokenBucket(requests_per_minute, burst_seconds, clock())
+        self.deadlines = deadlines or {
+            Priority.INTERACTIVE: 5.0,
+            Priority.STANDARD: 15.0,
+            Priority.BATCH: 120.0,
+        }
+        self._queue: list[_Waiter] = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._paused_until = 0.0
+        self._completion_average = float(expected_completion_tokens)
+        self.in_flight = 0
+
+        metrics = get_metrics()
+        self._decisions = metrics.counter(
+            "rag_admission_total", "Admission decisions by priority and result"
+        )
+        self._wait = metrics.histogram(
+            "rag_admission_wait_seconds", "Queue wait before admission"
+        )
+
+    # --- internal helpers (call with the condition held) ---
+
+    def _refill(self, now: float) -> None:
+        self.tokens.refill(now)
+        self.requests.refill(now)
+
+    def _estimate_wait(self, tokens: int, priority: int, now: float) -> float:
+        """Wait for this request given everything queued at equal or higher priority."""
+        ahead = [w for w in self._queue if w.priority <= priority]
+        return max(
+            self.tokens.seconds_until(sum(w.tokens for w in ahead) + tokens),
+            self.requests.seconds_until(len(ahead) + 1),
+            self._paused_until - now,
+            0.0,
+        )
+
+    def _ready_in(self, tokens: int, now: float) -> float:
+        return max(
+            self.tokens.seconds_until(tokens),
+            self.requests.seconds_until(1),
+            self._paused_until - now,
+            0.0,
+        )
+
+    def _remove(self, waiter: _Waiter) -> None:
+        if waiter in self._queue:
+            self._queue.remove(waiter)
+            heapq.heapify(self._queue)
+            self._cond.notify_all()
+
+    # --- public API ---
+
+    def expected_completion(self, max_tokens: int) -> int:
+        """
+        Completion tokens to reserve for a call.
+
+        Args:
+            max_tokens: The call's completion limit
+
+        Returns:
+            int: Running average of observed completions, capped at max_tokens
+        """
+        with self._cond:
+            return min(max_tokens, math.ceil(self._completion_average))
+
+    def acquire(
+        self,
+        tokens: int,
+        priority: Priority = Priority.STANDARD,
+        deadline: float | None = None,
+    ) -> AdmissionTicket:
+        """
+        Reserve budget for one LLM call, waiting in priority order.
+
+        Args:
+            tokens: Estimated prompt tokens plus expected completion tokens
+            priority: Request priority
+            deadline: Maximum queue wait in seconds (per-priority default if None)
+
+        Returns:
+            AdmissionTicket: Reservation to pass to release()
+
+        Raises:
+            AdmissionRejected: If the wait would exceed the deadline
+        """
+        if self.tokens.enabled:
+            tokens = min(tokens, int(self.tokens.capacity))
+        deadline = self.deadlines[priority] if deadline is None else deadline
+        label = priority.name.lower()
+
+        with self._cond:
+            start = self._clock()
+            self._refill(start)
+            estimate = self._estimate_wait(tokens, priority, start)
+            if estimate > deadline:
+                self._decisions.inc(priority=label, result="rejected")
+                raise AdmissionRejected(retry_after=estimate)
+
+            waiter = _Waiter(priority, next(self._sequence), tokens)
+            heapq.heappush(self._queue, waiter)
+            expires = start + deadline
+            try:
+                while True:
+                    now = self._clock()
+                    self._refill(now)
+                    ready_in = self._ready_in(tokens, now)
+                    if self._queue[0] is waiter and ready_in == 0.0:
+                        heapq.heappop(self._queue)
+                        self.tokens.consume(tokens)
+                        self.requests.consume(1)
+                        self.in_flight += 1
+                        self._cond.notify_all()
+                        break
+                    if now >= expires:
+                        self._decisions.inc(priority=label, result="expired")
+                        raise AdmissionRejected(
+                            retry_after=max(1.0, self._estimate_wait(tokens, priority, now))
+                        )
+                    self._cond.wait(timeout=min(expires - now, max(ready_in, 0.01)))
+            except BaseException:
+                self._remove(waiter)
+                raise
+
+        wait = self._clock() - start
+        self._decisions.inc(priority=label, result="admitted")
+        self._wait.observe(wait, priority=label)
+        return AdmissionTicket(tokens=tokens, priority=priority, wait_seconds=wait)
+
+    def release(
+        self,
+        ticket: AdmissionTicket,
+        used_tokens: int | None = None,
+        completion_tokens: int | None = None,
+    ) -> None:
+        """
+        Finish a call and settle its reservation.
+
+        Unused tokens are refunded; usage above the reservation is charged,
+        so later requests wait for it.
+
+        Args:
+            ticket: Ticket returned by acquire()
+            used_tokens: Actual total tokens (None keeps the reservation)
+            completion_tokens: Actual completion tokens (updates the
+                expected completion size)
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if used_tokens is not None:
+                self._refill(self._clock())
+                if used_tokens < ticket.tokens:
+                    self.tokens.refund(ticket.tokens - used_tokens)
+                else:
+                    self.tokens.consume(used_tokens - ticket.tokens)
+            if completion_tokens is not None:
+                self._completion_average += COMPLETION_SMOOTHING * (
+                    completion_tokens - self._completion_average
+                )
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(
+        self,
+        tokens: int,
+        priority: Priority = Priority.STANDARD,
+        deadline: float | None = None,
+    ):
+        """Context manager form of acquire()/release() without refunds."""
+        ticket = self.acquire(tokens, priority, deadline)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def penalize(self, retry_after: float) -> None:
+        """Pause admissions after an upstream 429."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, self._clock() + retry_after)
+
+    def stats(self) -> dict:
+        """Snapshot of controller state."""
+        with self._cond:
+            self._refill(self._clock())
+            return {
+                "queued": len(self._queue),
+                "in_flight": self.in_flight,
+                "tokens_available": round(self.tokens.level, 1) if self.tokens.enabled else None,
+                "requests_available": round(self.requests.level, 2) if self.requests.enabled else None,
+            }
+
+
+def retry_after_from_error(error: Exception, default: float = 1.0) -> float:
+    """Extract Retry-After seconds from an OpenAI API error."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return default
+
+
+@lru_cache()
+def get_admission_controller() -> AdmissionController:
+    """Get the process-wide admission controller (shared by all pipelines)."""
+    settings = get_settings()
+    controller = AdmissionController(
+        tokens_per_minute=settings.admission_tpm,
+        requests_per_minute=settings.admission_rpm,
+        burst_seconds=settings.admission_burst_seconds,
+        expected_completion_tokens=settings.admission_expected_completion_tokens,
+        deadlines={
+            Priority.INTERACTIVE: settings.admission_deadline_interactive,
+            Priority.STANDARD: settings.admission_deadline_standard,
+            Priority.BATCH: settings.admission_deadline_batch,
+        },
+    )
+    get_metrics().gauge(
+        "rag_admission_queue_depth", "Requests waiting for admission"
+    ).set_callback(lambda: [({}, controller.stats()["queued"])])
+    return controller
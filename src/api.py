@@ -4,35 +4,123 @@ FastAPI REST API for RAG Pipeline.
 Endpoints:
 - POST /query - Execute RAG query
 - POST /query/stream - Execute RAG query with streaming
-- POST /ingest - Ingest documents
-- GET /health - Health check
+- POST /query/batch - Answer many questions, results streamed as NDJSON
+- POST /search - Retrieval only (ranked chunks and optional context, no LLM)
+- POST /ingest - Start a background ingestion job
+- POST /ingest/stream - Ingest an NDJSON (optionally gzip) body as it arrives
+- GET /ingest/{job_id} - Ingestion job progress
+- DELETE /ingest/{job_id} - Cancel an ingestion job
+- POST /ingest/{job_id}/resume - Resume a cancelled or failed job
+- DELETE /documents/{document_id} - Delete a document's chunks
+- PATCH /documents/{document_id} - Update a document's metadata (no re-embedding)
+- GET /health - Health check (cached index statistics)
+- GET /health/live - Liveness (no dependencies)
+- GET /health/ready - Readiness (warm-up done, index statistics fresh)
+- GET /index/stats - Cached document count, facets and index size
+- GET /metrics - Prometheus metrics
 """
+import asyncio
+import json
+import math
+import time
 import uuid
+import zlib
 from contextlib import asynccontextmanager
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, Field
-
-from .indexer import DocumentIngestionPipeline, SearchIndexManager
-from .rag_pipeline import ConversationManager, RAGPipeline
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import AfterValidator, BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+
+from .admission import AdmissionRejected, Priority
+from .components import AppComponents
+from .config import get_settings
+from .embedding import VECTOR_FIELDS
+from .index_profile import get_index_profile
+from .jobs import JobNotFound
+from .retriever import DEFAULT_SELECT_FIELDS
+from .search_planner import parse_filter
+from .streaming import END_OF_STREAM, NDJSONDecoder, StreamBuffer
+from .telemetry import get_metrics
 
 
 # === Pydantic Models ===
 
 
+def _check_filter(value: str | None) -> str | None:
+    """Reject malformed filters or unfilterable fields with 422."""
+    if value is not None and value.strip():
+        parse_filter(value)
+    return value
+
+
+ODataFilter = Annotated[str | None, AfterValidator(_check_filter)]
+
+
+def _check_vector_field(value: str | None) -> str | None:
+    """Reject the v2 vector field with 422 unless its embedding model is configured."""
+    if value == VECTOR_FIELDS[2] and not get_settings().embedding_v2_deployment:
+        raise ValueError(f"{value} requires AZURE_OPENAI_DEPLOYMENT_EMBEDDING_V2")
+    return value
+
+
+VectorField = Annotated[
+    Literal[tuple(VECTOR_FIELDS.values())] | None, AfterValidator(_check_vector_field)
+]
+
+
 class QueryRequest(BaseModel):
     """Request model for RAG query."""
 
     question: str = Field(..., min_length=1, max_length=2000)
     top_k: int = Field(default=5, ge=1, le=20)
-    search_mode: str = Field(default="hybrid", pattern="^(vector|keyword|hybrid)$")
-    filters: str | None = Field(default=None)
+    search_mode: str = Field(default="auto", pattern="^(auto|vector|keyword|hybrid)$")
+    filters: ODataFilter = Field(default=None)
+    vector_field: VectorField = Field(default=None)
     session_id: str | None = Field(default=None)
 
 
+class QueryBatchRequest(BaseModel):
+    """Request model for batch queries."""
+
+    questions: list[Annotated[str, Field(min_length=1, max_length=2000)]] = Field(
+        ..., min_length=1, max_length=10000
+    )
+    top_k: int = Field(default=5, ge=1, le=20)
+    search_mode: str = Field(default="auto", pattern="^(auto|vector|keyword|hybrid)$")
+    filters: ODataFilter = Field(default=None)
+    vector_field: VectorField = Field(default=None)
+
+
+class SearchRequest(BaseModel):
+    """Request model for retrieval-only search."""
+
+    query: str = Field(..., min_length=1, max_length=2000)
+    top_k: int = Field(default=5, ge=1, le=50)
+    skip: int = Field(default=0, ge=0, le=100000)
+    search_mode: str = Field(default="auto", pattern="^(auto|vector|keyword|hybrid)$")
+    filters: ODataFilter = Field(default=None)
+    vector_field: VectorField = Field(default=None)
+    select_fields: list[Literal[DEFAULT_SELECT_FIELDS]] | None = Field(default=None, min_length=1)
+    include_vectors: bool = Field(default=False)
+    include_context: bool = Field(default=False)
+    max_context_tokens: int | None = Field(default=None, ge=1)
+
+
+class SearchResponse(BaseModel):
+    """Response model for retrieval-only search."""
+
+    results: list[dict]
+    count: int
+    skip: int
+    next_skip: int | None = None
+    context: str | None = None
+    sources: list[dict] | None = None
+    context_tokens: int | None = None
+
+
 class QueryResponse(BaseModel):
     """Response model for RAG query."""
 
@@ -55,11 +143,45 @@ class IngestRequest(BaseModel):
     documents: list[DocumentInput]
 
 
-class IngestResponse(BaseModel):
-    """Response model for document ingestion."""
+class IngestJobResponse(BaseModel):
+    """Response model for ingestion job status."""
 
+    job_id: str
+    status: str
+    created_at: float
+    updated_at: float
+    progress: dict
+    error: str | None = None
+
+
+class IngestStreamResponse(BaseModel):
+    """Response model for streaming ingestion."""
+
+    documents: int
     succeeded: int
     failed: int
+    duplicates: int = 0
+    errors: list[dict]
+    parse_errors: int
+    parse_error_details: list[dict]
+
+
+class MetadataUpdateRequest(BaseModel):
+    """Request model for a document metadata update (omitted fields are kept)."""
+
+    source: str | None = None
+    category: str | None = None
+    title: str | None = None
+
+
+class DocumentOperationResponse(BaseModel):
+    """Response model for document delete and metadata update."""
+
+    document_id: str
+    chunks: int
+    succeeded: int
+    failed: int
+    repaired: int = 0
     errors: list[dict]
 
 
@@ -69,6 +191,27 @@ class HealthResponse(BaseModel):
     status: str
     index_name: str
     document_count: int
+    stats_age_seconds: float | None = None
+
+
+class ReadinessResponse(BaseModel):
+    """Response model for readiness check."""
+
+    status: str
+    checks: dict[str, bool]
+    stats_age_seconds: float | None = None
+    error: str | None = None
+
+
+class IndexStatsResponse(BaseModel):
+    """Response model for cached index statistics."""
+
+    index_name: str
+    document_count: int
+    storage_size: int | None
+    vector_index_size: int | None
+    facets: dict[str, dict[str, int]]
+    stats_age_seconds: float
 
 
 # === Application Setup ===
@@ -77,16 +220,32 @@ class HealthResponse(BaseModel):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
-    # Startup: Initialize components
-    app.state.rag_pipeline = RAGPipeline()
-    app.state.conversation_manager = ConversationManager()
-    app.state.index_manager = SearchIndexManager()
-    app.state.ingestion_pipeline = DocumentIngestionPipeline()
+    # Startup: components are built lazily; warm them according to RAG_WARMUP
+    components = AppComponents()
+    app.state.components = components
+
+    match get_settings().warmup_mode:
+        case "eager":
+            await run_in_threadpool(components.warm_up)
+        case "lazy":
+            pass
+        case _:
+            components.start_warm_up()
+
+    # Pick up ingestion jobs interrupted by a previous shutdown
+    await run_in_threadpool(components.ingestion_jobs.resume_unfinished)
+
+    # Document count, facets and index size for /health and search planning
+    components.index_stats.start()
+
+    # Embedding migration: fill content_vector_v2 for existing chunks
+    if get_settings().reembed_background:
+        components.reembedder.start()
 
     yield
 
-    # Shutdown: Cleanup if needed
-    pass
+    # Shutdown: stop job workers after their current batch
+    components.shutdown()
 
 
 app = FastAPI(
@@ -105,30 +264,127 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+http_request_duration = get_metrics().histogram(
+    "rag_http_request_duration_seconds",
+    "API request latency until response headers are sent",
+)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Record request latency per route template."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    http_request_duration.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=response.status_code,
+    )
+    return response
+
 
 # === Endpoints ===
 
 
+async def _index_stats():
+    """Cached index statistics, fetched once if no refresh has finished yet."""
+    service = app.state.components.index_stats
+    stats = service.get()
+    if stats is None:
+        stats = await run_in_threadpool(service.refresh)
+    return service, stats
+
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """
     Health check endpoint.
 
+    Serves the cached index statistics (see index_stats.py), so probes do
+    not query the search service. Status is "stale" when refreshes have
+    been failing for several intervals.
+
     Returns:
         HealthResponse: System health status
     """
     try:
-        index_manager: SearchIndexManager = app.state.index_manager
-        doc_count = index_manager.get_document_count()
-
-        return HealthResponse(
-            status="healthy",
-            index_name=index_manager.index_name,
-            document_count=doc_count,
-        )
+        service, stats = await _index_stats()
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Service unhealthy: {str(e)}")
 
+    return HealthResponse(
+        status="stale" if service.stale else "healthy",
+        index_name=service.index_name,
+        document_count=stats.document_count,
+        stats_age_seconds=round(stats.age, 3),
+    )
+
+
+@app.get("/health/live")
+async def liveness():
+    """
+    Liveness check: the process is serving requests.
+
+    Returns:
+        dict: Always {"status": "alive"}
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", response_model=ReadinessResponse)
+async def readiness():
+    """
+    Readiness check: components are warmed up and index statistics are fresh.
+
+    Never calls the search service; a failing service shows up as
+    statistics that stop refreshing.
+
+    Returns:
+        ReadinessResponse: Checks (503 if any fails)
+    """
+    components = app.state.components
+    service = components.index_stats
+    stats = service.get()
+    checks = {
+        # Lazy mode builds components on first use; there is nothing to wait for
+        "warm_up": get_settings().warmup_mode == "lazy" or components.ready.is_set(),
+        "index_stats": not service.stale,
+    }
+    response = ReadinessResponse(
+        status="ready" if all(checks.values()) else "not_ready",
+        checks=checks,
+        stats_age_seconds=round(stats.age, 3) if stats else None,
+        error=service.last_error,
+    )
+    if not all(checks.values()):
+        raise HTTPException(status_code=503, detail=response.model_dump())
+    return response
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics endpoint.
+
+    Returns:
+        PlainTextResponse: Metrics in Prometheus text exposition format
+    """
+    return PlainTextResponse(
+        get_metrics().render_prometheus(),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+def _overloaded(error: AdmissionRejected) -> HTTPException:
+    """Map an admission rejection to 429 with Retry-After."""
+    return HTTPException(
+        status_code=429,
+        detail=str(error),
+        headers={"Retry-After": str(math.ceil(error.retry_after))},
+    )
+
 
 @app.post("/query", response_model=QueryResponse)
 async def query_rag(request: QueryRequest):
@@ -142,21 +398,25 @@ async def query_rag(request: QueryRequest):
         QueryResponse: Generated answer with sources
     """
     try:
-        pipeline: RAGPipeline = app.state.rag_pipeline
-        conversation_manager: ConversationManager = app.state.conversation_manager
+        components: AppComponents = app.state.components
+        pipeline = components.rag_pipeline
+        conversation_manager = components.conversation_manager
 
         # Get or create session
         session_id = request.session_id or str(uuid.uuid4())
         history = conversation_manager.get_history(session_id)
 
-        # Execute query
-        response = pipeline.query(
+        # Execute query off the event loop (may wait for LLM admission)
+        response = await run_in_threadpool(
+            pipeline.query,
             question=request.question,
             top_k=request.top_k,
             search_mode=request.search_mode,
             filters=request.filters,
+            vector_field=request.vector_field,
             stream=False,
             conversation_history=history if history else None,
+            priority=Priority.STANDARD,
         )
 
         # Update conversation history
@@ -172,40 +432,173 @@ async def query_rag(request: QueryRequest):
             session_id=session_id,
         )
 
+    except AdmissionRejected as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
 
+@app.post("/query/batch")
+async def query_rag_batch(request: QueryBatchRequest):
+    """
+    Answer many questions in one request.
+
+    Questions are embedded together, searched and answered with bounded
+    concurrency at batch admission priority. Each result is written as
+    one NDJSON line as soon as it finishes (not in request order):
+    ``{"index", "question", "answer", "sources", "usage"}`` or
+    ``{"index", "question", "error"}`` (plus ``retry_after`` when shed).
+
+    Args:
+        request: Questions and shared search parameters
+
+    Returns:
+        StreamingResponse: NDJSON stream of per-question results
+    """
+    pipeline = app.state.components.rag_pipeline
+
+    # Sync generator: Starlette iterates it in the threadpool
+    def generate():
+        try:
+            for index, result in pipeline.query_batch(
+                request.questions,
+                top_k=request.top_k,
+                search_mode=request.search_mode,
+                filters=request.filters,
+                vector_field=request.vector_field,
+            ):
+                line = {"index": index, "question": request.questions[index]}
+                if isinstance(result, AdmissionRejected):
+                    line |= {"error": str(result), "retry_after": math.ceil(result.retry_after)}
+                elif isinstance(result, Exception):
+                    line["error"] = str(result)
+                else:
+                    line |= {"answer": result.answer, "sources": result.sources, "usage": result.usage}
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": f"Batch failed: {str(e)}"}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@app.post("/search", response_model=SearchResponse, response_model_exclude_none=True)
+async def search(request: SearchRequest):
+    """
+    Retrieve ranked chunks without generating an answer.
+
+    Uses the same retriever, embedding and context packing as /query and
+    skips admission and the completion call. Each result carries ``id``,
+    ``score`` and the requested ``select_fields`` (plus ``vector`` when
+    ``include_vectors`` is set; rejected with 400 when the index profile
+    does not store vectors). ``next_skip`` is returned while the search
+    returned a full page, even if the score threshold dropped some of it.
+
+    Args:
+        request: Search request with query, paging and projection options
+
+    Returns:
+        SearchResponse: Ranked results, plus packed context if requested
+    """
+    if request.include_vectors and not get_index_profile().stored:
+        raise HTTPException(
+            status_code=400,
+            detail="include_vectors is unavailable: the index profile does not store vectors",
+        )
+
+    fields = list(request.select_fields or DEFAULT_SELECT_FIELDS)
+    fetch_fields = list(fields)
+    if request.include_context:
+        # Context packing and expansion need these even if not returned
+        needed = ("content", "source", "title", "document_id", "chunk_index")
+        fetch_fields += [f for f in needed if f not in fetch_fields]
+    if "id" not in fetch_fields:
+        fetch_fields.insert(0, "id")
+
+    try:
+        pipeline = app.state.components.rag_pipeline
+        response = await run_in_threadpool(
+            pipeline.retrieve,
+            question=request.query,
+            top_k=request.top_k,
+            search_mode=request.search_mode,
+            filters=request.filters,
+            skip=request.skip,
+            select_fields=fetch_fields,
+            include_vectors=request.include_vectors,
+            vector_field=request.vector_field,
+            include_context=request.include_context,
+            max_context_tokens=request.max_context_tokens,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+    results = []
+    for result in response.results:
+        item = {"id": result.id, "score": result.score}
+        item |= {field: getattr(result, field) for field in fields}
+        if request.include_vectors:
+            item["vector"] = result.vector
+        results.append(item)
+
+    full_page = response.ranked == request.top_k
+    return SearchResponse(
+        results=results,
+        count=len(results),
+        skip=request.skip,
+        next_skip=request.skip + request.top_k if full_page else None,
+        context=response.context if request.include_context else None,
+        sources=response.sources if request.include_context else None,
+        context_tokens=response.context_tokens if request.include_context else None,
+    )
+
+
 @app.post("/query/stream")
 async def query_rag_stream(request: QueryRequest):
     """
     Execute RAG query with streaming response.
 
+    Interactive streams are admitted ahead of standard and batch work.
+    Requests that cannot be admitted in time get 429 with Retry-After
+    before the stream starts.
+
     Args:
         request: Query request with question and parameters
 
     Returns:
         StreamingResponse: Server-sent events stream
     """
+    components: AppComponents = app.state.components
+    pipeline = components.rag_pipeline
+    conversation_manager = components.conversation_manager
 
-    async def generate():
-        try:
-            pipeline: RAGPipeline = app.state.rag_pipeline
-            conversation_manager: ConversationManager = app.state.conversation_manager
-
-            session_id = request.session_id or str(uuid.uuid4())
-            history = conversation_manager.get_history(session_id)
+    session_id = request.session_id or str(uuid.uuid4())
+    history = conversation_manager.get_history(session_id)
 
-            # Execute streaming query
-            generator = pipeline.query(
-                question=request.question,
-                top_k=request.top_k,
-                search_mode=request.search_mode,
-                filters=request.filters,
-                stream=True,
-                conversation_history=history if history else None,
-            )
+    setup_error = None
+    try:
+        # Retrieval, admission and the completion request run off the event loop
+        generator = await run_in_threadpool(
+            pipeline.query,
+            question=request.question,
+            top_k=request.top_k,
+            search_mode=request.search_mode,
+            filters=request.filters,
+            vector_field=request.vector_field,
+            stream=True,
+            conversation_history=history if history else None,
+            priority=Priority.INTERACTIVE,
+        )
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    except Exception as e:
+        setup_error = e
 
+    # Sync generator: Starlette iterates it in the threadpool
+    def generate():
+        if setup_error is not None:
+            yield f"data: [ERROR] {str(setup_error)}\n\n"
+            return
+        try:
             answer_parts = []
             for chunk in generator:
                 answer_parts.append(chunk)
@@ -238,19 +631,22 @@ async def query_rag_stream(request: QueryRequest):
     )
 
 
-@app.post("/ingest", response_model=IngestResponse)
+@app.post("/ingest", response_model=IngestJobResponse, status_code=202)
 async def ingest_documents(request: IngestRequest):
     """
-    Ingest documents into the search index.
+    Start a background ingestion job.
+
+    Documents are stored with the job and processed by the job worker
+    pool; poll GET /ingest/{job_id} for progress.
 
     Args:
         request: List of documents to ingest
 
     Returns:
-        IngestResponse: Ingestion results
+        IngestJobResponse: Queued job
     """
     try:
-        pipeline: DocumentIngestionPipeline = app.state.ingestion_pipeline
+        jobs = app.state.components.ingestion_jobs
 
         # Convert to expected format
         documents = [
@@ -262,16 +658,198 @@ async def ingest_documents(request: IngestRequest):
             for doc in request.documents
         ]
 
-        result = pipeline.ingest_documents(documents)
+        job_id = await run_in_threadpool(jobs.submit, documents)
+        return IngestJobResponse(**jobs.get(job_id))
 
-        return IngestResponse(
-            succeeded=result["succeeded"],
-            failed=result["failed"],
-            errors=result["errors"],
-        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ingestion failed: {str(e)}")
+
+
+@app.post("/ingest/stream", response_model=IngestStreamResponse)
+async def ingest_stream(request: Request):
+    """
+    Ingest documents from an NDJSON request body while it is uploaded.
+
+    One JSON document per line ({"id", "content", "metadata"}); send
+    ``Content-Encoding: gzip`` for compressed bodies. Lines are parsed as
+    they arrive and handed to the chunk/embed/upload pipeline through a
+    bounded buffer, so slow processing applies backpressure to the upload.
+    Malformed lines are skipped and reported.
+
+    Args:
+        request: Raw request with NDJSON body
+
+    Returns:
+        IngestStreamResponse: Ingestion and parse results
+    """
+    settings = get_settings()
+    pipeline = app.state.components.ingestion_pipeline
+    decoder = NDJSONDecoder(gzipped=request.headers.get("content-encoding", "").lower() == "gzip")
+    buffer = StreamBuffer(settings.ingest_stream_buffer)
+
+    consumer = asyncio.ensure_future(run_in_threadpool(pipeline.ingest_stream, iter(buffer)))
+    # A finished (or failed) worker must not leave the upload waiting for space
+    consumer.add_done_callback(lambda _: buffer.close())
+    body_error = None
+    try:
+        async for chunk in request.stream():
+            if consumer.done():
+                break
+            for doc in decoder.feed(chunk):
+                await buffer.put(doc)
+        for doc in decoder.close():
+            await buffer.put(doc)
+    except zlib.error as e:
+        body_error = e
+    finally:
+        # Always end the worker's input so it flushes what it has
+        await buffer.put(END_OF_STREAM)
 
+    try:
+        result = await consumer
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ingestion failed: {str(e)}")
+    if body_error is not None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid gzip body after {result['documents']} documents: {body_error}",
+        )
+
+    return IngestStreamResponse(
+        documents=result["documents"],
+        succeeded=result["succeeded"],
+        failed=result["failed"],
+        duplicates=result["duplicates"],
+        errors=result["errors"],
+        parse_errors=decoder.error_count,
+        parse_error_details=decoder.errors,
+    )
+
+
+@app.get("/ingest/{job_id}", response_model=IngestJobResponse)
+async def get_ingest_job(job_id: str):
+    """
+    Get ingestion job progress.
+
+    Args:
+        job_id: Job identifier returned by POST /ingest
+
+    Returns:
+        IngestJobResponse: Status, counters, throughput and errors
+    """
+    try:
+        return IngestJobResponse(**app.state.components.ingestion_jobs.get(job_id))
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+
+@app.delete("/ingest/{job_id}", response_model=IngestJobResponse)
+async def cancel_ingest_job(job_id: str):
+    """
+    Cancel an ingestion job (running jobs stop after the current batch).
+
+    Args:
+        job_id: Job identifier
+
+    Returns:
+        IngestJobResponse: Job status after cancellation
+    """
+    try:
+        return IngestJobResponse(**app.state.components.ingestion_jobs.cancel(job_id))
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+
+@app.post("/ingest/{job_id}/resume", response_model=IngestJobResponse, status_code=202)
+async def resume_ingest_job(job_id: str):
+    """
+    Resume a cancelled, failed or interrupted job with its remaining documents.
+
+    Args:
+        job_id: Job identifier
+
+    Returns:
+        IngestJobResponse: Re-queued job
+    """
+    try:
+        return IngestJobResponse(**app.state.components.ingestion_jobs.resume(job_id))
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+
+@app.delete("/documents/{document_id}", response_model=DocumentOperationResponse)
+async def delete_document(document_id: str):
+    """
+    Delete all chunks of a document.
+
+    Args:
+        document_id: Document identifier used at ingestion
+
+    Returns:
+        DocumentOperationResponse: Chunks found and delete results
+    """
+    pipeline = app.state.components.ingestion_pipeline
+    try:
+        result = await run_in_threadpool(pipeline.delete_document, document_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Delete failed: {str(e)}")
+    if not result["chunks"]:
+        raise HTTPException(status_code=404, detail=f"Document not found: {document_id}")
+
+    return DocumentOperationResponse(document_id=document_id, **result)
+
+
+@app.patch("/documents/{document_id}", response_model=DocumentOperationResponse)
+async def update_document_metadata(document_id: str, request: MetadataUpdateRequest):
+    """
+    Update metadata on all chunks of a document.
+
+    Chunks are merged in place; content and vectors are not touched.
+    Fields set to null are cleared.
+
+    Args:
+        document_id: Document identifier used at ingestion
+        request: Metadata fields to change
+
+    Returns:
+        DocumentOperationResponse: Chunks found and merge results
+    """
+    metadata = request.model_dump(exclude_unset=True)
+    if not metadata:
+        raise HTTPException(status_code=422, detail="No metadata fields to update")
+
+    pipeline = app.state.components.ingestion_pipeline
+    try:
+        result = await run_in_threadpool(pipeline.update_metadata, document_id, metadata)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Update failed: {str(e)}")
+    if not result["chunks"]:
+        raise HTTPException(status_code=404, detail=f"Document not found: {document_id}")
+
+    return DocumentOperationResponse(document_id=document_id, **result)
+
+
+@app.get("/index/stats", response_model=IndexStatsResponse)
+async def index_stats():
+    """
+    Cached index statistics.
+
+    Returns:
+        IndexStatsResponse: Document count, index size and category/source facets
+    """
+    try:
+        service, stats = await _index_stats()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Index statistics unavailable: {str(e)}")
+
+    return IndexStatsResponse(
+        index_name=service.index_name,
+        document_count=stats.document_count,
+        storage_size=stats.storage_size,
+        vector_index_size=stats.vector_index_size,
+        facets={field: stats.facets.counts.get(field, {}) for field in ("category", "source")},
+        stats_age_seconds=round(stats.age, 3),
+    )
 
 
 @app.post("/index/create")
@@ -283,7 +861,7 @@ async def create_index():
         dict: Index creation status
     """
     try:
-        index_manager: SearchIndexManager = app.state.index_manager
+        index_manager = app.state.components.index_manager
         index = index_manager.create_index()
 
         return {
@@ -307,7 +885,7 @@ async def clear_conversation(session_id: str):
     Returns:
         dict: Clear status
     """
-    conversation_manager: ConversationManager = app.state.conversation_manager
+    conversation_manager = app.state.components.conversation_manager
     conversation_manager.clear_session(session_id)
 
     return {"status": "cleared", "session_id": session_id}
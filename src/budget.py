@@ -0,0 +1,170 @@
+"""
+Prompt budgeting for chat completions.
+
+Features:
+- Token measurement of system prompt, history, context and question
+- Fitting into a configurable total prompt budget (history trimmed first)
+- Per-query-class max_tokens policy
+"""
+import re
+from dataclasses import asdict, dataclass
+
+from .config import get_settings
+from .tokenizer import MESSAGE_OVERHEAD_TOKENS, REPLY_PRIMING_TOKENS, count_tokens
+
+# Default completion budgets per query class
+DEFAULT_MAX_TOKENS_POLICY = {
+    "factoid": 300,
+    "explanation": 800,
+    "procedure": 1200,
+    "summary": 1000,
+    "code": 1500,
+}
+
+_CODE_PATTERN = re.compile(
+    r"```|`[^`]+`|\b(code|snippet|sample|example|implement|function|python|sdk|cli)\b"
+    r"|コード|サンプル|実装|スクリプト",
+    re.IGNORECASE,
+)
+_SUMMARY_PATTERN = re.compile(r"\b(summari[sz]e|summary|overview|tl;?dr)\b|要約|まとめ|概要", re.IGNORECASE)
+_PROCEDURE_PATTERN = re.compile(
+    r"\b(how (to|do|can)|steps?|configure|set ?up|enable|deploy|install)\b"
+    r"|方法|手順|設定|有効化|構築|やり方",
+    re.IGNORECASE,
+)
+_EXPLANATION_PATTERN = re.compile(
+    r"\b(why|explain|difference|compare|versus|vs\.?)\b|なぜ|理由|違い|比較|説明|仕組み",
+    re.IGNORECASE,
+)
+
+
+def classify_query(question: str) -> str:
+    """
+    Cheaply classify a question for completion budgeting.
+
+    Returns:
+        str: One of factoid, explanation, procedure, summary, code
+    """
+    if _CODE_PATTERN.search(question):
+        return "code"
+    if _SUMMARY_PATTERN.search(question):
+        return "summary"
+    if _PROCEDURE_PATTERN.search(question):
+        return "procedure"
+    if _EXPLANATION_PATTERN.search(question):
+        return "explanation"
+    # Short questions without other cues are usually lookups
+    return "factoid" if len(question) <= 60 else "explanation"
+
+
+def parse_policy(spec: str) -> dict[str, int]:
+    """Parse ``class=tokens,...`` overrides on top of the default policy."""
+    policy = dict(DEFAULT_MAX_TOKENS_POLICY)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        policy[name.strip()] = int(value)
+    return policy
+
+
+@dataclass
+class PromptBudget:
+    """Token accounting for a single request."""
+
+    query_class: str
+    max_tokens: int
+    fixed_tokens: int = 0
+    context_budget: int = 0
+    context_tokens: int = 0
+    history_tokens: int = 0
+    history_messages_dropped: int = 0
+
+    @property
+    def prompt_tokens(self) -> int:
+        """Estimated prompt tokens (system + question + context + history)."""
+        return self.fixed_tokens + self.context_tokens + self.history_tokens
+
+    def to_dict(self) -> dict:
+        return asdict(self) | {"prompt_tokens": self.prompt_tokens}
+
+
+class PromptBudgeter:
+    """
+    Fits prompts into a total token budget.
+
+    Allocation order: system prompt and question are fixed, context gets
+    up to ``max_context_tokens`` of the remainder, and conversation
+    history only gets what is left (oldest turns dropped first).
+    """
+
+    def __init__(
+        self,
+        total_budget: int | None = None,
+        max_context_tokens: int = 4000,
+        policy: dict[str, int] | None = None,
+    ):
+        """
+        Initialize budgeter.
+
+        Args:
+            total_budget: Maximum prompt tokens per request (settings default if None)
+            max_context_tokens: Upper bound for retrieved context
+            policy: max_tokens per query class (settings default if None)
+        """
+        settings = get_settings()
+        self.total_budget = total_budget or settings.prompt_token_budget
+        self.max_context_tokens = max_context_tokens
+        self.policy = policy or parse_policy(settings.max_tokens_policy)
+
+    def plan(self, system_prompt: str, user_template_tokens: int, question: str) -> PromptBudget:
+        """
+        Compute fixed costs, context budget and max_tokens for a question.
+
+        Args:
+            system_prompt: System message content
+            user_template_tokens: Tokens of the user message without context
+            question: User question (for classification)
+
+        Returns:
+            PromptBudget: Budget with context_budget filled in
+        """
+        query_class = classify_query(question)
+        fixed = (
+            REPLY_PRIMING_TOKENS
+            + 2 * MESSAGE_OVERHEAD_TOKENS
+            + count_tokens(system_prompt)
+            + user_template_tokens
+        )
+        return PromptBudget(
+            query_class=query_class,
+            max_tokens=self.policy.get(query_class, self.policy["explanation"]),
+            fixed_tokens=fixed,
+            context_budget=max(0, min(self.max_context_tokens, self.total_budget - fixed)),
+        )
+
+    def fit_history(
+        self,
+        budget: PromptBudget,
+        history: list[dict] | None,
+    ) -> list[dict]:
+        """
+        Trim conversation history to the tokens left after context.
+
+        Whole turns are dropped oldest-first so user/assistant pairs stay aligned.
+        """
+        if not history:
+            return []
+
+        available = self.total_budget - budget.fixed_tokens - budget.context_tokens
+        costs = [MESSAGE_OVERHEAD_TOKENS + count_tokens(m.get("content") or "") for m in history]
+
+        start = 0
+        total = sum(costs)
+        while start < len(history) and total > available:
+            # Drop a full turn (user + assistant) when possible
+            step = 2 if start + 1 < len(history) else 1
+            total -= sum(costs[start : start + step])
+            start += step
+
+        budget.history_tokens = total
+        budget.history_messages_dropped = start
+        return history[start:]
@@ -0,0 +1,420 @@
+"""
+Ingestion checkpoints for resumable blob ingestion.
+
+Features:
+- SQLite (WAL) journal of ingestion runs in the job store database,
+  keyed by container, prefix and index: an interrupted run (crash, OOM, network error) resumes where
+  it stopped instead of starting from zero
+- Blob listing continuation token of the page being ingested
+- Completed and failed document ids (skipped before download on resume)
+- Embedded chunks that are not uploaded yet, so embeddings already paid
+  for are uploaded on resume instead of being recomputed
+- Dead-letter list of failed documents and chunks, replayed separately
+  (DocumentIngestionPipeline.replay_dead_letters)
+- A run aborts (and stays resumable) after
+  INGEST_MAX_CONSECUTIVE_FAILURES documents fail in a row
+- Finished runs are pruned after INGEST_CHECKPOINT_RETENTION_DAYS
+
+Usage:
+    python -m src.checkpoint runs
+    python -m src.checkpoint dead-letters [--run RUN_ID]
+    python -m src.checkpoint replay [--run RUN_ID]
+"""
+import argparse
+import json
+import sys
+import time
+import uuid
+from collections.abc import Iterator
+from functools import lru_cache
+
+from .config import get_settings
+from .sqlite_store import SQLiteStore
+from .telemetry import get_metrics
+
+# Run states
+RUNNING = "running"
+INTERRUPTED = "interrupted"
+COMPLETED = "completed"
+ABANDONED = "abandoned"
+
+# Document states within a run
+DONE = "done"
+FAILED = "failed"
+
+
+class IngestionAborted(RuntimeError):
+    """Too many documents failed in a row; the run is left resumable."""
+
+
+class IngestJournal(SQLiteStore):
+    """
+    SQLite-backed checkpoint journal.
+
+    Thread-safe; upload threads record results while documents are processed.
+    Stored in the job store's database unless INGEST_CHECKPOINT_DB names
+    another file. Finished runs are pruned after a retention period.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS ingest_runs (
+            id TEXT PRIMARY KEY,
+            key TEXT NOT NULL,
+            status TEXT NOT NULL,
+            continuation_token TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS ingest_runs_key ON ingest_runs (key, created_at);
+        CREATE TABLE IF NOT EXISTS ingest_documents (
+            run_id TEXT NOT NULL,
+            document_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            PRIMARY KEY (run_id, document_id)
+        );
+        CREATE TABLE IF NOT EXISTS ingest_chunks (
+            run_id TEXT NOT NULL,
+            chunk_id TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            PRIMARY KEY (run_id, chunk_id)
+        );
+        CREATE TABLE IF NOT EXISTS dead_letters (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            error TEXT,
+            created_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, retention_days: float | None = None):
+        """
+        Open (and create) the journal.
+
+        Args:
+            path: SQLite database path (":memory:" for tests)
+            retention_days: Days a completed or abandoned run (with its
+                documents and dead letters) is kept (settings default if None)
+        """
+        super().__init__(path)
+        retention = get_settings().ingest_checkpoint_retention_days if retention_days is None else retention_days
+        self.retention_seconds = retention * 86400
+
+    def open_run(self, key: str, resume: bool = True) -> "IngestCheckpoint":
+        """
+        Resume the unfinished run for ``key``, or start a new one.
+
+        Args:
+            key: Run identity (e.g. container/prefix and target index)
+            resume: Continue an unfinished run (False abandons it)
+
+        Returns:
+            IngestCheckpoint: Handle for recording the run's progress
+        """
+        self.prune()
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT id FROM ingest_runs WHERE key = ? AND status IN (?, ?) "
+                "ORDER BY created_at DESC LIMIT 1",
+                (key, RUNNING, INTERRUPTED),
+            ).fetchone()
+            if row is not None and resume:
+                run_id = row[0]
+                self._conn.execute(
+                    "UPDATE ingest_runs SET status = ?, updated_at = ? WHERE id = ?", (RUNNING, now, run_id)
+                )
+            else:
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE ingest_runs SET status = ?, updated_at = ? WHERE id = ?", (ABANDONED, now, row[0])
+                    )
+                    self._conn.execute("DELETE FROM ingest_chunks WHERE run_id = ?", (row[0],))
+                run_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO ingest_runs VALUES (?, ?, ?, NULL, ?, ?, NULL)", (run_id, key, RUNNING, now, now)
+                )
+        return IngestCheckpoint(self, run_id, resumed=row is not None and resume)
+
+    def prune(self, max_age: float | None = None) -> int:
+        """
+        Delete runs that finished (completed or abandoned) over ``max_age`` seconds ago.
+
+        Their documents, journaled chunks and dead letters are deleted too;
+        interrupted runs are kept for resume.
+
+        Args:
+            max_age: Seconds since the run finished (retention period if None)
+
+        Returns:
+            int: Runs deleted
+        """
+        cutoff = time.time() - (self.retention_seconds if max_age is None else max_age)
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            run_ids = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT id FROM ingest_runs WHERE status IN (?, ?) AND updated_at < ?",
+                    (COMPLETED, ABANDONED, cutoff),
+                )
+            ]
+            for table, column in (
+                ("ingest_documents", "run_id"),
+                ("ingest_chunks", "run_id"),
+                ("dead_letters", "run_id"),
+                ("ingest_runs", "id"),
+            ):
+                self._conn.executemany(f"DELETE FROM {table} WHERE {column} = ?", ((i,) for i in run_ids))
+        return len(run_ids)
+
+    def runs(self, limit: int = 20) -> list[dict]:
+        """Most recent runs with document and pending chunk counts."""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT r.id, r.key, r.status, r.continuation_token, r.created_at, r.updated_at, r.error,
+                    (SELECT COUNT(*) FROM ingest_documents d WHERE d.run_id = r.id AND d.status = ?),
+                    (SELECT COUNT(*) FROM ingest_documents d WHERE d.run_id = r.id AND d.status = ?),
+                    (SELECT COUNT(*) FROM ingest_chunks c WHERE c.run_id = r.id)
+                FROM ingest_runs r ORDER BY r.created_at DESC LIMIT ?
+                """,
+                (DONE, FAILED, limit),
+            ).fetchall()
+        keys = ("run_id", "key", "status", "continuation_token", "created_at", "updated_at", "error",
+                "documents_done", "documents_failed", "pending_chunks")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def dead_letters(self, run_id: str | None = None, kind: str | None = None) -> list[dict]:
+        """
+        Dead-lettered items, oldest first.
+
+        Args:
+            run_id: Only this run's items (all runs if None)
+            kind: "document" or "chunk" (both if None)
+
+        Returns:
+            list[dict]: Items with id, run_id, kind, key, payload, error, created_at
+        """
+        query = "SELECT id, run_id, kind, key, payload, error, created_at FROM dead_letters WHERE 1 = 1"
+        values: list = []
+        if run_id is not None:
+            query += " AND run_id = ?"
+            values.append(run_id)
+        if kind is not None:
+            query += " AND kind = ?"
+            values.append(kind)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id", values).fetchall()
+        keys = ("id", "run_id", "kind", "key", "payload", "error", "created_at")
+        return [dict(zip(keys, row[:4] + (json.loads(row[4]),) + row[5:])) for row in rows]
+
+    def remove_dead_letters(self, ids: list[int]) -> None:
+        """Delete dead letters (after a successful replay)."""
+        with self._lock:
+            self._conn.executemany("DELETE FROM dead_letters WHERE id = ?", ((i,) for i in ids))
+
+
+class IngestCheckpoint:
+    """
+    Progress of one ingestion run, written through to the journal.
+
+    Created by IngestJournal.open_run; see
+    DocumentIngestionPipeline.ingest_from_blob for how it is used.
+    """
+
+    def __init__(self, journal: IngestJournal, run_id: str, resumed: bool = False):
+        """
+        Initialize run handle.
+
+        Args:
+            journal: Journal the run is stored in
+            run_id: Run id
+            resumed: Whether the run continues an interrupted one
+        """
+        self.journal = journal
+        self.run_id = run_id
+        self.resumed = resumed
+        self.max_consecutive_failures = get_settings().ingest_max_consecutive_failures
+        self.dead_letter_count = 0
+        self._consecutive_failures = 0
+        self._conn = journal._conn
+        self._lock = journal._lock
+        self._dead_letters_total = get_metrics().counter(
+            "rag_ingest_dead_letters_total", "Documents and chunks dead-lettered during ingestion by kind"
+        )
+
+    @property
+    def position(self) -> str | None:
+        """Listing continuation token of the page to resume from (None: the start)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT continuation_token FROM ingest_runs WHERE id = ?", (self.run_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_position(self, token: str | None) -> None:
+        """Record the continuation token of the page being ingested."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE ingest_runs SET continuation_token = ?, updated_at = ? WHERE id = ?",
+                (token, time.time(), self.run_id),
+            )
+
+    def is_finished(self, document_id: str) -> bool:
+        """Whether the document is done or failed in this run."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM ingest_documents WHERE run_id = ? AND document_id = ?",
+                (self.run_id, document_id),
+            ).fetchone()
+        return row is not None
+
+    def add_chunks(self, chunks: list[dict]) -> None:
+        """Journal embedded chunks before they are uploaded."""
+        if not chunks:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ingest_chunks VALUES (?, ?, ?)",
+                ((self.run_id, chunk["id"], json.dumps(chunk, ensure_ascii=False)) for chunk in chunks),
+            )
+
+    def document_done(self, document_id: str, chunks: list[dict]) -> None:
+        """
+        Record a processed document with its chunks not journaled yet.
+
+        A document already recorded as failed stays failed.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ingest_chunks VALUES (?, ?, ?)",
+                ((self.run_id, chunk["id"], json.dumps(chunk, ensure_ascii=False)) for chunk in chunks),
+            )
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO ingest_documents VALUES (?, ?, ?)", (self.run_id, document_id, DONE)
+            )
+        if cursor.rowcount:
+            self._consecutive_failures = 0
+
+    def document_failed(self, document: dict, error: Exception) -> None:
+        """
+        Dead-letter a document that could not be processed.
+
+        Raises:
+            IngestionAborted: After max_consecutive_failures failures in a row
+        """
+        # Lazily loaded content is re-read from its source on replay
+        payload = {k: v for k, v in document.items() if k != "content" or isinstance(v, str)}
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ingest_documents VALUES (?, ?, ?)", (self.run_id, document["id"], FAILED)
+            )
+            self._dead_letter("document", document["id"], payload, str(error))
+        self._consecutive_failures += 1
+        if self.max_consecutive_failures and self._consecutive_failures >= self.max_consecutive_failures:
+            raise IngestionAborted(f"{self._consecutive_failures} documents failed in a row, last: {error}")
+
+    def uploaded(self, chunks: list[dict], result: dict, dead_letter: bool = False) -> None:
+        """
+        Record an upload batch result.
+
+        Uploaded chunks leave the journal; chunks the service rejected are
+        dead-lettered. If the whole request failed the chunks stay journaled
+        for a retry, unless ``dead_letter`` is set.
+
+        Args:
+            chunks: Uploaded batch
+            result: SearchIndexManager.upload_documents result
+            dead_letter: Dead-letter the chunks of a failed request
+        """
+        request_error = next((e["error"] for e in result["errors"] if "key" not in e), None)
+        if request_error is not None and not dead_letter:
+            return
+        rejected = {e["key"]: e["error"] for e in result["errors"] if "key" in e}
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "DELETE FROM ingest_chunks WHERE run_id = ? AND chunk_id = ?",
+                ((self.run_id, chunk["id"]) for chunk in chunks),
+            )
+            for chunk in chunks:
+                error = request_error or rejected.get(chunk["id"])
+                if error is not None:
+                    self._dead_letter("chunk", chunk["id"], chunk, error)
+
+    def pending_chunks(self, batch_size: int = 100) -> Iterator[list[dict]]:
+        """Journaled chunks not uploaded yet, in batches."""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT chunk_id, payload FROM ingest_chunks WHERE run_id = ? AND chunk_id > ? "
+                    "ORDER BY chunk_id LIMIT ?",
+                    (self.run_id, last, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [json.loads(payload) for _, payload in rows]
+
+    def finish(self, status: str, error: str | None = None) -> None:
+        """Mark the run completed or interrupted."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE ingest_runs SET status = ?, error = ?, updated_at = ?, "
+                "continuation_token = CASE WHEN ? = ? THEN NULL ELSE continuation_token END WHERE id = ?",
+                (status, error, time.time(), status, COMPLETED, self.run_id),
+            )
+
+    def _dead_letter(self, kind: str, key: str, payload: dict, error: str) -> None:
+        """Insert a dead letter (caller holds the lock and transaction)."""
+        self._conn.execute(
+            "INSERT INTO dead_letters (run_id, kind, key, payload, error, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.run_id, kind, key, json.dumps(payload, ensure_ascii=False), error, time.time()),
+        )
+        self.dead_letter_count += 1
+        self._dead_letters_total.inc(kind=kind)
+
+
+@lru_cache
+def get_ingest_journal() -> IngestJournal | None:
+    """Shared journal at INGEST_CHECKPOINT_DB (None when checkpoints are disabled)."""
+    path = get_settings().ingest_checkpoint_db
+    return IngestJournal(path) if path else None
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Inspect ingestion runs and replay dead letters")
+    parser.add_argument("command", choices=("runs", "dead-letters", "replay"))
+    parser.add_argument("--run", help="Limit to one run id")
+    args = parser.parse_args(argv)
+
+    journal = get_ingest_journal()
+    if journal is None:
+        print("Checkpoints are disabled (INGEST_CHECKPOINT_DB is empty)", file=sys.stderr)
+        return 1
+
+    if args.command == "runs":
+        result = journal.runs()
+    elif args.command == "dead-letters":
+        result = [
+            {k: v for k, v in item.items() if k != "payload"} for item in journal.dead_letters(args.run)
+        ]
+    else:
+        from .indexer import DocumentIngestionPipeline
+
+        result = DocumentIngestionPipeline().replay_dead_letters(args.run)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Shared Azure and OpenAI client registry.
+
+Features:
+- One client per endpoint, created on first use and shared by all components
+- One pooled transport per host (see transport.py)
+- One credential per process
+- SDK modules imported lazily so that importing ``src`` stays cheap
+"""
+import os
+from functools import lru_cache
+
+from .config import get_azure_credential, get_settings
+from .telemetry import azure_response_hook, openai_response_hook
+from .transport import (
+    get_azure_transport,
+    get_httpx_client,
+    register_pool_metrics,
+    reset_transports,
+)
+
+
+@lru_cache()
+def get_credential():
+    """Get the process-wide Azure AD credential."""
+    return get_azure_credential()
+
+
+@lru_cache()
+def get_openai_token_provider():
+    """
+    Get a caching bearer token provider for Azure OpenAI.
+
+    Tokens are reused until shortly before expiry instead of being
+    requested from the credential on every call.
+    """
+    from azure.identity import get_bearer_token_provider
+
+    return get_bearer_token_provider(
+        get_credential(), "https://cognitiveservices.azure.com/.default"
+    )
+
+
+@lru_cache()
+def get_search_credential():
+    """
+    Get credential for Azure AI Search.
+
+    Uses AZURE_SEARCH_API_KEY when set, otherwise the Azure AD credential.
+    """
+    api_key = os.getenv("AZURE_SEARCH_API_KEY")
+    if api_key:
+        from azure.core.credentials import AzureKeyCredential
+
+        return AzureKeyCredential(api_key)
+    return get_credential()
+
+
+@lru_cache(maxsize=None)
+def get_search_client(index_name: str | None = None):
+    """
+    Get shared SearchClient for an index.
+
+    Args:
+        index_name: Index name (defaults to AZURE_SEARCH_INDEX)
+    """
+    from azure.search.documents import SearchClient
+
+    settings = get_settings()
+    register_pool_metrics()
+    return SearchClient(
+        endpoint=settings.search_endpoint,
+        index_name=index_name or settings.search_index,
+        credential=get_search_credential(),
+        transport=get_azure_transport(settings.search_endpoint),
+        raw_response_hook=azure_response_hook("search"),
+    )
+
+
+@lru_cache()
+def get_search_index_client():
+    """Get shared SearchIndexClient for the search endpoint."""
+    from azure.search.documents.indexes import SearchIndexClient
+
+    settings = get_settings()
+    register_pool_metrics()
+    return SearchIndexClient(
+        endpoint=settings.search_endpoint,
+        credential=get_search_credential(),
+        transport=get_azure_transport(settings.search_endpoint),
+        raw_response_hook=azure_response_hook("search.indexes"),
+    )
+
+
+@lru_cache()
+def get_openai_client():
+    """Get shared AzureOpenAI client (embeddings and chat use one endpoint)."""
+    from openai import AzureOpenAI
+
+    settings = get_settings()
+    register_pool_metrics()
+    return AzureOpenAI(
+        azure_endpoint=settings.openai_endpoint,
+        azure_ad_token_provider=get_openai_token_provider(),
+        api_version=settings.openai_api_version,
+        http_client=get_httpx_client(
+            settings.openai_endpoint,
+            event_hooks={"response": [openai_response_hook("openai")]},
+        ),
+    )
+
+
+@lru_cache()
+def get_blob_service_client():
+    """Get shared BlobServiceClient (Azure AD authentication)."""
+    from azure.storage.blob import BlobServiceClient
+
+    settings = get_settings()
+    register_pool_metrics()
+    return BlobServiceClient(
+        account_url=settings.storage_account_url,
+        credential=get_credential(),
+        transport=get_azure_transport(settings.storage_account_url),
+    )
+
+
+def reset_clients() -> None:
+    """Drop all cached clients (e.g. after changing settings in tests)."""
+    for factory in (
+        get_credential,
+        get_openai_token_provider,
+        get_search_credential,
+        get_search_client,
+        get_search_index_client,
+        get_openai_client,
+        get_blob_service_client,
+    ):
+        factory.cache_clear()
+    reset_transports()
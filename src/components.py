@@ -0,0 +1,129 @@
+"""
+Lazily constructed application components.
+
+Features:
+- Components built on first use (thread-safe, at most once)
+- Shared clients and embedding service across query and ingestion
+- Optional background warm-up so the first request does not pay for
+  credential, client and tokenizer initialization
+"""
+import logging
+import threading
+import time
+
+from .telemetry import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AppComponents:
+    """
+    Container for the API's long-lived components.
+
+    Nothing is constructed in ``__init__``; each property builds its
+    component on first access. ``warm_up()`` touches everything ahead of
+    traffic and is safe to run concurrently with requests.
+    """
+
+    def __init__(self):
+        """Initialize empty container."""
+        from .rag_pipeline import ConversationManager
+
+        # In-memory only, nothing to warm
+        self.conversation_manager = ConversationManager()
+        self._instances: dict = {}
+        self._lock = threading.Lock()
+        self.ready = threading.Event()
+        self.warmup_error: Exception | None = None
+
+    def _get(self, name: str, factory):
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    start = time.perf_counter()
+                    instance = factory()
+                    get_metrics().histogram(
+                        "rag_component_init_seconds", "Component construction time"
+                    ).observe(time.perf_counter() - start, component=name)
+                    self._instances[name] = instance
+        return instance
+
+    @property
+    def rag_pipeline(self):
+        from .rag_pipeline import RAGPipeline
+
+        return self._get("rag_pipeline", RAGPipeline)
+
+    @property
+    def index_manager(self):
+        from .indexer import SearchIndexManager
+
+        return self._get("index_manager", SearchIndexManager)
+
+    @property
+    def ingestion_pipeline(self):
+        from .indexer import DocumentIngestionPipeline
+
+        return self._get("ingestion_pipeline", DocumentIngestionPipeline)
+
+    @property
+    def ingestion_jobs(self):
+        from .jobs import IngestionJobManager
+
+        # Workers build the ingestion pipeline on their first job
+        return self._get(
+            "ingestion_jobs",
+            lambda: IngestionJobManager(pipeline_factory=lambda: self.ingestion_pipeline),
+        )
+
+    @property
+    def index_stats(self):
+        from .index_stats import get_index_stats
+
+        return self._get("index_stats", get_index_stats)
+
+    @property
+    def reembedder(self):
+        from .reembed import ReEmbedder
+
+        return self._get("reembedder", ReEmbedder)
+
+    def shutdown(self) -> None:
+        """Stop background workers that were started."""
+        jobs = self._instances.get("ingestion_jobs")
+        if jobs is not None:
+            jobs.shutdown()
+        reembedder = self._instances.get("reembedder")
+        if reembedder is not None:
+            reembedder.stop()
+        index_stats = self._instances.get("index_stats")
+        if index_stats is not None:
+            index_stats.stop()
+
+    def warm_up(self) -> None:
+        """
+        Build all components and load the tokenizer.
+
+        Failures are logged and kept in ``warmup_error``; components are
+        retried on first use.
+        """
+        from .tokenizer import get_encoding
+
+        try:
+            self.rag_pipeline
+            self.index_manager
+            self.ingestion_pipeline
+            get_encoding()
+        except Exception as e:
+            self.warmup_error = e
+            logger.warning("Component warm-up failed: %s", e)
+        finally:
+            self.ready.set()
+
+    def start_warm_up(self) -> threading.Thread:
+        """Run warm_up() in a daemon thread."""
+        thread = threading.Thread(target=self.warm_up, name="component-warmup", daemon=True)
+        thread.start()
+        return thread
@@ -10,58 +10,216 @@ import os
 from functools import lru_cache
 from typing import Literal
 
-from azure.identity import (
-    AzureCliCredential,
-    DefaultAzureCredential,
-    ManagedIdentityCredential,
-    ClientSecretCredential,
-)
-from dotenv import load_dotenv
 
-load_dotenv()
+class Settings:
+    """
+    Application settings loaded from environment variables.
 
+    Values are read when the instance is created (see get_settings),
+    not at import time.
+    """
 
-class Settings:
-    """Application settings loaded from environment variables."""
+    def __init__(self):
+        # Azure AI Search
+        self.search_endpoint: str = os.getenv("AZURE_SEARCH_ENDPOINT", "")
+        self.search_index: str = os.getenv("AZURE_SEARCH_INDEX", "rag-documents")
 
-    # Azure AI Search
-    search_endpoint: str = os.getenv("AZURE_SEARCH_ENDPOINT", "")
-    search_index: str = os.getenv("AZURE_SEARCH_INDEX", "rag-documents")
+        # Azure OpenAI
+        self.openai_endpoint: str = os.getenv("AZURE_OPENAI_ENDPOINT", "")
+        self.openai_deployment_chat: str = os.getenv("AZURE_OPENAI_DEPLOYMENT_CHAT", "gpt-4o")
+        self.openai_deployment_embedding: str = os.getenv(
+            "AZURE_OPENAI_DEPLOYMENT_EMBEDDING", "text-embedding-ada-002"
+        )
+        self.openai_api_version: str = os.getenv(
+            "AZURE_OPENAI_API_VERSION", "2024-10-01-preview"
+        )
 
-    # Azure OpenAI
-    openai_endpoint: str = os.getenv("AZURE_OPENAI_ENDPOINT", "")
-    openai_deployment_chat: str = os.getenv("AZURE_OPENAI_DEPLOYMENT_CHAT", "gpt-4o")
-    openai_deployment_embedding: str = os.getenv(
-        "AZURE_OPENAI_DEPLOYMENT_EMBEDDING", "text-embedding-ada-002"
-    )
-    openai_api_version: str = os.getenv(
-        "AZURE_OPENAI_API_VERSION", "2024-10-01-preview"
-    )
+        # Azure Storage
+        self.storage_account_url: str = os.getenv("AZURE_STORAGE_ACCOUNT_URL", "")
+        self.storage_container: str = os.getenv("AZURE_STORAGE_CONTAINER", "documents")
 
-    # Azure Storage
-    storage_account_url: str = os.getenv("AZURE_STORAGE_ACCOUNT_URL", "")
-    storage_container: str = os.getenv("AZURE_STORAGE_CONTAINER", "documents")
+        # Authentication
+        self.auth_method: Literal["managed_identity", "azure_cli", "service_principal"] = (
+            os.getenv("AZURE_AUTH_METHOD", "azure_cli")
+        )
 
-    # Authentication
-    auth_method: Literal["managed_identity", "azure_cli", "service_principal"] = (
-        os.getenv("AZURE_AUTH_METHOD", "azure_cli")
-    )
+        # Service Principal credentials (if applicable)
+        self.client_id: str = os.getenv("AZURE_CLIENT_ID", "")
+        self.client_secret: str = os.getenv("AZURE_CLIENT_SECRET", "")
+        self.tenant_id: str = os.getenv("AZURE_TENANT_ID", "")
+
+        # RAG Configuration
+        self.rag_top_k: int = int(os.getenv("RAG_TOP_K", "5"))
+        # Minimum result score per executed search mode (0 disables): vector scores are
+        # cosine similarities, keyword scores unbounded BM25, hybrid scores RRF (~0.03 max)
+        self.rag_score_threshold: float = float(os.getenv("RAG_SCORE_THRESHOLD", "0.7"))
+        self.rag_keyword_score_threshold: float = float(os.getenv("RAG_KEYWORD_SCORE_THRESHOLD", "0"))
+        self.rag_hybrid_score_threshold: float = float(os.getenv("RAG_HYBRID_SCORE_THRESHOLD", "0"))
+        self.chunk_size: int = int(os.getenv("CHUNK_SIZE", "500"))
+        self.chunk_overlap: int = int(os.getenv("CHUNK_OVERLAP", "100"))
+
+        # Embedding output size: content_vector dimensions, and how they are produced
+        # ("native": model default, must equal EMBEDDING_DIMENSIONS; "api": the
+        # text-embedding-3 dimensions parameter; "truncate": first N dimensions of
+        # the native vector, renormalized)
+        self.embedding_dimensions: int = int(os.getenv("EMBEDDING_DIMENSIONS", "1536"))
+        self.embedding_dimensions_mode: Literal["native", "api", "truncate"] = os.getenv(
+            "EMBEDDING_DIMENSIONS_MODE", "native"
+        )
+
+        # Structure-aware chunking (headings, code blocks, tables) for Markdown
+        # documents (.md/.markdown sources or titles); false uses TextChunker
+        self.markdown_chunking: bool = os.getenv("MARKDOWN_CHUNKING", "true").lower() == "true"
+
+        # Document loaders: worker processes for CPU-bound extraction (PDF, DOCX;
+        # 0 extracts in the ingesting process), and encodings tried in order for
+        # text that is not UTF-8 when charset-normalizer is not installed
+        self.loader_processes: int = int(os.getenv("LOADER_PROCESSES", "2"))
+        self.loader_fallback_encodings: list[str] = [
+            name.strip()
+            for name in os.getenv("LOADER_FALLBACK_ENCODINGS", "cp932,euc_jp,cp1252").split(",")
+            if name.strip()
+        ]
+
+        # Ingestion dedup: "off", "drop" duplicates, or store them as "reference"
+        # chunks (no vector or content, duplicate_of -> first chunk). Near
+        # duplicates from estimated Jaccard similarity >= threshold (> 1 = exact
+        # only); chunks remembered per ingestion pipeline
+        self.dedup_mode: Literal["off", "drop", "reference"] = os.getenv("DEDUP_MODE", "off")
+        self.dedup_threshold: float = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+        self.dedup_max_chunks: int = int(os.getenv("DEDUP_MAX_CHUNKS", "50000"))
+
+        # Batch queries: questions retrieved/generated in parallel per batch
+        self.batch_query_concurrency: int = int(os.getenv("RAG_BATCH_CONCURRENCY", "8"))
+
+        # Embedding model migration: second deployment dual-written to
+        # content_vector_v2 (empty disables), its output dimensions and mode, the
+        # vector field queried by default, and the background re-embedder's pace
+        self.embedding_v2_deployment: str = os.getenv("AZURE_OPENAI_DEPLOYMENT_EMBEDDING_V2", "")
+        self.embedding_v2_dimensions: int = int(os.getenv("EMBEDDING_V2_DIMENSIONS", "1536"))
+        self.embedding_v2_dimensions_mode: Literal["native", "api", "truncate"] = os.getenv(
+            "EMBEDDING_V2_DIMENSIONS_MODE", "api"
+        )
+        self.search_vector_field: str = os.getenv("SEARCH_VECTOR_FIELD", "content_vector")
+        self.reembed_rate: float = float(os.getenv("REEMBED_RATE", "20"))
+        self.reembed_batch_size: int = int(os.getenv("REEMBED_BATCH_SIZE", "16"))
+        self.reembed_background: bool = os.getenv("REEMBED_BACKGROUND", "false").lower() == "true"
 
-    # Service Principal credentials (if applicable)
-    client_id: str = os.getenv("AZURE_CLIENT_ID", "")
-    client_secret: str = os.getenv("AZURE_CLIENT_SECRET", "")
-    tenant_id: str = os.getenv("AZURE_TENANT_ID", "")
+        # Precomputed query embeddings (built by python -m src.warm_cache; empty disables)
+        self.warm_cache_path: str = os.getenv("RAG_WARM_CACHE_PATH", "")
 
-    # RAG Configuration
-    rag_top_k: int = int(os.getenv("RAG_TOP_K", "5"))
-    rag_score_threshold: float = float(os.getenv("RAG_SCORE_THRESHOLD", "0.7"))
-    chunk_size: int = int(os.getenv("CHUNK_SIZE", "500"))
-    chunk_overlap: int = int(os.getenv("CHUNK_OVERLAP", "100"))
+        # Context expansion: neighbor chunks added on each side of a hit (0 disables)
+        # and chunks kept in the process-wide LRU chunk store
+        self.context_window: int = int(os.getenv("RAG_CONTEXT_WINDOW", "0"))
+        self.chunk_cache_size: int = int(os.getenv("RAG_CHUNK_CACHE_SIZE", "10000"))
+
+        # Search planning: filters estimated to match at least this fraction of the
+        # index run as vector post-filters with oversampled k (capped at max k);
+        # more selective filters run as pre-filters.
+        self.post_filter_min_selectivity: float = float(
+            os.getenv("SEARCH_POSTFILTER_MIN_SELECTIVITY", "0.5")
+        )
+        self.vector_max_k: int = int(os.getenv("SEARCH_VECTOR_MAX_K", "1000"))
+
+        # Query routing for search mode "auto": queries of at most the keyword max
+        # terms run keyword-only (no embedding), prose of at least the vector min
+        # terms runs vector-only, code/ID-heavy queries run hybrid with a lower
+        # vector weight, and other hybrid queries oversample k by the multiplier.
+        # Pre-filters estimated to leave at most the exhaustive max documents use
+        # exact kNN (0 disables).
+        self.query_routing: bool = os.getenv("SEARCH_QUERY_ROUTING", "true").lower() == "true"
+        self.router_keyword_max_terms: int = int(os.getenv("SEARCH_ROUTER_KEYWORD_MAX_TERMS", "3"))
+        self.router_vector_min_terms: int = int(os.getenv("SEARCH_ROUTER_VECTOR_MIN_TERMS", "32"))
+        self.router_lexical_vector_weight: float = float(
+            os.getenv("SEARCH_ROUTER_LEXICAL_VECTOR_WEIGHT", "0.5")
+        )
+        self.router_hybrid_k_multiplier: float = float(os.getenv("SEARCH_ROUTER_HYBRID_K_MULTIPLIER", "2"))
+        self.exhaustive_max_documents: int = int(os.getenv("SEARCH_EXHAUSTIVE_MAX_DOCUMENTS", "5000"))
+
+        # Index statistics (document count, facet counts, index size) served to
+        # /health and the search planner refresh in the background every interval
+        # (SEARCH_FACET_TTL is the older name of the setting)
+        self.index_stats_interval: float = float(
+            os.getenv("INDEX_STATS_INTERVAL", os.getenv("SEARCH_FACET_TTL", "60"))
+        )
+
+        # Index schema: vector profile preset (default/compact/binary) and
+        # field=value overrides (e.g. "hnsw_m=8,ef_search=200,stored=false")
+        self.index_profile: str = os.getenv("INDEX_PROFILE", "default")
+        self.index_profile_overrides: str = os.getenv("INDEX_PROFILE_OVERRIDES", "")
+
+        # Blue/green reindexing: previous index versions kept for rollback and
+        # the minimum shadow/live document count ratio accepted at cutover
+        self.reindex_keep_versions: int = int(os.getenv("REINDEX_KEEP_VERSIONS", "1"))
+        self.reindex_min_count_ratio: float = float(os.getenv("REINDEX_MIN_COUNT_RATIO", "0.9"))
+
+        # Prompt budgeting: total prompt tokens and max_tokens per query class
+        # (e.g. "factoid=300,procedure=1200"; unspecified classes keep defaults)
+        self.prompt_token_budget: int = int(os.getenv("RAG_PROMPT_TOKEN_BUDGET", "6000"))
+        self.max_tokens_policy: str = os.getenv("RAG_MAX_TOKENS_POLICY", "")
+
+        # LLM admission control, off by default (0 disables a budget); set TPM to the
+        # deployment quota to enable it. RPM defaults to 6 per 1000 TPM, and the
+        # burst (a minute of budget) must hold several max-size requests
+        self.admission_tpm: int = int(os.getenv("ADMISSION_TPM", "0"))
+        self.admission_rpm: int = int(
+            os.getenv("ADMISSION_RPM", str(self.admission_tpm * 6 // 1000))
+        )
+        self.admission_burst_seconds: float = float(os.getenv("ADMISSION_BURST_SECONDS", "60"))
+        self.admission_expected_completion_tokens: int = int(
+            os.getenv("ADMISSION_EXPECTED_COMPLETION_TOKENS", "500")
+        )
+        self.admission_deadline_interactive: float = float(
+            os.getenv("ADMISSION_DEADLINE_INTERACTIVE", "5")
+        )
+        self.admission_deadline_standard: float = float(
+            os.getenv("ADMISSION_DEADLINE_STANDARD", "15")
+        )
+        self.admission_deadline_batch: float = float(
+            os.getenv("ADMISSION_DEADLINE_BATCH", "120")
+        )
+
+        # Background ingestion jobs (SQLite job store enables resume after restart)
+        self.ingest_job_db: str = os.getenv("INGEST_JOB_DB", ".ingest_jobs.sqlite3")
+        self.ingest_workers: int = int(os.getenv("INGEST_WORKERS", "2"))
+        self.ingest_batch_documents: int = int(os.getenv("INGEST_BATCH_DOCUMENTS", "20"))
+        # Streaming ingestion: parsed documents buffered ahead of processing,
+        # and upload batches in flight
+        self.ingest_stream_buffer: int = int(os.getenv("INGEST_STREAM_BUFFER", "64"))
+        self.ingest_upload_concurrency: int = int(os.getenv("INGEST_UPLOAD_CONCURRENCY", "4"))
+        # Blob ingestion checkpoints (resume after a crash, dead letters), stored
+        # in the job store database unless set (empty disables); finished runs are
+        # kept for the retention period; a run aborts after this many documents
+        # fail in a row (0: never)
+        self.ingest_checkpoint_db: str = os.getenv("INGEST_CHECKPOINT_DB", self.ingest_job_db)
+        self.ingest_checkpoint_retention_days: float = float(
+            os.getenv("INGEST_CHECKPOINT_RETENTION_DAYS", "7")
+        )
+        self.ingest_max_consecutive_failures: int = int(os.getenv("INGEST_MAX_CONSECUTIVE_FAILURES", "10"))
+
+        # Shared HTTP pools (one per host); HTTP2=auto uses HTTP/2 for OpenAI if h2 is installed
+        self.http_pool_maxsize: int = int(os.getenv("HTTP_POOL_MAXSIZE", "100"))
+        self.http_pool_keepalive: int = int(os.getenv("HTTP_POOL_KEEPALIVE", "20"))
+        self.http_keepalive_expiry: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+        self.http_connect_timeout: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+        self.http_read_timeout: float = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+        self.http2: str = os.getenv("HTTP2", "auto")
+
+        # Startup: "background" warms clients after startup, "eager" warms before
+        # accepting traffic, "lazy" builds components on first request
+        self.warmup_mode: str = os.getenv("RAG_WARMUP", "background")
+
+        # Telemetry (OTLP export is optional and requires opentelemetry-sdk)
+        self.otlp_endpoint: str = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")
+        self.otel_service_name: str = os.getenv("OTEL_SERVICE_NAME", "azure-rag-agent-poc")
 
 
 @lru_cache()
 def get_settings() -> Settings:
-    """Get cached settings instance."""
+    """Get cached settings instance (loads .env on first call)."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
     return Settings()
 
 
@@ -78,6 +236,13 @@ def get_azure_credential():
         3. Service Principal (CI/CD pipelines)
         4. Default (auto-detect)
     """
+    from azure.identity import (
+        AzureCliCredential,
+        ClientSecretCredential,
+        DefaultAzureCredential,
+        ManagedIdentityCredential,
+    )
+
     settings = get_settings()
 
     match settings.auth_method:
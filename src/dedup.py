@@ -0,0 +1,241 @@
+"""
+Chunk deduplication at ingestion time.
+
+Features:
+- Exact duplicates by hash of the normalized chunk text
+- Near duplicates by MinHash over token shingles, with LSH banding for
+  candidate lookup and the signature agreement (estimated Jaccard
+  similarity) checked against DEDUP_THRESHOLD
+- CJK text is shingled over character bigrams, other text over words
+- Bounded memory: the oldest chunks are forgotten past DEDUP_MAX_CHUNKS
+- Re-ingesting a document first forgets its previous chunks, so a new
+  version is never a duplicate of itself
+
+Runs inside DocumentProcessor before embedding, so duplicates cost no
+embedding calls. DEDUP_MODE decides what is stored for them (see
+DocumentProcessor.process_document).
+"""
+import hashlib
+import random
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Literal
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Mersenne prime modulus for the MinHash permutations
+_PRIME = (1 << 61) - 1
+_SEED = 1
+
+
+@dataclass(frozen=True)
+class Duplicate:
+    """A chunk already seen during ingestion."""
+
+    kind: Literal["exact", "near"]
+    # Index key of the first chunk with this content
+    canonical_id: str
+    similarity: float = 1.0
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase with whitespace collapsed."""
+    return " ".join(text.lower().split())
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens; CJK runs are split into character bigrams."""
+    tokens = []
+    for word in _TOKEN_PATTERN.findall(text.lower()):
+        if word.isascii() or len(word) < 2:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i : i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def shingles(text: str, size: int = 3) -> set[int]:
+    """64-bit hashes of overlapping ``size``-token shingles."""
+    tokens = tokenize(text)
+    if len(tokens) <= size:
+        grams = [" ".join(tokens)]
+    else:
+        grams = [" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)]
+    return {
+        int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=8).digest(), "little")
+        for gram in grams
+    }
+
+
+class MinHasher:
+    """MinHash signatures from universal hash permutations."""
+
+    def __init__(self, num_perm: int = 64, seed: int = _SEED):
+        """
+        Initialize hasher.
+
+        Args:
+            num_perm: Signature length
+            seed: Seed for the permutation coefficients
+        """
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)
+        ]
+
+    def signature(self, hashes: set[int]) -> array:
+        """Minimum permuted hash per permutation."""
+        values = list(hashes) or [0]
+        return array("Q", [min([(a * h + b) % _PRIME for h in values]) for a, b in self.permutations])
+
+
+def similarity(left: array, right: array) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+class ChunkDeduplicator:
+    """
+    Finds exact and near-duplicate chunks among those seen so far.
+
+    Thread-safe; one instance is shared by the ingestion pipeline.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        max_chunks: int = 50000,
+    ):
+        """
+        Initialize deduplicator.
+
+        Args:
+            threshold: Estimated Jaccard similarity at which chunks are near
+                duplicates (above 1.0 finds exact duplicates only)
+            num_perm: MinHash signature length
+            bands: LSH bands (num_perm must be divisible by bands); more bands
+                find less similar candidates at higher lookup cost
+            shingle_size: Tokens per shingle
+            max_chunks: Chunks remembered before the oldest are forgotten
+
+        Raises:
+            ValueError: If num_perm is not divisible by bands
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_chunks = max_chunks
+        self.hasher = MinHasher(num_perm)
+
+        # chunk id -> (document id, exact digest, signature or None)
+        self._chunks: OrderedDict[str, tuple[str, bytes, array | None]] = OrderedDict()
+        self._exact: dict[bytes, str] = {}
+        self._buckets: dict[tuple[int, bytes], set[str]] = {}
+        self._documents: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    @property
+    def near(self) -> bool:
+        """Whether near-duplicate detection is enabled."""
+        return self.threshold <= 1.0
+
+    def check(self, document_id: str, chunk_id: str, text: str) -> Duplicate | None:
+        """
+        Look up a chunk, remembering it when it is new.
+
+        Args:
+            document_id: Parent document ID
+            chunk_id: Index key of the chunk
+            text: Chunk text
+
+        Returns:
+            Duplicate | None: The earlier chunk it duplicates, or None if new
+        """
+        digest = hashlib.blake2b(normalize_text(text).encode(), digest_size=16).digest()
+        signature = self.hasher.signature(shingles(text, self.shingle_size)) if self.near else None
+
+        with self._lock:
+            canonical = self._exact.get(digest)
+            if canonical is not None:
+                return Duplicate("exact", canonical)
+
+            if signature is not None:
+                best: Duplicate | None = None
+                for candidate in self._candidates(signature):
+                    score = similarity(signature, self._chunks[candidate][2])
+                    if score >= self.threshold and (best is None or score > best.similarity):
+                        best = Duplicate("near", candidate, score)
+                if best is not None:
+                    return best
+
+            self._remember(document_id, chunk_id, digest, signature)
+            return None
+
+    def forget_document(self, document_id: str) -> None:
+        """Forget a document's chunks (before it is re-ingested)."""
+        with self._lock:
+            for chunk_id in list(self._documents.get(document_id, ())):
+                self._forget(chunk_id)
+
+    def clear(self) -> None:
+        """Forget all chunks."""
+        with self._lock:
+            self._chunks.clear()
+            self._exact.clear()
+            self._buckets.clear()
+            self._documents.clear()
+
+    def _band_keys(self, signature: array) -> list[tuple[int, bytes]]:
+        rows = self.rows
+        return [(band, signature[band * rows : (band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+    def _candidates(self, signature: array) -> set[str]:
+        found: set[str] = set()
+        for key in self._band_keys(signature):
+            found.update(self._buckets.get(key, ()))
+        return found
+
+    def _remember(self, document_id: str, chunk_id: str, digest: bytes, signature: array | None) -> None:
+        if chunk_id in self._chunks:
+            self._forget(chunk_id)
+        self._chunks[chunk_id] = (document_id, digest, signature)
+        self._exact[digest] = chunk_id
+        if signature is not None:
+            for key in self._band_keys(signature):
+                self._buckets.setdefault(key, set()).add(chunk_id)
+        self._documents.setdefault(document_id, set()).add(chunk_id)
+
+        while len(self._chunks) > self.max_chunks:
+            oldest = next(iter(self._chunks))
+            self._forget(oldest)
+
+    def _forget(self, chunk_id: str) -> None:
+        entry = self._chunks.pop(chunk_id, None)
+        if entry is None:
+            return
+        document_id, digest, signature = entry
+        chunk_ids = self._documents[document_id]
+        chunk_ids.discard(chunk_id)
+        if not chunk_ids:
+            del self._documents[document_id]
+        if self._exact.get(digest) == chunk_id:
+            del self._exact[digest]
+        if signature is not None:
+            for key in self._band_keys(signature):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(chunk_id)
+                    if not bucket:
+                        del self._buckets[key]
@@ -3,17 +3,54 @@ Embedding module for document vectorization.
 
 Features:
 - Semantic chunking with overlap
+- Structure-aware chunking for Markdown (see markdown_chunker.py)
 - Token-aware splitting using tiktoken
 - Batch embedding for efficiency
+- Precomputed query embeddings from the warm cache
+- Optional second embedding model (v2) dual-written during migrations
+- Reduced output dimensions (API ``dimensions`` or Matryoshka truncation)
+- Duplicate chunks skipped before embedding (see dedup.py)
+- Streamed documents (see loaders.py) chunked and embedded in batches
 - Async support for high throughput
 """
 import asyncio
-from typing import Generator
+import math
+import re
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Generator
 
-import tiktoken
-from openai import AzureOpenAI
+from .clients import get_openai_client
+from .config import get_settings
+from .dedup import ChunkDeduplicator
+from .markdown_chunker import TITLE_SEPARATOR, MarkdownChunker, is_markdown
+from .telemetry import get_metrics, record_cache, span
+from .tokenizer import get_encoding
+from .warm_cache import get_warm_cache
 
-from .config import get_settings, get_openai_token
+# Index vector field filled by each embedding version
+VECTOR_FIELDS = {1: "content_vector", 2: "content_vector_v2"}
+
+# How output dimensions are produced (see EmbeddingService)
+DIMENSION_MODES = ("native", "api", "truncate")
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+# Streamed text without a sentence boundary is cut here (token-split later anyway)
+_MAX_SENTENCE_CHARS = 100_000
+
+
+def truncate_embedding(vector: list[float], dimensions: int) -> list[float]:
+    """
+    Shorten an embedding to its first ``dimensions`` values and L2-normalize.
+
+    text-embedding-3 models are trained so that prefixes of the vector are
+    embeddings themselves (Matryoshka representation); this matches what the
+    API returns for the same ``dimensions`` parameter.
+    """
+    head = vector[:dimensions]
+    norm = math.sqrt(sum(v * v for v in head))
+    return [v / norm for v in head] if norm else head
 
 
 class TextChunker:
@@ -40,7 +77,7 @@ class TextChunker:
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.encoding = tiktoken.encoding_for_model(model)
+        self.encoding = get_encoding(model)
 
     def _count_tokens(self, text: str) -> int:
         """Count tokens in text."""
@@ -48,16 +85,34 @@ class TextChunker:
 
     def _split_into_sentences(self, text: str) -> list[str]:
         """Split text into sentences for semantic boundaries."""
-        import re
-
         # Split on sentence boundaries
-        sentences = re.split(r"(?<=[.!?])\s+", text)
+        sentences = _SENTENCE_BOUNDARY.split(text)
         return [s.strip() for s in sentences if s.strip()]
 
-    def chunk_text(self, text: str) -> Generator[dict, None, None]:
+    def _iter_sentences(self, pieces: Iterable[str]) -> Iterator[str]:
+        """Split streamed text pieces into sentences (same result as the joined text)."""
+        pending = ""
+        for piece in pieces:
+            pending += piece
+            sentences = _SENTENCE_BOUNDARY.split(pending)
+            # The last part may continue in the next piece
+            pending = sentences.pop()
+            if len(pending) > _MAX_SENTENCE_CHARS:
+                sentences.append(pending)
+                pending = ""
+            for sentence in sentences:
+                if sentence.strip():
+                    yield sentence.strip()
+        if pending.strip():
+            yield pending.strip()
+
+    def chunk_text(self, text: str | Iterable[str]) -> Generator[dict, None, None]:
         """
         Split text into overlapping chunks.
 
+        Args:
+            text: Text, or text pieces as a loader streams them
+
         Yields:
             dict: Chunk with text and metadata
                 - text: Chunk content
@@ -65,7 +120,7 @@ class TextChunker:
                 - end_token: End position
                 - token_count: Number of tokens
         """
-        sentences = self._split_into_sentences(text)
+        sentences = self._split_into_sentences(text) if isinstance(text, str) else self._iter_sentences(text)
         current_chunk: list[str] = []
         current_tokens = 0
         chunk_start = 0
@@ -177,34 +232,86 @@ class EmbeddingService:
     - Batch embedding for efficiency
     - Azure AD token authentication
     - Automatic retry with exponential backoff
+    - Warm cache lookup for frequent queries (embed_text only)
+    - Reduced output dimensions for text-embedding-3 models
     """
 
-    def __init__(self):
-        """Initialize embedding service with Azure OpenAI client."""
+    def __init__(
+        self,
+        deployment: str | None = None,
+        dimensions: int | None = None,
+        dimensions_mode: str | None = None,
+    ):
+        """
+        Initialize embedding service with the shared Azure OpenAI client.
+
+        Args:
+            deployment: Embedding deployment (AZURE_OPENAI_DEPLOYMENT_EMBEDDING
+                with EMBEDDING_DIMENSIONS[_MODE] if None)
+            dimensions: Output dimensions for models that support shortening
+                (model default if None)
+            dimensions_mode: How ``dimensions`` is applied: "api" (default)
+                sends the dimensions parameter, "truncate" shortens native
+                vectors locally, "native" ignores it
+
+        Raises:
+            ValueError: If the mode is unknown or "truncate" has no dimensions
+        """
         settings = get_settings()
 
-        self.client = AzureOpenAI(
-            azure_endpoint=settings.openai_endpoint,
-            azure_ad_token_provider=get_openai_token,
-            api_version=settings.openai_api_version,
+        if deployment is None:
+            dimensions = dimensions or settings.embedding_dimensions
+            dimensions_mode = dimensions_mode or settings.embedding_dimensions_mode
+        dimensions_mode = dimensions_mode or "api"
+        if dimensions_mode not in DIMENSION_MODES:
+            raise ValueError(f"Unknown embedding dimensions mode: {dimensions_mode}")
+        if dimensions_mode == "truncate" and not dimensions:
+            raise ValueError("Truncated embeddings need dimensions")
+
+        self.client = get_openai_client()
+        self.deployment = deployment or settings.openai_deployment_embedding
+        self.dimensions = dimensions
+        self.dimensions_mode = dimensions_mode
+        # The warm cache holds vectors of the primary deployment at its configured size
+        is_primary = (
+            self.deployment == settings.openai_deployment_embedding
+            and (dimensions, dimensions_mode)
+            == (settings.embedding_dimensions, settings.embedding_dimensions_mode)
         )
-        self.deployment = settings.openai_deployment_embedding
+        self.warm_cache = get_warm_cache() if is_primary else None
+
+    def _embed(self, input) -> list[list[float]]:
+        """Call the embeddings API and apply the output dimensions."""
+        kwargs = {}
+        if self.dimensions and self.dimensions_mode == "api":
+            kwargs["dimensions"] = self.dimensions
+        response = self.client.embeddings.create(model=self.deployment, input=input, **kwargs)
+        vectors = [item.embedding for item in response.data]
+        if self.dimensions_mode == "truncate":
+            vectors = [truncate_embedding(v, self.dimensions) for v in vectors]
+        return vectors
 
     def embed_text(self, text: str) -> list[float]:
         """
         Generate embedding for single text.
 
+        Frequent queries are served from the warm cache when one is
+        configured.
+
         Args:
             text: Input text to embed
 
         Returns:
-            list[float]: Embedding vector (1536 dimensions for ada-002)
+            list[float]: Embedding vector (EMBEDDING_DIMENSIONS for the primary service)
         """
-        response = self.client.embeddings.create(
-            model=self.deployment,
-            input=text,
-        )
-        return response.data[0].embedding
+        if self.warm_cache is not None:
+            vector = self.warm_cache.get(text)
+            record_cache("query_embedding", vector is not None)
+            if vector is not None:
+                return vector
+
+        with span("embedding.embed_text"):
+            return self._embed(text)[0]
 
     def embed_batch(
         self,
@@ -225,45 +332,126 @@ class EmbeddingService:
 
         for i in range(0, len(texts), batch_size):
             batch = texts[i : i + batch_size]
-            response = self.client.embeddings.create(
-                model=self.deployment,
-                input=batch,
-            )
-            batch_embeddings = [item.embedding for item in response.data]
-            all_embeddings.extend(batch_embeddings)
+            with span("embedding.embed_batch"):
+                all_embeddings.extend(self._embed(batch))
 
         return all_embeddings
 
 
+@lru_cache()
+def get_embedding_service(version: int = 1) -> EmbeddingService:
+    """
+    Get the process-wide embedding service (shared by query and ingestion).
+
+    Args:
+        version: 1 for the primary deployment, 2 for the migration target
+            (AZURE_OPENAI_DEPLOYMENT_EMBEDDING_V2)
+
+    Raises:
+        ValueError: If version 2 is requested but not configured
+    """
+    settings = get_settings()
+    if version == 1:
+        return EmbeddingService()
+    if version != 2 or not settings.embedding_v2_deployment:
+        raise ValueError(f"Embedding version {version} is not configured")
+    return EmbeddingService(
+        settings.embedding_v2_deployment,
+        settings.embedding_v2_dimensions,
+        settings.embedding_v2_dimensions_mode,
+    )
+
+
+def vector_field_version(field: str) -> int:
+    """
+    Embedding version that fills a vector field.
+
+    Raises:
+        ValueError: If the field is not a known vector field
+    """
+    for version, name in VECTOR_FIELDS.items():
+        if name == field:
+            return version
+    raise ValueError(f"Unknown vector field: {field}")
+
+
 class DocumentProcessor:
     """
     End-to-end document processing pipeline.
 
-    Combines chunking and embedding for RAG indexing.
+    Combines chunking, deduplication and embedding for RAG indexing.
     """
 
     def __init__(self):
-        """Initialize processor with chunker and embedding service."""
+        """Initialize processor with chunker, deduplicator and embedding service(s)."""
         settings = get_settings()
         self.chunker = TextChunker(
             chunk_size=settings.chunk_size,
             chunk_overlap=settings.chunk_overlap,
         )
-        self.embedding_service = EmbeddingService()
+        self.markdown_chunker = (
+            MarkdownChunker(chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap)
+            if settings.markdown_chunking
+            else None
+        )
+        self.embedding_service = get_embedding_service()
+        # Dual-write the v2 vector while an embedding migration is in progress
+        self.embedding_service_v2 = get_embedding_service(2) if settings.embedding_v2_deployment else None
+        # Duplicates seen by this processor (one per ingestion pipeline / index)
+        self.dedup_mode = settings.dedup_mode
+        self.deduplicator = (
+            ChunkDeduplicator(threshold=settings.dedup_threshold, max_chunks=settings.dedup_max_chunks)
+            if self.dedup_mode != "off"
+            else None
+        )
+        self._duplicates_total = get_metrics().counter(
+            "rag_duplicate_chunks_total", "Duplicate chunks found at ingestion by kind"
+        )
+
+    def chunker_for(
+        self,
+        metadata: dict | None,
+        text_format: str | None = None,
+    ) -> TextChunker | MarkdownChunker:
+        """
+        Markdown chunker for Markdown text: ``text_format`` "markdown" (set by
+        the document loader), or else a source or title that is a Markdown file.
+        """
+        metadata = metadata or {}
+        if self.markdown_chunker is None or text_format == "text":
+            return self.chunker
+        if text_format == "markdown" or is_markdown(metadata.get("source")) or is_markdown(metadata.get("title")):
+            return self.markdown_chunker
+        return self.chunker
 
     def process_document(
         self,
         document_id: str,
-        text: str,
+        text: str | Iterable[str],
         metadata: dict | None = None,
+        progress: Callable[[str, int], None] | None = None,
+        text_format: str | None = None,
     ) -> list[dict]:
         """
         Process document into indexed chunks with embeddings.
 
+        Chunks duplicating an earlier chunk are not embedded. With
+        DEDUP_MODE=drop they are left out; with DEDUP_MODE=reference they
+        are kept as reference chunks without vectors, content or title,
+        whose ``duplicate_of`` names the first chunk with that content
+        (context expansion follows it).
+
+        Markdown documents are chunked along their structure, and each
+        chunk's title gets its heading path (``guide.md > Install > Linux``).
+
         Args:
             document_id: Unique document identifier
-            text: Document text content
+            text: Document text content (or text pieces from a loader)
             metadata: Additional metadata (source, category, etc.)
+            progress: Optional callback(stage, count) for "chunks",
+                "embeddings" and "duplicates"
+            text_format: "text" or "markdown" to choose the chunker (from the
+                metadata file names if None)
 
         Returns:
             list[dict]: Processed chunks ready for indexing
@@ -271,26 +459,118 @@ class DocumentProcessor:
                 - document_id: Parent document ID
                 - content: Chunk text
                 - content_vector: Embedding vector
+                - content_vector_v2, embedding_version: v2 embedding
+                  (only while dual-writing)
+                - duplicate_of: First chunk with this content (reference
+                  chunks only)
                 - metadata: Additional fields
         """
-        chunks = list(self.chunker.chunk_text(text))
+        return list(self.iter_process_document(
+            document_id, text, metadata, progress, text_format, batch_size=None
+        ))
+
+    def iter_process_document(
+        self,
+        document_id: str,
+        text: str | Iterable[str],
+        metadata: dict | None = None,
+        progress: Callable[[str, int], None] | None = None,
+        text_format: str | None = None,
+        batch_size: int | None = 64,
+    ) -> Iterator[dict]:
+        """
+        Process a document in batches of chunks, as its text is read.
 
-        # Extract chunk texts for batch embedding
-        chunk_texts = [c["text"] for c in chunks]
-        embeddings = self.embedding_service.embed_batch(chunk_texts)
+        Chunks are embedded and yielded ``batch_size`` at a time, so a large
+        document streamed by a loader is never held in memory as a whole.
+
+        Args:
+            document_id: Unique document identifier
+            text: Document text content (or text pieces from a loader)
+            metadata: Additional metadata (source, category, etc.)
+            progress: Optional callback(stage, count), reported per batch
+            text_format: "text" or "markdown" (see chunker_for)
+            batch_size: Chunks per batch (None: the whole document at once)
+
+        Yields:
+            dict: Processed chunks (see process_document)
+        """
+        chunks = self.chunker_for(metadata, text_format).chunk_text(text)
+        if self.deduplicator is not None:
+            self.deduplicator.forget_document(document_id)
+
+        start = 0
+        while batch := list(islice(chunks, batch_size)):
+            yield from self._process_batch(document_id, batch, start, metadata, progress)
+            start += len(batch)
+
+    def _process_batch(
+        self,
+        document_id: str,
+        chunks: list[dict],
+        start: int,
+        metadata: dict | None,
+        progress: Callable[[str, int], None] | None,
+    ) -> list[dict]:
+        """Dedup, embed and build index documents for chunks numbered from ``start``."""
+        chunk_ids = [f"{document_id}_chunk_{start + i}" for i in range(len(chunks))]
+
+        duplicates = [None] * len(chunks)
+        if self.deduplicator is not None:
+            with span("embedding.dedup", chunks=len(chunks)):
+                duplicates = [
+                    self.deduplicator.check(document_id, key, chunk["text"])
+                    for key, chunk in zip(chunk_ids, chunks)
+                ]
+        unique = [i for i, duplicate in enumerate(duplicates) if duplicate is None]
+
+        # Batch-embed the chunks seen for the first time
+        unique_texts = [chunks[i]["text"] for i in unique]
+        embeddings = dict(zip(unique, self.embedding_service.embed_batch(unique_texts)))
+        embeddings_v2 = (
+            dict(zip(unique, self.embedding_service_v2.embed_batch(unique_texts)))
+            if self.embedding_service_v2
+            else None
+        )
 
         # Build indexed documents
         processed_chunks = []
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+        for i, (chunk, duplicate) in enumerate(zip(chunks, duplicates)):
+            if duplicate is not None:
+                self._duplicates_total.inc(kind=duplicate.kind)
+                if self.dedup_mode == "reference":
+                    processed_chunks.append({
+                        "id": chunk_ids[i],
+                        "document_id": document_id,
+                        "content": "",
+                        "duplicate_of": duplicate.canonical_id,
+                        "chunk_index": start + i,
+                        "token_count": chunk["token_count"],
+                        # Title is searchable; references must not match queries
+                        **{k: v for k, v in (metadata or {}).items() if k != "title"},
+                        **({"embedding_version": 2} if embeddings_v2 is not None else {}),
+                    })
+                continue
             chunk_doc = {
-                "id": f"{document_id}_chunk_{i}",
+                "id": chunk_ids[i],
                 "document_id": document_id,
                 "content": chunk["text"],
-                "content_vector": embedding,
-                "chunk_index": i,
+                "content_vector": embeddings[i],
+                "chunk_index": start + i,
                 "token_count": chunk["token_count"],
                 **(metadata or {}),
             }
+            if chunk.get("title"):
+                chunk_doc["title"] = TITLE_SEPARATOR.join(
+                    filter(None, [(metadata or {}).get("title"), chunk["title"]])
+                )
+            if embeddings_v2 is not None:
+                chunk_doc[VECTOR_FIELDS[2]] = embeddings_v2[i]
+                chunk_doc["embedding_version"] = 2
             processed_chunks.append(chunk_doc)
 
+        if progress:
+            progress("chunks", len(chunks))
+            progress("embeddings", len(unique))
+            progress("duplicates", len(chunks) - len(unique))
         return processed_chunks
@@ -0,0 +1,293 @@
+"""
+Neighbor-chunk context expansion.
+
+Features:
+- Fetches chunks ±k around each hit by key (``{document_id}_chunk_{i}``)
+- One batched ``search.in(id, ...)`` lookup per query for uncached chunks
+- Process-wide LRU chunk store (including known-missing keys)
+- Adjacent chunks merged into one span with the chunk overlap removed
+- Deduplicated reference chunks resolved to the content they point to
+"""
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from functools import lru_cache
+
+from .clients import get_search_client
+from .config import get_settings
+from .retriever import SearchResult
+from .telemetry import record_cache, span
+
+# Fields needed to rebuild a neighbor chunk
+CHUNK_FIELDS = ("id", "document_id", "content", "source", "title", "category", "chunk_index")
+# Extra field of indexes holding deduplicated reference chunks (DEDUP_MODE=reference)
+REFERENCE_FIELD = "duplicate_of"
+
+# Cached marker for keys the index does not have (past the last chunk)
+_MISSING = object()
+
+
+def chunk_id(document_id: str, chunk_index: int) -> str:
+    """Index key of a document chunk (see DocumentProcessor)."""
+    return f"{document_id}_chunk_{chunk_index}"
+
+
+class ChunkStore:
+    """Thread-safe LRU cache of index chunks by key."""
+
+    def __init__(self, max_chunks: int = 10000):
+        """
+        Initialize store.
+
+        Args:
+            max_chunks: Maximum cached chunks (including missing-key markers)
+        """
+        self.max_chunks = max_chunks
+        self._chunks: OrderedDict[str, object] = OrderedDict()
+        # document_id -> cached keys, for invalidation
+        self._documents: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def get_many(self, keys: list[str]) -> tuple[dict[str, dict], list[str]]:
+        """
+        Look up chunks.
+
+        Returns:
+            tuple: (found chunks by key, keys not in the store); keys known
+                to be missing from the index are in neither
+        """
+        found, unknown = {}, []
+        with self._lock:
+            for key in keys:
+                chunk = self._chunks.get(key)
+                if chunk is None:
+                    unknown.append(key)
+                    continue
+                self._chunks.move_to_end(key)
+                if chunk is not _MISSING:
+                    found[key] = chunk
+        return found, unknown
+
+    def put_many(self, chunks: dict[str, dict | None]) -> None:
+        """Store chunks; a None value records that the key does not exist."""
+        with self._lock:
+            for key, chunk in chunks.items():
+                self._chunks[key] = _MISSING if chunk is None else chunk
+                self._chunks.move_to_end(key)
+                self._documents.setdefault(_document_of(key), set()).add(key)
+            while len(self._chunks) > self.max_chunks:
+                key, _ = self._chunks.popitem(last=False)
+                self._forget(key)
+
+    def invalidate(self, document_ids: Iterable[str]) -> None:
+        """Drop all cached chunks of the given documents (after re-ingestion)."""
+        with self._lock:
+            for document_id in document_ids:
+                for key in self._documents.pop(document_id, ()):
+                    self._chunks.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chunks.clear()
+            self._documents.clear()
+
+    def _forget(self, key: str) -> None:
+        document_id = _document_of(key)
+        keys = self._documents.get(document_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._documents[document_id]
+
+
+def _document_of(key: str) -> str:
+    return key.rsplit("_chunk_", 1)[0]
+
+
+@lru_cache()
+def get_chunk_store() -> ChunkStore:
+    """Get the process-wide chunk store."""
+    return ChunkStore(get_settings().chunk_cache_size)
+
+
+def merge_overlap(left: str, right: str) -> str:
+    """
+    Concatenate adjacent chunk texts, removing the repeated overlap.
+
+    The chunker starts each chunk with trailing sentences of the previous
+    one, so the longest suffix of ``left`` that is a word-aligned prefix
+    of ``right`` is dropped from ``right``.
+    """
+    limit = min(len(left), len(right))
+    boundary = len(right) if len(right) <= limit else right.rfind(" ", 0, limit + 1)
+    while boundary > 0:
+        if left.endswith(right[:boundary]) and (
+            boundary == len(left) or left[-boundary - 1].isspace()
+        ):
+            return left + right[boundary:]
+        boundary = right.rfind(" ", 0, boundary)
+    return f"{left} {right}"
+
+
+class ContextExpander:
+    """
+    Expands search hits with their neighboring chunks.
+
+    Hits from the same document whose windows touch are merged into one
+    span. Spans keep the best score of their hits and are returned in
+    the order of their best-ranked hit.
+    """
+
+    def __init__(self, window: int = 1, store: ChunkStore | None = None):
+        """
+        Initialize expander.
+
+        Args:
+            window: Neighbors fetched on each side of a hit
+            store: Chunk cache (process-wide store if None)
+        """
+        self.window = window
+        self.store = store or get_chunk_store()
+        self.search_client = get_search_client()
+        self.fields = CHUNK_FIELDS
+        if get_settings().dedup_mode == "reference":
+            self.fields += (REFERENCE_FIELD,)
+
+    def expand(self, results: list[SearchResult]) -> list[SearchResult]:
+        """
+        Replace hits with merged neighbor spans.
+
+        Hits without a ``chunk_index`` are passed through unchanged.
+
+        Args:
+            results: Ranked search results
+
+        Returns:
+            list[SearchResult]: Ranked spans (one per contiguous run of chunks)
+        """
+        if self.window <= 0 or not results:
+            return results
+
+        with span("context.expand", hits=len(results)):
+            # Hits come back from search with their content; only neighbors are looked up
+            chunks = {
+                chunk_id(r.document_id, r.chunk_index): {
+                    "document_id": r.document_id,
+                    "content": r.content,
+                    "source": r.source,
+                    "title": r.title,
+                    "category": r.category,
+                    "chunk_index": r.chunk_index,
+                }
+                for r in results
+                if r.chunk_index is not None
+            }
+            wanted: dict[str, None] = {}
+            for result in results:
+                if result.chunk_index is None:
+                    continue
+                start = max(0, result.chunk_index - self.window)
+                for index in range(start, result.chunk_index + self.window + 1):
+                    key = chunk_id(result.document_id, index)
+                    if key not in chunks:
+                        wanted[key] = None
+            chunks.update(self._fetch(list(wanted)))
+            return self._merge(results, chunks)
+
+    def _fetch(self, keys: list[str]) -> dict[str, dict]:
+        """Get chunks from the store, loading unknown keys in one query."""
+        found, unknown = self.store.get_many(keys)
+        missed = set(unknown)
+        for key in keys:
+            record_cache("chunk_store", key not in missed)
+        if not unknown:
+            return found
+
+        delimiter = "|" if any("," in key for key in unknown) else ","
+        values = delimiter.join(key.replace("'", "''") for key in unknown)
+        loaded: dict[str, dict | None] = dict.fromkeys(unknown)
+        for doc in self.search_client.search(
+            search_text="*",
+            filter=f"search.in(id, '{values}', '{delimiter}')",
+            select=list(self.fields),
+            top=len(unknown),
+        ):
+            loaded[doc["id"]] = {field: doc.get(field) for field in self.fields if field != "id"}
+
+        # Reference chunks carry no content; borrow it from the chunk they duplicate
+        references = {
+            key: chunk[REFERENCE_FIELD]
+            for key, chunk in loaded.items()
+            if chunk and chunk.get(REFERENCE_FIELD) and not chunk["content"]
+        }
+        if references:
+            originals = self._fetch(list(dict.fromkeys(references.values())))
+            for key, original in references.items():
+                if original in originals:
+                    loaded[key]["content"] = originals[original]["content"]
+
+        self.store.put_many(loaded)
+        found.update((key, chunk) for key, chunk in loaded.items() if chunk is not None)
+        return found
+
+    def _merge(self, results: list[SearchResult], chunks: dict[str, dict]) -> list[SearchResult]:
+        """Group hit windows into contiguous per-document spans."""
+        # document_id -> {chunk_index: (rank, score)} of hits
+        hits: dict[str, dict[int, tuple[int, float]]] = {}
+        passthrough: list[tuple[int, SearchResult]] = []
+        for rank, result in enumerate(results):
+            if result.chunk_index is None:
+                passthrough.append((rank, result))
+                continue
+            doc_hits = hits.setdefault(result.document_id, {})
+            previous = doc_hits.get(result.chunk_index)
+            doc_hits[result.chunk_index] = (
+                (previous[0], max(previous[1], result.score)) if previous else (rank, result.score)
+            )
+
+        spans: list[tuple[int, SearchResult]] = list(passthrough)
+        for document_id, doc_hits in hits.items():
+            covered = sorted({
+                index
+                for hit in doc_hits
+                for index in range(max(0, hit - self.window), hit + self.window + 1)
+                if chunk_id(document_id, index) in chunks
+            })
+            runs: list[list[int]] = []
+            for index in covered:
+                if runs and index == runs[-1][-1] + 1:
+                    runs[-1].append(index)
+                else:
+                    runs.append([index])
+
+            for run in runs:
+                run_hits = [doc_hits[i] for i in run if i in doc_hits]
+                if not run_hits:
+                    continue
+                first = chunks[chunk_id(document_id, run[0])]
+                content = first["content"] or ""
+                for index in run[1:]:
+                    content = merge_overlap(content, chunks[chunk_id(document_id, index)]["content"] or "")
+                spans.append((
+                    min(rank for rank, _ in run_hits),
+                    SearchResult(
+                        id=chunk_id(document_id, run[0]),
+                        document_id=document_id,
+                        content=content,
+                        score=max(score for _, score in run_hits),
+                        source=first.get("source"),
+                        # Reference chunks have no title
+                        title=next(
+                            (t for i in run if (t := chunks[chunk_id(document_id, i)].get("title"))),
+                            None,
+                        ),
+                        category=first.get("category"),
+                        chunk_index=run[0],
+                    ),
+                ))
+
+        spans.sort(key=lambda item: item[0])
+        return [result for _, result in spans]
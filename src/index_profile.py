@@ -0,0 +1,207 @@
+"""
+Vector index profiles for the search index schema.
+
+Features:
+- Named presets for vector compression (scalar/binary quantization with
+  rescoring), vector element type and HNSW parameters
+- ``stored=False`` vectors (searchable, not retrievable) to cut index size
+- ``key=value`` overrides on top of a preset (INDEX_PROFILE_OVERRIDES)
+- Vector storage estimates for comparing profiles
+"""
+from dataclasses import dataclass, fields, replace
+from typing import Literal
+
+from .config import get_settings
+
+ALGORITHM_NAME = "rag-hnsw-config"
+VECTOR_PROFILE_NAME = "rag-vector-profile"
+COMPRESSION_NAME = "rag-vector-compression"
+
+
+@dataclass(frozen=True)
+class IndexProfile:
+    """Vector field and vector search configuration of the index."""
+
+    name: str = "default"
+    # "none", "scalar" (int8) or "binary" (1 bit per dimension)
+    compression: Literal["none", "scalar", "binary"] = "none"
+    # Re-rank compressed candidates with full-precision vectors
+    rescore: bool = True
+    # Candidates fetched per requested result before rescoring
+    oversampling: float = 4.0
+    # Element type of the vector field: float32 ("single") or float16 ("half")
+    vector_type: Literal["single", "half"] = "single"
+    # Keep a retrievable copy of the vectors (needed for include_vectors)
+    stored: bool = True
+    hnsw_m: int = 4
+    ef_construction: int = 400
+    ef_search: int = 500
+    metric: Literal["cosine", "dotProduct", "euclidean"] = "cosine"
+
+    def __post_init__(self):
+        if self.compression not in ("none", "scalar", "binary"):
+            raise ValueError(f"Unknown compression: {self.compression}")
+        if self.vector_type not in ("single", "half"):
+            raise ValueError(f"Unknown vector type: {self.vector_type}")
+        if not 4 <= self.hnsw_m <= 10:
+            raise ValueError("hnsw_m must be between 4 and 10")
+        if not 100 <= self.ef_construction <= 1000 or not 100 <= self.ef_search <= 1000:
+            raise ValueError("ef_construction and ef_search must be between 100 and 1000")
+
+    def vector_bytes(self, dimensions: int) -> dict[str, float]:
+        """
+        Estimate per-vector storage.
+
+        Returns:
+            dict: Bytes for the HNSW graph vectors ("index"), full-precision
+                originals kept for rescoring ("originals") and the
+                retrievable copy ("stored")
+        """
+        element = 4 if self.vector_type == "single" else 2
+        full = dimensions * element
+        match self.compression:
+            case "scalar":
+                index = dimensions
+            case "binary":
+                index = dimensions / 8
+            case _:
+                index = full
+        originals = full if self.compression != "none" and self.rescore else 0
+        return {"index": index, "originals": originals, "stored": full if self.stored else 0}
+
+
+# Presets selectable with INDEX_PROFILE
+PROFILES = {
+    # Original schema: float32, no compression, retrievable vectors
+    "default": IndexProfile(),
+    # int8 quantization, float16 originals, vectors not retrievable
+    "compact": IndexProfile(
+        name="compact",
+        compression="scalar",
+        oversampling=4.0,
+        vector_type="half",
+        stored=False,
+        ef_search=200,
+    ),
+    # 1-bit quantization with heavier rescoring; smallest graph
+    "binary": IndexProfile(
+        name="binary",
+        compression="binary",
+        oversampling=10.0,
+        vector_type="single",
+        stored=False,
+        hnsw_m=8,
+        ef_search=400,
+    ),
+}
+
+
+def parse_overrides(spec: str) -> dict:
+    """Parse ``field=value,...`` overrides for IndexProfile fields."""
+    types = {f.name: f.type for f in fields(IndexProfile)}
+    overrides = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, raw = item.partition("=")
+        name, raw = name.strip(), raw.strip()
+        if name not in types or name == "name":
+            raise ValueError(f"Unknown index profile field: {name}")
+        if types[name] is bool:
+            overrides[name] = raw.lower() in ("1", "true", "yes")
+        elif types[name] in (int, float):
+            overrides[name] = types[name](raw)
+        else:
+            overrides[name] = raw
+    return overrides
+
+
+def get_index_profile(name: str | None = None, overrides: str | None = None) -> IndexProfile:
+    """
+    Resolve an index profile.
+
+    Args:
+        name: Preset name (INDEX_PROFILE if None)
+        overrides: ``field=value,...`` (INDEX_PROFILE_OVERRIDES if None)
+
+    Returns:
+        IndexProfile: Preset with overrides applied
+
+    Raises:
+        ValueError: If the preset or an override is unknown
+    """
+    settings = get_settings()
+    name = name or settings.index_profile
+    if name not in PROFILES:
+        raise ValueError(f"Unknown index profile: {name} (expected one of {', '.join(PROFILES)})")
+    spec = settings.index_profile_overrides if overrides is None else overrides
+    return replace(PROFILES[name], **parse_overrides(spec))
+
+
+def build_vector_field(profile: IndexProfile, dimensions: int, name: str = "content_vector"):
+    """Build the vector SearchField for a profile."""
+    from azure.search.documents.indexes.models import SearchField, SearchFieldDataType
+
+    element = SearchFieldDataType.Single if profile.vector_type == "single" else SearchFieldDataType.Half
+    return SearchField(
+        name=name,
+        type=SearchFieldDataType.Collection(element),
+        searchable=True,
+        # Non-stored vectors cannot be returned, so they must not be retrievable
+        retrievable=profile.stored,
+        stored=profile.stored,
+        vector_search_dimensions=dimensions,
+        vector_search_profile_name=VECTOR_PROFILE_NAME,
+    )
+
+
+def build_vector_search(profile: IndexProfile):
+    """Build the VectorSearch configuration (HNSW, compression, profile)."""
+    from azure.search.documents.indexes.models import (
+        BinaryQuantizationCompression,
+        HnswAlgorithmConfiguration,
+        RescoringOptions,
+        ScalarQuantizationCompression,
+        ScalarQuantizationParameters,
+        VectorSearch,
+        VectorSearchProfile,
+    )
+
+    compressions = []
+    if profile.compression != "none":
+        rescoring = RescoringOptions(
+            enable_rescoring=profile.rescore,
+            default_oversampling=profile.oversampling,
+            rescore_storage_method="preserveOriginals" if profile.rescore else "discardOriginals",
+        )
+        if profile.compression == "scalar":
+            compressions.append(ScalarQuantizationCompression(
+                compression_name=COMPRESSION_NAME,
+                rescoring_options=rescoring,
+                parameters=ScalarQuantizationParameters(quantized_data_type="int8"),
+            ))
+        else:
+            compressions.append(BinaryQuantizationCompression(
+                compression_name=COMPRESSION_NAME,
+                rescoring_options=rescoring,
+            ))
+
+    return VectorSearch(
+        algorithms=[
+            HnswAlgorithmConfiguration(
+                name=ALGORITHM_NAME,
+                parameters={
+                    "m": profile.hnsw_m,  # Bi-directional links per node
+                    "efConstruction": profile.ef_construction,  # Index build quality
+                    "efSearch": profile.ef_search,  # Search quality
+                    "metric": profile.metric,
+                },
+            ),
+        ],
+        compressions=compressions or None,
+        profiles=[
+            VectorSearchProfile(
+                name=VECTOR_PROFILE_NAME,
+                algorithm_configuration_name=ALGORITHM_NAME,
+                compression_name=COMPRESSION_NAME if compressions else None,
+            ),
+        ],
+    )
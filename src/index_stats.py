@@ -0,0 +1,221 @@
+"""
+Index statistics cached for health checks and search planning.
+
+Features:
+- One snapshot of document count, facet counts (category/source/document_id)
+  and index size (storage and vector index)
+- Refreshed in a background thread every INDEX_STATS_INTERVAL seconds
+  (start/stop), or on first use once stale; readers never wait
+- Snapshot age and the last refresh error for readiness checks
+- Index size is looked up through the alias when the index is one
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+from .clients import get_search_client, get_search_index_client
+from .config import get_settings
+from .search_planner import FACET_FIELDS, FACET_LIMIT, FacetSnapshot
+from .telemetry import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# A snapshot older than this many refresh intervals counts as stale for readiness
+STALE_AFTER_INTERVALS = 3
+
+
+@dataclass
+class IndexStats:
+    """Index statistics at one point in time."""
+
+    document_count: int
+    facets: FacetSnapshot
+    # Bytes (None if the service did not report them)
+    storage_size: int | None
+    vector_index_size: int | None
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        """Seconds since the snapshot was fetched."""
+        return time.monotonic() - self.fetched_at
+
+
+class IndexStatsService:
+    """
+    Index statistics refreshed in the background.
+
+    ``get()`` always returns the cached snapshot. ``start()`` refreshes it
+    every ``interval`` seconds; without the loop, a stale snapshot starts
+    a single background refresh. Counts are None until the first refresh.
+    """
+
+    def __init__(
+        self,
+        index_name: str | None = None,
+        interval: float | None = None,
+        search_client=None,
+        index_client=None,
+    ):
+        """
+        Initialize service.
+
+        Args:
+            index_name: Index or alias (AZURE_SEARCH_INDEX if None)
+            interval: Seconds between refreshes (INDEX_STATS_INTERVAL if None)
+            search_client: Search client (shared client if None)
+            index_client: Search index client (shared client if None)
+        """
+        settings = get_settings()
+        self.index_name = index_name or settings.search_index
+        self.interval = interval or settings.index_stats_interval
+        self.search_client = search_client
+        self.index_client = index_client
+        self.last_error: str | None = None
+        self._snapshot: IndexStats | None = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._refreshes_total = get_metrics().counter(
+            "rag_index_stats_refreshes_total", "Index statistics refreshes by result"
+        )
+
+    def get(self) -> IndexStats | None:
+        """Current snapshot (starts a background refresh when stale)."""
+        snapshot = self._snapshot
+        if (snapshot is None or snapshot.age > self.interval) and not self.running:
+            with self._lock:
+                start = not self._refreshing
+                self._refreshing = True
+            if start:
+                threading.Thread(target=self._refresh_in_background, name="index-stats", daemon=True).start()
+        return snapshot
+
+    def facets(self) -> FacetSnapshot | None:
+        """Facet counts of the current snapshot (see get())."""
+        snapshot = self.get()
+        return snapshot.facets if snapshot else None
+
+    @property
+    def stale(self) -> bool:
+        """Whether the snapshot is missing or has not refreshed for several intervals."""
+        return self._snapshot is None or self._snapshot.age > self.interval * STALE_AFTER_INTERVALS
+
+    def refresh(self) -> IndexStats:
+        """Fetch statistics now."""
+        if self.search_client is None:
+            self.search_client = get_search_client(self.index_name)
+        results = self.search_client.search(
+            search_text="*",
+            facets=[f"{field},count:{FACET_LIMIT}" for field in FACET_FIELDS],
+            include_total_count=True,
+            top=0,
+        )
+        total = results.get_count() or 0
+        facets = results.get_facets() or {}
+        counts = {
+            field: {str(f["value"]): f["count"] for f in facets.get(field, [])}
+            for field in FACET_FIELDS
+        }
+        fetched_at = time.monotonic()
+        size = self._index_size()
+        self._snapshot = IndexStats(
+            document_count=total,
+            facets=FacetSnapshot(
+                total=total,
+                counts=counts,
+                truncated=frozenset(f for f, values in counts.items() if len(values) >= FACET_LIMIT),
+                fetched_at=fetched_at,
+            ),
+            storage_size=_statistic(size, "storage_size"),
+            vector_index_size=_statistic(size, "vector_index_size"),
+            fetched_at=fetched_at,
+        )
+        self.last_error = None
+        return self._snapshot
+
+    def _index_size(self):
+        """Storage statistics of the index, or of the index behind the alias ({} if unavailable)."""
+        from azure.core.exceptions import ResourceNotFoundError
+
+        if self.index_client is None:
+            self.index_client = get_search_index_client()
+        try:
+            try:
+                return self.index_client.get_index_statistics(self.index_name)
+            except ResourceNotFoundError:
+                index = self.index_client.get_alias(self.index_name).indexes[0]
+                return self.index_client.get_index_statistics(index)
+        except Exception as e:
+            # Counts are still useful without sizes
+            logger.warning("Index size lookup failed: %s", e)
+            return {}
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self._try_refresh()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _try_refresh(self) -> None:
+        try:
+            self.refresh()
+            self._refreshes_total.inc(result="ok")
+        except Exception as e:
+            self.last_error = str(e)
+            self._refreshes_total.inc(result="error")
+            logger.warning("Index stats refresh failed: %s", e)
+
+    # --- background loop ---
+
+    @property
+    def running(self) -> bool:
+        """Whether the refresh loop is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self) -> None:
+        """Refresh every ``interval`` seconds until stop() is called."""
+        while not self._stop.is_set():
+            self._try_refresh()
+            self._stop.wait(self.interval)
+
+    def start(self) -> threading.Thread:
+        """Run the refresh loop in a daemon thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="index-stats", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float | None = 10.0) -> None:
+        """Stop the refresh loop."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def _statistic(stats, name: str) -> int | None:
+    """
+    Read one index statistic.
+
+    The SDK returns a GetIndexStatisticsResult whose attributes are
+    snake_case but whose mapping keys are the REST names (storageSize);
+    older SDKs returned a plain dict with snake_case keys.
+    """
+    value = getattr(stats, name, None)
+    if value is None and isinstance(stats, dict):
+        value = stats.get(name)
+    return value
+
+
+@lru_cache()
+def get_index_stats() -> IndexStatsService:
+    """Get the process-wide index statistics for AZURE_SEARCH_INDEX."""
+    service = IndexStatsService()
+    get_metrics().gauge(
+        "rag_index_stats_age_seconds", "Age of the cached index statistics"
+    ).set_callback(lambda: [({}, snapshot.age)] if (snapshot := service._snapshot) else [])
+    return service
@@ -5,23 +5,43 @@ Features:
 - Index schema creation with vector search
 - Document batch upload
 - Skillset configuration (optional AI enrichment)
+- Blob ingestion through content-type loaders (see loaders.py), streamed
+  from download to upload
+- Checkpointed, resumable blob ingestion with dead letters (see checkpoint.py)
+- Document-level delete and metadata updates as batched delete/merge
+  actions (no re-embedding)
 """
-import os
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
-from azure.search.documents.indexes import SearchIndexClient
-from azure.search.documents.indexes.models import (
-    HnswAlgorithmConfiguration,
-    SearchableField,
-    SearchField,
-    SearchFieldDataType,
-    SearchIndex,
-    SimpleField,
-    VectorSearch,
-    VectorSearchProfile,
-)
-
-from .config import get_azure_credential, get_settings
+import logging
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING
+
+from .clients import get_blob_service_client, get_search_client, get_search_index_client
+from .checkpoint import COMPLETED, INTERRUPTED, get_ingest_journal
+from .config import get_settings
+from .expansion import REFERENCE_FIELD, get_chunk_store
+from .index_profile import IndexProfile, build_vector_field, build_vector_search, get_index_profile
+from .loaders import ExtractionPool, LoaderError, get_loader, stream_text
+from .markdown_chunker import TITLE_SEPARATOR
+from .telemetry import get_metrics
+
+if TYPE_CHECKING:
+    from azure.search.documents.indexes.models import SearchIndex
+
+    from .checkpoint import IngestCheckpoint
+
+logger = logging.getLogger(__name__)
+
+# Metadata fields stored on every chunk of a document (see create_index)
+METADATA_FIELDS = ("source", "category", "title")
+
+# Chunk keys per search.in() filter when looking up dedup references
+REFERENCE_LOOKUP_SIZE = 500
+
+
+class ReferenceRepairError(Exception):
+    """Raised when dedup references to a document's chunks cannot be repaired."""
 
 
 class SearchIndexManager:
@@ -31,36 +51,44 @@ class SearchIndexManager:
     Handles index creation, schema updates, and document ingestion.
     """
 
-    def __init__(self):
-        """Initialize with Azure credentials."""
+    def __init__(self, index_name: str | None = None):
+        """
+        Initialize with shared search clients.
+
+        Args:
+            index_name: Index to manage (AZURE_SEARCH_INDEX if None)
+        """
         settings = get_settings()
-        api_key = os.getenv("AZURE_SEARCH_API_KEY")
-        if api_key:
-            credential = AzureKeyCredential(api_key)
-        else:
-            credential = get_azure_credential()
 
-        self.index_client = SearchIndexClient(
-            endpoint=settings.search_endpoint,
-            credential=credential,
-        )
-        self.search_client = SearchClient(
-            endpoint=settings.search_endpoint,
-            index_name=settings.search_index,
-            credential=credential,
-        )
-        self.index_name = settings.search_index
+        self.index_client = get_search_index_client()
+        self.search_client = get_search_client(index_name)
+        self.index_name = index_name or settings.search_index
 
-    def create_index(self, vector_dimensions: int = 1536) -> SearchIndex:
+    def create_index(
+        self,
+        vector_dimensions: int | None = None,
+        profile: IndexProfile | None = None,
+    ) -> "SearchIndex":
         """
         Create or update search index with vector search capability.
 
         Args:
-            vector_dimensions: Embedding vector size (1536 for ada-002)
+            vector_dimensions: Embedding vector size (EMBEDDING_DIMENSIONS if None)
+            profile: Vector compression/HNSW profile (INDEX_PROFILE if None)
 
         Returns:
             SearchIndex: Created/updated index
         """
+        from azure.search.documents.indexes.models import (
+            SearchableField,
+            SearchFieldDataType,
+            SearchIndex,
+            SimpleField,
+        )
+
+        profile = profile or get_index_profile()
+        vector_dimensions = vector_dimensions or get_settings().embedding_dimensions
+
         # Define fields
         fields = [
             # Primary key
@@ -83,14 +111,8 @@ class SearchIndexManager:
                 type=SearchFieldDataType.String,
                 analyzer_name="ja.lucene",  # Japanese analyzer
             ),
-            # Vector embedding
-            SearchField(
-                name="content_vector",
-                type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
-                searchable=True,
-                vector_search_dimensions=vector_dimensions,
-                vector_search_profile_name="rag-vector-profile",
-            ),
+            # Vector embedding (element type, storage and compression per profile)
+            build_vector_field(profile, vector_dimensions),
             # Metadata fields
             SimpleField(
                 name="source",
@@ -119,26 +141,33 @@ class SearchIndexManager:
             ),
         ]
 
-        # Vector search configuration
-        vector_search = VectorSearch(
-            algorithms=[
-                HnswAlgorithmConfiguration(
-                    name="rag-hnsw-config",
-                    parameters={
-                        "m": 4,  # Bi-directional links per node
-                        "efConstruction": 400,  # Index build quality
-                        "efSearch": 500,  # Search quality
-                        "metric": "cosine",
-                    },
-                ),
-            ],
-            profiles=[
-                VectorSearchProfile(
-                    name="rag-vector-profile",
-                    algorithm_configuration_name="rag-hnsw-config",
+        settings = get_settings()
+        if settings.embedding_v2_deployment:
+            from .embedding import VECTOR_FIELDS
+
+            # Embedding migration: second vector field (dual-write + re-embedder);
+            # embedding_version marks the chunks that already have it
+            fields += [
+                build_vector_field(profile, settings.embedding_v2_dimensions, name=VECTOR_FIELDS[2]),
+                SimpleField(
+                    name="embedding_version",
+                    type=SearchFieldDataType.Int32,
+                    filterable=True,
                 ),
-            ],
-        )
+            ]
+
+        if settings.dedup_mode == "reference":
+            # Duplicate chunks stored as references to the first chunk with their content
+            fields.append(
+                SimpleField(
+                    name="duplicate_of",
+                    type=SearchFieldDataType.String,
+                    filterable=True,
+                )
+            )
+
+        # Vector search configuration
+        vector_search = build_vector_search(profile)
 
         # Create index
         index = SearchIndex(
@@ -153,6 +182,7 @@ class SearchIndexManager:
         self,
         documents: list[dict],
         batch_size: int = 100,
+        progress: Callable[[str, int], None] | None = None,
     ) -> dict:
         """
         Upload documents to search index in batches.
@@ -160,10 +190,63 @@ class SearchIndexManager:
         Args:
             documents: List of documents to upload
             batch_size: Documents per upload batch
+            progress: Optional callback(stage, count) for "uploaded"/"failed"
 
         Returns:
             dict: Upload results summary
         """
+        return self._write("upload", documents, batch_size, progress)
+
+    def merge_documents(
+        self,
+        documents: list[dict],
+        batch_size: int = 1000,
+        progress: Callable[[str, int], None] | None = None,
+    ) -> dict:
+        """
+        Update fields of existing documents in batches.
+
+        Fields left out of a document (such as its vectors) are kept;
+        documents that do not exist fail.
+
+        Args:
+            documents: Partial documents with their "id"
+            batch_size: Documents per merge batch
+            progress: Optional callback(stage, count) for "uploaded"/"failed"
+
+        Returns:
+            dict: Merge results summary
+        """
+        return self._write("merge", documents, batch_size, progress)
+
+    def delete_documents(
+        self,
+        keys: list[str],
+        batch_size: int = 1000,
+        progress: Callable[[str, int], None] | None = None,
+    ) -> dict:
+        """
+        Delete documents by key in batches.
+
+        Args:
+            keys: Keys ("id") of the documents to delete
+            batch_size: Keys per delete batch
+            progress: Optional callback(stage, count) for "uploaded"/"failed"
+
+        Returns:
+            dict: Delete results summary
+        """
+        return self._write("delete", [{"id": key} for key in keys], batch_size, progress)
+
+    def _write(
+        self,
+        action: str,
+        documents: list[dict],
+        batch_size: int,
+        progress: Callable[[str, int], None] | None,
+    ) -> dict:
+        """Send documents as batches of one index action ("upload", "merge" or "delete")."""
+        send = getattr(self.search_client, f"{action}_documents")
         results = {
             "succeeded": 0,
             "failed": 0,
@@ -173,12 +256,17 @@ class SearchIndexManager:
         for i in range(0, len(documents), batch_size):
             batch = documents[i : i + batch_size]
             try:
-                result = self.search_client.upload_documents(batch)
+                result = send(batch)
+                # Neighbor chunks cached for context expansion are now stale
+                get_chunk_store().invalidate({d["document_id"] for d in batch if "document_id" in d})
                 succeeded = sum(1 for r in result if r.succeeded)
                 failed = len(result) - succeeded
 
                 results["succeeded"] += succeeded
                 results["failed"] += failed
+                if progress:
+                    progress("uploaded", succeeded)
+                    progress("failed", failed)
 
                 # Collect errors
                 for r in result:
@@ -193,9 +281,32 @@ class SearchIndexManager:
                     "batch_start": i,
                     "error": str(e),
                 })
+                if progress:
+                    progress("failed", len(batch))
 
         return results
 
+    def find_chunks(self, document_id: str, fields: tuple[str, ...] = ("id",)) -> list[dict]:
+        """
+        Get all chunks of a document.
+
+        Args:
+            document_id: Document whose chunks to find
+            fields: Fields to return for each chunk
+
+        Returns:
+            list[dict]: Chunks in no particular order
+        """
+        quoted = document_id.replace("'", "''")
+        return [
+            {field: chunk.get(field) for field in fields}
+            for chunk in self.search_client.search(
+                search_text="*",
+                filter=f"document_id eq '{quoted}'",
+                select=list(fields),
+            )
+        ]
+
     def delete_index(self) -> None:
         """Delete the search index."""
         self.index_client.delete_index(self.index_name)
@@ -205,6 +316,61 @@ class SearchIndexManager:
         return self.search_client.get_document_count()
 
 
+class ConcurrentWriter:
+    """
+    Sends index action batches with a bounded number of requests in flight.
+
+    ``submit`` blocks while ``concurrency`` batches are in flight, so memory
+    stays bounded by the batch size. The "succeeded", "failed" and "errors"
+    of each finished batch are added to ``results``; leaving the context
+    waits for the batches still in flight.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[list], dict],
+        results: dict,
+        concurrency: int | None = None,
+    ):
+        """
+        Initialize writer.
+
+        Args:
+            send: Sends one batch, returning an upload results summary
+                (e.g. SearchIndexManager.upload_documents)
+            results: Summary the batch results are added to
+            concurrency: Batches in flight (INGEST_UPLOAD_CONCURRENCY if None)
+        """
+        self.send = send
+        self.results = results
+        self.concurrency = concurrency or get_settings().ingest_upload_concurrency
+        self._pending: set = set()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="ingest-upload")
+
+    def submit(self, batch: list) -> None:
+        """Send a batch once fewer than ``concurrency`` are in flight."""
+        if len(self._pending) >= self.concurrency:
+            done, self._pending = wait(self._pending, return_when=FIRST_COMPLETED)
+            self._collect(done)
+        self._pending.add(self._executor.submit(self.send, batch))
+
+    def _collect(self, done) -> None:
+        for future in done:
+            result = future.result()
+            self.results["succeeded"] += result["succeeded"]
+            self.results["failed"] += result["failed"]
+            self.results["errors"].extend(result["errors"])
+
+    def __enter__(self) -> "ConcurrentWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            self._collect(wait(self._pending).done)
+        finally:
+            self._executor.shutdown()
+
+
 class DocumentIngestionPipeline:
     """
     End-to-end document ingestion pipeline.
@@ -212,16 +378,22 @@ class DocumentIngestionPipeline:
     Combines processing and indexing for streamlined data loading.
     """
 
-    def __init__(self):
-        """Initialize pipeline components."""
+    def __init__(self, index_name: str | None = None):
+        """
+        Initialize pipeline components.
+
+        Args:
+            index_name: Target index (AZURE_SEARCH_INDEX if None)
+        """
         from .embedding import DocumentProcessor
 
         self.processor = DocumentProcessor()
-        self.index_manager = SearchIndexManager()
+        self.index_manager = SearchIndexManager(index_name)
 
     def ingest_documents(
         self,
         documents: list[dict],
+        progress: Callable[[str, int], None] | None = None,
     ) -> dict:
         """
         Process and ingest multiple documents.
@@ -229,71 +401,635 @@ class DocumentIngestionPipeline:
         Args:
             documents: List of documents with format:
                 - id: Document ID
-                - content: Text content
+                - content: Text content, or text pieces from a loader
                 - metadata: Optional metadata (source, category, title)
+                - format: Optional "text" or "markdown" (chooses the chunker)
+            progress: Optional callback(stage, count) with stages
+                "chunks", "embeddings", "duplicates", "documents", "uploaded", "failed"
 
         Returns:
-            dict: Ingestion results
+            dict: Ingestion results (plus "duplicates" found and documents
+                "skipped" because their text could not be extracted)
         """
         all_chunks = []
+        counts = {"duplicates": 0, "skipped": 0}
 
         for doc in documents:
-            metadata = doc.get("metadata", {})
-            chunks = self.processor.process_document(
-                document_id=doc["id"],
-                text=doc["content"],
-                metadata=metadata,
-            )
-            all_chunks.extend(chunks)
+            all_chunks.extend(self._process(doc, counts, progress))
 
         # Upload to index
-        return self.index_manager.upload_documents(all_chunks)
+        return self.index_manager.upload_documents(all_chunks, progress=progress) | counts
+
+    def _process(
+        self,
+        doc: dict,
+        results: dict,
+        progress: Callable[[str, int], None] | None,
+        checkpoint: "IngestCheckpoint | None" = None,
+    ) -> Iterator[dict]:
+        """
+        Chunk and embed one document, counting duplicates into ``results``.
+
+        Lazily loaded content (text pieces from a loader) is processed and
+        yielded in batches; a document whose extraction fails is logged and
+        counted as "skipped" (chunks already yielded for it stay). With a
+        checkpoint, embedding and search service errors left after the
+        SDKs' retries are skipped this way too, and dead-lettered; other
+        errors (bugs) stop the run.
+
+        With DEDUP_MODE=reference, references to the document's indexed
+        chunks are repaired first (see _release_references); a document
+        whose repair fails is skipped too.
+        """
+
+        def track(stage: str, count: int) -> None:
+            if stage == "duplicates":
+                results["duplicates"] += count
+            if progress:
+                progress(stage, count)
+
+        content = doc["content"]
+        try:
+            self._release_references(doc["id"])
+            if isinstance(content, str):
+                yield from self.processor.process_document(
+                    document_id=doc["id"],
+                    text=content,
+                    metadata=doc.get("metadata", {}),
+                    progress=track,
+                )
+            else:
+                yield from self.processor.iter_process_document(
+                    document_id=doc["id"],
+                    text=content,
+                    metadata=doc.get("metadata", {}),
+                    progress=track,
+                    text_format=doc.get("format"),
+                )
+        except Exception as e:
+            skipped = (LoaderError, ReferenceRepairError) + (_service_errors() if checkpoint else ())
+            if not isinstance(e, skipped):
+                raise
+            logger.warning("Skipping document %s: %s", doc["id"], e)
+            results["skipped"] += 1
+            if checkpoint is not None:
+                checkpoint.document_failed(doc, e)
+            return
+        if progress:
+            progress("documents", 1)
+
+    def _release_references(self, document_id: str) -> int:
+        """
+        Repair references to a document's indexed chunks before re-ingesting it.
+
+        Re-ingestion rewrites the chunks that other documents' dedup
+        references point to (or orphans them if the document shrank), so
+        those references are promoted and re-pointed first, as on delete.
+        Only with DEDUP_MODE=reference.
+
+        Returns:
+            int: Reference chunks repaired
+
+        Raises:
+            ReferenceRepairError: If a repair fails
+        """
+        if get_settings().dedup_mode != "reference":
+            return 0
+        keys = [chunk["id"] for chunk in self.index_manager.find_chunks(document_id)]
+        if not keys:
+            return 0
+        try:
+            repair = self._repair_references(document_id, keys, None)
+        except Exception as e:
+            raise ReferenceRepairError(f"Dedup reference repair failed for {document_id}: {e}") from e
+        if repair["failed"]:
+            raise ReferenceRepairError(
+                f"{repair['failed']} dedup reference repairs failed for {document_id}"
+            )
+        if repair["succeeded"]:
+            logger.info("Repaired %d dedup references to %s", repair["succeeded"], document_id)
+        return repair["succeeded"]
+
+    def ingest_stream(
+        self,
+        documents: Iterable[dict],
+        upload_batch_size: int = 100,
+        max_concurrent_uploads: int | None = None,
+        progress: Callable[[str, int], None] | None = None,
+        checkpoint: "IngestCheckpoint | None" = None,
+    ) -> dict:
+        """
+        Ingest documents as they are produced, without materializing the input.
+
+        Chunks are uploaded in batches while later documents are still being
+        processed; at most ``max_concurrent_uploads`` batches are in flight,
+        so memory stays bounded by the batch size and upload concurrency.
+
+        With a checkpoint, chunks are journaled before they are uploaded and
+        each document is recorded once all its chunks are journaled, so a
+        crashed run loses no embeddings (see ingest_from_blob).
+
+        Args:
+            documents: Iterable of documents (same format as ingest_documents)
+            upload_batch_size: Chunks per upload request
+            max_concurrent_uploads: Upload batches in flight (settings default if None)
+            progress: Optional callback(stage, count), see ingest_documents
+            checkpoint: Optional run checkpoint (see checkpoint.py)
+
+        Returns:
+            dict: Ingestion results (plus "documents" processed, "duplicates"
+                found and "skipped" documents, which are not counted as
+                processed; see ingest_documents)
+        """
+        results = {"documents": 0, "succeeded": 0, "failed": 0, "duplicates": 0, "skipped": 0, "errors": []}
+
+        def upload(batch: list[dict]) -> dict:
+            result = self.index_manager.upload_documents(batch, len(batch), progress)
+            if checkpoint is not None:
+                checkpoint.uploaded(batch, result)
+            return result
+
+        with ConcurrentWriter(upload, results, max_concurrent_uploads) as writer:
+            batch: list[dict] = []
+            # batch[:journaled] is already in the checkpoint journal
+            journaled = 0
+            for doc in documents:
+                skipped = results["skipped"]
+                for chunk in self._process(doc, results, progress, checkpoint):
+                    batch.append(chunk)
+                    if len(batch) >= upload_batch_size:
+                        if checkpoint is not None:
+                            checkpoint.add_chunks(batch[journaled:])
+                        writer.submit(batch)
+                        batch, journaled = [], 0
+                if checkpoint is not None:
+                    checkpoint.document_done(doc["id"], batch[journaled:])
+                    journaled = len(batch)
+                if results["skipped"] == skipped:
+                    results["documents"] += 1
+            if batch:
+                writer.submit(batch)
+
+        return results
+
+    def delete_document(
+        self,
+        document_id: str,
+        batch_size: int = 1000,
+        max_concurrent_uploads: int | None = None,
+    ) -> dict:
+        """
+        Delete all chunks of a document from the index.
+
+        Keys are deleted in batches through a ConcurrentWriter. With
+        DEDUP_MODE=reference, chunks of other documents that reference the
+        deleted chunks are repaired first (see _repair_references); if a
+        repair fails, nothing is deleted.
+
+        Args:
+            document_id: Document to delete
+            batch_size: Keys per delete request
+            max_concurrent_uploads: Requests in flight (settings default if None)
+
+        Returns:
+            dict: Delete results ("chunks" found, "succeeded", "failed",
+                "errors" and "repaired" references)
+        """
+        keys = [chunk["id"] for chunk in self.index_manager.find_chunks(document_id)]
+        results = {"chunks": len(keys), "succeeded": 0, "failed": 0, "errors": [], "repaired": 0}
+        if not keys:
+            return results
+
+        if self.processor.deduplicator is not None:
+            # New chunks must not become references to deleted ones
+            self.processor.deduplicator.forget_document(document_id)
+        if get_settings().dedup_mode == "reference":
+            repair = self._repair_references(document_id, keys, max_concurrent_uploads)
+            results["repaired"] = repair["succeeded"]
+            if repair["failed"]:
+                results["failed"] = len(keys)
+                results["errors"] = repair["errors"]
+                return results
+
+        self._write_concurrently(
+            self.index_manager.delete_documents, keys, batch_size, results, max_concurrent_uploads
+        )
+        get_chunk_store().invalidate([document_id])
+        return results
+
+    def update_metadata(
+        self,
+        document_id: str,
+        metadata: dict,
+        batch_size: int = 1000,
+        max_concurrent_uploads: int | None = None,
+    ) -> dict:
+        """
+        Change metadata on all chunks of a document.
+
+        Chunks are merged in batches through a ConcurrentWriter, so their
+        content and vectors are kept and nothing is re-embedded. A new title
+        replaces only the document title part of chunk titles, keeping
+        Markdown heading paths (``guide.md > Install`` becomes
+        ``Guide > Install``). Dedup reference chunks do not get a title
+        (titles are searchable).
+
+        Args:
+            document_id: Document to update
+            metadata: New values for some of METADATA_FIELDS (None clears one)
+            batch_size: Chunks per merge request
+            max_concurrent_uploads: Requests in flight (settings default if None)
+
+        Returns:
+            dict: Merge results ("chunks" found, "succeeded", "failed", "errors")
+
+        Raises:
+            ValueError: If metadata has fields other than METADATA_FIELDS
+        """
+        unknown = set(metadata) - set(METADATA_FIELDS)
+        if unknown:
+            raise ValueError(f"Not metadata fields: {', '.join(sorted(unknown))}")
+
+        fields = ("id", "title")
+        if get_settings().dedup_mode == "reference":
+            fields += (REFERENCE_FIELD,)
+        chunks = self.index_manager.find_chunks(document_id, fields)
+        titled = [chunk for chunk in chunks if not chunk.get(REFERENCE_FIELD)]
+        old_title = _document_title([chunk.get("title") for chunk in titled])
+
+        actions = []
+        for chunk in chunks:
+            action = {"id": chunk["id"], "document_id": document_id} | metadata
+            if chunk.get(REFERENCE_FIELD):
+                action.pop("title", None)
+            elif "title" in metadata:
+                action["title"] = _retitle(chunk.get("title"), old_title, metadata["title"])
+            actions.append(action)
+        results = {"chunks": len(chunks), "succeeded": 0, "failed": 0, "errors": []}
+        return self._write_concurrently(
+            self.index_manager.merge_documents, actions, batch_size, results, max_concurrent_uploads
+        )
+
+    def _repair_references(
+        self,
+        document_id: str,
+        keys: list[str],
+        max_concurrent_uploads: int | None,
+    ) -> dict:
+        """
+        Re-point other documents' references to chunks that will be deleted.
+
+        The first reference to each such chunk is promoted to a full chunk
+        with its content, title and a new embedding; the other references
+        then point to it. Returns the merge results summary.
+        """
+        from .embedding import VECTOR_FIELDS
+
+        search_client = self.index_manager.search_client
+        quoted = document_id.replace("'", "''")
+
+        # deleted chunk -> referencing chunks of other documents
+        references: dict[str, list[dict]] = {}
+        for i in range(0, len(keys), REFERENCE_LOOKUP_SIZE):
+            batch = keys[i : i + REFERENCE_LOOKUP_SIZE]
+            delimiter = "|" if any("," in key for key in batch) else ","
+            values = delimiter.join(key.replace("'", "''") for key in batch)
+            for chunk in search_client.search(
+                search_text="*",
+                filter=f"search.in({REFERENCE_FIELD}, '{values}', '{delimiter}') and document_id ne '{quoted}'",
+                select=["id", "document_id", REFERENCE_FIELD],
+            ):
+                references.setdefault(chunk[REFERENCE_FIELD], []).append(chunk)
+
+        results = {"succeeded": 0, "failed": 0, "errors": []}
+        if not references:
+            return results
+
+        delimiter = "|" if any("," in key for key in references) else ","
+        values = delimiter.join(key.replace("'", "''") for key in references)
+        canonical = {
+            chunk["id"]: chunk
+            for chunk in search_client.search(
+                search_text="*",
+                filter=f"search.in(id, '{values}', '{delimiter}')",
+                select=["id", "content", "title"],
+            )
+        }
+        contents = {key: chunk["content"] for key, chunk in canonical.items()}
+        promoted = {
+            key: min(chunks, key=lambda chunk: chunk["id"])
+            for key, chunks in references.items()
+            if contents.get(key)
+        }
+        texts = [contents[key] for key in promoted]
+        embedding_v2 = self.processor.embedding_service_v2
+        vectors = zip(
+            self.processor.embedding_service.embed_batch(texts),
+            embedding_v2.embed_batch(texts) if embedding_v2 else [None] * len(texts),
+        )
+
+        actions = []
+        for (key, first), (vector, vector_v2) in zip(promoted.items(), vectors):
+            actions.append(
+                {
+                    "id": first["id"],
+                    "document_id": first["document_id"],
+                    "content": contents[key],
+                    "title": canonical[key].get("title"),
+                    VECTOR_FIELDS[1]: vector,
+                    REFERENCE_FIELD: None,
+                }
+                | ({VECTOR_FIELDS[2]: vector_v2, "embedding_version": 2} if vector_v2 is not None else {})
+            )
+            actions.extend(
+                {"id": chunk["id"], "document_id": chunk["document_id"], REFERENCE_FIELD: first["id"]}
+                for chunk in references[key]
+                if chunk is not first
+            )
+        return self._write_concurrently(
+            self.index_manager.merge_documents, actions, 1000, results, max_concurrent_uploads
+        )
+
+    @staticmethod
+    def _write_concurrently(
+        send: Callable[..., dict],
+        items: list,
+        batch_size: int,
+        results: dict,
+        concurrency: int | None,
+    ) -> dict:
+        """Send ``items`` in batches through a ConcurrentWriter; returns ``results``."""
+        with ConcurrentWriter(lambda batch: send(batch, len(batch)), results, concurrency) as writer:
+            for i in range(0, len(items), batch_size):
+                writer.submit(items[i : i + batch_size])
+        return results
+
+    def iter_blob_documents(
+        self,
+        container_name: str | None = None,
+        prefix: str = "",
+        checkpoint: "IngestCheckpoint | None" = None,
+    ) -> Iterator[dict]:
+        """
+        Yield documents from Azure Blob Storage, loaded by content type.
+
+        Each document's ``content`` is a lazy iterator of text pieces
+        (see loaders.py); read it before requesting the next document.
+        Text formats are decoded while they download. PDF/DOCX blobs are
+        spooled to disk and extracted in the loader process pool, up to
+        LOADER_PROCESSES documents ahead. Blobs without a loader (or whose
+        loader's dependency is missing) are logged and skipped.
+
+        With a checkpoint, listing starts at its continuation token and
+        documents it has finished are skipped before download; the token of
+        each document's listing page is recorded as the document is handed
+        out (all earlier documents are then finished).
+
+        Args:
+            container_name: Blob container name (uses default from settings if None)
+            prefix: Optional blob prefix filter
+            checkpoint: Optional run checkpoint (see ingest_from_blob)
+
+        Yields:
+            dict: Documents in the ingest_documents format, with "format"
+        """
+        settings = get_settings()
+        # Storage uses Azure AD; the search API key is not a storage credential
+        blob_service = get_blob_service_client()
+
+        container = container_name or settings.storage_container
+        container_client = blob_service.get_container_client(container)
+
+        def listing() -> Iterator[tuple[str | None, object]]:
+            """(continuation token of the blob's page, blob)."""
+            if checkpoint is None:
+                for blob in container_client.list_blobs(name_starts_with=prefix):
+                    yield None, blob
+                return
+            token = checkpoint.position
+            pages = container_client.list_blobs(name_starts_with=prefix).by_page(continuation_token=token)
+            for page in pages:
+                next_token = pages.continuation_token
+                for blob in page:
+                    yield token, blob
+                token = next_token
+
+        with ExtractionPool() as pool:
+            # (page token, document) handed out in order
+            ahead: deque[tuple[str | None, dict]] = deque()
+
+            def hand_out() -> dict:
+                token, doc = ahead.popleft()
+                if checkpoint is not None:
+                    checkpoint.set_position(token)
+                return doc
+
+            try:
+                for token, blob in listing():
+                    if checkpoint is not None and checkpoint.is_finished(blob_document_id(blob.name)):
+                        continue
+                    content_settings = getattr(blob, "content_settings", None)
+                    doc = self._load_blob(
+                        container_client, container, blob.name,
+                        getattr(content_settings, "content_type", None), pool,
+                    )
+                    if doc is None:
+                        continue
+                    ahead.append((token, doc))
+                    # Keep extractions running while earlier documents are ingested
+                    while len(ahead) > pool.processes:
+                        yield hand_out()
+                while ahead:
+                    yield hand_out()
+            finally:
+                # Documents never handed out (the consumer stopped early)
+                for _, doc in ahead:
+                    if hasattr(doc["content"], "close"):
+                        doc["content"].close()
+
+    def _load_blob(
+        self,
+        container_client,
+        container: str,
+        name: str,
+        content_type: str | None,
+        pool: ExtractionPool,
+    ) -> dict | None:
+        """Document for a blob with lazily loaded content, or None if unsupported."""
+        loaded = get_metrics().counter("rag_loader_documents_total", "Blob documents by loader")
+        loader = get_loader(content_type, name)
+        if loader is None or not loader.available():
+            logger.info(
+                "Skipping %s: %s", name,
+                "unsupported format" if loader is None else f"{loader.name} loader unavailable",
+            )
+            loaded.inc(loader="unsupported")
+            return None
+        loaded.inc(loader=loader.name)
+
+        def download() -> Iterator[bytes]:
+            yield from container_client.get_blob_client(name).download_blob().chunks()
+
+        if loader.cpu_bound:
+            content = pool.submit(loader, download(), name)
+        else:
+            content = stream_text(loader, download())
+        return {
+            "id": blob_document_id(name),
+            "content": content,
+            "format": loader.text_format,
+            "metadata": {
+                "source": f"blob://{container}/{name}",
+                "title": name.split("/")[-1],
+            },
+        }
 
     def ingest_from_blob(
         self,
         container_name: str | None = None,
         prefix: str = "",
+        resume: bool = True,
     ) -> dict:
         """
         Ingest documents from Azure Blob Storage.
 
+        Documents stream from download through extraction, chunking and
+        embedding to upload (see ingest_stream and iter_blob_documents).
+
+        Progress is checkpointed in the INGEST_CHECKPOINT_DB journal (see
+        checkpoint.py). If a run for the same container, prefix and index
+        was interrupted, it resumes: journaled chunks are uploaded without
+        re-embedding, and listing continues from the last page, skipping
+        finished documents. Documents that fail are dead-lettered
+        (replay_dead_letters) instead of stopping the run.
+
         Args:
             container_name: Blob container name (uses default from settings if None)
             prefix: Optional blob prefix filter
+            resume: Continue an interrupted run (False starts over)
 
         Returns:
-            dict: Ingestion results
+            dict: Ingestion results (with checkpoints also "run_id",
+                "resumed_chunks" uploaded from the journal, included in
+                "succeeded", and
+                "dead_letters" recorded)
         """
-        from azure.storage.blob import BlobServiceClient
+        journal = get_ingest_journal()
+        if journal is None:
+            return self.ingest_stream(self.iter_blob_documents(container_name, prefix))
 
-        settings = get_settings()
-        api_key = os.getenv("AZURE_SEARCH_API_KEY")
-        if api_key:
-            credential = AzureKeyCredential(api_key)
-        else:
-            credential = get_azure_credential()
+        container = container_name or get_settings().storage_container
+        checkpoint = journal.open_run(f"{container}/{prefix} -> {self.index_manager.index_name}", resume=resume)
+        try:
+            resumed = self._upload_journaled(checkpoint)
+            results = self.ingest_stream(
+                self.iter_blob_documents(container, prefix, checkpoint), checkpoint=checkpoint
+            )
+            # Requests that failed as a whole are retried once, then dead-lettered
+            results["succeeded"] += resumed + self._upload_journaled(checkpoint, dead_letter=True)
+        except BaseException as e:
+            checkpoint.finish(INTERRUPTED, error=str(e) or type(e).__name__)
+            raise
+        checkpoint.finish(COMPLETED)
+        return results | {
+            "run_id": checkpoint.run_id,
+            "resumed_chunks": resumed,
+            "dead_letters": checkpoint.dead_letter_count,
+        }
 
-        blob_service = BlobServiceClient(
-            account_url=settings.storage_account_url,
-            credential=credential,
-        )
+    def _upload_journaled(self, checkpoint: "IngestCheckpoint", dead_letter: bool = False) -> int:
+        """Upload chunks left in the journal; returns the number uploaded."""
+        uploaded = 0
+        for batch in checkpoint.pending_chunks():
+            result = self.index_manager.upload_documents(batch, len(batch))
+            checkpoint.uploaded(batch, result, dead_letter=dead_letter)
+            uploaded += result["succeeded"]
+        return uploaded
 
-        container = container_name or settings.storage_container
-        container_client = blob_service.get_container_client(container)
+    def replay_dead_letters(self, run_id: str | None = None) -> dict:
+        """
+        Retry dead-lettered documents and chunks.
+
+        Chunks are uploaded as journaled (no re-embedding). Documents are
+        ingested again, blob documents re-read from storage (by extension).
+        Items that succeed leave the dead-letter list.
+
+        Args:
+            run_id: Only this run's items (all runs if None)
+
+        Returns:
+            dict: Counts of "replayed" and still "failed" items
+        """
+        journal = get_ingest_journal()
+        if journal is None:
+            return {"replayed": 0, "failed": 0}
+        replayed: list[int] = []
+        failed = 0
+
+        for item in journal.dead_letters(run_id, kind="chunk"):
+            result = self.index_manager.upload_documents([item["payload"]], 1)
+            if result["succeeded"]:
+                replayed.append(item["id"])
+            else:
+                failed += 1
+
+        with ExtractionPool(0) as pool:
+            for item in journal.dead_letters(run_id, kind="document"):
+                doc = item["payload"]
+                source = doc.get("metadata", {}).get("source", "")
+                if "content" not in doc and source.startswith("blob://"):
+                    container, _, name = source.removeprefix("blob://").partition("/")
+                    container_client = get_blob_service_client().get_container_client(container)
+                    doc = self._load_blob(container_client, container, name, None, pool)
+                if doc is None or "content" not in doc:
+                    failed += 1
+                    continue
+                try:
+                    result = self.ingest_stream([doc])
+                except Exception as e:
+                    logger.warning("Replay of %s failed: %s", item["key"], e)
+                    failed += 1
+                    continue
+                if result["skipped"] or result["failed"]:
+                    failed += 1
+                else:
+                    replayed.append(item["id"])
+
+        journal.remove_dead_letters(replayed)
+        return {"replayed": len(replayed), "failed": failed}
+
+
+def _service_errors() -> tuple[type[Exception], ...]:
+    """OpenAI and Azure SDK errors (raised once the SDKs' retries are exhausted)."""
+    from azure.core.exceptions import AzureError
+    from openai import OpenAIError
+
+    return (OpenAIError, AzureError)
+
+
+def _document_title(titles: list[str | None]) -> str | None:
+    """
+    Document title part of a document's chunk titles.
+
+    Chunk titles are the document title, optionally followed by a heading
+    path (``guide.md > Install > Linux``). A document without a title has
+    chunks without one; the document title is assumed not to contain the
+    separator.
+    """
+    if not titles or not all(titles):
+        return None
+    first = titles[0].split(TITLE_SEPARATOR)[0]
+    if all(title == first or title.startswith(first + TITLE_SEPARATOR) for title in titles):
+        return first
+    return None
+
+
+def _retitle(title: str | None, old_title: str | None, new_title: str | None) -> str | None:
+    """Replace the document title part of a chunk title, keeping its heading path."""
+    headings = title[len(old_title) + len(TITLE_SEPARATOR):] if title and old_title else title
+    return TITLE_SEPARATOR.join(filter(None, [new_title, headings])) or None
 
-        documents = []
-        for blob in container_client.list_blobs(name_starts_with=prefix):
-            if blob.name.endswith((".txt", ".md")):
-                blob_client = container_client.get_blob_client(blob.name)
-                content = blob_client.download_blob().readall().decode("utf-8")
-
-                documents.append({
-                    "id": blob.name.replace("/", "_").replace(".", "_"),
-                    "content": content,
-                    "metadata": {
-                        "source": f"blob://{container}/{blob.name}",
-                        "title": blob.name.split("/")[-1],
-                    },
-                })
 
-        return self.ingest_documents(documents)
+def blob_document_id(name: str) -> str:
+    """Document id of a blob (its path with separators replaced)."""
+    return name.replace("/", "_").replace(".", "_")
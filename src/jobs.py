@@ -0,0 +1,369 @@
+"""
+Background ingestion jobs.
+
+Features:
+- POST /ingest enqueues a job and returns immediately
+- Bounded worker pool (INGEST_WORKERS jobs in parallel)
+- Per-job progress: documents, chunks, embeddings, uploads, throughput, errors
+- Cancellation between document batches
+- Local SQLite job store, so unfinished jobs resume after a restart
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+from .config import get_settings
+from .sqlite_store import SQLiteStore
+from .telemetry import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+TERMINAL_STATES = (COMPLETED, FAILED, CANCELLED)
+
+# Errors kept per job (the rest are only counted)
+MAX_ERRORS = 100
+
+
+class JobNotFound(KeyError):
+    """Raised for unknown job ids."""
+
+
+@dataclass
+class JobProgress:
+    """Counters reported by GET /ingest/{job_id}."""
+
+    documents_total: int = 0
+    documents_done: int = 0
+    chunks: int = 0
+    embeddings: int = 0
+    duplicates: int = 0
+    uploaded: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    def add(self, stage: str, count: int) -> None:
+        """Progress callback for DocumentIngestionPipeline."""
+        if stage == "documents":
+            self.documents_done += count
+        elif stage in ("chunks", "embeddings", "duplicates", "uploaded", "failed"):
+            setattr(self, stage, getattr(self, stage) + count)
+
+    def add_errors(self, errors: list[dict]) -> None:
+        room = MAX_ERRORS - len(self.errors)
+        if room > 0:
+            self.errors.extend(errors[:room])
+
+    def to_dict(self) -> dict:
+        elapsed = self.elapsed_seconds
+        return asdict(self) | {
+            "documents_per_second": round(self.documents_done / elapsed, 3) if elapsed else 0.0,
+            "chunks_per_second": round(self.chunks / elapsed, 3) if elapsed else 0.0,
+        }
+
+
+class JobStore(SQLiteStore):
+    """
+    SQLite-backed job store.
+
+    Document payloads are stored with the job so that a restarted process
+    can resume with the documents that were not yet uploaded; they are
+    deleted when the job completes.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            progress TEXT NOT NULL,
+            error TEXT
+        );
+        CREATE TABLE IF NOT EXISTS job_documents (
+            job_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            payload TEXT NOT NULL,
+            done INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (job_id, seq)
+        );
+    """
+
+    def create(self, documents: list[dict]) -> str:
+        """Persist a new queued job with its documents and return its id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        progress = JobProgress(documents_total=len(documents))
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT INTO jobs VALUES (?, ?, ?, ?, ?, NULL)",
+                (job_id, QUEUED, now, now, json.dumps(asdict(progress))),
+            )
+            self._conn.executemany(
+                "INSERT INTO job_documents (job_id, seq, payload) VALUES (?, ?, ?)",
+                ((job_id, i, json.dumps(doc, ensure_ascii=False)) for i, doc in enumerate(documents)),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> dict:
+        """Load job row (progress decoded)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, created_at, updated_at, progress, error FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            raise JobNotFound(job_id)
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            "created_at": row[2],
+            "updated_at": row[3],
+            "progress": json.loads(row[4]),
+            "error": row[5],
+        }
+
+    def update(
+        self,
+        job_id: str,
+        status: str | None = None,
+        progress: JobProgress | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Update status, progress and/or error of a job."""
+        assignments = ["updated_at = ?"]
+        values: list = [time.time()]
+        if status is not None:
+            assignments.append("status = ?")
+            values.append(status)
+        if progress is not None:
+            assignments.append("progress = ?")
+            values.append(json.dumps(asdict(progress)))
+        if error is not None:
+            assignments.append("error = ?")
+            values.append(error)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {', '.join(assignments)} WHERE id = ?", (*values, job_id)
+            )
+
+    def pending_documents(self, job_id: str) -> list[tuple[int, dict]]:
+        """Documents of a job that have not been uploaded yet, in order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, payload FROM job_documents WHERE job_id = ? AND done = 0 ORDER BY seq",
+                (job_id,),
+            ).fetchall()
+        return [(seq, json.loads(payload)) for seq, payload in rows]
+
+    def mark_done(self, job_id: str, seqs: list[int]) -> None:
+        """Mark documents as uploaded."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE job_documents SET done = 1 WHERE job_id = ? AND seq = ?",
+                ((job_id, seq) for seq in seqs),
+            )
+
+    def delete_documents(self, job_id: str) -> None:
+        """Drop the document payloads of a job (no longer needed once completed)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM job_documents WHERE job_id = ?", (job_id,))
+
+    def unfinished(self) -> list[str]:
+        """Ids of jobs that were queued or running (e.g. before a restart)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (QUEUED, RUNNING),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+class IngestionJobManager:
+    """
+    Runs ingestion jobs on a bounded thread pool.
+
+    Each job is processed in batches of documents; progress is persisted
+    after every batch, which is also where cancellation takes effect.
+    """
+
+    def __init__(
+        self,
+        pipeline_factory: Callable,
+        store: JobStore | None = None,
+        max_workers: int | None = None,
+        batch_documents: int | None = None,
+    ):
+        """
+        Initialize manager.
+
+        Args:
+            pipeline_factory: Returns the DocumentIngestionPipeline (called in workers)
+            store: Job store (settings default path if None)
+            max_workers: Jobs processed in parallel
+            batch_documents: Documents per processing/upload batch
+        """
+        settings = get_settings()
+        self.pipeline_factory = pipeline_factory
+        self.store = store or JobStore(settings.ingest_job_db)
+        self.batch_documents = batch_documents or settings.ingest_batch_documents
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.ingest_workers,
+            thread_name_prefix="ingest-job",
+        )
+        self._cancelled: set[str] = set()
+        self._active: set[str] = set()
+        # Active jobs resumed while their worker was still running
+        self._rescheduled: set[str] = set()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+        metrics = get_metrics()
+        self._jobs_total = metrics.counter("rag_ingest_jobs_total", "Finished ingestion jobs by status")
+        self._documents_total = metrics.counter(
+            "rag_ingest_documents_total", "Documents processed by ingestion jobs"
+        )
+
+    def submit(self, documents: list[dict]) -> str:
+        """
+        Enqueue a new job.
+
+        Args:
+            documents: Documents in DocumentIngestionPipeline format
+
+        Returns:
+            str: Job id
+        """
+        job_id = self.store.create(documents)
+        self._schedule(job_id)
+        return job_id
+
+    def _schedule(self, job_id: str) -> bool:
+        with self._lock:
+            if job_id in self._active:
+                # The running worker runs the job again when it exits
+                self._rescheduled.add(job_id)
+                self._cancelled.discard(job_id)
+                return False
+            self._active.add(job_id)
+            self._cancelled.discard(job_id)
+        self._executor.submit(self._run, job_id)
+        return True
+
+    def get(self, job_id: str) -> dict:
+        """Job status with progress and throughput."""
+        job = self.store.get(job_id)
+        progress = JobProgress(**job["progress"])
+        job["progress"] = progress.to_dict()
+        return job
+
+    def cancel(self, job_id: str) -> dict:
+        """
+        Cancel a job.
+
+        Queued jobs stop before starting; running jobs stop after the
+        current batch. Completed work is kept (the job can be resumed).
+        """
+        job = self.store.get(job_id)
+        if job["status"] in TERMINAL_STATES:
+            return self.get(job_id)
+        with self._lock:
+            self._cancelled.add(job_id)
+            active = job_id in self._active
+        if not active:
+            self.store.update(job_id, status=CANCELLED)
+        return self.get(job_id)
+
+    def resume(self, job_id: str) -> dict:
+        """Re-enqueue a cancelled, failed or interrupted job with its remaining documents."""
+        job = self.store.get(job_id)
+        if job["status"] != COMPLETED:
+            self.store.update(job_id, status=QUEUED, error="")
+            self._schedule(job_id)
+        return self.get(job_id)
+
+    def resume_unfinished(self) -> list[str]:
+        """Resume jobs left queued or running by a previous process."""
+        job_ids = self.store.unfinished()
+        for job_id in job_ids:
+            self._schedule(job_id)
+        if job_ids:
+            logger.info("Resuming %d unfinished ingestion job(s)", len(job_ids))
+        return job_ids
+
+    def _is_cancelled(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._cancelled
+
+    def _run(self, job_id: str) -> None:
+        """Worker: process pending documents of a job batch by batch."""
+        progress = JobProgress(**self.store.get(job_id)["progress"])
+        status = COMPLETED
+        error = None
+        try:
+            if self._is_cancelled(job_id):
+                status = CANCELLED
+                return
+            self.store.update(job_id, status=RUNNING)
+            pipeline = self.pipeline_factory()
+            pending = self.store.pending_documents(job_id)
+            start = time.monotonic() - progress.elapsed_seconds
+
+            for i in range(0, len(pending), self.batch_documents):
+                if self._is_cancelled(job_id):
+                    status = CANCELLED
+                    break
+                if self._stopping.is_set():
+                    # Left for resume_unfinished() in the next process
+                    status = QUEUED
+                    break
+                batch = pending[i : i + self.batch_documents]
+                result = pipeline.ingest_documents([doc for _, doc in batch], progress=progress.add)
+                progress.add_errors(result["errors"])
+                # Failed uploads stay in the job's error list; the batch is not retried
+                self.store.mark_done(job_id, [seq for seq, _ in batch])
+                self._documents_total.inc(len(batch))
+                progress.elapsed_seconds = round(time.monotonic() - start, 3)
+                self.store.update(job_id, progress=progress)
+        except Exception as e:
+            logger.exception("Ingestion job %s failed", job_id)
+            status = FAILED
+            error = str(e)
+        finally:
+            # Decided under the lock so a concurrent resume() either reschedules
+            # through this worker or finds the job inactive with its final status
+            with self._lock:
+                rerun = (
+                    job_id in self._rescheduled and status != COMPLETED and not self._stopping.is_set()
+                )
+                self._rescheduled.discard(job_id)
+                self._cancelled.discard(job_id)
+                if rerun:
+                    self.store.update(job_id, status=QUEUED, progress=progress, error="")
+                else:
+                    if status == COMPLETED:
+                        self.store.delete_documents(job_id)
+                    self.store.update(job_id, status=status, progress=progress, error=error)
+                    self._active.discard(job_id)
+            if rerun:
+                self._executor.submit(self._run, job_id)
+            else:
+                self._jobs_total.inc(status=status)
+
+    def shutdown(self) -> None:
+        """Stop after the current batches; unfinished jobs resume on restart."""
+        self._stopping.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,708 @@
+"""
+Document loaders: streaming text extraction by content type.
+
+Features:
+- Loader registry keyed by content type, with the file extension as
+  fallback for generic types (``application/octet-stream``, ``text/plain``)
+- Plain text and Markdown decoded incrementally with encoding detection
+  (BOM, UTF-8, charset-normalizer if installed, LOADER_FALLBACK_ENCODINGS)
+- HTML converted to Markdown (headings, lists, code, tables) while it is
+  parsed; scripts and styles are dropped
+- DOCX read section by section from ``word/document.xml`` with the
+  standard library (heading styles and tables kept as Markdown)
+- PDF extracted page by page (requires ``pypdf``)
+- CPU-bound loaders (PDF, DOCX) run in a process pool (LOADER_PROCESSES);
+  the blob is spooled to a temp file and the extracted text is read back
+  from one, so no document is ever held in memory as a whole
+
+Loaders yield text pieces; chunkers (TextChunker, MarkdownChunker) accept
+the pieces directly.
+"""
+import codecs
+import io
+import os
+import re
+import tempfile
+import zipfile
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from importlib.util import find_spec
+from multiprocessing import get_context
+from typing import BinaryIO
+from xml.etree import ElementTree
+
+from .config import get_settings
+
+# Bytes read per step when streaming a document
+READ_SIZE = 64 * 1024
+# Bytes inspected for encoding detection
+SAMPLE_SIZE = 64 * 1024
+
+# Content types that say nothing about the format; the extension decides
+GENERIC_CONTENT_TYPES = frozenset({"", "application/octet-stream", "binary/octet-stream", "text/plain"})
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+class LoaderError(Exception):
+    """Text could not be extracted from a document."""
+
+
+# === Encoding detection ===
+
+
+def _decodes(sample: bytes, encoding: str) -> bool:
+    """Whether the sample decodes strictly (a character cut at the end is fine)."""
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(sample)
+    except (UnicodeDecodeError, LookupError):
+        return False
+    return True
+
+
+def _charset_normalizer(sample: bytes) -> str | None:
+    """Best guess from charset-normalizer, or None if it is not installed."""
+    try:
+        from charset_normalizer import from_bytes
+    except ImportError:
+        return None
+    best = from_bytes(sample).best()
+    return best.encoding if best is not None else None
+
+
+def detect_encoding(sample: bytes, declared: str | None = None) -> str:
+    """
+    Detect the encoding of a document from its first bytes.
+
+    Args:
+        sample: Leading bytes of the document
+        declared: Encoding named by the document itself (HTML ``<meta>``)
+
+    Returns:
+        str: Codec name; latin-1 if nothing else fits (decodes any bytes)
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    if declared and _decodes(sample, declared):
+        return declared
+    if _decodes(sample, "utf-8"):
+        return "utf-8"
+    detected = _charset_normalizer(sample)
+    if detected:
+        return detected
+    for encoding in get_settings().loader_fallback_encodings:
+        if _decodes(sample, encoding):
+            return encoding
+    return "latin-1"
+
+
+def decode_stream(stream: BinaryIO, declared: str | None = None) -> Iterator[str]:
+    """
+    Decode a byte stream incrementally.
+
+    Undecodable bytes become U+FFFD instead of failing the document.
+
+    Args:
+        stream: Binary stream
+        declared: Encoding named by the document (see detect_encoding)
+
+    Yields:
+        str: Decoded text pieces
+    """
+    sample = stream.read(SAMPLE_SIZE)
+    decoder = codecs.getincrementaldecoder(detect_encoding(sample, declared))(errors="replace")
+    if text := decoder.decode(sample):
+        yield text
+    while block := stream.read(READ_SIZE):
+        if text := decoder.decode(block):
+            yield text
+    if text := decoder.decode(b"", final=True):
+        yield text
+
+
+class _ChunkReader(io.RawIOBase):
+    """Readable stream over an iterable of byte chunks (a blob download)."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            self._buffer = next(self._chunks, None)
+            if self._buffer is None:
+                self._buffer = b""
+                return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def open_chunks(chunks: Iterable[bytes]) -> BinaryIO:
+    """Buffered binary stream reading from byte chunks as they are needed."""
+    return io.BufferedReader(_ChunkReader(chunks), READ_SIZE)
+
+
+# === Loaders ===
+
+
+class DocumentLoader:
+    """
+    Base class for loaders.
+
+    Subclasses set the class attributes and implement ``load``.
+    Instances must be picklable (CPU-bound loaders run in worker processes).
+    """
+
+    name: str = ""
+    content_types: tuple[str, ...] = ()
+    extensions: tuple[str, ...] = ()
+    # Chunker for the extracted text: "text" or "markdown"
+    text_format: str = "text"
+    # Extract in the loader process pool (needs a seekable, spooled file)
+    cpu_bound: bool = False
+
+    def available(self) -> bool:
+        """Whether the loader's optional dependencies are installed."""
+        return True
+
+    def load(self, stream: BinaryIO) -> Iterator[str]:
+        """
+        Extract text from a document.
+
+        Args:
+            stream: Binary stream (seekable for CPU-bound loaders)
+
+        Yields:
+            str: Text pieces in document order
+
+        Raises:
+            LoaderError: If the document cannot be read
+        """
+        raise NotImplementedError
+
+
+class TextLoader(DocumentLoader):
+    """Plain text with encoding detection."""
+
+    name = "text"
+    content_types = ("text/plain",)
+    extensions = (".txt", ".text", ".log")
+
+    def load(self, stream: BinaryIO) -> Iterator[str]:
+        yield from decode_stream(stream)
+
+
+class MarkdownLoader(TextLoader):
+    """Markdown, decoded like plain text and chunked by structure."""
+
+    name = "markdown"
+    content_types = ("text/markdown", "text/x-markdown")
+    extensions = (".md", ".markdown")
+    text_format = "markdown"
+
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+
+
+class _HTMLToMarkdown:
+    """Incremental HTML to Markdown converter (see HTMLLoader)."""
+
+    HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+    SKIP = {"script", "style", "noscript", "template", "svg", "title", "iframe", "object"}
+    BLOCKS = {
+        "p", "div", "section", "article", "main", "header", "footer", "aside", "nav",
+        "blockquote", "figure", "figcaption", "dl", "dt", "dd", "hr", "form", "address",
+    }
+
+    def __init__(self):
+        from html.parser import HTMLParser
+
+        self._parser = HTMLParser(convert_charrefs=True)
+        self._parser.handle_starttag = self._start
+        self._parser.handle_endtag = self._end
+        self._parser.handle_data = self._data
+        self._out: list[str] = []
+        self._line: list[str] = []
+        self._prefix = ""
+        self._skip = 0
+        self._lists = 0
+        self._pre: list[str] | None = None
+        self._row: list[str] | None = None
+        self._cell: list[str] | None = None
+        self._rows = 0
+
+    def feed(self, text: str) -> str:
+        """Parse more HTML; returns the Markdown completed so far."""
+        self._parser.feed(text)
+        return self._drain()
+
+    def close(self) -> str:
+        """Finish parsing; returns the remaining Markdown."""
+        self._parser.close()
+        self._flush()
+        return self._drain()
+
+    def _drain(self) -> str:
+        text = "".join(self._out)
+        self._out.clear()
+        return text
+
+    def _flush(self, end: str = "\n\n") -> None:
+        text = " ".join("".join(self._line).split())
+        if text:
+            self._out.append(f"{self._prefix}{text}{end}")
+        self._line, self._prefix = [], ""
+
+    def _start(self, tag: str, attrs) -> None:
+        if tag in self.SKIP:
+            self._skip += 1
+        if self._skip:
+            return
+        if tag in self.HEADINGS:
+            self._flush()
+            self._prefix = "#" * int(tag[1]) + " "
+        elif tag == "li":
+            self._flush("\n")
+            self._prefix = "  " * max(self._lists - 1, 0) + "- "
+        elif tag in ("ul", "ol"):
+            self._flush("\n" if self._lists else "\n\n")
+            self._lists += 1
+        elif tag == "pre":
+            self._flush()
+            self._pre = []
+        elif tag == "table":
+            self._flush()
+            self._rows = 0
+        elif tag == "tr":
+            self._row = []
+        elif tag in ("td", "th"):
+            self._cell = []
+        elif tag == "br":
+            if self._pre is not None:
+                self._pre.append("\n")
+            elif self._cell is not None:
+                self._cell.append(" ")
+            else:
+                self._flush("\n")
+        elif tag in self.BLOCKS:
+            self._flush()
+
+    def _end(self, tag: str) -> None:
+        if tag in self.SKIP:
+            self._skip = max(self._skip - 1, 0)
+            return
+        if self._skip:
+            return
+        if tag in self.HEADINGS or tag in self.BLOCKS:
+            self._flush()
+        elif tag == "li":
+            self._flush("\n")
+        elif tag in ("ul", "ol"):
+            self._flush("\n")
+            self._lists = max(self._lists - 1, 0)
+            if not self._lists:
+                self._out.append("\n")
+        elif tag == "pre" and self._pre is not None:
+            code = "".join(self._pre).strip("\n")
+            if code:
+                self._out.append(f"```\n{code}\n```\n\n")
+            self._pre = None
+        elif tag in ("td", "th") and self._cell is not None:
+            if self._row is not None:
+                self._row.append(" ".join("".join(self._cell).split()).replace("|", "\\|"))
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            if self._row:
+                self._out.append("| " + " | ".join(self._row) + " |\n")
+                if not self._rows:
+                    # The first row is the header row in Markdown
+                    self._out.append("|" + "---|" * len(self._row) + "\n")
+                self._rows += 1
+            self._row = None
+        elif tag == "table":
+            self._out.append("\n")
+
+    def _data(self, data: str) -> None:
+        if self._skip:
+            return
+        if self._pre is not None:
+            self._pre.append(data)
+        elif self._cell is not None:
+            self._cell.append(data)
+        else:
+            self._line.append(data)
+
+
+class HTMLLoader(DocumentLoader):
+    """HTML converted to Markdown while it is parsed."""
+
+    name = "html"
+    content_types = ("text/html", "application/xhtml+xml")
+    extensions = (".html", ".htm", ".xhtml")
+    text_format = "markdown"
+
+    def load(self, stream: BinaryIO) -> Iterator[str]:
+        stream = stream if isinstance(stream, io.BufferedReader) else io.BufferedReader(stream)
+        match = _META_CHARSET.search(stream.peek(SAMPLE_SIZE)[:SAMPLE_SIZE])
+        declared = match.group(1).decode("ascii") if match else None
+
+        converter = _HTMLToMarkdown()
+        for text in decode_stream(stream, declared):
+            if markdown := converter.feed(text):
+                yield markdown
+        if markdown := converter.close():
+            yield markdown
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_HEADING_STYLE = re.compile(r"^heading\s?(\d)$", re.IGNORECASE)
+
+
+def _docx_paragraph(paragraph: ElementTree.Element) -> str:
+    """Text of a ``w:p`` element."""
+    parts = []
+    for node in paragraph.iter():
+        if node.tag == f"{_W}t" and node.text:
+            parts.append(node.text)
+        elif node.tag == f"{_W}tab":
+            parts.append("\t")
+        elif node.tag in (f"{_W}br", f"{_W}cr"):
+            parts.append(" ")
+    return "".join(parts).strip()
+
+
+def _docx_prefix(paragraph: ElementTree.Element) -> str:
+    """Markdown prefix for a paragraph's heading level or list membership."""
+    properties = paragraph.find(f"{_W}pPr")
+    if properties is None:
+        return ""
+    style = properties.find(f"{_W}pStyle")
+    style_id = style.get(f"{_W}val", "") if style is not None else ""
+    if match := _HEADING_STYLE.match(style_id):
+        return "#" * min(int(match.group(1)), 6) + " "
+    if style_id.lower() == "title":
+        return "# "
+    outline = properties.find(f"{_W}outlineLvl")
+    if outline is not None and outline.get(f"{_W}val", "").isdigit():
+        return "#" * min(int(outline.get(f"{_W}val")) + 1, 6) + " "
+    if properties.find(f"{_W}numPr") is not None:
+        return "- "
+    return ""
+
+
+class DOCXLoader(DocumentLoader):
+    """Word documents, read paragraph by paragraph from the document XML."""
+
+    name = "docx"
+    content_types = ("application/vnd.openxmlformats-officedocument.wordprocessingml.document",)
+    extensions = (".docx",)
+    text_format = "markdown"
+    cpu_bound = True
+
+    def load(self, stream: BinaryIO) -> Iterator[str]:
+        try:
+            archive = zipfile.ZipFile(stream)
+            xml = archive.open("word/document.xml")
+        except (zipfile.BadZipFile, KeyError) as e:
+            raise LoaderError(f"Not a Word document: {e}") from e
+
+        tables = 0
+        rows = 0
+        row: list[str] | None = None
+        cell: list[str] | None = None
+        with archive, xml:
+            for event, element in ElementTree.iterparse(xml, events=("start", "end")):
+                tag = element.tag
+                if event == "start":
+                    if tag == f"{_W}tbl":
+                        tables += 1
+                        if tables == 1:
+                            rows = 0
+                    elif tag == f"{_W}tr" and tables == 1:
+                        row = []
+                    elif tag == f"{_W}tc" and tables == 1:
+                        cell = []
+                    continue
+
+                if tag == f"{_W}p":
+                    text = _docx_paragraph(element)
+                    if tables:
+                        # Nested table text stays in the outer cell
+                        if cell is not None and text:
+                            cell.append(text)
+                    else:
+                        if text:
+                            yield f"{_docx_prefix(element)}{text}\n\n"
+                        element.clear()
+                elif tag == f"{_W}tc" and tables == 1 and row is not None and cell is not None:
+                    row.append(" ".join(cell).replace("|", "\\|"))
+                    cell = None
+                elif tag == f"{_W}tr" and tables == 1 and row is not None:
+                    if row:
+                        lines = "| " + " | ".join(row) + " |\n"
+                        if not rows:
+                            lines += "|" + "---|" * len(row) + "\n"
+                        rows += 1
+                        yield lines
+                    row = None
+                elif tag == f"{_W}tbl":
+                    tables -= 1
+                    if not tables:
+                        yield "\n"
+                        element.clear()
+
+
+class PDFLoader(DocumentLoader):
+    """PDF text, page by page (requires pypdf)."""
+
+    name = "pdf"
+    content_types = ("application/pdf",)
+    extensions = (".pdf",)
+    cpu_bound = True
+
+    def available(self) -> bool:
+        return find_spec("pypdf") is not None
+
+    def load(self, stream: BinaryIO) -> Iterator[str]:
+        try:
+            from pypdf import PdfReader
+        except ImportError as e:
+            raise LoaderError("PDF extraction requires pypdf: pip install pypdf") from e
+
+        try:
+            reader = PdfReader(stream)
+            if reader.is_encrypted:
+                reader.decrypt("")
+            pages = reader.pages
+        except Exception as e:
+            raise LoaderError(f"Unreadable PDF: {e}") from e
+        for page in pages:
+            text = page.extract_text() or ""
+            if text.strip():
+                yield text + "\n\n"
+
+
+# === Registry ===
+
+_BY_CONTENT_TYPE: dict[str, DocumentLoader] = {}
+_BY_EXTENSION: dict[str, DocumentLoader] = {}
+
+
+def register_loader(loader: DocumentLoader) -> None:
+    """Register a loader for its content types and extensions (replacing earlier ones)."""
+    for content_type in loader.content_types:
+        _BY_CONTENT_TYPE[content_type.lower()] = loader
+    for extension in loader.extensions:
+        _BY_EXTENSION[extension.lower()] = loader
+
+
+def get_loader(content_type: str | None = None, name: str | None = None) -> DocumentLoader | None:
+    """
+    Find the loader for a document.
+
+    A specific content type wins; generic ones (see GENERIC_CONTENT_TYPES)
+    defer to the file extension.
+
+    Args:
+        content_type: MIME type (parameters such as ``charset`` are ignored)
+        name: File or blob name
+
+    Returns:
+        DocumentLoader | None: Loader, or None if the format is unsupported
+    """
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    extension = os.path.splitext(name or "")[1].lower()
+    if content_type not in GENERIC_CONTENT_TYPES and content_type in _BY_CONTENT_TYPE:
+        return _BY_CONTENT_TYPE[content_type]
+    return _BY_EXTENSION.get(extension) or _BY_CONTENT_TYPE.get(content_type)
+
+
+for _loader in (TextLoader(), MarkdownLoader(), HTMLLoader(), DOCXLoader(), PDFLoader()):
+    register_loader(_loader)
+
+
+# === Process pool ===
+
+
+def _guarded(loader: DocumentLoader, pieces: Iterator[str]) -> Iterator[str]:
+    """Re-raise extraction failures as LoaderError."""
+    try:
+        yield from pieces
+    except LoaderError:
+        raise
+    except Exception as e:
+        raise LoaderError(f"{loader.name} extraction failed: {e}") from e
+
+
+def stream_text(loader: DocumentLoader, chunks: Iterable[bytes]) -> Iterator[str]:
+    """
+    Extract text with a streaming (not CPU-bound) loader as bytes arrive.
+
+    Args:
+        loader: Loader
+        chunks: Document bytes, e.g. ``blob.download_blob().chunks()``
+
+    Yields:
+        str: Text pieces
+
+    Raises:
+        LoaderError: If the document cannot be read
+    """
+    yield from _guarded(loader, loader.load(open_chunks(chunks)))
+
+
+def _spool(chunks: Iterable[bytes], suffix: str = "") -> str:
+    """Write byte chunks to a temp file; returns its path."""
+    fd, path = tempfile.mkstemp(prefix="rag-load-", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in chunks:
+                out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def _extract_file(loader: DocumentLoader, source: str, target: str) -> int:
+    """Worker process: extract ``source`` into the UTF-8 file ``target``."""
+    characters = 0
+    with open(source, "rb") as stream, open(target, "w", encoding="utf-8") as out:
+        for text in loader.load(stream):
+            out.write(text)
+            characters += len(text)
+    return characters
+
+
+def _remove(*paths: str | None) -> None:
+    for path in paths:
+        if path:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+class Extraction:
+    """
+    Text of a document extracted by a CPU-bound loader.
+
+    Iterate once to read the text; the temp files are removed afterwards.
+    A document that could not be spooled raises its LoaderError when read,
+    like any other extraction failure.
+    """
+
+    def __init__(
+        self,
+        loader: DocumentLoader,
+        source: str | None,
+        target: str | None,
+        future: Future | None,
+        error: LoaderError | None = None,
+    ):
+        self.loader = loader
+        self._source = source
+        self._target = target
+        self._future = future
+        self._error = error
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            yield from _guarded(self.loader, self._read())
+        finally:
+            self.close()
+
+    def _read(self) -> Iterator[str]:
+        if self._error is not None:
+            raise self._error
+        if self._future is None:
+            # In-process: extract straight from the spooled file
+            with open(self._source, "rb") as stream:
+                yield from self.loader.load(stream)
+            return
+        self._future.result()
+        with open(self._target, encoding="utf-8") as text:
+            while piece := text.read(READ_SIZE):
+                yield piece
+
+    def close(self) -> None:
+        """Remove the temp files (cancels extraction that has not started)."""
+        if self._future is not None:
+            self._future.cancel()
+        _remove(self._source, self._target)
+        self._source = self._target = None
+
+    def __del__(self):
+        if self._source or self._target:
+            self.close()
+
+
+class ExtractionPool:
+    """
+    Process pool for CPU-bound loaders.
+
+    Use as a context manager; with ``processes=0`` extraction runs in the
+    calling process when the text is read.
+    """
+
+    def __init__(self, processes: int | None = None):
+        """
+        Initialize pool.
+
+        Args:
+            processes: Worker processes (LOADER_PROCESSES if None; 0 disables)
+        """
+        self.processes = get_settings().loader_processes if processes is None else processes
+        # spawn: workers must not inherit the parent's threads and locks
+        self._executor = (
+            ProcessPoolExecutor(self.processes, mp_context=get_context("spawn"))
+            if self.processes > 0
+            else None
+        )
+
+    def submit(self, loader: DocumentLoader, chunks: Iterable[bytes], name: str = "") -> Extraction:
+        """
+        Spool a document to disk and start extracting it.
+
+        Args:
+            loader: CPU-bound loader
+            chunks: Document bytes
+            name: File name (its extension is kept on the temp file)
+
+        Returns:
+            Extraction: The document's text, once iterated
+        """
+        try:
+            source = _spool(chunks, os.path.splitext(name)[1])
+        except Exception as e:
+            # Reported when the text is read, so only this document is skipped
+            return Extraction(loader, None, None, None, LoaderError(f"{loader.name} download failed: {e}"))
+        if self._executor is None:
+            return Extraction(loader, source, None, None)
+        fd, target = tempfile.mkstemp(prefix="rag-text-", suffix=".txt")
+        os.close(fd)
+        future = self._executor.submit(_extract_file, loader, source, target)
+        return Extraction(loader, source, target, future)
+
+    def close(self) -> None:
+        """Stop the worker processes once submitted extractions finish."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "ExtractionPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
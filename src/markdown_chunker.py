@@ -0,0 +1,380 @@
+"""
+Structure-aware chunking for Markdown documents.
+
+Features:
+- One streaming pass over the lines: blocks (headings, paragraphs, lists,
+  fenced code, tables) are parsed and packed into chunks as they arrive
+- Chunks break between blocks, never inside a sentence of code or a table row
+- Code and table blocks stay whole up to the chunk size; larger ones are
+  split at line boundaries, repeating the code fence / table header so
+  every piece is valid Markdown on its own
+- Each chunk carries its heading path (``Install > Linux``) as ``title``
+- Short sibling sections are packed together (titled with their common
+  heading path) instead of producing many tiny chunks
+- Accepts text pieces streamed by a document loader (see loaders.py)
+
+Chunks have the same shape as TextChunker chunks, plus ``title``.
+"""
+import re
+from collections.abc import Generator, Iterable, Iterator
+from dataclasses import dataclass
+
+from .tokenizer import get_encoding
+
+# Separator between blocks in a chunk
+BLOCK_SEPARATOR = "\n\n"
+# Joins a heading path into a title
+TITLE_SEPARATOR = " > "
+
+_ATX_HEADING = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_SETEXT_UNDERLINE = re.compile(r"^ {0,3}(=+|-+)[ \t]*$")
+_FENCE = re.compile(r"^( {0,3})(`{3,}|~{3,})(.*)$")
+_TABLE_DELIMITER = re.compile(r"^ {0,3}\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+_LIST_ITEM = re.compile(r"^ {0,3}(?:[-*+]|\d{1,9}[.)])[ \t]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s+")
+
+# Paragraphs and lists longer than this are cut into several blocks, so text
+# without blank lines does not have to be buffered whole (they are split to
+# chunk size later anyway)
+MAX_BLOCK_CHARS = 100_000
+
+
+@dataclass
+class Block:
+    """A Markdown block with the headings it is nested under."""
+
+    kind: str  # heading, paragraph, list, code, table
+    text: str
+    headings: tuple[str, ...]
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[Block]:
+    """
+    Parse Markdown lines into blocks, one line at a time.
+
+    Headings are yielded as blocks too; ``headings`` of a heading block
+    already includes it.
+
+    Args:
+        lines: Document lines (with or without line endings)
+
+    Yields:
+        Block: Blocks in document order
+    """
+    headings: list[tuple[int, str]] = []
+    kind: str | None = None
+    buffer: list[str] = []
+    size = 0
+    fence: str | None = None
+
+    def path() -> tuple[str, ...]:
+        return tuple(title for _, title in headings)
+
+    def flush() -> Block | None:
+        nonlocal kind, buffer, size
+        block = Block(kind, "\n".join(buffer), path()) if kind and buffer else None
+        kind, buffer, size = None, [], 0
+        return block
+
+    def heading(level: int, title: str) -> Block:
+        while headings and headings[-1][0] >= level:
+            headings.pop()
+        headings.append((level, title))
+        return Block("heading", f"{'#' * level} {title}", path())
+
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+
+        if fence is not None:
+            buffer.append(line)
+            stripped = line.strip()
+            if stripped.startswith(fence) and not stripped.strip(fence[0]):
+                fence = None
+                if block := flush():
+                    yield block
+            continue
+
+        if match := _FENCE.match(line):
+            if match.group(2)[0] == "~" or "`" not in match.group(3):
+                if block := flush():
+                    yield block
+                kind, buffer, fence = "code", [line], match.group(2)
+                continue
+
+        if not line.strip():
+            if block := flush():
+                yield block
+            continue
+
+        if match := _ATX_HEADING.match(line):
+            if block := flush():
+                yield block
+            yield heading(len(match.group(1)), (match.group(2) or "").strip())
+            continue
+
+        if kind == "paragraph" and (match := _SETEXT_UNDERLINE.match(line)):
+            title = " ".join(part.strip() for part in buffer)
+            kind, buffer = None, []
+            yield heading(1 if match.group(1)[0] == "=" else 2, title)
+            continue
+
+        if kind == "paragraph" and len(buffer) == 1 and "|" in buffer[0] and _TABLE_DELIMITER.match(line):
+            kind = "table"
+            buffer.append(line)
+            continue
+
+        if kind == "table":
+            if "|" in line:
+                buffer.append(line)
+                continue
+            if block := flush():
+                yield block
+
+        if _LIST_ITEM.match(line):
+            if kind not in ("list", None):
+                if block := flush():
+                    yield block
+            kind = "list"
+        elif line.lstrip().startswith("|") and kind != "list":
+            if block := flush():
+                yield block
+            kind, buffer = "table", [line]
+            continue
+
+        if kind is None:
+            kind = "paragraph"
+        buffer.append(line)
+        size += len(line)
+        if size > MAX_BLOCK_CHARS and kind in ("paragraph", "list"):
+            continued = kind
+            if block := flush():
+                yield block
+            kind = continued
+
+    if block := flush():
+        yield block
+
+
+class MarkdownChunker:
+    """
+    Token-aware chunker that follows Markdown structure.
+
+    Drop-in alternative to TextChunker for Markdown input.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 500,
+        chunk_overlap: int = 100,
+        model: str = "text-embedding-ada-002",
+    ):
+        """
+        Initialize chunker.
+
+        Args:
+            chunk_size: Maximum tokens per chunk
+            chunk_overlap: Tokens of trailing prose repeated when a section
+                continues in the next chunk
+            model: Model name for tokenizer selection
+        """
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.encoding = get_encoding(model)
+        self._separator_tokens = len(self.encoding.encode(BLOCK_SEPARATOR))
+
+    def _count_tokens(self, text: str) -> int:
+        """Count tokens in text."""
+        return len(self.encoding.encode(text))
+
+    def chunk_text(self, text: str | Iterable[str]) -> Generator[dict, None, None]:
+        """Split Markdown text, or text pieces as a loader streams them, into chunks (see chunk_lines)."""
+        return self.chunk_lines(text.splitlines() if isinstance(text, str) else iter_lines(text))
+
+    def chunk_lines(self, lines: Iterable[str]) -> Generator[dict, None, None]:
+        """
+        Split Markdown lines into chunks as they are read.
+
+        Yields:
+            dict: Chunk with text and metadata
+                - text: Chunk content (blocks separated by blank lines)
+                - title: Heading path of the chunk's blocks (may be empty)
+                - start_token: Start position
+                - end_token: End position
+                - token_count: Number of tokens
+        """
+        # (block, tokens) of the chunk being built
+        current: list[tuple[Block, int]] = []
+        current_tokens = 0
+        # Token offsets in the document: end of the last block, start of the chunk
+        position = start = 0
+
+        def emit() -> dict:
+            nonlocal current, current_tokens
+            chunk = {
+                "text": BLOCK_SEPARATOR.join(block.text for block, _ in current),
+                "title": TITLE_SEPARATOR.join(_common_prefix([block.headings for block, _ in current])),
+                "start_token": start,
+                "end_token": position,
+                "token_count": current_tokens,
+            }
+            current, current_tokens = [], 0
+            return chunk
+
+        def add(block: Block, tokens: int, repeated: bool = False) -> None:
+            """Append a block; ``repeated`` overlap text does not advance the position."""
+            nonlocal current_tokens, position, start
+            if not current:
+                start = position - tokens if repeated else position
+            added = tokens + (self._separator_tokens if current else 0)
+            current.append((block, tokens))
+            current_tokens += added
+            if not repeated:
+                position += added
+
+        for block in iter_blocks(lines):
+            tokens = self._count_tokens(block.text)
+
+            if block.kind == "heading":
+                # A new section starts a new chunk unless the current one is small
+                # (and holding just a heading, it stays with its content)
+                if current_tokens >= self.chunk_size // 2 and current[-1][0].kind != "heading":
+                    yield emit()
+
+            for piece, piece_tokens in self._fit(block, tokens):
+                separator = self._separator_tokens if current else 0
+                if current and current_tokens + separator + piece_tokens > self.chunk_size:
+                    # Prose continuing the same section repeats the last sentences
+                    carry = None
+                    if piece.kind in ("paragraph", "list") and current[-1][0].headings == piece.headings:
+                        carry = self._overlap(current[-1][0])
+                    yield emit()
+                    if carry is not None:
+                        carry_tokens = self._count_tokens(carry.text)
+                        if carry_tokens + self._separator_tokens + piece_tokens <= self.chunk_size:
+                            add(carry, carry_tokens, repeated=True)
+                add(piece, piece_tokens)
+
+        if current:
+            yield emit()
+
+    def _fit(self, block: Block, tokens: int) -> Iterator[tuple[Block, int]]:
+        """Yield the block, or pieces of it that each fit in a chunk."""
+        if tokens <= self.chunk_size:
+            yield block, tokens
+            return
+
+        lines = block.text.split("\n")
+        if block.kind == "code":
+            # Keep the fences on every piece
+            opening = lines[0]
+            closing = lines[-1] if len(lines) > 1 and _FENCE.match(lines[-1]) else opening.strip()[:3]
+            body = lines[1:-1] if len(lines) > 1 and _FENCE.match(lines[-1]) else lines[1:]
+            pieces = self._pack_lines(body, head=[opening], tail=[closing])
+        elif block.kind == "table":
+            # Repeat the header row and delimiter on every piece
+            head = lines[:2] if len(lines) > 1 and _TABLE_DELIMITER.match(lines[1]) else []
+            pieces = self._pack_lines(lines[len(head):], head=head)
+        elif block.kind == "list":
+            pieces = self._pack_lines(_list_items(lines), joiner="\n")
+        else:
+            pieces = self._pack_lines(_SENTENCE_END.split(block.text), joiner=" ")
+
+        for text in pieces:
+            yield Block(block.kind, text, block.headings), self._count_tokens(text)
+
+    def _pack_lines(
+        self,
+        units: list[str],
+        head: list[str] | None = None,
+        tail: list[str] | None = None,
+        joiner: str = "\n",
+    ) -> list[str]:
+        """Greedily pack text units into pieces within the chunk size."""
+        head, tail = head or [], tail or []
+        frame = self._count_tokens("\n".join(head + tail)) + (len(head) + len(tail))
+        budget = max(self.chunk_size - frame, 1)
+
+        pieces: list[str] = []
+        current: list[str] = []
+        current_tokens = 0
+
+        def close() -> None:
+            nonlocal current, current_tokens
+            if current:
+                pieces.append("\n".join(head + [joiner.join(current)] + tail))
+            current, current_tokens = [], 0
+
+        for unit in units:
+            tokens = self._count_tokens(unit) + 1
+            if tokens > budget:
+                close()
+                # A single line or sentence longer than a chunk: split by tokens
+                encoded = self.encoding.encode(unit)
+                for start in range(0, len(encoded), budget):
+                    current = [self.encoding.decode(encoded[start : start + budget])]
+                    close()
+                continue
+            if current_tokens + tokens > budget:
+                close()
+            current.append(unit)
+            current_tokens += tokens
+        close()
+        return pieces
+
+    def _overlap(self, block: Block) -> Block | None:
+        """Trailing sentences of a paragraph, up to chunk_overlap tokens."""
+        if self.chunk_overlap <= 0 or block.kind != "paragraph":
+            return None
+        all_sentences = _SENTENCE_END.split(block.text)
+        sentences: list[str] = []
+        tokens = 0
+        for sentence in reversed(all_sentences):
+            sentence_tokens = self._count_tokens(sentence)
+            if tokens + sentence_tokens > self.chunk_overlap:
+                break
+            sentences.insert(0, sentence)
+            tokens += sentence_tokens
+        # Repeating the whole paragraph is not overlap
+        if not sentences or len(sentences) == len(all_sentences):
+            return None
+        return Block("paragraph", " ".join(sentences), block.headings)
+
+
+def iter_lines(pieces: Iterable[str]) -> Iterator[str]:
+    """Lines of streamed text pieces (a line may span several pieces)."""
+    pending = ""
+    for piece in pieces:
+        pending += piece
+        if "\n" in piece:
+            lines = pending.split("\n")
+            pending = lines.pop()
+            yield from lines
+    if pending:
+        yield pending
+
+
+def _list_items(lines: list[str]) -> list[str]:
+    """Group list lines into items (an item line plus its continuation lines)."""
+    items: list[list[str]] = []
+    for line in lines:
+        if _LIST_ITEM.match(line) or not items:
+            items.append([line])
+        else:
+            items[-1].append(line)
+    return ["\n".join(item) for item in items]
+
+
+def _common_prefix(paths: list[tuple[str, ...]]) -> tuple[str, ...]:
+    """Longest heading path shared by all blocks."""
+    prefix = paths[0] if paths else ()
+    for path in paths[1:]:
+        length = 0
+        while length < min(len(prefix), len(path)) and prefix[length] == path[length]:
+            length += 1
+        prefix = prefix[:length]
+    return prefix
+
+
+def is_markdown(name: str | None) -> bool:
+    """Whether a file name or URL has a Markdown extension."""
+    return bool(name) and name.lower().endswith((".md", ".markdown"))
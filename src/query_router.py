@@ -0,0 +1,212 @@
+"""
+Per-query choice of search mode and vector query tuning.
+
+Features:
+- Cheap lexical features: term count (CJK text counted by characters, since
+  it has no spaces), code tokens, ID-like tokens, quoted phrases, questions
+- Search mode "auto": short keyword-like or exact-match queries run keyword-only and
+  skip the embedding call; long prose runs vector-only; the rest runs
+  hybrid with a per-query vector weight and k oversampling
+- Exhaustive (exact) kNN when a pre-filter leaves few enough documents
+"""
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Literal
+
+from .config import get_settings
+
+if TYPE_CHECKING:
+    from .index_stats import IndexStatsService
+    from .search_planner import SearchPlan
+
+SearchMode = Literal["auto", "vector", "keyword", "hybrid"]
+
+_CJK = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯ｦ-ﾟ]")
+
+# Ticket/error numbers, versions, hashes, UUIDs: any token with a digit, or long hex
+_ID_TOKEN = re.compile(r"(?=[\w.#-]*\d)[\w.#-]{3,}|[0-9a-fA-F]{12,}")
+
+# Identifier-like tokens only, so prose ("and/or", "e.g.", "iPhone", "file(s)") is not code
+_CODE_TOKEN = re.compile(
+    r"\w+_\w+"  # snake_case
+    r"|\b[a-z]{2,}[A-Z][a-z]\w*"  # camelCase (not iPhone, macOS)
+    r"|\b[A-Z][a-z]+(?:[A-Z][a-z]+)+"  # PascalCase (ValueError)
+    r"|\b[A-Za-z_]\w+(?:\.[A-Za-z_]\w+)+"  # dotted.names (not e.g., Ph.D.)
+    r"|\w+\((?!s\))|::|->|^--?[a-zA-Z]"  # calls(), a::b, a->b, --flags
+    r"|^\.{0,2}/\w|\w/\w+/"  # /abs, ./rel and a/b/c paths (not and/or)
+    r"|[=<>{}\[\];$]"
+)
+
+_QUOTED = re.compile(r"\"[^\"]+\"|「[^」]+」")
+
+# Characters of a CJK run counted as one term (words average about two)
+CJK_CHARS_PER_TERM = 2
+
+# Share of code or ID tokens above which a query is treated as lexical
+LEXICAL_TOKEN_SHARE = 1 / 3
+
+
+@dataclass(frozen=True)
+class QueryFeatures:
+    """Lexical features of a query."""
+
+    terms: int
+    code_tokens: int
+    id_tokens: int
+    quoted: bool
+    question: bool
+
+
+@dataclass(frozen=True)
+class Route:
+    """How to run one search."""
+
+    mode: Literal["vector", "keyword", "hybrid"]
+    # Why the mode was chosen ("requested" for explicit modes)
+    reason: str
+    # Weight of the vector query relative to the keyword query in hybrid ranking
+    vector_weight: float = 1.0
+    # Nearest neighbors requested, as a multiple of the planned k
+    k_multiplier: float = 1.0
+    exhaustive: bool = False
+
+    @property
+    def needs_vector(self) -> bool:
+        """Whether the search needs a query embedding."""
+        return self.mode != "keyword"
+
+
+def query_features(query: str) -> QueryFeatures:
+    """Extract routing features from a query."""
+    tokens = query.split()
+    cjk = len(_CJK.findall(query))
+    # Whitespace tokens without CJK characters, plus CJK characters in terms
+    words = sum(1 for token in tokens if not _CJK.search(token))
+    return QueryFeatures(
+        terms=words + math.ceil(cjk / CJK_CHARS_PER_TERM),
+        code_tokens=sum(1 for token in tokens if _CODE_TOKEN.search(token) and not _ID_TOKEN.fullmatch(token)),
+        id_tokens=sum(1 for token in tokens if _ID_TOKEN.fullmatch(token.strip(".,:;!?()\"'"))),
+        quoted=bool(_QUOTED.search(query)),
+        question=query.rstrip().endswith(("?", "？")),
+    )
+
+
+class QueryRouter:
+    """
+    Chooses search mode, vector weight, k and exhaustive kNN per query.
+
+    Rules for mode "auto", in order:
+    - quoted phrases, and short queries with an ID: keyword (exact match)
+    - other short queries (up to ``keyword_max_terms``) that are not
+      questions: keyword
+    - queries whose tokens are largely code or IDs: hybrid with a reduced
+      vector weight
+    - long prose (at least ``vector_min_terms``): vector
+    - anything else: hybrid with k oversampled for the fusion
+
+    Keyword routes never embed the query.
+    """
+
+    def __init__(
+        self,
+        enabled: bool | None = None,
+        keyword_max_terms: int | None = None,
+        vector_min_terms: int | None = None,
+        lexical_vector_weight: float | None = None,
+        hybrid_k_multiplier: float | None = None,
+        exhaustive_max_documents: int | None = None,
+        stats: "IndexStatsService | None" = None,
+    ):
+        """
+        Initialize router (settings defaults for None).
+
+        Args:
+            enabled: Route "auto" queries (False runs them as plain hybrid)
+            keyword_max_terms: Longest query sent to keyword search alone
+            vector_min_terms: Shortest query sent to vector search alone
+            lexical_vector_weight: Vector weight for code/ID-heavy queries
+            hybrid_k_multiplier: k oversampling for hybrid queries
+            exhaustive_max_documents: Pre-filters estimated to leave at most
+                this many documents use exhaustive kNN (0 disables)
+            stats: Index statistics for the document count (process-wide if None)
+        """
+        settings = get_settings()
+        self.enabled = settings.query_routing if enabled is None else enabled
+        self.keyword_max_terms = (
+            settings.router_keyword_max_terms if keyword_max_terms is None else keyword_max_terms
+        )
+        self.vector_min_terms = settings.router_vector_min_terms if vector_min_terms is None else vector_min_terms
+        self.lexical_vector_weight = (
+            settings.router_lexical_vector_weight if lexical_vector_weight is None else lexical_vector_weight
+        )
+        self.hybrid_k_multiplier = (
+            settings.router_hybrid_k_multiplier if hybrid_k_multiplier is None else hybrid_k_multiplier
+        )
+        self.exhaustive_max_documents = (
+            settings.exhaustive_max_documents if exhaustive_max_documents is None else exhaustive_max_documents
+        )
+        self._stats = stats
+
+    @property
+    def stats(self) -> "IndexStatsService":
+        if self._stats is None:
+            from .index_stats import get_index_stats
+
+            self._stats = get_index_stats()
+        return self._stats
+
+    def route(self, query: str, mode: SearchMode = "auto", plan: "SearchPlan | None" = None) -> Route:
+        """
+        Route a query.
+
+        Args:
+            query: Query text
+            mode: Requested mode ("auto" lets the router choose)
+            plan: Search plan of the query's filter (for exhaustive kNN)
+
+        Returns:
+            Route: Mode and vector query tuning
+        """
+        if mode == "auto":
+            route = self._choose(query) if self.enabled else Route("hybrid", "default")
+        elif mode in ("vector", "keyword", "hybrid"):
+            route = Route(mode, "requested")
+        else:
+            raise ValueError(f"Invalid search mode: {mode}")
+
+        if route.needs_vector and self._exhaustive(plan):
+            route = Route(route.mode, route.reason, route.vector_weight, route.k_multiplier, exhaustive=True)
+        return route
+
+    def _choose(self, query: str) -> Route:
+        features = query_features(query)
+        if features.quoted:
+            return Route("keyword", "phrase")
+        if features.terms <= self.keyword_max_terms and features.id_tokens:
+            return Route("keyword", "identifier")
+        if features.terms <= self.keyword_max_terms and not features.question:
+            return Route("keyword", "short")
+        if features.code_tokens + features.id_tokens >= features.terms * LEXICAL_TOKEN_SHARE:
+            return Route("hybrid", "lexical", vector_weight=self.lexical_vector_weight)
+        if features.terms >= self.vector_min_terms:
+            return Route("vector", "long")
+        return Route("hybrid", "natural", k_multiplier=self.hybrid_k_multiplier)
+
+    def _exhaustive(self, plan: "SearchPlan | None") -> bool:
+        """Whether the plan's pre-filter leaves few enough documents for exact kNN."""
+        if not self.enabled or not self.exhaustive_max_documents:
+            return False
+        if plan is None or plan.vector_filter_mode != "preFilter":
+            return False
+        snapshot = self.stats.facets()
+        if snapshot is None:
+            return False
+        return plan.selectivity * snapshot.total <= self.exhaustive_max_documents
+
+
+@lru_cache()
+def get_query_router() -> QueryRouter:
+    """Get the process-wide query router."""
+    return QueryRouter()
@@ -3,18 +3,33 @@ RAG Pipeline module - Core orchestration logic.
 
 Features:
 - End-to-end query processing
+- Optional neighbor-chunk context expansion
+- Retrieval-only queries (results and packed context, no generation)
 - Streaming response generation
+- Batch queries with shared embedding and bounded fan-out
 - Source citation
 - Conversation context (optional)
 """
-from collections.abc import Generator
-from dataclasses import dataclass
-from typing import Literal
-
-from openai import AzureOpenAI
-
-from .config import get_openai_token, get_settings
+import time
+from collections.abc import Generator, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from .admission import (
+    AdmissionRejected,
+    AdmissionTicket,
+    Priority,
+    get_admission_controller,
+    retry_after_from_error,
+)
+from .budget import PromptBudget, PromptBudgeter
+from .clients import get_openai_client
+from .config import get_settings
+from .expansion import ContextExpander
+from .query_router import SearchMode
 from .retriever import ContextBuilder, HybridRetriever, SearchResult
+from .telemetry import get_metrics, record_tokens, span
+from .tokenizer import count_message_tokens, count_tokens
 
 
 @dataclass
@@ -25,6 +40,20 @@ class RAGResponse:
     sources: list[dict]
     context_used: str
     search_results: list[SearchResult]
+    usage: dict = field(default_factory=dict)
+
+
+@dataclass
+class RetrievalResponse:
+    """Represents a retrieval-only response."""
+
+    results: list[SearchResult]
+    context: str | None = None
+    sources: list[dict] = field(default_factory=list)
+    context_tokens: int = 0
+    # Results the search returned before score filtering (a full page
+    # means more may follow)
+    ranked: int = 0
 
 
 class RAGPipeline:
@@ -53,10 +82,14 @@ class RAGPipeline:
 - コード例がある場合はMarkdown形式で記述
 - 不確実な情報は推測として明示"""
 
+    # Completion budget when no per-query budget is supplied
+    DEFAULT_MAX_TOKENS = 2000
+
     def __init__(
         self,
         system_prompt: str | None = None,
         max_context_tokens: int = 4000,
+        context_window: int | None = None,
     ):
         """
         Initialize RAG pipeline.
@@ -64,29 +97,34 @@ class RAGPipeline:
         Args:
             system_prompt: Custom system prompt (uses default if None)
             max_context_tokens: Maximum tokens for context window
+            context_window: Neighbor chunks added on each side of a hit
+                (settings default if None, 0 disables)
         """
         settings = get_settings()
 
         self.retriever = HybridRetriever()
         self.context_builder = ContextBuilder(max_context_tokens)
+        window = settings.context_window if context_window is None else context_window
+        self.expander = ContextExpander(window) if window > 0 else None
+        self.budgeter = PromptBudgeter(max_context_tokens=max_context_tokens)
         self.system_prompt = system_prompt or self.DEFAULT_SYSTEM_PROMPT
 
-        # Initialize OpenAI client
-        self.openai_client = AzureOpenAI(
-            azure_endpoint=settings.openai_endpoint,
-            azure_ad_token_provider=get_openai_token,
-            api_version=settings.openai_api_version,
-        )
+        # Shared OpenAI client (same endpoint as embeddings)
+        self.openai_client = get_openai_client()
         self.chat_deployment = settings.openai_deployment_chat
+        self.admission = get_admission_controller()
 
     def query(
         self,
         question: str,
         top_k: int = 5,
-        search_mode: Literal["vector", "keyword", "hybrid"] = "hybrid",
+        search_mode: SearchMode = "auto",
         filters: str | None = None,
         stream: bool = False,
         conversation_history: list[dict] | None = None,
+        priority: Priority = Priority.STANDARD,
+        query_vector: list[float] | None = None,
+        vector_field: str | None = None,
     ) -> RAGResponse | Generator[str, None, RAGResponse]:
         """
         Execute RAG query.
@@ -94,24 +132,41 @@ class RAGPipeline:
         Args:
             question: User question
             top_k: Number of context chunks to retrieve
-            search_mode: Search strategy
+            search_mode: Search strategy (auto routes each question)
             filters: OData filter for search
             stream: Whether to stream response
             conversation_history: Previous messages for context
+            priority: Admission priority for the LLM call
+            query_vector: Precomputed question embedding (skips embedding)
+            vector_field: Vector field to search (SEARCH_VECTOR_FIELD if None)
 
         Returns:
             RAGResponse or Generator yielding chunks then RAGResponse
+
+        Raises:
+            AdmissionRejected: If LLM capacity is exhausted (retry later)
         """
-        # Step 1: Retrieve relevant context
-        search_results = self.retriever.search(
-            query=question,
-            top_k=top_k,
-            mode=search_mode,
-            filters=filters,
-        )
+        with span("rag.retrieve"):
+            # Step 1: Retrieve relevant context
+            search_results = self.retriever.search(
+                query=question,
+                top_k=top_k,
+                mode=search_mode,
+                filters=filters,
+                query_vector=query_vector,
+                vector_field=vector_field,
+            )
 
-        # Step 2: Build context
-        context, sources = self.context_builder.build_context(search_results)
+            # Step 2: Build context within the prompt budget
+            budget = self.budgeter.plan(
+                self.system_prompt,
+                count_tokens(self._format_user_message(question, "")),
+                question,
+            )
+            context, sources, budget.context_tokens = self.context_builder.pack_context(
+                self._expand(search_results), max_tokens=budget.context_budget
+            )
+            history = self.budgeter.fit_history(budget, conversation_history)
 
         # Step 3: Generate response
         if stream:
@@ -120,7 +175,9 @@ class RAGPipeline:
                 context=context,
                 sources=sources,
                 search_results=search_results,
-                conversation_history=conversation_history,
+                conversation_history=history or None,
+                priority=priority,
+                budget=budget,
             )
         else:
             return self._generate_response(
@@ -128,8 +185,152 @@ class RAGPipeline:
                 context=context,
                 sources=sources,
                 search_results=search_results,
-                conversation_history=conversation_history,
+                conversation_history=history or None,
+                priority=priority,
+                budget=budget,
+            )
+
+    def retrieve(
+        self,
+        question: str,
+        top_k: int = 5,
+        search_mode: SearchMode = "auto",
+        filters: str | None = None,
+        skip: int = 0,
+        select_fields: list[str] | None = None,
+        include_vectors: bool = False,
+        include_context: bool = False,
+        max_context_tokens: int | None = None,
+        query_vector: list[float] | None = None,
+        vector_field: str | None = None,
+    ) -> RetrievalResponse:
+        """
+        Retrieve context without generating an answer.
+
+        Runs the same search and context packing as ``query()`` but stops
+        before the LLM call, so no admission ticket is taken.
+
+        Args:
+            question: User question
+            top_k: Number of chunks to return
+            search_mode: Search strategy (auto routes each question)
+            filters: OData filter for search
+            skip: Number of ranked chunks to skip (pagination)
+            select_fields: Index fields to return (default set if None)
+            include_vectors: Also return stored chunk embeddings
+            include_context: Pack results (plus neighbor chunks, if enabled)
+                into an LLM-ready context string
+            max_context_tokens: Context budget (capped at the builder's limit)
+            query_vector: Precomputed question embedding (skips embedding)
+            vector_field: Vector field to search (SEARCH_VECTOR_FIELD if None)
+
+        Returns:
+            RetrievalResponse: Ranked results, plus context and sources if requested
+        """
+        with span("rag.retrieve", mode=search_mode):
+            page = self.retriever.search_page(
+                query=question,
+                top_k=top_k,
+                mode=search_mode,
+                filters=filters,
+                select_fields=select_fields,
+                query_vector=query_vector,
+                skip=skip,
+                include_vectors=include_vectors,
+                vector_field=vector_field,
             )
+            search_results = page.results
+            response = RetrievalResponse(results=search_results, ranked=page.ranked)
+            if include_context:
+                response.context, response.sources, response.context_tokens = (
+                    self.context_builder.pack_context(
+                        self._expand(search_results), max_tokens=max_context_tokens
+                    )
+                )
+        return response
+
+    def query_batch(
+        self,
+        questions: list[str],
+        top_k: int = 5,
+        search_mode: SearchMode = "auto",
+        filters: str | None = None,
+        max_concurrency: int | None = None,
+        vector_field: str | None = None,
+    ) -> Iterator[tuple[int, RAGResponse | Exception]]:
+        """
+        Answer many independent questions.
+
+        Questions routed to a vector query are embedded up front with
+        batched embedding calls; retrieval and generation then run on a
+        bounded thread pool, with generations admitted at batch priority so
+        interactive traffic keeps precedence.
+
+        Args:
+            questions: Questions to answer
+            top_k: Number of context chunks per question
+            search_mode: Search strategy (auto routes each question)
+            filters: OData filter for search
+            max_concurrency: Questions in flight (settings default if None)
+            vector_field: Vector field to search (SEARCH_VECTOR_FIELD if None)
+
+        Yields:
+            tuple: (question index, RAGResponse or the exception it raised),
+                in completion order
+        """
+        concurrency = max_concurrency or get_settings().batch_query_concurrency
+        vectors: list = [None] * len(questions)
+        # Only questions that will run a vector query are embedded
+        embed = [
+            index for index, question in enumerate(questions)
+            if self.retriever.router.route(question, search_mode).needs_vector
+        ]
+        if embed:
+            with span("rag.batch_embed", questions=len(embed)):
+                embedding_service = (
+                    self.retriever.embedding_service_for(vector_field)
+                    if vector_field
+                    else self.retriever.embedding_service
+                )
+                for index, vector in zip(embed, embedding_service.embed_batch([questions[i] for i in embed])):
+                    vectors[index] = vector
+
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="rag-batch")
+        try:
+            futures = {
+                executor.submit(
+                    self.query,
+                    question=question,
+                    top_k=top_k,
+                    search_mode=search_mode,
+                    filters=filters,
+                    priority=Priority.BATCH,
+                    query_vector=vector,
+                    vector_field=vector_field,
+                ): index
+                for index, (question, vector) in enumerate(zip(questions, vectors))
+            }
+            for future in as_completed(futures):
+                error = future.exception()
+                yield futures[future], error if error is not None else future.result()
+        finally:
+            # Stop queued questions if the consumer goes away
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _expand(self, search_results: list[SearchResult]) -> list[SearchResult]:
+        """Add neighbor chunks to the hits used for context (if enabled)."""
+        if self.expander is None:
+            return search_results
+        return self.expander.expand(search_results)
+
+    @staticmethod
+    def _format_user_message(question: str, context: str) -> str:
+        """Format the user turn carrying context and question."""
+        return f"""## コンテキスト
+{context}
+
+## 質問
+{question}"""
 
     def _build_messages(
         self,
@@ -145,16 +346,23 @@ class RAGPipeline:
             messages.extend(conversation_history)
 
         # Add current question with context
-        user_message = f"""## コンテキスト
-{context}
-
-## 質問
-{question}"""
+        user_message = self._format_user_message(question, context)
 
         messages.append({"role": "user", "content": user_message})
 
         return messages
 
+    def _admit(self, messages: list[dict], max_tokens: int, priority: Priority) -> AdmissionTicket:
+        """Reserve TPM/RPM budget for a chat completion of expected size."""
+        estimate = count_message_tokens(messages) + self.admission.expected_completion(max_tokens)
+        return self.admission.acquire(estimate, priority)
+
+    def _rate_limited(self, error: Exception) -> AdmissionRejected:
+        """Back off the shared controller after an upstream 429."""
+        retry_after = retry_after_from_error(error)
+        self.admission.penalize(retry_after)
+        return AdmissionRejected(retry_after, reason="Azure OpenAI rate limit")
+
     def _generate_response(
         self,
         question: str,
@@ -162,16 +370,33 @@ class RAGPipeline:
         sources: list[dict],
         search_results: list[SearchResult],
         conversation_history: list[dict] | None = None,
+        priority: Priority = Priority.STANDARD,
+        budget: PromptBudget | None = None,
     ) -> RAGResponse:
         """Generate non-streaming response."""
-        messages = self._build_messages(question, context, conversation_history)
+        from openai import RateLimitError
 
-        response = self.openai_client.chat.completions.create(
-            model=self.chat_deployment,
-            messages=messages,
-            temperature=0.7,
-            max_tokens=2000,
-        )
+        messages = self._build_messages(question, context, conversation_history)
+        max_tokens = budget.max_tokens if budget else self.DEFAULT_MAX_TOKENS
+
+        ticket = self._admit(messages, max_tokens, priority)
+        used_tokens = completion_tokens = None
+        try:
+            with span("llm.generate"):
+                response = self.openai_client.chat.completions.create(
+                    model=self.chat_deployment,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=max_tokens,
+                )
+            if response.usage:
+                used_tokens = response.usage.total_tokens
+                completion_tokens = response.usage.completion_tokens
+        except RateLimitError as e:
+            used_tokens = 0
+            raise self._rate_limited(e) from e
+        finally:
+            self.admission.release(ticket, used_tokens, completion_tokens)
 
         answer = response.choices[0].message.content or ""
 
@@ -180,6 +405,7 @@ class RAGPipeline:
             sources=sources,
             context_used=context,
             search_results=search_results,
+            usage=self._record_usage(response.usage, budget, max_tokens),
         )
 
     def _generate_streaming_response(
@@ -189,24 +415,77 @@ class RAGPipeline:
         sources: list[dict],
         search_results: list[SearchResult],
         conversation_history: list[dict] | None = None,
+        priority: Priority = Priority.STANDARD,
+        budget: PromptBudget | None = None,
     ) -> Generator[str, None, RAGResponse]:
-        """Generate streaming response."""
-        messages = self._build_messages(question, context, conversation_history)
+        """
+        Generate streaming response.
 
-        response = self.openai_client.chat.completions.create(
-            model=self.chat_deployment,
-            messages=messages,
-            temperature=0.7,
-            max_tokens=2000,
-            stream=True,
+        Admission and the completion request happen eagerly so that
+        rejections surface before the caller starts streaming.
+        """
+        from openai import RateLimitError
+
+        messages = self._build_messages(question, context, conversation_history)
+        max_tokens = budget.max_tokens if budget else self.DEFAULT_MAX_TOKENS
+
+        ticket = self._admit(messages, max_tokens, priority)
+        start = time.perf_counter()
+        try:
+            response = self.openai_client.chat.completions.create(
+                model=self.chat_deployment,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+        except RateLimitError as e:
+            self.admission.release(ticket, 0)
+            raise self._rate_limited(e) from e
+        except BaseException:
+            self.admission.release(ticket, 0)
+            raise
+
+        return self._stream_chunks(
+            response, ticket, start, context, sources, search_results, budget, max_tokens
         )
 
+    def _stream_chunks(
+        self,
+        response,
+        ticket: AdmissionTicket,
+        start: float,
+        context: str,
+        sources: list[dict],
+        search_results: list[SearchResult],
+        budget: PromptBudget | None,
+        max_tokens: int,
+    ) -> Generator[str, None, RAGResponse]:
+        """Yield streamed content and release the admission ticket when done."""
+        metrics = get_metrics()
         answer_parts = []
-        for chunk in response:
-            if chunk.choices and chunk.choices[0].delta.content:
-                content = chunk.choices[0].delta.content
-                answer_parts.append(content)
-                yield content
+        used_tokens = None
+        usage = None
+
+        try:
+            with span("llm.stream"):
+                for chunk in response:
+                    if chunk.usage:
+                        usage = chunk.usage
+                        used_tokens = usage.total_tokens
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        content = chunk.choices[0].delta.content
+                        if not answer_parts:
+                            metrics.stage_duration.observe(
+                                time.perf_counter() - start, stage="llm.ttft"
+                            )
+                        answer_parts.append(content)
+                        yield content
+        finally:
+            self.admission.release(
+                ticket, used_tokens, usage.completion_tokens if usage else None
+            )
 
         # Return final response object
         return RAGResponse(
@@ -214,8 +493,31 @@ class RAGPipeline:
             sources=sources,
             context_used=context,
             search_results=search_results,
+            usage=self._record_usage(usage, budget, max_tokens),
         )
 
+    @staticmethod
+    def _record_usage(usage, budget: PromptBudget | None, max_tokens: int) -> dict:
+        """
+        Record token usage for a request.
+
+        Returns:
+            dict: Budget breakdown plus actual prompt/completion tokens
+        """
+        record = budget.to_dict() if budget else {"max_tokens": max_tokens}
+        record_tokens("max_tokens", max_tokens)
+        if budget:
+            record_tokens("history", budget.history_tokens)
+        if usage is not None:
+            if budget:
+                record["estimated_prompt_tokens"] = budget.prompt_tokens
+            record["prompt_tokens"] = usage.prompt_tokens
+            record["completion_tokens"] = usage.completion_tokens
+            record["total_tokens"] = usage.total_tokens
+            record_tokens("prompt", usage.prompt_tokens)
+            record_tokens("completion", usage.completion_tokens)
+        return record
+
 
 class ConversationManager:
     """
@@ -0,0 +1,225 @@
+"""
+Background re-embedding for embedding model migrations.
+
+Features:
+- Fills content_vector_v2 for chunks written before dual-write was
+  enabled, from the chunk content already stored in the index (no
+  re-chunking, no blob reads)
+- Pending chunks are found with ``embedding_version ne 2``; merged chunks
+  drop out of the filter, so an interrupted run simply resumes
+- Throttled to REEMBED_RATE chunks per second so the migration does not
+  compete with query and ingestion embedding traffic
+- Runs once from the CLI or as a stoppable background thread in the API
+  (REEMBED_BACKGROUND=true, enable on a single instance)
+
+Re-embed everything pending:
+    python -m src.reembed --rate 50
+"""
+import argparse
+import logging
+import sys
+import threading
+import time
+from collections import deque
+
+from .clients import get_search_client
+from .config import get_settings
+from .embedding import VECTOR_FIELDS, get_embedding_service
+from .telemetry import get_metrics, span
+
+logger = logging.getLogger(__name__)
+
+TARGET_VERSION = 2
+PENDING_FILTER = f"embedding_version ne {TARGET_VERSION}"
+
+# Batches remembered while the index refresh catches up with merges
+RECENT_BATCHES = 4
+# Largest page the search API returns
+MAX_TOP = 1000
+
+
+class ReEmbedder:
+    """
+    Throttled re-embedding of stored chunks into the v2 vector field.
+
+    Safe to run next to dual-writing ingestion: chunks written with the
+    v2 vector are never pending.
+    """
+
+    def __init__(
+        self,
+        index_name: str | None = None,
+        rate: float | None = None,
+        batch_size: int | None = None,
+        poll_interval: float = 2.0,
+    ):
+        """
+        Initialize re-embedder.
+
+        Args:
+            index_name: Index or alias to update (AZURE_SEARCH_INDEX if None)
+            rate: Maximum chunks embedded per second (REEMBED_RATE if None)
+            batch_size: Chunks per embedding call (REEMBED_BATCH_SIZE if None)
+            poll_interval: Seconds to wait for the index to reflect merges
+
+        Raises:
+            ValueError: If the v2 embedding model is not configured
+        """
+        settings = get_settings()
+
+        self.search_client = get_search_client(index_name)
+        self.embedding_service = get_embedding_service(TARGET_VERSION)
+        self.rate = rate or settings.reembed_rate
+        self.batch_size = batch_size or settings.reembed_batch_size
+        self.poll_interval = poll_interval
+
+        self.embedded = 0
+        self.failed_ids: set[str] = set()
+        self.started_at: float | None = None
+        self._recent: deque[set[str]] = deque(maxlen=RECENT_BATCHES)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._chunks_total = get_metrics().counter(
+            "rag_reembedded_chunks_total", "Chunks re-embedded into the v2 vector field by result"
+        )
+
+    def pending(self) -> int:
+        """Chunks still missing the v2 embedding."""
+        results = self.search_client.search(
+            search_text="*", filter=PENDING_FILTER, top=0, include_total_count=True
+        )
+        return results.get_count() or 0
+
+    def _next_batch(self) -> list[dict] | None:
+        """
+        Pending chunks not yet handled in this run.
+
+        Returns:
+            list | None: Chunks to embed ([] while the index catches up,
+                None when nothing is pending)
+        """
+        skip = set(self.failed_ids).union(*self._recent)
+        page = list(self.search_client.search(
+            search_text="*",
+            filter=PENDING_FILTER,
+            select=["id", "content"],
+            top=min(self.batch_size + len(skip), MAX_TOP),
+        ))
+        if all(d["id"] in self.failed_ids for d in page):
+            # Nothing left, or only chunks that cannot be updated
+            return None
+        return [d for d in page if d["id"] not in skip][: self.batch_size]
+
+    def run_batch(self) -> int | None:
+        """
+        Re-embed one batch.
+
+        Returns:
+            int | None: Chunks updated (0 while waiting for the index),
+                None when nothing is pending
+        """
+        batch = self._next_batch()
+        if batch is None:
+            return None
+        if not batch:
+            return 0
+
+        with span("reembed.batch", chunks=len(batch)):
+            # Chunks without content (deduplicated references) are only marked done
+            texts = [d["content"] for d in batch if d["content"]]
+            vectors = iter(self.embedding_service.embed_batch(texts) if texts else [])
+            results = self.search_client.merge_documents([
+                {"id": d["id"], "embedding_version": TARGET_VERSION}
+                | ({VECTOR_FIELDS[TARGET_VERSION]: next(vectors)} if d["content"] else {})
+                for d in batch
+            ])
+
+        self._recent.append({d["id"] for d in batch})
+        succeeded = 0
+        for result in results:
+            if result.succeeded:
+                succeeded += 1
+            else:
+                self.failed_ids.add(result.key)
+                logger.warning("Re-embedding %s failed: %s", result.key, result.error_message)
+        self.embedded += succeeded
+        self._chunks_total.inc(succeeded, result="ok")
+        self._chunks_total.inc(len(batch) - succeeded, result="failed")
+        return succeeded
+
+    def run(self, max_chunks: int | None = None) -> dict:
+        """
+        Re-embed until nothing is pending, ``max_chunks`` is reached or stop() is called.
+
+        Embedding errors (e.g. exhausted rate limits) back off exponentially
+        and retry; chunks whose update is rejected are skipped.
+
+        Returns:
+            dict: Progress (see status())
+        """
+        self.started_at = time.monotonic()
+        errors = 0
+        while not self._stop.is_set() and (max_chunks is None or self.embedded < max_chunks):
+            batch_start = time.monotonic()
+            try:
+                updated = self.run_batch()
+                errors = 0
+            except Exception as e:
+                errors += 1
+                delay = min(self.poll_interval * 2 ** errors, 300.0)
+                logger.warning("Re-embedding batch failed (retry in %.0fs): %s", delay, e)
+                self._stop.wait(delay)
+                continue
+            if updated is None:
+                break
+            if updated == 0:
+                self._stop.wait(self.poll_interval)
+                continue
+            # Pace to the configured rate
+            self._stop.wait(max(updated / self.rate - (time.monotonic() - batch_start), 0.0))
+        return self.status()
+
+    def status(self) -> dict:
+        """Progress counters."""
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "embedded": self.embedded,
+            "failed": len(self.failed_ids),
+            "chunks_per_second": round(self.embedded / elapsed, 3) if elapsed else 0.0,
+            "rate_limit": self.rate,
+        }
+
+    def start(self) -> threading.Thread:
+        """Run in a daemon thread until done or stopped."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="reembed", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float | None = 10.0) -> None:
+        """Stop after the current batch."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Fill content_vector_v2 for existing chunks")
+    parser.add_argument("--index", help="Index or alias (default: AZURE_SEARCH_INDEX)")
+    parser.add_argument("--rate", type=float, help="Chunks per second (default: REEMBED_RATE)")
+    parser.add_argument("--batch-size", type=int, help="Chunks per embedding call")
+    parser.add_argument("--max-chunks", type=int, help="Stop after this many chunks")
+    args = parser.parse_args(argv)
+
+    reembedder = ReEmbedder(args.index, rate=args.rate, batch_size=args.batch_size)
+    print(f"Pending: {reembedder.pending()} chunks")
+    status = reembedder.run(max_chunks=args.max_chunks)
+    print(f"Re-embedded {status['embedded']} chunks ({status['failed']} failed), "
+          f"{reembedder.pending()} pending")
+    return 1 if status["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
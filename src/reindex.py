@@ -0,0 +1,434 @@
+"""
+Blue/green reindexing behind an index alias.
+
+Features:
+- Builds a versioned shadow index (``<alias>-<UTC timestamp>``) with the
+  current schema and index profile, bulk-loaded with the concurrent
+  upload path (DocumentIngestionPipeline.ingest_stream)
+- Validates the shadow before cutover: upload failures, document count
+  against the upload results and the live index, and a sample query set
+  (every query answered, optional result overlap with live)
+- The sample queries also warm the shadow before it takes traffic
+- Atomic cutover by repointing the alias that clients query
+  (AZURE_SEARCH_INDEX), so no request ever sees a missing or partial index
+- Previous versions are kept for rollback; older ones are pruned, and
+  shadows that fail validation are deleted
+
+Reindex from blob storage:
+    python -m src.reindex --alias rag-index --queries queries.txt
+
+Roll back to the previous version:
+    python -m src.reindex --alias rag-index --rollback
+"""
+import argparse
+import json
+import logging
+import re
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass, field
+
+from .clients import get_search_index_client
+from .config import get_settings
+from .expansion import get_chunk_store
+from .index_profile import IndexProfile
+from .indexer import DocumentIngestionPipeline, SearchIndexManager
+from .jobs import JobProgress
+from .telemetry import get_metrics, span
+
+logger = logging.getLogger(__name__)
+
+VERSION_FORMAT = "%Y%m%d%H%M%S"
+
+
+class ReindexError(RuntimeError):
+    """Raised when a reindex or rollback cannot proceed."""
+
+
+@dataclass
+class ValidationReport:
+    """Checks run against a shadow index before cutover."""
+
+    expected_documents: int
+    indexed_documents: int
+    live_documents: int | None = None
+    queries: int = 0
+    answered: int = 0
+    # Mean fraction of live top-k ids also returned by the shadow
+    mean_overlap: float | None = None
+    problems: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+
+@dataclass
+class ReindexResult:
+    """Outcome of Reindexer.run."""
+
+    alias: str
+    index_name: str
+    previous_index: str | None
+    ingest: dict
+    validation: ValidationReport
+    swapped: bool
+
+    def to_dict(self) -> dict:
+        result = asdict(self)
+        result["ingest"] = {k: v for k, v in self.ingest.items() if k != "errors"}
+        result["validation"]["ok"] = self.validation.ok
+        return result
+
+
+class Reindexer:
+    """
+    Orchestrates shadow index builds and alias cutover.
+
+    Clients keep querying ``alias``; the service resolves it to the
+    current version on every request.
+    """
+
+    def __init__(
+        self,
+        alias: str | None = None,
+        keep_versions: int | None = None,
+        min_count_ratio: float | None = None,
+        min_overlap: float = 0.0,
+        count_timeout: float = 60.0,
+        poll_interval: float = 2.0,
+    ):
+        """
+        Initialize reindexer.
+
+        Args:
+            alias: Alias clients query (AZURE_SEARCH_INDEX if None)
+            keep_versions: Previous versions kept for rollback
+            min_count_ratio: Minimum shadow/live document count ratio
+            min_overlap: Minimum mean top-k overlap with the live index
+                (0 disables; re-embeds legitimately change rankings)
+            count_timeout: Seconds to wait for the document count to settle
+            poll_interval: Seconds between document count polls
+        """
+        settings = get_settings()
+
+        self.alias = alias or settings.search_index
+        self.index_client = get_search_index_client()
+        self.keep_versions = settings.reindex_keep_versions if keep_versions is None else keep_versions
+        self.min_count_ratio = settings.reindex_min_count_ratio if min_count_ratio is None else min_count_ratio
+        self.min_overlap = min_overlap
+        self.count_timeout = count_timeout
+        self.poll_interval = poll_interval
+        self._version_pattern = re.compile(rf"{re.escape(self.alias)}-\d{{14}}")
+        self._swaps = get_metrics().counter("rag_reindex_swaps_total", "Alias cutovers by kind")
+
+    # --- state ---
+
+    def current_index(self) -> str | None:
+        """Index the alias points to (None if the alias does not exist)."""
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            return self.index_client.get_alias(self.alias).indexes[0]
+        except ResourceNotFoundError:
+            return None
+
+    def _is_index(self, name: str) -> bool:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            self.index_client.get_index(name)
+            return True
+        except ResourceNotFoundError:
+            return False
+
+    def versions(self) -> list[str]:
+        """Versioned indexes of this alias, oldest first."""
+        return sorted(n for n in self.index_client.list_index_names() if self._version_pattern.fullmatch(n))
+
+    def live_name(self) -> str | None:
+        """Name currently serving queries: the alias, or the configured plain index."""
+        if self.current_index():
+            return self.alias
+        configured = get_settings().search_index
+        return configured if self._is_index(configured) else None
+
+    def new_version_name(self) -> str:
+        name = f"{self.alias}-{time.strftime(VERSION_FORMAT, time.gmtime())}"
+        # Two builds within one second: wait for a fresh timestamp
+        while name in self.versions():
+            time.sleep(1.0)
+            name = f"{self.alias}-{time.strftime(VERSION_FORMAT, time.gmtime())}"
+        return name
+
+    # --- phases ---
+
+    def build(
+        self,
+        documents: Iterable[dict],
+        vector_dimensions: int | None = None,
+        profile: IndexProfile | None = None,
+        index_name: str | None = None,
+        progress: JobProgress | None = None,
+    ) -> tuple[str, dict]:
+        """
+        Create a shadow index and bulk-load it.
+
+        Returns:
+            tuple: (index name, ingest results)
+        """
+        name = index_name or self.new_version_name()
+        with span("reindex.build", index=name):
+            SearchIndexManager(name).create_index(vector_dimensions, profile)
+            pipeline = DocumentIngestionPipeline(name)
+            results = pipeline.ingest_stream(documents, progress=progress.add if progress else None)
+        logger.info("Loaded %s: %d chunks, %d failed", name, results["succeeded"], results["failed"])
+        return name, results
+
+    def _settled_count(self, manager: SearchIndexManager, expected: int) -> int:
+        """Document count once it reaches ``expected`` or stops changing."""
+        deadline = time.monotonic() + self.count_timeout
+        count = manager.get_document_count()
+        while count != expected and time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            previous, count = count, manager.get_document_count()
+            if count == previous and count > expected:
+                break
+        return count
+
+    def validate(
+        self,
+        index_name: str,
+        ingest: dict,
+        queries: Iterable[str] = (),
+        top_k: int = 5,
+    ) -> ValidationReport:
+        """
+        Check a shadow index against its upload results and the live index.
+
+        Running the sample queries also warms the shadow index.
+        """
+        from .retriever import HybridRetriever
+
+        with span("reindex.validate", index=index_name):
+            report = ValidationReport(
+                expected_documents=ingest["succeeded"],
+                indexed_documents=self._settled_count(SearchIndexManager(index_name), ingest["succeeded"]),
+            )
+            if ingest["failed"]:
+                report.problems.append(f"{ingest['failed']} chunks failed to upload")
+            if report.indexed_documents != report.expected_documents:
+                report.problems.append(
+                    f"index has {report.indexed_documents} documents, expected {report.expected_documents}"
+                )
+
+            live = self.live_name()
+            if live:
+                report.live_documents = SearchIndexManager(live).get_document_count()
+                if report.indexed_documents < report.live_documents * self.min_count_ratio:
+                    report.problems.append(
+                        f"index has {report.indexed_documents} documents, live index has "
+                        f"{report.live_documents} (minimum ratio {self.min_count_ratio})"
+                    )
+
+            queries = list(queries)
+            shadow_retriever = HybridRetriever(index_name) if queries else None
+            live_retriever = HybridRetriever(live) if queries and live else None
+            # Compare rankings, not scores: hybrid (RRF) scores fall far below
+            # RAG_SCORE_THRESHOLD, so the threshold is not applied here
+            search = dict(top_k=top_k, score_threshold=0.0)
+            overlaps = []
+            for query in queries:
+                # One embedding per query, shared by both indexes
+                vector = shadow_retriever.embedding_service.embed_text(query)
+                shadow_ids = [r.id for r in shadow_retriever.search(query, query_vector=vector, **search)]
+                report.queries += 1
+                live_ids = None
+                if live_retriever:
+                    live_ids = [r.id for r in live_retriever.search(query, query_vector=vector, **search)]
+                if shadow_ids or live_ids == []:
+                    report.answered += 1
+                if live_ids:
+                    overlaps.append(len(set(live_ids) & set(shadow_ids)) / len(live_ids))
+
+            if report.answered < report.queries:
+                report.problems.append(
+                    f"{report.queries - report.answered} of {report.queries} sample queries returned no results"
+                )
+            if overlaps:
+                report.mean_overlap = round(sum(overlaps) / len(overlaps), 4)
+                if report.mean_overlap < self.min_overlap:
+                    report.problems.append(
+                        f"mean top-{top_k} overlap with live index {report.mean_overlap} < {self.min_overlap}"
+                    )
+        return report
+
+    def swap(self, index_name: str, kind: str = "cutover") -> str | None:
+        """
+        Atomically point the alias at ``index_name``.
+
+        Returns:
+            str | None: Index the alias pointed to before
+        """
+        from azure.search.documents.indexes.models import SearchAlias
+
+        previous = self.current_index()
+        with span("reindex.swap", index=index_name, previous=previous or "none"):
+            self.index_client.create_or_update_alias(SearchAlias(name=self.alias, indexes=[index_name]))
+        self._swaps.inc(kind=kind)
+        # Chunks cached for context expansion belong to the old index
+        get_chunk_store().clear()
+        logger.info("Alias %s -> %s (was %s)", self.alias, index_name, previous)
+        return previous
+
+    def prune(self) -> list[str]:
+        """Delete versions older than the current one plus ``keep_versions`` previous."""
+        current = self.current_index()
+        versions = self.versions()
+        if current not in versions:
+            return []
+        stale = versions[: max(versions.index(current) - self.keep_versions, 0)]
+        for name in stale:
+            self.index_client.delete_index(name)
+        return stale
+
+    def rollback(self) -> str:
+        """
+        Point the alias back at the version before the current one.
+
+        Raises:
+            ReindexError: If there is no earlier version
+        """
+        current = self.current_index()
+        versions = self.versions()
+        if current not in versions or versions.index(current) == 0:
+            raise ReindexError(f"No earlier version of {self.alias} to roll back to")
+        target = versions[versions.index(current) - 1]
+        self.swap(target, kind="rollback")
+        return target
+
+    def run(
+        self,
+        documents: Iterable[dict],
+        queries: Iterable[str] = (),
+        vector_dimensions: int | None = None,
+        profile: IndexProfile | None = None,
+        swap: bool = True,
+        keep_failed: bool = False,
+        progress: JobProgress | None = None,
+    ) -> ReindexResult:
+        """
+        Build, validate and (if valid) cut over to a new index version.
+
+        A shadow that fails validation leaves the alias unchanged and is
+        deleted, unless ``keep_failed`` keeps it for inspection (delete it
+        before the next rollback, which targets the previous version by name).
+
+        Args:
+            documents: Documents to load (ingest_documents format)
+            queries: Sample queries for validation and warm-up
+            vector_dimensions: Embedding vector size (EMBEDDING_DIMENSIONS if None)
+            profile: Vector index profile (INDEX_PROFILE if None)
+            swap: Cut over after successful validation
+            keep_failed: Keep a shadow that failed validation
+            progress: Optional counters updated while loading
+
+        Returns:
+            ReindexResult: Build, validation and cutover outcome
+
+        Raises:
+            ReindexError: If the alias name is taken by a plain index
+        """
+        if self._is_index(self.alias):
+            raise ReindexError(
+                f"'{self.alias}' is an index, not an alias. Reindex into a new alias name "
+                f"(--alias) and set AZURE_SEARCH_INDEX to it after the first cutover."
+            )
+        with span("reindex", alias=self.alias):
+            name, ingest = self.build(documents, vector_dimensions, profile, progress=progress)
+            report = self.validate(name, ingest, queries)
+            previous = self.current_index()
+            swapped = False
+            if report.ok and swap:
+                previous = self.swap(name)
+                swapped = True
+                self.prune()
+            elif not report.ok:
+                logger.warning("Shadow index %s failed validation: %s", name, "; ".join(report.problems))
+                if not keep_failed:
+                    self.index_client.delete_index(name)
+        return ReindexResult(
+            alias=self.alias,
+            index_name=name,
+            previous_index=previous,
+            ingest=ingest,
+            validation=report,
+            swapped=swapped,
+        )
+
+
+def iter_jsonl_documents(path: str) -> Iterator[dict]:
+    """Documents from a JSONL file (one ``{"id", "content", "metadata"}`` per line)."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _read_queries(path: str) -> list[str]:
+    from .warm_cache import DEFAULT_LOG_FIELDS, iter_log_queries
+
+    return list(iter_log_queries(path, DEFAULT_LOG_FIELDS))
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Blue/green reindex behind an index alias")
+    parser.add_argument("--alias", help="Alias clients query (default: AZURE_SEARCH_INDEX)")
+    parser.add_argument("--jsonl", help="Load documents from JSONL instead of blob storage")
+    parser.add_argument("--container", help="Blob container (default: AZURE_STORAGE_CONTAINER)")
+    parser.add_argument("--prefix", default="", help="Blob name prefix")
+    parser.add_argument("--queries", help="Sample queries (one per line, or a JSONL query log)")
+    parser.add_argument("--dimensions", type=int,
+                        help="Embedding vector size (default: EMBEDDING_DIMENSIONS)")
+    parser.add_argument("--min-overlap", type=float, default=0.0,
+                        help="Minimum mean top-k overlap with the live index")
+    parser.add_argument("--no-swap", action="store_true", help="Build and validate only")
+    parser.add_argument("--keep-failed", action="store_true", help="Keep a shadow that fails validation")
+    parser.add_argument("--swap-to", help="Point the alias at an existing version")
+    parser.add_argument("--rollback", action="store_true", help="Point the alias at the previous version")
+    args = parser.parse_args(argv)
+
+    reindexer = Reindexer(alias=args.alias, min_overlap=args.min_overlap)
+    if args.rollback:
+        print(f"{reindexer.alias} -> {reindexer.rollback()}")
+        return 0
+    if args.swap_to:
+        reindexer.swap(args.swap_to, kind="manual")
+        print(f"{reindexer.alias} -> {args.swap_to}")
+        return 0
+
+    if args.jsonl:
+        documents = iter_jsonl_documents(args.jsonl)
+    else:
+        documents = DocumentIngestionPipeline().iter_blob_documents(args.container, args.prefix)
+    queries = _read_queries(args.queries) if args.queries else []
+
+    result = reindexer.run(
+        documents,
+        queries,
+        vector_dimensions=args.dimensions,
+        swap=not args.no_swap,
+        keep_failed=args.keep_failed,
+    )
+    print(json.dumps(result.to_dict(), indent=2))
+    if not result.validation.ok:
+        return 1
+    if result.swapped and get_settings().search_index != reindexer.alias:
+        print(f"Set AZURE_SEARCH_INDEX={reindexer.alias} so clients query the alias", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
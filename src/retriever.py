@@ -3,18 +3,40 @@ Retriever module for RAG search operations.
 
 Features:
 - Hybrid search (vector + keyword)
+- Per-query routing: keyword-only queries skip the embedding call; vector
+  weight, k and exhaustive kNN are chosen per query
+- Per-request vector field (e.g. content_vector_v2 during a model migration)
 - Semantic reranking (optional)
-- Configurable filtering
-- Score-based result filtering
+- Validated filters with filter-aware vector search planning
+- Score-based result filtering with a threshold per executed mode (vector,
+  keyword and hybrid scores are on different scales)
 """
+import math
 from dataclasses import dataclass
-from typing import Literal
 
-from azure.search.documents import SearchClient
-from azure.search.documents.models import VectorizedQuery
+from .clients import get_search_client
+from .config import get_settings
+from .embedding import VECTOR_FIELDS, get_embedding_service, vector_field_version
+from .query_router import Route, SearchMode, get_query_router
+from .search_planner import SearchPlan, get_search_planner
+from .telemetry import get_metrics, record_tokens, span
+from .tokenizer import get_encoding
 
-from .config import get_azure_credential, get_settings
-from .embedding import EmbeddingService
+# Separator between packed context chunks
+CONTEXT_SEPARATOR = "\n---\n"
+
+# Retrievable index fields returned by default
+DEFAULT_SELECT_FIELDS = (
+    "id",
+    "document_id",
+    "content",
+    "source",
+    "title",
+    "category",
+    "chunk_index",
+)
+
+VECTOR_FIELD = VECTOR_FIELDS[1]
 
 
 @dataclass
@@ -29,6 +51,18 @@ class SearchResult:
     title: str | None = None
     category: str | None = None
     chunk_index: int | None = None
+    vector: list[float] | None = None
+
+
+@dataclass
+class SearchPage:
+    """One page of search results."""
+
+    # Results at or above the executed mode's score threshold
+    results: list[SearchResult]
+    # Results the search service returned before score filtering
+    ranked: int
+    route: Route
 
 
 class HybridRetriever:
@@ -38,54 +72,94 @@ class HybridRetriever:
     Search Modes:
     - vector: Pure vector similarity search
     - keyword: Traditional BM25 keyword search
-    - hybrid: Combined vector + keyword (recommended)
+    - hybrid: Combined vector + keyword
+    - auto: Chosen per query by the query router (recommended)
     """
 
-    def __init__(self):
-        """Initialize retriever with search client and embedding service."""
+    def __init__(self, index_name: str | None = None):
+        """
+        Initialize retriever with shared search client and embedding service.
+
+        Args:
+            index_name: Index or alias to query (AZURE_SEARCH_INDEX if None)
+        """
         settings = get_settings()
-        credential = get_azure_credential()
 
-        self.search_client = SearchClient(
-            endpoint=settings.search_endpoint,
-            index_name=settings.search_index,
-            credential=credential,
-        )
-        self.embedding_service = EmbeddingService()
+        self.search_client = get_search_client(index_name)
+        self.vector_field = settings.search_vector_field
+        self.embedding_service = self.embedding_service_for(self.vector_field)
+        self.planner = get_search_planner()
+        self.router = get_query_router()
         self.default_top_k = settings.rag_top_k
-        self.score_threshold = settings.rag_score_threshold
+        # Cosine similarity (0..1), BM25 (unbounded) and RRF (at most ~0.03)
+        # scores are not comparable, so each executed mode has its own minimum
+        self.score_thresholds = {
+            "vector": settings.rag_score_threshold,
+            "keyword": settings.rag_keyword_score_threshold,
+            "hybrid": settings.rag_hybrid_score_threshold,
+        }
+        self._routes_total = get_metrics().counter(
+            "rag_query_routes_total", "Searches by executed mode and routing reason"
+        )
+
+    def search(self, query: str, **kwargs) -> list[SearchResult]:
+        """
+        Execute search query.
+
+        Takes the arguments of search_page().
+
+        Returns:
+            list[SearchResult]: Ranked results above the score threshold
+        """
+        return self.search_page(query, **kwargs).results
 
-    def search(
+    def search_page(
         self,
         query: str,
         top_k: int | None = None,
-        mode: Literal["vector", "keyword", "hybrid"] = "hybrid",
+        mode: SearchMode = "hybrid",
         filters: str | None = None,
         select_fields: list[str] | None = None,
-    ) -> list[SearchResult]:
+        query_vector: list[float] | None = None,
+        skip: int = 0,
+        include_vectors: bool = False,
+        vector_field: str | None = None,
+        score_threshold: float | None = None,
+    ) -> SearchPage:
         """
-        Execute search query.
+        Execute search query and report the page before score filtering.
 
         Args:
             query: User query text
             top_k: Number of results to return
-            mode: Search mode (vector/keyword/hybrid)
-            filters: OData filter expression (e.g., "category eq 'tech'")
+            mode: Search mode (vector/keyword/hybrid, or auto to route the query)
+            filters: OData filter expression (e.g., "category eq 'tech'"),
+                validated and planned by the search planner
             select_fields: Fields to return in results
+            query_vector: Precomputed query embedding (skips embed_text;
+                unused if the query is routed to keyword search)
+            skip: Number of ranked results to skip (pagination)
+            include_vectors: Also return stored chunk embeddings
+            vector_field: Vector field to query (SEARCH_VECTOR_FIELD if None);
+                ``query_vector`` must come from the matching embedding model
+            score_threshold: Minimum score of returned results (threshold
+                of the executed mode if None)
 
         Returns:
-            list[SearchResult]: Ranked search results
+            SearchPage: Ranked results above the threshold, the unfiltered
+                result count and the executed route
+
+        Raises:
+            FilterError: If the filter is malformed or uses unfilterable fields
+            ValueError: If the mode or vector field is unknown, or the field's
+                model is not configured
         """
         top_k = top_k or self.default_top_k
-        select_fields = select_fields or [
-            "id",
-            "document_id",
-            "content",
-            "source",
-            "title",
-            "category",
-            "chunk_index",
-        ]
+        vector_field = vector_field or self.vector_field
+        embedding_service = self.embedding_service_for(vector_field)
+        select_fields = list(select_fields or DEFAULT_SELECT_FIELDS)
+        if include_vectors and vector_field not in select_fields:
+            select_fields.append(vector_field)
 
         # Build search parameters
         search_kwargs = {
@@ -93,85 +167,73 @@ class HybridRetriever:
             "top": top_k,
         }
 
-        if filters:
-            search_kwargs["filter"] = filters
-
-        # Execute search based on mode
-        match mode:
-            case "vector":
-                results = self._vector_search(query, **search_kwargs)
-            case "keyword":
-                results = self._keyword_search(query, **search_kwargs)
-            case "hybrid":
-                results = self._hybrid_search(query, **search_kwargs)
-            case _:
-                raise ValueError(f"Invalid search mode: {mode}")
-
-        # Filter by score threshold
+        if skip:
+            search_kwargs["skip"] = skip
+
+        # Validate the filter and pick vector filter mode / k for it
+        plan = self.planner.plan(filters, top_k + skip)
+        if plan.filter:
+            search_kwargs["filter"] = plan.filter
+
+        # Choose mode, vector weight, k and exhaustive kNN for this query
+        route = self.router.route(query, mode, plan)
+        self._routes_total.inc(mode=route.mode, reason=route.reason)
+        if route.needs_vector and plan.vector_filter_mode:
+            search_kwargs["vector_filter_mode"] = plan.vector_filter_mode
+
+        with span(
+            "retrieval.search",
+            mode=route.mode,
+            route=route.reason,
+            vector_field=vector_field,
+            vector_filter_mode=plan.vector_filter_mode or "none",
+        ):
+            if route.needs_vector:
+                if query_vector is None:
+                    query_vector = embedding_service.embed_text(query)
+                search_kwargs["vector_queries"] = [self._vector_query(query_vector, plan, route, vector_field)]
+            results = self._parse_results(
+                self.search_client.search(
+                    search_text=None if route.mode == "vector" else query,
+                    **search_kwargs,
+                ),
+                vector_field,
+            )
+
+        # Filter by the executed mode's score threshold
+        if score_threshold is None:
+            score_threshold = self.score_thresholds[route.mode]
         filtered_results = [
-            r for r in results if r.score >= self.score_threshold
+            r for r in results if r.score >= score_threshold
         ]
 
-        return filtered_results
-
-    def _vector_search(
-        self,
-        query: str,
-        **kwargs,
-    ) -> list[SearchResult]:
-        """Execute pure vector search."""
-        query_embedding = self.embedding_service.embed_text(query)
-
-        vector_query = VectorizedQuery(
-            vector=query_embedding,
-            k_nearest_neighbors=kwargs.get("top", self.default_top_k),
-            fields="content_vector",
-        )
-
-        results = self.search_client.search(
-            search_text=None,  # No keyword search
-            vector_queries=[vector_query],
-            **kwargs,
-        )
-
-        return self._parse_results(results)
-
-    def _keyword_search(
-        self,
-        query: str,
-        **kwargs,
-    ) -> list[SearchResult]:
-        """Execute pure keyword search."""
-        results = self.search_client.search(
-            search_text=query,
-            **kwargs,
-        )
+        return SearchPage(filtered_results, len(results), route)
 
-        return self._parse_results(results)
-
-    def _hybrid_search(
-        self,
-        query: str,
-        **kwargs,
-    ) -> list[SearchResult]:
-        """Execute hybrid (vector + keyword) search."""
-        query_embedding = self.embedding_service.embed_text(query)
-
-        vector_query = VectorizedQuery(
-            vector=query_embedding,
-            k_nearest_neighbors=kwargs.get("top", self.default_top_k),
-            fields="content_vector",
-        )
-
-        results = self.search_client.search(
-            search_text=query,
-            vector_queries=[vector_query],
-            **kwargs,
-        )
-
-        return self._parse_results(results)
+    def embedding_service_for(self, vector_field: str):
+        """
+        Embedding service producing query vectors for a vector field.
 
-    def _parse_results(self, results) -> list[SearchResult]:
+        Raises:
+            ValueError: If the field is unknown or its model is not configured
+        """
+        return get_embedding_service(vector_field_version(vector_field))
+
+    def _vector_query(self, query_vector: list[float], plan: SearchPlan, route: Route, vector_field: str):
+        """Vector query with the route's weight, oversampled k and exhaustive flag."""
+        from azure.search.documents.models import VectorizedQuery
+
+        k = plan.k_nearest_neighbors
+        if route.k_multiplier > 1:
+            k = max(k, min(self.planner.max_k, math.ceil(k * route.k_multiplier)))
+        options = {}
+        # Leave defaults off the wire
+        if route.vector_weight != 1.0:
+            options["weight"] = route.vector_weight
+        if route.exhaustive:
+            options["exhaustive"] = True
+        return VectorizedQuery(vector=query_vector, k_nearest_neighbors=k, fields=vector_field, **options)
+
+    def _parse_results(self, results, vector_field: str = VECTOR_FIELD) -> list[SearchResult]:
         """Convert Azure search results to SearchResult objects."""
         parsed = []
         for r in results:
@@ -185,6 +247,7 @@ class HybridRetriever:
                     title=r.get("title"),
                     category=r.get("category"),
                     chunk_index=r.get("chunk_index"),
+                    vector=r.get(vector_field),
                 )
             )
         return parsed
@@ -224,9 +287,39 @@ class ContextBuilder:
         Returns:
             tuple: (context_string, source_references)
         """
-        import tiktoken
+        context, sources, _ = self.pack_context(results, include_metadata=include_metadata)
+        return context, sources
 
-        encoding = tiktoken.encoding_for_model("gpt-4")
+    def pack_context(
+        self,
+        results: list[SearchResult],
+        max_tokens: int | None = None,
+        include_metadata: bool = True,
+    ) -> tuple[str, list[dict], int]:
+        """
+        Pack search results into a token budget.
+
+        Args:
+            results: Search results to include
+            max_tokens: Budget override (capped at max_context_tokens)
+            include_metadata: Whether to include source/category info
+
+        Returns:
+            tuple: (context_string, source_references, context_tokens)
+        """
+        limit = self.max_tokens if max_tokens is None else min(max_tokens, self.max_tokens)
+        with span("context.build"):
+            return self._pack_context(results, limit, include_metadata)
+
+    def _pack_context(
+        self,
+        results: list[SearchResult],
+        limit: int,
+        include_metadata: bool,
+    ) -> tuple[str, list[dict], int]:
+        """Greedily pack results in relevance order (see pack_context)."""
+        encoding = get_encoding("gpt-4")
+        separator_tokens = len(encoding.encode(CONTEXT_SEPARATOR))
         context_parts = []
         sources = []
         current_tokens = 0
@@ -242,9 +335,11 @@ class ContextBuilder:
                 chunk_text = f"{result.content}\n"
 
             chunk_tokens = len(encoding.encode(chunk_text))
+            if context_parts:
+                chunk_tokens += separator_tokens
 
             # Check token limit
-            if current_tokens + chunk_tokens > self.max_tokens:
+            if current_tokens + chunk_tokens > limit:
                 break
 
             context_parts.append(chunk_text)
@@ -258,10 +353,12 @@ class ContextBuilder:
                     "relevance_score": result.score,
                 })
 
-        context = "\n---\n".join(context_parts)
+        record_tokens("context", current_tokens)
+
+        context = CONTEXT_SEPARATOR.join(context_parts)
         unique_sources = self._deduplicate_sources(sources)
 
-        return context, unique_sources
+        return context, unique_sources, current_tokens
 
     def _deduplicate_sources(self, sources: list[dict]) -> list[dict]:
         """Remove duplicate sources, keeping highest relevance."""
@@ -0,0 +1,416 @@
+"""
+Filter parsing and filter-aware search planning.
+
+Features:
+- Parser/validator for the OData filter subset used by this project
+  (comparisons, ``search.in``, ``and``/``or``/``not``, parentheses)
+- Canonical re-serialization of validated filters
+- Selectivity estimates from cached facet counts (category/source/document_id,
+  see index_stats.py)
+- Per-query choice of vector filter mode and k oversampling
+"""
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from .config import get_settings
+from .telemetry import get_metrics
+
+if TYPE_CHECKING:
+    from .index_stats import IndexStatsService
+
+# Filterable fields of the index schema (see SearchIndexManager.create_index)
+FILTERABLE_FIELDS = frozenset({"id", "document_id", "source", "category"})
+
+# Facetable fields used for selectivity estimates
+FACET_FIELDS = ("category", "source", "document_id")
+
+# Facet values fetched per field
+FACET_LIMIT = 1000
+
+# Selectivity assumed for predicates facets cannot estimate
+DEFAULT_SELECTIVITY = 0.5
+
+# Extra nearest neighbors requested on top of the expected filtered loss
+OVERSAMPLING_MARGIN = 1.5
+
+# Lowest selectivity used for oversampling (post-filtering a filter
+# estimated to match nothing, when the threshold is 0, requests max_k)
+MIN_OVERSAMPLING_SELECTIVITY = 1e-6
+
+COMPARISON_OPERATORS = frozenset({"eq", "ne", "gt", "ge", "lt", "le"})
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<string>'(?:[^']|'')*')|(?P<number>-?\d+(?:\.\d+)?)"
+    r"|(?P<name>[A-Za-z_][\w.]*)|(?P<punct>[(),]))"
+)
+
+
+class FilterError(ValueError):
+    """Raised for filter expressions that are malformed or not allowed."""
+
+
+# === Filter AST ===
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """``field op literal``."""
+
+    field: str
+    op: str
+    value: str | int | float | bool | None
+
+
+@dataclass(frozen=True)
+class SearchIn:
+    """``search.in(field, 'a,b,c')``."""
+
+    field: str
+    values: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class BoolOp:
+    """``and``/``or`` over two or more operands."""
+
+    op: str
+    operands: tuple
+
+
+@dataclass(frozen=True)
+class Not:
+    """``not operand``."""
+
+    operand: object
+
+
+def _tokenize(expression: str) -> list[tuple[str, str]]:
+    tokens, position = [], 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if match is None or match.end() == position:
+            raise FilterError(f"Unexpected character at position {position}: {expression[position:][:20]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+def _literal(kind: str, raw: str):
+    if kind == "string":
+        return raw[1:-1].replace("''", "'")
+    if kind == "number":
+        return float(raw) if "." in raw else int(raw)
+    match raw:
+        case "null":
+            return None
+        case "true" | "false":
+            return raw == "true"
+    raise FilterError(f"Expected a literal, got {raw!r}")
+
+
+def _split_values(values: str, delimiters: str | None) -> tuple[str, ...]:
+    """Split search.in values (default delimiters: whitespace and comma)."""
+    if delimiters is None:
+        parts = re.split(r"[\s,]+", values)
+    else:
+        parts = re.split(f"[{re.escape(delimiters)}]", values) if delimiters else [values]
+    return tuple(p for p in parts if p)
+
+
+class _Parser:
+    """Recursive-descent parser: or > and > not > primary."""
+
+    def __init__(self, expression: str, fields: frozenset[str] | None):
+        self.tokens = _tokenize(expression)
+        self.position = 0
+        self.fields = fields
+
+    def parse(self):
+        node = self._or()
+        if self.position != len(self.tokens):
+            raise FilterError(f"Unexpected {self.tokens[self.position][1]!r}")
+        return node
+
+    def _peek(self) -> tuple[str, str] | None:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _next(self) -> tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise FilterError("Unexpected end of filter")
+        self.position += 1
+        return token
+
+    def _expect(self, value: str) -> None:
+        kind, raw = self._next()
+        if raw != value:
+            raise FilterError(f"Expected {value!r}, got {raw!r}")
+
+    def _keyword(self, word: str) -> bool:
+        token = self._peek()
+        if token and token[0] == "name" and token[1].lower() == word:
+            self.position += 1
+            return True
+        return False
+
+    def _or(self):
+        operands = [self._and()]
+        while self._keyword("or"):
+            operands.append(self._and())
+        return operands[0] if len(operands) == 1 else BoolOp("or", tuple(operands))
+
+    def _and(self):
+        operands = [self._unary()]
+        while self._keyword("and"):
+            operands.append(self._unary())
+        return operands[0] if len(operands) == 1 else BoolOp("and", tuple(operands))
+
+    def _unary(self):
+        if self._keyword("not"):
+            return Not(self._unary())
+        if self._peek() == ("punct", "("):
+            self._next()
+            node = self._or()
+            self._expect(")")
+            return node
+        return self._predicate()
+
+    def _field(self, name: str) -> str:
+        if self.fields is not None and name not in self.fields:
+            raise FilterError(f"Field {name!r} is not filterable")
+        return name
+
+    def _predicate(self):
+        kind, name = self._next()
+        if kind != "name":
+            raise FilterError(f"Expected a field name, got {name!r}")
+
+        if name.lower() == "search.in":
+            self._expect("(")
+            kind, field = self._next()
+            if kind != "name":
+                raise FilterError(f"Expected a field name, got {field!r}")
+            self._expect(",")
+            kind, values = self._next()
+            if kind != "string":
+                raise FilterError("search.in values must be a string")
+            delimiters = None
+            if self._peek() == ("punct", ","):
+                self._next()
+                kind, raw = self._next()
+                if kind != "string":
+                    raise FilterError("search.in delimiters must be a string")
+                delimiters = _literal(kind, raw)
+            self._expect(")")
+            return SearchIn(self._field(field), _split_values(_literal("string", values), delimiters))
+
+        kind, op = self._next()
+        if kind != "name" or op.lower() not in COMPARISON_OPERATORS:
+            raise FilterError(f"Expected a comparison operator after {name!r}, got {op!r}")
+        kind, raw = self._next()
+        if kind == "punct":
+            raise FilterError(f"Expected a literal, got {raw!r}")
+        return Comparison(self._field(name), op.lower(), _literal(kind, raw))
+
+
+def parse_filter(expression: str, fields: frozenset[str] | None = FILTERABLE_FIELDS):
+    """
+    Parse and validate an OData filter.
+
+    Args:
+        expression: Filter expression
+        fields: Allowed field names (None allows any)
+
+    Returns:
+        Filter AST (Comparison, SearchIn, BoolOp or Not)
+
+    Raises:
+        FilterError: If the expression is malformed or uses other fields
+    """
+    if not expression or not expression.strip():
+        raise FilterError("Empty filter")
+    return _Parser(expression, fields).parse()
+
+
+def _format_literal(value) -> str:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def to_odata(node) -> str:
+    """Serialize a filter AST back to canonical OData."""
+    match node:
+        case Comparison(field, op, value):
+            return f"{field} {op} {_format_literal(value)}"
+        case SearchIn(field, values):
+            delimiter = "|" if any("," in v for v in values) else ","
+            return f"search.in({field}, {_format_literal(delimiter.join(values))}, '{delimiter}')"
+        case BoolOp(op, operands):
+            return f" {op} ".join(
+                f"({to_odata(o)})" if isinstance(o, BoolOp) else to_odata(o) for o in operands
+            )
+        case Not(operand):
+            inner = to_odata(operand)
+            return f"not ({inner})" if isinstance(operand, BoolOp) else f"not {inner}"
+    raise TypeError(f"Not a filter node: {node!r}")
+
+
+def validate_filter(expression: str | None) -> str | None:
+    """Parse a filter and return it in canonical form (None stays None)."""
+    if expression is None or not expression.strip():
+        return None
+    return to_odata(parse_filter(expression))
+
+
+# === Selectivity ===
+
+
+@dataclass
+class FacetSnapshot:
+    """Facet counts for the whole index at one point in time."""
+
+    total: int
+    counts: dict[str, dict[str, int]]
+    # Fields whose facet list hit FACET_LIMIT (unlisted values may exist)
+    truncated: frozenset[str]
+    fetched_at: float
+
+
+def estimate_selectivity(node, snapshot: FacetSnapshot | None) -> float:
+    """
+    Estimate the fraction of index documents matching a filter.
+
+    Faceted ``eq``/``ne``/``search.in`` predicates use facet counts;
+    other predicates assume DEFAULT_SELECTIVITY. Conjunctions are treated
+    as independent.
+    """
+    match node:
+        case BoolOp("and", operands):
+            return math.prod(estimate_selectivity(o, snapshot) for o in operands)
+        case BoolOp("or", operands):
+            return 1.0 - math.prod(1.0 - estimate_selectivity(o, snapshot) for o in operands)
+        case Not(operand):
+            return 1.0 - estimate_selectivity(operand, snapshot)
+        case Comparison(field, "eq", value):
+            fraction = _value_fraction(snapshot, field, [value])
+            return DEFAULT_SELECTIVITY if fraction is None else fraction
+        case Comparison(field, "ne", value):
+            fraction = _value_fraction(snapshot, field, [value])
+            return DEFAULT_SELECTIVITY if fraction is None else 1.0 - fraction
+        case SearchIn(field, values):
+            fraction = _value_fraction(snapshot, field, values)
+            return DEFAULT_SELECTIVITY if fraction is None else fraction
+    return DEFAULT_SELECTIVITY
+
+
+def _value_fraction(snapshot: FacetSnapshot | None, field: str, values) -> float | None:
+    """Fraction of documents with one of the values (None if unknown)."""
+    if snapshot is None or not snapshot.total:
+        return None
+    if field == "id":
+        return min(1.0, len(values) / snapshot.total)
+    counts = snapshot.counts.get(field)
+    if counts is None:
+        return None
+    # Values missing from a truncated facet list are at most as common as the rarest listed
+    unlisted = min(counts.values(), default=0) if field in snapshot.truncated else 0
+    matched = sum(counts.get(str(v), unlisted) for v in values)
+    return min(1.0, matched / snapshot.total)
+
+
+# === Planning ===
+
+
+@dataclass
+class SearchPlan:
+    """How to run one filtered search."""
+
+    filter: str | None
+    selectivity: float
+    # "preFilter", "postFilter" or None (no filter)
+    vector_filter_mode: str | None
+    k_nearest_neighbors: int
+
+
+class SearchPlanner:
+    """
+    Chooses vector filter mode and k per query.
+
+    Selective filters run as pre-filters (the vector search only visits
+    matching documents, so k = top suffices). Broad filters run as
+    post-filters, which are cheaper, with k oversampled by the expected
+    fraction of neighbors the filter removes.
+    """
+
+    def __init__(
+        self,
+        stats: "IndexStatsService | None" = None,
+        post_filter_min_selectivity: float | None = None,
+        max_k: int | None = None,
+    ):
+        """
+        Initialize planner.
+
+        Args:
+            stats: Index statistics (process-wide service if None)
+            post_filter_min_selectivity: Use post-filtering at or above this
+                estimated selectivity (settings default if None)
+            max_k: Upper bound for oversampled k (settings default if None)
+        """
+        from .index_stats import get_index_stats
+
+        settings = get_settings()
+        self.stats = stats or get_index_stats()
+        self.post_filter_min_selectivity = (
+            settings.post_filter_min_selectivity
+            if post_filter_min_selectivity is None
+            else post_filter_min_selectivity
+        )
+        self.max_k = max_k or settings.vector_max_k
+
+    def plan(self, filters: str | None, k: int) -> SearchPlan:
+        """
+        Plan a search.
+
+        Args:
+            filters: Raw OData filter (validated and canonicalized)
+            k: Results needed from the vector query (top + skip)
+
+        Returns:
+            SearchPlan: Filter, estimate, vector filter mode and k
+
+        Raises:
+            FilterError: If the filter is invalid
+        """
+        if filters is None or not filters.strip():
+            return SearchPlan(None, 1.0, None, k)
+
+        node = parse_filter(filters)
+        selectivity = estimate_selectivity(node, self.stats.facets())
+        if selectivity >= self.post_filter_min_selectivity:
+            mode = "postFilter"
+            expected = max(selectivity, MIN_OVERSAMPLING_SELECTIVITY)
+            k = min(self.max_k, max(k, math.ceil(k * OVERSAMPLING_MARGIN / expected)))
+        else:
+            mode = "preFilter"
+
+        get_metrics().counter(
+            "rag_search_plans_total", "Filtered search plans by vector filter mode"
+        ).inc(mode=mode)
+        return SearchPlan(to_odata(node), selectivity, mode, k)
+
+
+@lru_cache()
+def get_search_planner() -> SearchPlanner:
+    """Get the process-wide search planner."""
+    return SearchPlanner()
@@ -0,0 +1,61 @@
+"""
+Local SQLite stores shared by threads.
+
+Features:
+- One connection per database file in WAL mode, with a lock serializing
+  access; stores on the same file (job store, ingestion checkpoints)
+  share them and each adds its own tables
+- ":memory:" databases are private to their store (tests)
+"""
+import os
+import sqlite3
+import threading
+
+# Database path -> [connection, lock, stores using it]
+_connections: dict[str, list] = {}
+_connections_lock = threading.Lock()
+
+
+class SQLiteStore:
+    """
+    Base class for SQLite-backed stores.
+
+    Subclasses set ``SCHEMA`` (idempotent DDL) and use ``self._conn`` only
+    while holding ``self._lock``.
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path: str):
+        """
+        Open (and create) the store.
+
+        Args:
+            path: SQLite database path (":memory:" for tests)
+        """
+        self._key = path if path == ":memory:" else os.path.abspath(path)
+        with _connections_lock:
+            entry = _connections.get(self._key) if path != ":memory:" else None
+            if entry is None:
+                conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                entry = [conn, threading.Lock(), 0]
+                if path != ":memory:":
+                    _connections[self._key] = entry
+            entry[2] += 1
+        self._entry = entry
+        self._conn: sqlite3.Connection = entry[0]
+        self._lock: threading.Lock = entry[1]
+        with self._lock:
+            self._conn.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        """Release the store (the connection closes with its last store)."""
+        with _connections_lock:
+            self._entry[2] -= 1
+            if self._entry[2] > 0:
+                return
+            if _connections.get(self._key) is self._entry:
+                del _connections[self._key]
+        with self._lock:
+            self._conn.close()
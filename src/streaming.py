@@ -0,0 +1,201 @@
+"""
+Incremental NDJSON decoding for streamed request bodies.
+
+Features:
+- Line-by-line parsing as body chunks arrive (no full-body buffering)
+- Transparent gzip decompression
+- Per-line error reporting instead of failing the whole upload
+- Bounded buffer handing documents from the event loop to a worker thread;
+  the producer awaits free space instead of polling
+"""
+import asyncio
+import json
+import threading
+import zlib
+from collections import deque
+from collections.abc import Iterator
+
+# Reject single lines above this size instead of buffering them indefinitely
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+# Parse errors kept per request (the rest are only counted)
+MAX_PARSE_ERRORS = 100
+
+END_OF_STREAM = object()
+
+
+class NDJSONDecoder:
+    """
+    Incremental NDJSON document decoder.
+
+    Each non-empty line must be a JSON object with string ``id`` and
+    ``content`` and an optional ``metadata`` object.
+    """
+
+    def __init__(self, gzipped: bool = False, max_line_bytes: int = MAX_LINE_BYTES):
+        """
+        Initialize decoder.
+
+        Args:
+            gzipped: Body is gzip-compressed (Content-Encoding: gzip)
+            max_line_bytes: Maximum size of a single document line
+        """
+        self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+        self._buffer = bytearray()
+        self._skipping = False
+        self.max_line_bytes = max_line_bytes
+        self.line_number = 0
+        self.error_count = 0
+        self.errors: list[dict] = []
+
+    def feed(self, data: bytes) -> list[dict]:
+        """
+        Decode a body chunk.
+
+        Compressed chunks are inflated at most ``max_line_bytes`` at a time,
+        so the line limit also bounds memory for highly compressed bodies.
+
+        Args:
+            data: Raw (possibly compressed) bytes
+
+        Returns:
+            list[dict]: Documents completed by this chunk
+        """
+        documents = []
+        if self._inflater is None:
+            self._consume(data, documents)
+            return documents
+        while data:
+            piece = self._inflater.decompress(data, self.max_line_bytes + 1)
+            data = self._inflater.unconsumed_tail
+            self._consume(piece, documents)
+        return documents
+
+    def _consume(self, data: bytes, documents: list[dict]) -> None:
+        """Append decoded bytes, parsing complete lines into ``documents``."""
+        self._buffer.extend(data)
+
+        start = 0
+        while (end := self._buffer.find(b"\n", start)) != -1:
+            line = bytes(self._buffer[start:end])
+            start = end + 1
+            if self._skipping:
+                # Tail of an oversized line (already counted and reported)
+                self._skipping = False
+                continue
+            self.line_number += 1
+            if (doc := self._parse(line)) is not None:
+                documents.append(doc)
+        del self._buffer[:start]
+
+        if len(self._buffer) > self.max_line_bytes and not self._skipping:
+            self.line_number += 1
+            self._error(self.line_number, f"line exceeds {self.max_line_bytes} bytes")
+            self._skipping = True
+        if self._skipping:
+            self._buffer.clear()
+
+    def close(self) -> list[dict]:
+        """Flush the final line (without trailing newline)."""
+        if self._inflater is not None:
+            self._buffer.extend(self._inflater.flush())
+        line = bytes(self._buffer)
+        self._buffer.clear()
+        if self._skipping or not line.strip():
+            return []
+        self.line_number += 1
+        doc = self._parse(line)
+        return [doc] if doc is not None else []
+
+    def _error(self, line_number: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_PARSE_ERRORS:
+            self.errors.append({"line": line_number, "error": message})
+
+    def _parse(self, line: bytes) -> dict | None:
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            doc = json.loads(line)
+        except ValueError as e:
+            self._error(self.line_number, f"invalid JSON: {e}")
+            return None
+        if not isinstance(doc, dict):
+            self._error(self.line_number, "expected a JSON object")
+            return None
+        if not isinstance(doc.get("id"), str) or not isinstance(doc.get("content"), str):
+            self._error(self.line_number, "'id' and 'content' must be strings")
+            return None
+        metadata = doc.get("metadata") or {}
+        if not isinstance(metadata, dict):
+            self._error(self.line_number, "'metadata' must be an object")
+            return None
+        return {"id": doc["id"], "content": doc["content"], "metadata": metadata}
+
+
+class StreamBuffer:
+    """
+    Bounded hand-off from the event loop to a worker thread.
+
+    The event loop awaits put(); the worker iterates the buffer until
+    END_OF_STREAM. Each item taken wakes a waiting producer through the
+    loop, so a full buffer costs no polling. Once close() is called
+    (e.g. when the worker has finished), put() drops items instead of
+    waiting forever.
+    """
+
+    def __init__(self, maxsize: int):
+        """
+        Initialize buffer (call from the event loop).
+
+        Args:
+            maxsize: Items buffered before put() waits
+        """
+        self.maxsize = max(1, maxsize)
+        self._items: deque = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._loop = asyncio.get_running_loop()
+        self._space = asyncio.Event()
+
+    async def put(self, item) -> bool:
+        """
+        Add an item, waiting while the buffer is full.
+
+        Returns:
+            bool: False if the buffer was closed and the item dropped
+        """
+        while True:
+            with self._cond:
+                if self._closed:
+                    return False
+                if len(self._items) < self.maxsize:
+                    self._items.append(item)
+                    self._cond.notify()
+                    return True
+                # Cleared under the lock, so a later get() always sets it again
+                self._space.clear()
+            await self._space.wait()
+
+    def close(self) -> None:
+        """Stop accepting items and release a waiting producer (thread-safe)."""
+        with self._cond:
+            self._closed = True
+        self._wake()
+
+    def __iter__(self) -> Iterator:
+        """Yield items until END_OF_STREAM (worker thread side)."""
+        while True:
+            with self._cond:
+                while not self._items:
+                    self._cond.wait()
+                item = self._items.popleft()
+            self._wake()
+            if item is END_OF_STREAM:
+                return
+            yield item
+
+    def _wake(self) -> None:
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._space.set)
@@ -0,0 +1,381 @@
+"""
+Telemetry module for latency and usage instrumentation.
+
+Features:
+- Low-overhead span/timer context managers
+- Per-stage latency histograms
+- Token, cache and retry counters
+- Prometheus text exposition
+- Optional OTLP span export (requires opentelemetry-sdk)
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache, wraps
+
+from .config import get_settings
+
+# Latency buckets in seconds (1ms .. 60s)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# Token count buckets
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+def _label_key(labels: dict) -> tuple:
+    """Build a hashable, order-independent key from label values."""
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    """Format label pairs in Prometheus text syntax."""
+    pairs = key + extra
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _escape(value) -> str:
+    """Escape a label value for Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increment counter for the given label set."""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Get current value for the given label set."""
+        return self._values.get(_label_key(labels), 0)
+
+    def collect(self) -> list[str]:
+        """Render samples in Prometheus text format."""
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {v}" for k, v in items]
+
+
+class Gauge:
+    """
+    Gauge whose value is read from a callback at scrape time.
+
+    The callback returns an iterable of (labels, value) pairs, e.g.
+    ``[({"host": "a"}, 3.0)]``.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._callbacks: list = []
+
+    def set_callback(self, callback) -> None:
+        """Register a callback producing (labels, value) pairs."""
+        self._callbacks.append(callback)
+
+    def collect(self) -> list[str]:
+        """Render samples in Prometheus text format."""
+        lines = []
+        for callback in self._callbacks:
+            for labels, value in callback():
+                lines.append(f"{self.name}{_format_labels(_label_key(labels))} {value}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        # label key -> [bucket_counts..., +Inf count, sum]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        """Record a single observation."""
+        self._observe_key(value, _label_key(labels))
+
+    def _observe_key(self, value: float, key: tuple) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [0] * (len(self.buckets) + 2)
+                self._series[key] = series
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        """Get observation count for the given label set."""
+        series = self._series.get(_label_key(labels))
+        return sum(series[:-1]) if series else 0
+
+    def collect(self) -> list[str]:
+        """Render samples in Prometheus text format."""
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(key, (('le', bound),))} {cumulative}"
+                )
+            cumulative += series[len(self.buckets)]
+            lines.append(
+                f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {cumulative}"
+            )
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics registry.
+
+    Standard metrics:
+    - rag_stage_duration_seconds{stage}: latency per pipeline stage
+    - rag_tokens{kind}: prompt/completion/context tokens per request
+    - rag_cache_requests_total{cache,result}: cache hits and misses
+    - rag_retries_total{component}: upstream responses that trigger an SDK retry
+    - rag_errors_total{stage}: failed spans
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self._lock = threading.Lock()
+
+        self.stage_duration = self.histogram(
+            "rag_stage_duration_seconds", "Latency of each pipeline stage"
+        )
+        self.tokens = self.histogram(
+            "rag_tokens", "Token counts per request", buckets=TOKEN_BUCKETS
+        )
+        self.cache_requests = self.counter(
+            "rag_cache_requests_total", "Cache lookups by cache and result"
+        )
+        self.retries = self.counter(
+            "rag_retries_total", "Throttled or failed upstream responses that are retried"
+        )
+        self.errors = self.counter("rag_errors_total", "Failed spans by stage")
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, description: str) -> Counter:
+        """Get or create a counter."""
+        return self._register(Counter(name, description))
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        """Get or create a callback gauge."""
+        return self._register(Gauge(name, description))
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        buckets: tuple = LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Get or create a histogram."""
+        return self._register(Histogram(name, description, buckets))
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+@lru_cache()
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return MetricsRegistry()
+
+
+@lru_cache()
+def _get_tracer():
+    """
+    Get an OpenTelemetry tracer exporting via OTLP, or None.
+
+    Enabled only when OTEL_EXPORTER_OTLP_ENDPOINT is set and
+    opentelemetry-sdk with the OTLP exporter is installed.
+    """
+    settings = get_settings()
+    if not settings.otlp_endpoint:
+        return None
+
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        return None
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.otel_service_name})
+    )
+    provider.add_span_processor(
+        BatchSpanProcessor(
+            OTLPSpanExporter(endpoint=f"{settings.otlp_endpoint.rstrip('/')}/v1/traces")
+        )
+    )
+    return provider.get_tracer("azure-rag-agent-poc")
+
+
+class Span:
+    """
+    Timer context manager recording into the stage latency histogram.
+
+    Kept deliberately small: one perf_counter pair and one locked
+    histogram update per span when OTLP export is disabled.
+    """
+
+    __slots__ = ("stage", "attributes", "start", "duration", "_key", "_otel")
+
+    def __init__(self, stage: str, attributes: dict | None = None):
+        self.stage = stage
+        self.attributes = attributes
+        self._key = (("stage", stage),)
+        self._otel = None
+        self.start = 0.0
+        self.duration = 0.0
+
+    def __enter__(self) -> "Span":
+        tracer = _get_tracer()
+        if tracer is not None:
+            self._otel = tracer.start_as_current_span(
+                self.stage, attributes=self.attributes
+            )
+            self._otel.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = time.perf_counter() - self.start
+        metrics = get_metrics()
+        metrics.stage_duration._observe_key(self.duration, self._key)
+        if exc_type is not None:
+            metrics.errors.inc(stage=self.stage)
+        if self._otel is not None:
+            self._otel.__exit__(exc_type, exc, tb)
+
+    def set_attribute(self, key: str, value) -> None:
+        """Attach an attribute (exported with OTLP spans only)."""
+        if self._otel is not None:
+            from opentelemetry import trace
+
+            trace.get_current_span().set_attribute(key, value)
+
+
+def span(stage: str, **attributes) -> Span:
+    """
+    Time a pipeline stage.
+
+    Example:
+        with span("retrieval.search", mode="hybrid"):
+            results = retriever.search(...)
+    """
+    return Span(stage, attributes or None)
+
+
+def traced(stage: str):
+    """Decorator form of :func:`span`."""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_tokens(kind: str, count: int) -> None:
+    """Record a token count (prompt/completion/context/...)."""
+    if count:
+        get_metrics().tokens.observe(count, kind=kind)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Record a cache lookup result."""
+    get_metrics().cache_requests.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_retry(component: str) -> None:
+    """Record an upstream response that triggers a retry."""
+    get_metrics().retries.inc(component=component)
+
+
+# Status codes retried by both the OpenAI and Azure SDK retry policies
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def openai_response_hook(component: str):
+    """
+    Build an httpx response hook counting retryable responses.
+
+    Pass as ``event_hooks={"response": [hook]}`` on the httpx client
+    handed to ``AzureOpenAI(http_client=...)``. The operation (last URL
+    path segment, e.g. ``embeddings``) is appended to the component label.
+    """
+
+    def hook(response) -> None:
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            operation = response.request.url.path.rstrip("/").rsplit("/", 1)[-1]
+            record_retry(f"{component}.{operation}")
+
+    return hook
+
+
+def azure_response_hook(component: str):
+    """
+    Build an azure-core ``raw_response_hook`` counting retryable responses.
+
+    The hook runs once per attempt, so every retryable status seen here
+    corresponds to a retry issued by the SDK retry policy.
+    """
+
+    def hook(pipeline_response) -> None:
+        if pipeline_response.http_response.status_code in RETRYABLE_STATUS_CODES:
+            record_retry(component)
+
+    return hook
+
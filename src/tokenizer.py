@@ -0,0 +1,45 @@
+"""
+Shared tokenizer helpers.
+
+Encodings are loaded once per model and reused by chunking, context
+building, prompt budgeting and admission control.
+"""
+from functools import lru_cache
+
+# Per-message framing overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 3
+# Tokens priming the assistant reply
+REPLY_PRIMING_TOKENS = 3
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str = "gpt-4"):
+    """Get (cached) tiktoken encoding for a model."""
+    import tiktoken
+
+    return tiktoken.encoding_for_model(model)
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """Count tokens in text."""
+    return len(get_encoding(model).encode(text))
+
+
+def count_message_tokens(messages: list[dict], model: str = "gpt-4") -> int:
+    """
+    Estimate prompt tokens for a chat completion request.
+
+    Args:
+        messages: Chat messages (role/content dicts)
+        model: Model name for tokenizer selection
+
+    Returns:
+        int: Estimated prompt tokens including chat framing
+    """
+    encoding = get_encoding(model)
+    total = REPLY_PRIMING_TOKENS
+    for message in messages:
+        total += MESSAGE_OVERHEAD_TOKENS
+        total += len(encoding.encode(message.get("role", "")))
+        total += len(encoding.encode(message.get("content") or ""))
+    return total
@@ -0,0 +1,219 @@
+"""
+Shared HTTP transports for Azure SDK and OpenAI clients.
+
+Features:
+- One keep-alive connection pool per host, shared by every client for that host
+- HTTP/2 for OpenAI when the optional ``h2`` package is installed
+- Configurable pool sizes and timeouts (HTTP_POOL_*, HTTP_*_TIMEOUT)
+- Pool usage gauges (active/idle/opened connections) on /metrics
+
+Azure SDK clients use azure-core's requests transport, which speaks
+HTTP/1.1 only; sharing the session still avoids one pool (and one set of
+TLS handshakes) per client.
+"""
+import importlib
+import threading
+from functools import lru_cache
+from urllib.parse import urlparse
+
+from .config import get_settings
+from .telemetry import get_metrics
+
+_lock = threading.Lock()
+_httpx_clients: dict[str, object] = {}
+_azure_transports: dict[str, object] = {}
+# Connections opened per httpx pool (httpcore exposes no counter)
+_httpx_opened: dict[str, int] = {}
+
+
+def _host(endpoint: str) -> str:
+    return urlparse(endpoint).netloc or endpoint
+
+
+def http2_enabled() -> bool:
+    """Whether OpenAI traffic should negotiate HTTP/2 (HTTP2=auto|true|false)."""
+    mode = get_settings().http2.lower()
+    if mode in ("false", "0", "no"):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        if mode in ("true", "1", "yes"):
+            raise ImportError("HTTP2=true requires the 'h2' package (pip install httpx[http2])")
+        return False
+    return True
+
+
+def _httpx_module():
+    """The httpx package the installed OpenAI SDK is built on (httpx or a fork)."""
+    from openai import DefaultHttpxClient
+
+    base = next(c for c in DefaultHttpxClient.__mro__ if c.__name__ == "Client")
+    return importlib.import_module(base.__module__.split(".")[0])
+
+
+def _count_new_connections(pool, host: str) -> None:
+    """Wrap httpcore's connection factory to count new (TLS) connections."""
+    create_connection = pool.create_connection
+
+    def counting_create_connection(origin):
+        _httpx_opened[host] = _httpx_opened.get(host, 0) + 1
+        return create_connection(origin)
+
+    pool.create_connection = counting_create_connection
+
+
+def get_httpx_client(endpoint: str, event_hooks: dict | None = None):
+    """
+    Get the shared httpx client for an OpenAI endpoint host.
+
+    Args:
+        endpoint: Service endpoint URL (pool key is its host)
+        event_hooks: httpx event hooks, applied when the client is first created
+
+    Returns:
+        openai.DefaultHttpxClient: Pooled client (OpenAI defaults plus pool settings)
+    """
+    host = _host(endpoint)
+    with _lock:
+        client = _httpx_clients.get(host)
+        if client is None:
+            from openai import DefaultHttpxClient
+
+            httpx = _httpx_module()
+            settings = get_settings()
+            client = DefaultHttpxClient(
+                http2=http2_enabled(),
+                limits=httpx.Limits(
+                    max_connections=settings.http_pool_maxsize,
+                    max_keepalive_connections=settings.http_pool_keepalive,
+                    keepalive_expiry=settings.http_keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(
+                    settings.http_read_timeout, connect=settings.http_connect_timeout
+                ),
+                event_hooks=event_hooks or {},
+            )
+            pool = getattr(client._transport, "_pool", None)
+            if pool is not None:
+                _count_new_connections(pool, host)
+            _httpx_clients[host] = client
+    return client
+
+
+def get_azure_transport(endpoint: str):
+    """
+    Get the shared azure-core transport for an Azure service host.
+
+    Args:
+        endpoint: Service endpoint URL (pool key is its host)
+
+    Returns:
+        RequestsTransport: Transport backed by a pooled requests.Session
+    """
+    host = _host(endpoint)
+    with _lock:
+        transport = _azure_transports.get(host)
+        if transport is None:
+            import requests
+            from azure.core.pipeline.transport import RequestsTransport
+            from urllib3.util.retry import Retry
+
+            settings = get_settings()
+            session = requests.Session()
+            # Retries are handled by the azure-core pipeline (as in RequestsTransport)
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=settings.http_pool_maxsize,
+                max_retries=Retry(total=False, redirect=False, raise_on_status=False),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            # session_owner=False: closing one client must not close the shared pool
+            transport = RequestsTransport(
+                session=session,
+                session_owner=False,
+                connection_timeout=settings.http_connect_timeout,
+                read_timeout=settings.http_read_timeout,
+            )
+            _azure_transports[host] = transport
+    return transport
+
+
+def pool_stats() -> list[dict]:
+    """
+    Snapshot of every shared pool.
+
+    Returns:
+        list[dict]: One entry per host with active, idle and opened connections
+    """
+    stats = []
+    with _lock:
+        httpx_clients = list(_httpx_clients.items())
+        azure_transports = list(_azure_transports.items())
+
+    for host, client in httpx_clients:
+        pool = getattr(client._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for c in connections if c.is_idle())
+        stats.append({
+            "client": "httpx",
+            "host": host,
+            "active": len(connections) - idle,
+            "idle": idle,
+            "opened": _httpx_opened.get(host, 0),
+        })
+
+    for host, transport in azure_transports:
+        active = idle = opened = 0
+        # The same adapter is mounted for http:// and https://
+        adapters = {id(a): a for a in transport.session.adapters.values()}
+        for adapter in adapters.values():
+            manager = adapter.poolmanager
+            for key in manager.pools.keys():
+                pool = manager.pools.get(key)
+                if pool is None or pool.pool is None:
+                    continue
+                queued = list(pool.pool.queue)
+                # Slots not in the queue are checked out by in-flight requests
+                active += pool.pool.maxsize - len(queued)
+                idle += sum(1 for conn in queued if conn is not None)
+                opened += pool.num_connections
+        stats.append({
+            "client": "azure",
+            "host": host,
+            "active": active,
+            "idle": idle,
+            "opened": opened,
+        })
+    return stats
+
+
+@lru_cache()
+def register_pool_metrics() -> None:
+    """Expose pool usage as gauges (registered once per process)."""
+    metrics = get_metrics()
+    metrics.gauge(
+        "rag_http_pool_connections", "Pooled connections by host and state"
+    ).set_callback(lambda: [
+        ({"client": s["client"], "host": s["host"], "state": state}, s[state])
+        for s in pool_stats()
+        for state in ("active", "idle")
+    ])
+    metrics.gauge(
+        "rag_http_pool_connections_opened", "Connections (TLS handshakes) opened per host"
+    ).set_callback(lambda: [
+        ({"client": s["client"], "host": s["host"]}, s["opened"]) for s in pool_stats()
+    ])
+
+
+def reset_transports() -> None:
+    """Close and drop all shared pools (e.g. after changing settings in tests)."""
+    with _lock:
+        for client in _httpx_clients.values():
+            client.close()
+        for transport in _azure_transports.values():
+            transport.session.close()
+        _httpx_clients.clear()
+        _azure_transports.clear()
+        _httpx_opened.clear()
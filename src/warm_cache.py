@@ -0,0 +1,286 @@
+"""
+Precomputed query embedding cache.
+
+Features:
+- Mines query logs (JSONL or plain text) for the most frequent normalized queries
+- Batch-embeds them offline with the regular EmbeddingService
+- Compact file format: sorted blake2b keys + float32 vectors
+- Memory-mapped, zero-copy loading so new workers answer their first
+  requests without an embedding round trip
+
+Build a cache:
+    python -m src.warm_cache --log queries.jsonl --output .warm_cache.bin --top-n 10000
+"""
+import argparse
+import bisect
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import unicodedata
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RAGWARM1"
+# magic, dimensions, entry count, model name (utf-8, NUL padded)
+HEADER = struct.Struct("<8sII64s")
+# Keys and vectors start on an aligned offset
+HEADER_SIZE = 128
+KEY_SIZE = 16
+
+# JSON fields holding the query text, checked in order
+DEFAULT_LOG_FIELDS = ("question", "query")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize a query for cache lookup.
+
+    Applies NFKC (full-width/half-width folding) and collapses whitespace.
+    Case is preserved because it can change the embedding.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def query_key(text: str) -> bytes:
+    """Cache key for a query (hash of the normalized text)."""
+    return hashlib.blake2b(normalize_query(text).encode("utf-8"), digest_size=KEY_SIZE).digest()
+
+
+def iter_log_queries(path: str, fields: Iterable[str] = DEFAULT_LOG_FIELDS) -> Iterator[str]:
+    """
+    Yield query texts from a log file.
+
+    JSON object lines contribute the first non-empty string among
+    ``fields``; other non-empty lines are taken as the query itself.
+
+    Args:
+        path: Log file path
+        fields: JSON fields holding the query text
+
+    Yields:
+        str: Raw query text
+    """
+    fields = tuple(fields)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line
+                continue
+            if isinstance(record, dict):
+                for name in fields:
+                    value = record.get(name)
+                    if isinstance(value, str) and value.strip():
+                        yield value
+                        break
+
+
+def mine_queries(
+    queries: Iterable[str],
+    top_n: int = 10000,
+    min_count: int = 1,
+) -> list[tuple[str, int]]:
+    """
+    Count normalized queries and keep the most frequent.
+
+    Args:
+        queries: Raw query texts
+        top_n: Maximum number of queries to keep
+        min_count: Minimum occurrences for a query to be kept
+
+    Returns:
+        list[tuple[str, int]]: (normalized query, count), most frequent first
+    """
+    counts = Counter(q for q in map(normalize_query, queries) if q)
+    return [(q, n) for q, n in counts.most_common(top_n) if n >= min_count]
+
+
+def build_warm_cache(
+    queries: list[str],
+    output_path: str,
+    embedding_service=None,
+    batch_size: int = 16,
+) -> int:
+    """
+    Embed queries and write a warm cache file.
+
+    The file is written next to ``output_path`` and atomically renamed,
+    so workers that already mapped the previous version keep using it.
+
+    Args:
+        queries: Query texts (normalized before embedding)
+        output_path: Cache file path
+        embedding_service: EmbeddingService to use (shared one if None)
+        batch_size: Texts per embedding call
+
+    Returns:
+        int: Number of entries written
+    """
+    if embedding_service is None:
+        from .embedding import get_embedding_service
+
+        embedding_service = get_embedding_service()
+
+    texts = list(dict.fromkeys(q for q in map(normalize_query, queries) if q))
+    vectors = embedding_service.embed_batch(texts, batch_size=batch_size) if texts else []
+    dimensions = len(vectors[0]) if vectors else 0
+
+    entries = sorted(zip((query_key(t) for t in texts), vectors))
+    model = embedding_service.deployment.encode("utf-8")[:64]
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, dimensions, len(entries), model).ljust(HEADER_SIZE, b"\0"))
+        for key, _ in entries:
+            f.write(key)
+        for _, vector in entries:
+            if len(vector) != dimensions:
+                raise ValueError("Embedding dimensions differ between queries")
+            array("f", vector).tofile(f)
+    os.replace(tmp_path, output_path)
+    return len(entries)
+
+
+class _Keys:
+    """Sequence view over the sorted key table (for bisect)."""
+
+    def __init__(self, buffer: memoryview, count: int):
+        self._buffer = buffer
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> bytes:
+        return self._buffer[index * KEY_SIZE : (index + 1) * KEY_SIZE].tobytes()
+
+
+class WarmCache:
+    """
+    Read-only, memory-mapped query embedding cache.
+
+    Lookups binary-search the key table and read the vector straight from
+    the mapping; nothing is copied at load time.
+    """
+
+    def __init__(self, path: str):
+        """
+        Map a cache file.
+
+        Args:
+            path: File written by build_warm_cache()
+
+        Raises:
+            ValueError: If the file is not a warm cache
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(self._mmap)
+        if len(view) < HEADER_SIZE:
+            raise ValueError(f"{path} is not a warm cache file")
+        magic, self.dimensions, count, model = HEADER.unpack_from(view)
+        keys_end = HEADER_SIZE + count * KEY_SIZE
+        if magic != MAGIC or len(view) != keys_end + count * self.dimensions * 4:
+            raise ValueError(f"{path} is not a warm cache file")
+
+        self.model = model.rstrip(b"\0").decode("utf-8")
+        self._keys = _Keys(view[HEADER_SIZE:keys_end], count)
+        self._vectors = view[keys_end:].cast("f")
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, text: str) -> list[float] | None:
+        """
+        Look up the embedding of a query.
+
+        Args:
+            text: Query text (normalized before hashing)
+
+        Returns:
+            list[float] | None: Cached embedding, or None on a miss
+        """
+        key = query_key(text)
+        index = bisect.bisect_left(self._keys, key)
+        if index == len(self._keys) or self._keys[index] != key:
+            return None
+        start = index * self.dimensions
+        return self._vectors[start : start + self.dimensions].tolist()
+
+
+@lru_cache()
+def get_warm_cache() -> WarmCache | None:
+    """
+    Get the configured warm cache (RAG_WARM_CACHE_PATH).
+
+    Returns None when unset, missing, unreadable or built for a different
+    embedding deployment or EMBEDDING_DIMENSIONS.
+    """
+    settings = get_settings()
+    path = settings.warm_cache_path
+    if not path:
+        return None
+    try:
+        cache = WarmCache(path)
+    except (OSError, ValueError) as e:
+        logger.warning("Warm embedding cache not loaded: %s", e)
+        return None
+    if cache.model != settings.openai_deployment_embedding:
+        logger.warning(
+            "Warm embedding cache %s was built for %r, not %r; ignoring",
+            path, cache.model, settings.openai_deployment_embedding,
+        )
+        return None
+    if cache.dimensions != settings.embedding_dimensions:
+        logger.warning(
+            "Warm embedding cache %s holds %d-dimensional vectors, not %d; ignoring",
+            path, cache.dimensions, settings.embedding_dimensions,
+        )
+        return None
+    logger.info("Loaded %d warm query embeddings from %s", len(cache), path)
+    return cache
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Build the warm query embedding cache")
+    parser.add_argument("--log", action="append", required=True,
+                        help="Query log (JSONL or one query per line); repeatable")
+    parser.add_argument("--field", action="append",
+                        help="JSON field holding the query (default: question, query)")
+    parser.add_argument("--output", default=get_settings().warm_cache_path or ".warm_cache.bin",
+                        help="Cache file path")
+    parser.add_argument("--top-n", type=int, default=10000, help="Most frequent queries to keep")
+    parser.add_argument("--min-count", type=int, default=1, help="Minimum query frequency")
+    args = parser.parse_args(argv)
+
+    fields = args.field or DEFAULT_LOG_FIELDS
+    queries = (q for path in args.log for q in iter_log_queries(path, fields))
+    top = mine_queries(queries, top_n=args.top_n, min_count=args.min_count)
+    count = build_warm_cache([q for q, _ in top], args.output)
+    covered = sum(n for _, n in top)
+    print(f"Wrote {count} query embeddings ({covered} logged queries) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
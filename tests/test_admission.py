@@ -0,0 +1,127 @@
+"""
+Unit tests for LLM admission control.
+
+Run with: pytest tests/ -v
+"""
+import threading
+import time
+
+import pytest
+
+
+class TestAdmissionController:
+    """Tests for AdmissionController class."""
+
+    def test_disabled_budgets_admit_immediately(self):
+        """Zero budgets should never block."""
+        from src.admission import AdmissionController
+
+        controller = AdmissionController(tokens_per_minute=0, requests_per_minute=0)
+
+        for _ in range(100):
+            ticket = controller.acquire(10_000)
+            controller.release(ticket)
+
+        assert controller.in_flight == 0
+
+    def test_sheds_when_wait_exceeds_deadline(self):
+        """Requests that cannot be served in time should be rejected with Retry-After."""
+        from src.admission import AdmissionController, AdmissionRejected
+
+        # 600 TPM = 10 tokens/s, 100-token burst
+        controller = AdmissionController(
+            tokens_per_minute=600, requests_per_minute=0, burst_seconds=10
+        )
+        controller.acquire(100)
+
+        with pytest.raises(AdmissionRejected) as exc_info:
+            controller.acquire(100, deadline=1.0)
+
+        assert exc_info.value.retry_after == pytest.approx(10.0, rel=0.1)
+
+    def test_refund_unused_tokens(self):
+        """Releasing with actual usage should return unused budget."""
+        from src.admission import AdmissionController
+
+        controller = AdmissionController(
+            tokens_per_minute=600, requests_per_minute=0, burst_seconds=10
+        )
+        ticket = controller.acquire(100)
+        controller.release(ticket, used_tokens=20)
+
+        # 80 tokens refunded, so a second 80-token call is admitted at once
+        ticket = controller.acquire(80, deadline=0.0)
+        assert ticket.wait_seconds < 0.1
+
+    def test_priority_ordering(self):
+        """Interactive requests should be admitted before queued batch work."""
+        from src.admission import AdmissionController, Priority
+
+        # Frozen clock: queued requests wait until the test advances it
+        now = [0.0]
+        # 60 RPM = one request per second with a burst of one request
+        controller = AdmissionController(
+            tokens_per_minute=0, requests_per_minute=60, burst_seconds=1, clock=lambda: now[0]
+        )
+        controller.acquire(1)
+        order = []
+
+        def worker(priority, name):
+            ticket = controller.acquire(1, priority, deadline=5.0)
+            order.append(name)
+            controller.release(ticket)
+
+        def wait_for_queue(depth):
+            while controller.stats()["queued"] != depth:
+                time.sleep(0.001)
+
+        batch = threading.Thread(target=worker, args=(Priority.BATCH, "batch"))
+        batch.start()
+        wait_for_queue(1)
+        interactive = threading.Thread(target=worker, args=(Priority.INTERACTIVE, "interactive"))
+        interactive.start()
+        wait_for_queue(2)
+
+        for thread in (interactive, batch):
+            now[0] += 1.0
+            thread.join(timeout=5)
+
+        assert order == ["interactive", "batch"]
+
+    def test_reserves_expected_completion(self):
+        """Reservations should use observed completion sizes and settle actual usage."""
+        from src.admission import AdmissionController
+
+        controller = AdmissionController(
+            tokens_per_minute=6000, requests_per_minute=0, expected_completion_tokens=500
+        )
+
+        assert controller.expected_completion(2000) == 500
+        assert controller.expected_completion(100) == 100
+
+        ticket = controller.acquire(100 + controller.expected_completion(2000))
+        controller.release(ticket, used_tokens=1100, completion_tokens=1000)
+
+        # 500 tokens over the reservation are charged to the bucket
+        assert controller.stats()["tokens_available"] == pytest.approx(6000 - 1100, abs=1)
+        assert controller.expected_completion(2000) == 550
+
+
+class TestRetryAfter:
+    """Tests for Retry-After parsing."""
+
+    def test_retry_after_header(self):
+        """Retry-After headers should be parsed from API errors."""
+        import httpx
+        import openai
+
+        from src.admission import retry_after_from_error
+
+        response = httpx.Response(
+            429,
+            request=httpx.Request("POST", "https://example.com"),
+            headers={"retry-after-ms": "2500"},
+        )
+        error = openai.RateLimitError("limited", response=response, body=None)
+
+        assert retry_after_from_error(error) == 2.5
@@ -0,0 +1,72 @@
+"""
+Unit tests for prompt budgeting.
+
+Run with: pytest tests/ -v
+"""
+import pytest
+
+
+class TestClassifyQuery:
+    """Tests for query classification."""
+
+    @pytest.mark.parametrize(
+        "question,expected",
+        [
+            ("Azure AI Searchの料金は？", "factoid"),
+            ("Azure AI Searchでセマンティック検索を有効化する方法は？", "procedure"),
+            ("Show me Python sample code for hybrid search", "code"),
+            ("このドキュメントを要約してください", "summary"),
+            ("Why is hybrid search better than vector search?", "explanation"),
+        ],
+    )
+    def test_classification(self, question, expected):
+        """Cheap heuristics should pick the expected class."""
+        from src.budget import classify_query
+
+        assert classify_query(question) == expected
+
+    def test_policy_overrides(self):
+        """Policy overrides should merge into defaults."""
+        from src.budget import DEFAULT_MAX_TOKENS_POLICY, parse_policy
+
+        policy = parse_policy("factoid=150, code=2000")
+
+        assert policy["factoid"] == 150
+        assert policy["code"] == 2000
+        assert policy["procedure"] == DEFAULT_MAX_TOKENS_POLICY["procedure"]
+
+
+class TestPromptBudgeter:
+    """Tests for PromptBudgeter class."""
+
+    def test_context_budget_respects_total(self):
+        """Context budget should never exceed what is left after fixed costs."""
+        from src.budget import PromptBudgeter
+
+        budgeter = PromptBudgeter(total_budget=1000, max_context_tokens=4000)
+        budget = budgeter.plan("system prompt", user_template_tokens=20, question="What is RAG?")
+
+        assert budget.query_class == "factoid"
+        assert budget.context_budget == 1000 - budget.fixed_tokens
+        assert budget.max_tokens == budgeter.policy["factoid"]
+
+    def test_history_trimmed_oldest_first(self):
+        """History should be trimmed by whole turns, oldest first."""
+        from src.budget import PromptBudgeter
+
+        budgeter = PromptBudgeter(total_budget=400, max_context_tokens=4000)
+        budget = budgeter.plan("system", user_template_tokens=10, question="Q?")
+        budget.context_tokens = 400 - budget.fixed_tokens - 60
+
+        history = []
+        for i in range(4):
+            history.append({"role": "user", "content": f"question {i} " + "word " * 10})
+            history.append({"role": "assistant", "content": f"answer {i} " + "word " * 10})
+
+        kept = budgeter.fit_history(budget, history)
+
+        assert kept == history[-len(kept):]
+        assert len(kept) % 2 == 0
+        assert 0 < len(kept) < len(history)
+        assert budget.history_tokens <= 60
+        assert budget.history_messages_dropped == len(history) - len(kept)
@@ -0,0 +1,214 @@
+"""
+Unit tests for ingestion checkpoints and resumable blob ingestion.
+
+Run with: pytest tests/ -v
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _ok(batch, *args):
+    return {"succeeded": len(batch), "failed": 0, "errors": []}
+
+
+class TestIngestJournal:
+    """Tests for IngestJournal and IngestCheckpoint."""
+
+    def test_open_run_resumes_unfinished(self):
+        """An interrupted run should be resumed; resume=False should start over."""
+        from src.checkpoint import INTERRUPTED, IngestJournal
+
+        journal = IngestJournal(":memory:")
+        first = journal.open_run("docs/")
+        first.set_position("token-2")
+        first.finish(INTERRUPTED, "crash")
+
+        resumed = journal.open_run("docs/")
+        assert (resumed.run_id, resumed.resumed, resumed.position) == (first.run_id, True, "token-2")
+
+        fresh = journal.open_run("docs/", resume=False)
+        assert fresh.run_id != first.run_id
+        assert fresh.position is None
+        assert journal.runs()[1]["status"] == "abandoned"
+
+    def test_chunks_leave_journal_when_uploaded(self):
+        """Uploaded chunks should leave the journal; rejected ones are dead-lettered."""
+        from src.checkpoint import IngestJournal
+
+        journal = IngestJournal(":memory:")
+        run = journal.open_run("docs/")
+        chunks = [{"id": f"a_chunk_{i}", "content": "x"} for i in range(3)]
+        run.document_done("a", chunks)
+
+        assert run.is_finished("a")
+        assert [len(batch) for batch in run.pending_chunks(batch_size=2)] == [2, 1]
+
+        run.uploaded(chunks[:2], {"succeeded": 1, "failed": 1, "errors": [{"key": "a_chunk_1", "error": "bad"}]})
+
+        assert [c["id"] for batch in run.pending_chunks() for c in batch] == ["a_chunk_2"]
+        assert [(d["kind"], d["key"], d["error"]) for d in journal.dead_letters()] == [("chunk", "a_chunk_1", "bad")]
+
+    def test_failed_request_keeps_chunks(self):
+        """Chunks of a request that failed as a whole should stay journaled for a retry."""
+        from src.checkpoint import IngestJournal
+
+        run = IngestJournal(":memory:").open_run("docs/")
+        chunks = [{"id": "a_chunk_0"}]
+        run.add_chunks(chunks)
+        failed = {"succeeded": 0, "failed": 1, "errors": [{"batch_start": 0, "error": "timeout"}]}
+
+        run.uploaded(chunks, failed)
+        assert len(list(run.pending_chunks())) == 1
+
+        run.uploaded(chunks, failed, dead_letter=True)
+        assert list(run.pending_chunks()) == []
+        assert run.dead_letter_count == 1
+
+    def test_consecutive_failures_abort(self, monkeypatch):
+        """The run should abort after too many failed documents in a row."""
+        from src.checkpoint import IngestionAborted, IngestJournal
+        from src.config import get_settings
+
+        monkeypatch.setattr(get_settings(), "ingest_max_consecutive_failures", 2)
+        run = IngestJournal(":memory:").open_run("docs/")
+
+        run.document_failed({"id": "a", "content": "x"}, ValueError("first"))
+        run.document_done("b", [])
+        run.document_failed({"id": "c", "content": iter(["lazy"])}, ValueError("second"))
+        with pytest.raises(IngestionAborted):
+            run.document_failed({"id": "d"}, ValueError("third"))
+
+        payloads = {d["key"]: d["payload"] for d in run.journal.dead_letters()}
+        assert payloads["a"] == {"id": "a", "content": "x"}
+        assert payloads["c"] == {"id": "c"}
+
+
+class TestResumableIngestion:
+    """Tests for checkpointed ingest_from_blob."""
+
+    def _pipeline(self, processed: list[str]):
+        from benchmarks.fakes import FakeConfig, FakeContainerClient
+        from src.indexer import DocumentIngestionPipeline
+
+        container = FakeContainerClient("docs", FakeConfig(latency_scale=0, blob_page_size=2))
+        for i in range(5):
+            container.upload_blob(f"d{i}.txt", f"Text {i}.")
+
+        def process(document_id, text, metadata, progress, text_format):
+            processed.append(document_id)
+            if document_id == "d3_txt" and processed.count(document_id) == 1:
+                raise KeyboardInterrupt("crash")
+            return [{"id": f"{document_id}_chunk_0", "content": "".join(text)}]
+
+        pipeline = DocumentIngestionPipeline.__new__(DocumentIngestionPipeline)
+        pipeline.processor = MagicMock()
+        pipeline.processor.iter_process_document.side_effect = process
+        pipeline.index_manager = MagicMock(index_name="idx")
+        pipeline.index_manager.upload_documents.side_effect = _ok
+        return pipeline, container
+
+    def test_resume_after_crash(self, monkeypatch):
+        """A crashed run should resume from its listing page without re-embedding."""
+        from src.checkpoint import IngestJournal
+        from src.config import get_settings
+
+        monkeypatch.setattr(get_settings(), "loader_processes", 0)
+        journal = IngestJournal(":memory:")
+        processed: list[str] = []
+        pipeline, container = self._pipeline(processed)
+
+        with patch("src.indexer.get_blob_service_client") as mock_blob, \
+                patch("src.indexer.get_ingest_journal", return_value=journal):
+            mock_blob.return_value.get_container_client.return_value = container
+            with pytest.raises(KeyboardInterrupt):
+                pipeline.ingest_from_blob("docs")
+            assert journal.runs()[0]["status"] == "interrupted"
+            assert pipeline.index_manager.upload_documents.call_count == 0
+
+            result = pipeline.ingest_from_blob("docs")
+
+        assert processed == ["d0_txt", "d1_txt", "d2_txt", "d3_txt", "d3_txt", "d4_txt"]
+        assert result["resumed_chunks"] == 3
+        assert result["succeeded"] == 5
+        assert journal.runs()[0]["status"] == "completed"
+        uploaded = [c["id"] for call in pipeline.index_manager.upload_documents.call_args_list for c in call.args[0]]
+        assert sorted(uploaded) == [f"d{i}_txt_chunk_0" for i in range(5)]
+
+    def test_failed_documents_are_dead_lettered(self, monkeypatch):
+        """Service errors should be dead-lettered instead of stopping the run."""
+        from openai import OpenAIError
+
+        from src.checkpoint import IngestJournal
+        from src.config import get_settings
+
+        monkeypatch.setattr(get_settings(), "loader_processes", 0)
+        journal = IngestJournal(":memory:")
+        pipeline, container = self._pipeline([])
+        pipeline.processor.iter_process_document.side_effect = lambda document_id, **kwargs: (
+            (_ for _ in ()).throw(OpenAIError("embedding failed")) if document_id == "d1_txt"
+            else [{"id": f"{document_id}_chunk_0", "content": "x"}]
+        )
+
+        with patch("src.indexer.get_blob_service_client") as mock_blob, \
+                patch("src.indexer.get_ingest_journal", return_value=journal):
+            mock_blob.return_value.get_container_client.return_value = container
+            result = pipeline.ingest_from_blob("docs")
+
+        assert (result["succeeded"], result["skipped"], result["dead_letters"]) == (4, 1, 1)
+        letter = journal.dead_letters()[0]
+        assert (letter["key"], letter["error"]) == ("d1_txt", "embedding failed")
+        assert letter["payload"]["metadata"]["source"] == "blob://docs/d1.txt"
+
+    def test_unexpected_errors_stop_the_run(self, monkeypatch):
+        """Errors other than loader and service errors should not be dead-lettered."""
+        from src.checkpoint import IngestJournal
+        from src.config import get_settings
+
+        monkeypatch.setattr(get_settings(), "loader_processes", 0)
+        journal = IngestJournal(":memory:")
+        pipeline, container = self._pipeline([])
+        pipeline.processor.iter_process_document.side_effect = KeyError("bug")
+
+        with patch("src.indexer.get_blob_service_client") as mock_blob, \
+                patch("src.indexer.get_ingest_journal", return_value=journal):
+            mock_blob.return_value.get_container_client.return_value = container
+            with pytest.raises(KeyError):
+                pipeline.ingest_from_blob("docs")
+
+        assert journal.dead_letters() == []
+        assert journal.runs()[0]["status"] == "interrupted"
+
+
+class TestJournalStorage:
+    """Tests for journal storage and retention."""
+
+    def test_shares_job_database(self, tmp_path):
+        """The journal and job store should share one connection per database file."""
+        from src.checkpoint import IngestJournal
+        from src.jobs import JobStore
+
+        path = str(tmp_path / "ingest.sqlite3")
+        store = JobStore(path)
+        journal = IngestJournal(path)
+
+        assert journal._conn is store._conn
+        store.close()
+        assert journal.open_run("docs/").run_id
+        journal.close()
+
+    def test_prune_finished_runs(self):
+        """Finished runs and their dead letters should be pruned; interrupted runs kept."""
+        from src.checkpoint import COMPLETED, INTERRUPTED, IngestJournal
+
+        journal = IngestJournal(":memory:", retention_days=1)
+        finished = journal.open_run("a/")
+        finished.document_failed({"id": "x", "content": "x"}, ValueError("bad"))
+        finished.finish(COMPLETED)
+        journal.open_run("b/").finish(INTERRUPTED)
+
+        # Within the retention period
+        assert journal.prune() == 0
+        assert journal.prune(max_age=0) == 1
+        assert [run["key"] for run in journal.runs()] == ["b/"]
+        assert journal.dead_letters() == []
@@ -0,0 +1,83 @@
+"""
+Unit tests for lazy component construction and shared clients.
+
+Run with: pytest tests/ -v
+"""
+import threading
+from unittest.mock import MagicMock, patch
+
+
+class TestAppComponents:
+    """Tests for AppComponents class."""
+
+    def test_nothing_built_until_first_use(self):
+        """Components should be constructed on first access, once."""
+        from src.components import AppComponents
+
+        with patch("src.rag_pipeline.RAGPipeline") as mock_pipeline:
+            components = AppComponents()
+            mock_pipeline.assert_not_called()
+
+            first = components.rag_pipeline
+            second = components.rag_pipeline
+
+        mock_pipeline.assert_called_once()
+        assert first is second
+
+    def test_concurrent_access_builds_once(self):
+        """Racing first requests should share one instance."""
+        from src.components import AppComponents
+
+        calls = []
+
+        def slow_factory():
+            calls.append(1)
+            threading.Event().wait(0.05)
+            return MagicMock()
+
+        components = AppComponents()
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(components._get("x", slow_factory)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert all(r is results[0] for r in results)
+
+    def test_warm_up_failure_is_recorded(self):
+        """Warm-up errors should not propagate; components retry on first use."""
+        from src.components import AppComponents
+
+        with patch("src.rag_pipeline.RAGPipeline", side_effect=RuntimeError("no credential")):
+            components = AppComponents()
+            components.warm_up()
+
+        assert components.ready.is_set()
+        assert isinstance(components.warmup_error, RuntimeError)
+        assert "rag_pipeline" not in components._instances
+
+
+class TestClients:
+    """Tests for the shared client registry."""
+
+    def test_search_client_shared_per_index(self):
+        """One SearchClient per index name."""
+        from src.clients import get_search_client, reset_clients
+
+        reset_clients()
+        with patch("azure.search.documents.SearchClient") as mock_client, \
+                patch("src.clients.get_search_credential"):
+            mock_client.side_effect = lambda **kwargs: MagicMock(**kwargs)
+            a = get_search_client()
+            b = get_search_client()
+            c = get_search_client("other-index")
+        reset_clients()
+
+        assert a is b
+        assert a is not c
+        assert mock_client.call_count == 2
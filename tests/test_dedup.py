@@ -0,0 +1,154 @@
+"""
+Unit tests for ingestion-time chunk deduplication.
+
+Run with: pytest tests/ -v
+"""
+import random
+from unittest.mock import MagicMock, patch
+
+
+def _words(seed: int, count: int = 300) -> list[str]:
+    rng = random.Random(seed)
+    return [f"w{rng.randrange(5000)}" for _ in range(count)]
+
+
+class TestChunkDeduplicator:
+    """Tests for ChunkDeduplicator."""
+
+    def test_exact_duplicates_ignore_case_and_whitespace(self):
+        """Normalized identical text should be an exact duplicate of the first chunk."""
+        from src.dedup import ChunkDeduplicator
+
+        dedup = ChunkDeduplicator()
+
+        assert dedup.check("a", "a_chunk_0", "All rights reserved.") is None
+        duplicate = dedup.check("b", "b_chunk_3", "  ALL rights\nreserved. ")
+
+        assert (duplicate.kind, duplicate.canonical_id) == ("exact", "a_chunk_0")
+
+    def test_near_duplicates(self):
+        """A few changed words should be a near duplicate; unrelated text should not."""
+        from src.dedup import ChunkDeduplicator
+
+        dedup = ChunkDeduplicator(threshold=0.8)
+        words = _words(1)
+        edited = list(words)
+        edited[100:103] = ["changed", "three", "words"]
+
+        dedup.check("a", "a_chunk_0", " ".join(words))
+        duplicate = dedup.check("b", "b_chunk_0", " ".join(edited))
+
+        assert duplicate.kind == "near"
+        assert duplicate.canonical_id == "a_chunk_0"
+        assert duplicate.similarity >= 0.8
+        assert dedup.check("c", "c_chunk_0", " ".join(_words(2))) is None
+
+    def test_exact_only_above_one(self):
+        """A threshold above 1.0 should disable near-duplicate detection."""
+        from src.dedup import ChunkDeduplicator
+
+        dedup = ChunkDeduplicator(threshold=1.01)
+        words = _words(3)
+
+        dedup.check("a", "a_chunk_0", " ".join(words))
+
+        assert dedup.check("b", "b_chunk_0", " ".join(words[:-1])) is None
+
+    def test_forget_document_and_eviction(self):
+        """Re-ingested documents and chunks past max_chunks should be forgotten."""
+        from src.dedup import ChunkDeduplicator
+
+        dedup = ChunkDeduplicator(max_chunks=2)
+        dedup.check("a", "a_chunk_0", "first")
+        dedup.forget_document("a")
+
+        assert dedup.check("a", "a_chunk_0", "first") is None
+        dedup.check("b", "b_chunk_0", "second")
+        dedup.check("c", "c_chunk_0", "third")
+
+        assert len(dedup) == 2
+        assert dedup.check("d", "d_chunk_0", "first") is None
+
+
+class TestDocumentProcessorDedup:
+    """Tests for deduplication in DocumentProcessor."""
+
+    def _processor(self, monkeypatch, mode: str):
+        from src.config import get_settings
+        from src.embedding import DocumentProcessor
+
+        monkeypatch.setattr(get_settings(), "dedup_mode", mode)
+        monkeypatch.setattr(get_settings(), "chunk_size", 20)
+        monkeypatch.setattr(get_settings(), "chunk_overlap", 0)
+        with patch("src.embedding.get_embedding_service") as mock_embedding:
+            service = mock_embedding.return_value = MagicMock()
+            service.embed_batch.side_effect = lambda texts: [[float(len(t))] for t in texts]
+            return DocumentProcessor(), service
+
+    TEXT = (
+        "Unique opening sentence number {n} about topic {n} with details {n}. "
+        "This file is confidential and for internal use only by employees of the company."
+    )
+
+    def test_reference_mode(self, monkeypatch):
+        """Duplicates should skip embedding and point at the first chunk."""
+        processor, service = self._processor(monkeypatch, "reference")
+        progress = MagicMock()
+
+        processor.process_document("a", self.TEXT.format(n=1), {"title": "A", "category": "x"})
+        chunks = processor.process_document(
+            "b", self.TEXT.format(n=2), {"title": "B", "category": "x"}, progress=progress
+        )
+
+        assert len(chunks) == 2
+        reference = chunks[1]
+        assert reference["duplicate_of"] == "a_chunk_1"
+        assert reference["content"] == ""
+        assert "content_vector" not in reference
+        assert "title" not in reference
+        assert reference["category"] == "x"
+        assert len(service.embed_batch.call_args.args[0]) == 1
+        progress.assert_any_call("duplicates", 1)
+        progress.assert_any_call("embeddings", 1)
+
+    def test_drop_mode(self, monkeypatch):
+        """Duplicates should be left out with drop mode."""
+        processor, _ = self._processor(monkeypatch, "drop")
+
+        processor.process_document("a", self.TEXT.format(n=1))
+        chunks = processor.process_document("b", self.TEXT.format(n=2))
+
+        assert [c["id"] for c in chunks] == ["b_chunk_0"]
+
+
+class TestReferenceExpansion:
+    """Tests for resolving reference chunks during context expansion."""
+
+    @patch("src.expansion.get_search_client")
+    def test_reference_content_resolved(self, mock_search_client, monkeypatch):
+        """A neighbor stored as a reference should get the content it points to."""
+        from src.config import get_settings
+        from src.expansion import ChunkStore, ContextExpander
+        from src.retriever import SearchResult
+
+        monkeypatch.setattr(get_settings(), "dedup_mode", "reference")
+        index = {
+            "b_chunk_1": {"id": "b_chunk_1", "document_id": "b", "content": "", "chunk_index": 1,
+                          "duplicate_of": "a_chunk_4"},
+            "a_chunk_4": {"id": "a_chunk_4", "document_id": "a", "content": "Shared footer.",
+                          "chunk_index": 4},
+        }
+
+        def search(search_text, filter, select, top):
+            assert "duplicate_of" in select
+            keys = filter.split("'")[1].split(",")
+            return [index[key] for key in keys if key in index]
+
+        mock_search_client.return_value.search.side_effect = search
+        hit = SearchResult(id="b_chunk_0", document_id="b", content="Intro.", score=1.0,
+                           title="B", chunk_index=0)
+
+        spans = ContextExpander(window=1, store=ChunkStore()).expand([hit])
+
+        assert spans[0].content == "Intro. Shared footer."
+        assert spans[0].title == "B"
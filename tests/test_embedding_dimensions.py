@@ -0,0 +1,110 @@
+"""
+Unit tests for reduced-dimension embeddings and the dimension evaluation tool.
+
+Run with: pytest tests/ -v
+"""
+import math
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+
+def _response(*vectors):
+    return SimpleNamespace(data=[SimpleNamespace(embedding=list(v)) for v in vectors])
+
+
+class TestEmbeddingDimensions:
+    """Tests for EmbeddingService output dimensions."""
+
+    def test_truncate_embedding(self):
+        """Truncated vectors keep the leading values and have unit length."""
+        from src.embedding import truncate_embedding
+
+        vector = truncate_embedding([3.0, 4.0, 12.0], 2)
+
+        assert vector == pytest.approx([0.6, 0.8])
+        assert math.isclose(sum(v * v for v in vector), 1.0)
+
+    @patch("src.embedding.get_openai_client")
+    def test_api_mode_sends_dimensions(self, mock_client):
+        """The api mode should pass dimensions to the embeddings API unchanged."""
+        from src.embedding import EmbeddingService
+
+        client = mock_client.return_value
+        client.embeddings.create.return_value = _response([0.1, 0.2])
+
+        service = EmbeddingService("text-embedding-3-large", 2, "api")
+
+        assert service.embed_batch(["a"]) == [[0.1, 0.2]]
+        assert client.embeddings.create.call_args.kwargs["dimensions"] == 2
+
+    @patch("src.embedding.get_openai_client")
+    def test_truncate_mode_shortens_locally(self, mock_client):
+        """The truncate mode should request native vectors and shorten each one."""
+        from src.embedding import EmbeddingService
+
+        client = mock_client.return_value
+        client.embeddings.create.return_value = _response([3.0, 4.0, 1.0], [0.0, 2.0, 5.0])
+
+        vectors = EmbeddingService("text-embedding-3-small", 2, "truncate").embed_batch(["a", "b"])
+
+        assert "dimensions" not in client.embeddings.create.call_args.kwargs
+        assert vectors == [pytest.approx([0.6, 0.8]), pytest.approx([0.0, 1.0])]
+
+    @patch("src.embedding.get_openai_client")
+    def test_primary_service_uses_settings(self, mock_client, monkeypatch):
+        """Without a deployment, EMBEDDING_DIMENSIONS and its mode apply."""
+        from src.config import get_settings
+        from src.embedding import EmbeddingService
+
+        monkeypatch.setattr(get_settings(), "embedding_dimensions", 256)
+        monkeypatch.setattr(get_settings(), "embedding_dimensions_mode", "api")
+        mock_client.return_value.embeddings.create.return_value = _response([0.5])
+
+        EmbeddingService().embed_text("query")
+
+        assert mock_client.return_value.embeddings.create.call_args.kwargs["dimensions"] == 256
+
+    @pytest.mark.parametrize("dimensions, mode", [(256, "pca"), (None, "truncate")])
+    def test_invalid_modes_rejected(self, dimensions, mode):
+        """Unknown modes and truncation without a size should raise ValueError."""
+        from src.embedding import EmbeddingService
+
+        with patch("src.embedding.get_openai_client"), pytest.raises(ValueError):
+            EmbeddingService("text-embedding-3-small", dimensions, mode)
+
+    @patch("src.indexer.get_search_client")
+    @patch("src.indexer.get_search_index_client")
+    def test_schema_follows_setting(self, mock_index_client, mock_search_client, monkeypatch):
+        """create_index should size content_vector from EMBEDDING_DIMENSIONS by default."""
+        from src.config import get_settings
+        from src.indexer import SearchIndexManager
+
+        monkeypatch.setattr(get_settings(), "embedding_dimensions", 512)
+
+        SearchIndexManager().create_index()
+        index = mock_index_client.return_value.create_or_update_index.call_args.args[0]
+        field = next(f for f in index.fields if f.name == "content_vector")
+        assert field.vector_search_dimensions == 512
+
+
+class TestDimensionEval:
+    """Tests for the recall vs dimensions evaluation."""
+
+    def test_evaluate_and_recommend(self):
+        """Full size is exact; the recommendation is the smallest size meeting the target."""
+        from benchmarks.dimension_eval import evaluate, recommend_dimensions
+        from benchmarks.index_sweep import synthetic_corpus
+        from src.index_profile import PROFILES
+
+        corpus, queries = synthetic_corpus(docs=200, queries=10, dims=32, clusters=6, seed=3)
+
+        rows = evaluate(corpus, queries, [4, 16, 32, 64], k=5, profile=PROFILES["default"])
+
+        assert [r["dimensions"] for r in rows] == [4, 16, 32]
+        assert rows[-1]["recall"] == 1.0
+        assert rows[-1]["storage_ratio"] == 1.0
+        assert rows[0]["bytes_per_vector"] == rows[-1]["bytes_per_vector"] // 8
+        assert recommend_dimensions(rows, min_recall=1.0)["dimensions"] <= 32
+        assert recommend_dimensions(rows, min_recall=1.1) is None
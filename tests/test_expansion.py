@@ -0,0 +1,103 @@
+"""
+Unit tests for neighbor-chunk context expansion.
+
+Run with: pytest tests/ -v
+"""
+from unittest.mock import patch
+
+
+def _chunk(document_id: str, index: int, content: str) -> dict:
+    return {
+        "id": f"{document_id}_chunk_{index}",
+        "document_id": document_id,
+        "content": content,
+        "source": f"{document_id}.md",
+        "title": None,
+        "category": None,
+        "chunk_index": index,
+    }
+
+
+class TestMergeOverlap:
+    """Tests for merge_overlap."""
+
+    def test_overlap_removed(self):
+        """The repeated leading sentences of the next chunk should be dropped."""
+        from src.expansion import merge_overlap
+
+        left = "One. Two. Three."
+        right = "Two. Three. Four."
+
+        assert merge_overlap(left, right) == "One. Two. Three. Four."
+
+    def test_no_overlap(self):
+        """Chunks without overlap should be joined with a space."""
+        from src.expansion import merge_overlap
+
+        assert merge_overlap("Alpha.", "Beta.") == "Alpha. Beta."
+        # Partial-word matches are not overlap
+        assert merge_overlap("I am here", "here and there") == "I am here and there"
+        assert merge_overlap("where", "here it is") == "where here it is"
+
+
+class TestChunkStore:
+    """Tests for ChunkStore class."""
+
+    def test_lru_eviction_and_invalidation(self):
+        """Least recently used chunks should be evicted; documents invalidated."""
+        from src.expansion import ChunkStore
+
+        store = ChunkStore(max_chunks=2)
+        store.put_many({"a_chunk_0": {"content": "a0"}, "b_chunk_0": {"content": "b0"}})
+        store.get_many(["a_chunk_0"])
+        store.put_many({"a_chunk_1": None})
+
+        found, unknown = store.get_many(["a_chunk_0", "a_chunk_1", "b_chunk_0"])
+        assert list(found) == ["a_chunk_0"]
+        assert unknown == ["b_chunk_0"]
+
+        store.invalidate(["a"])
+        assert len(store) == 0
+
+
+class TestContextExpander:
+    """Tests for ContextExpander class."""
+
+    @patch("src.expansion.get_search_client")
+    def test_neighbors_fetched_once_and_merged(self, mock_search_client):
+        """Neighbors should be loaded in one lookup, cached, and merged into spans."""
+        from src.expansion import ChunkStore, ContextExpander
+        from src.retriever import SearchResult
+
+        index = {
+            c["id"]: c
+            for c in [
+                _chunk("doc", 0, "Zero."),
+                _chunk("doc", 1, "Zero. One."),
+                _chunk("doc", 2, "One. Two."),
+                _chunk("doc", 3, "Two. Three."),
+                _chunk("other", 0, "Other."),
+            ]
+        }
+        client = mock_search_client.return_value
+        client.search.side_effect = lambda filter, **kwargs: [
+            index[key] for key in filter.split("'")[1].split(",") if key in index
+        ]
+        expander = ContextExpander(window=1, store=ChunkStore())
+        results = [
+            SearchResult(id="other_chunk_0", document_id="other", content="Other.", score=0.9, chunk_index=0),
+            SearchResult(id="doc_chunk_1", document_id="doc", content="Zero. One.", score=0.8, chunk_index=1),
+            SearchResult(id="doc_chunk_2", document_id="doc", content="One. Two.", score=0.85, chunk_index=2),
+        ]
+
+        spans = expander.expand(results)
+
+        assert client.search.call_count == 1
+        assert "search.in(id, " in client.search.call_args.kwargs["filter"]
+        assert [s.id for s in spans] == ["other_chunk_0", "doc_chunk_0"]
+        assert spans[1].content == "Zero. One. Two. Three."
+        assert spans[1].score == 0.85
+
+        # Second query for the same hits is served from the chunk store
+        expander.expand(results)
+        assert client.search.call_count == 1
@@ -0,0 +1,63 @@
+"""
+Unit tests for the benchmark fakes.
+
+Run with: pytest tests/ -v
+"""
+
+
+class TestFakeEmbedding:
+    """Tests for deterministic fake embeddings."""
+
+    def test_deterministic_and_normalized(self):
+        """Same text should give the same unit-length vector."""
+        from benchmarks.fakes import fake_embedding
+
+        first = fake_embedding("azure search index", 64)
+        second = fake_embedding("azure search index", 64)
+
+        assert first == second
+        assert abs(sum(v * v for v in first) - 1.0) < 1e-9
+
+    def test_similar_texts_are_closer(self):
+        """Texts sharing words should be more similar than unrelated ones."""
+        from benchmarks.fakes import fake_embedding
+
+        query = fake_embedding("vector search latency", 256)
+        related = fake_embedding("vector search latency tuning", 256)
+        unrelated = fake_embedding("managed identity credential", 256)
+
+        def cosine(a, b):
+            return sum(x * y for x, y in zip(a, b))
+
+        assert cosine(query, related) > cosine(query, unrelated)
+
+
+class TestFakeSearch:
+    """Tests for the in-memory search fake."""
+
+    def test_filter_evaluation(self):
+        """OData subset should support eq/ne/and/or/search.in."""
+        from benchmarks.fakes import matches_filter
+
+        doc = {"category": "azure", "chunk_index": 3, "source": "a.md"}
+
+        assert matches_filter(doc, "category eq 'azure'")
+        assert not matches_filter(doc, "category ne 'azure'")
+        assert matches_filter(doc, "category eq 'x' or chunk_index ge 3")
+        assert matches_filter(doc, "(category eq 'azure') and search.in(source, 'a.md,b.md')")
+
+    def test_keyword_search_and_facets(self):
+        """Keyword search should rank matches and report facets."""
+        from benchmarks.fakes import FakeConfig, FakeIndex, FakeSearchClient
+
+        client = FakeSearchClient(FakeIndex("test"), FakeConfig(latency_scale=0))
+        client.upload_documents([
+            {"id": "1", "content": "vector search", "category": "a"},
+            {"id": "2", "content": "identity", "category": "b"},
+        ])
+
+        results = client.search("vector", top=5, facets=["category"])
+        items = list(results)
+
+        assert [r["id"] for r in items] == ["1"]
+        assert results.get_facets()["category"] == [{"value": "a", "count": 1}, {"value": "b", "count": 1}]
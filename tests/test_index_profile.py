@@ -0,0 +1,102 @@
+"""
+Unit tests for vector index profiles and the index sweep tool.
+
+Run with: pytest tests/ -v
+"""
+import pytest
+
+
+class TestIndexProfile:
+    """Tests for IndexProfile and get_index_profile."""
+
+    def test_overrides_applied_to_preset(self):
+        """Overrides should be typed and applied on top of the preset."""
+        from src.index_profile import get_index_profile
+
+        profile = get_index_profile("compact", "hnsw_m=8, oversampling=2.5, stored=true, metric=dotProduct")
+
+        assert profile.name == "compact"
+        assert profile.compression == "scalar"
+        assert profile.hnsw_m == 8
+        assert profile.oversampling == 2.5
+        assert profile.stored is True
+        assert profile.metric == "dotProduct"
+
+    @pytest.mark.parametrize(
+        "name, overrides",
+        [
+            ("missing", ""),
+            ("default", "unknown=1"),
+            ("default", "hnsw_m=12"),
+            ("default", "ef_search=50"),
+            ("default", "compression=pq"),
+        ],
+    )
+    def test_invalid_profiles_rejected(self, name, overrides):
+        """Unknown presets, fields and out-of-range values should raise ValueError."""
+        from src.index_profile import get_index_profile
+
+        with pytest.raises(ValueError):
+            get_index_profile(name, overrides)
+
+    def test_vector_bytes(self):
+        """Storage estimates should reflect compression, rescoring and storage."""
+        from src.index_profile import PROFILES
+
+        assert PROFILES["default"].vector_bytes(1536) == {"index": 6144, "originals": 0, "stored": 6144}
+        assert PROFILES["compact"].vector_bytes(1536) == {"index": 1536, "originals": 3072, "stored": 0}
+        assert PROFILES["binary"].vector_bytes(1536) == {"index": 192, "originals": 6144, "stored": 0}
+
+
+class TestSchema:
+    """Tests for the vector field and vector search builders."""
+
+    def test_default_matches_original_schema(self):
+        """The default profile should keep float32, retrievable vectors and no compression."""
+        from src.index_profile import PROFILES, build_vector_field, build_vector_search
+
+        field = build_vector_field(PROFILES["default"], 1536)
+        vector_search = build_vector_search(PROFILES["default"])
+
+        assert field.type == "Collection(Edm.Single)"
+        assert field.stored is True
+        assert vector_search.compressions is None
+        assert vector_search.algorithms[0].parameters["m"] == 4
+        assert vector_search.profiles[0].compression_name is None
+
+    def test_compact_profile(self):
+        """Compressed profiles should add a rescoring compression and drop stored vectors."""
+        from src.index_profile import PROFILES, build_vector_field, build_vector_search
+
+        field = build_vector_field(PROFILES["compact"], 768)
+        vector_search = build_vector_search(PROFILES["compact"])
+        compression = vector_search.compressions[0]
+
+        assert field.type == "Collection(Edm.Half)"
+        assert field.stored is False
+        assert field.retrievable is False
+        assert compression.kind == "scalarQuantization"
+        assert compression.rescoring_options.default_oversampling == 4.0
+        assert vector_search.profiles[0].compression_name == compression.compression_name
+
+
+class TestIndexSweep:
+    """Tests for the offline recall/latency sweep."""
+
+    def test_sweep_and_recommendation(self):
+        """Uncompressed search should reach high recall and be recommended as settings."""
+        from benchmarks.index_sweep import profile_settings, recommend, sweep, synthetic_corpus
+        from src.index_profile import PROFILES
+
+        corpus, queries = synthetic_corpus(docs=300, queries=10, dims=16, clusters=8, seed=1)
+
+        rows = sweep(corpus, queries, [PROFILES["default"], PROFILES["binary"]], [4], [100], [2.0], k=5)
+        best = recommend(rows, min_recall=0.9)
+
+        assert len(rows) == 2
+        assert rows[0]["recall"] >= 0.9
+        assert rows[1]["bytes_per_vector"] < rows[0]["bytes_per_vector"]
+        assert profile_settings(best["profile"]) == {
+            "INDEX_PROFILE": "default",
+            "INDEX_PROFILE_OVERRIDES": "ef_search=100",
+        }
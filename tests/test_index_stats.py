@@ -0,0 +1,147 @@
+"""
+Unit tests for cached index statistics and health endpoints.
+
+Run with: pytest tests/ -v
+"""
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _search_client(total: int = 10):
+    client = MagicMock()
+    client.search.return_value = SimpleNamespace(
+        get_count=lambda: total,
+        get_facets=lambda: {"category": [{"value": "azure", "count": 7}, {"value": "aws", "count": 3}]},
+    )
+    return client
+
+
+def _statistics(storage_size: int, vector_index_size: int):
+    """Index statistics as the SDK returns them (REST names as mapping keys)."""
+    from azure.search.documents.indexes.models import GetIndexStatisticsResult
+
+    return GetIndexStatisticsResult(
+        {"documentCount": 10, "storageSize": storage_size, "vectorIndexSize": vector_index_size}
+    )
+
+
+def _service(search_client=None, index_client=None, interval: float = 60.0):
+    from src.index_stats import IndexStatsService
+
+    if index_client is None:
+        index_client = MagicMock()
+        index_client.get_index_statistics.return_value = _statistics(2048, 512)
+    return IndexStatsService(
+        index_name="idx",
+        interval=interval,
+        search_client=search_client or _search_client(),
+        index_client=index_client,
+    )
+
+
+class TestIndexStatsService:
+    """Tests for IndexStatsService class."""
+
+    def test_refresh(self):
+        """One refresh should fetch the count, facets and index size."""
+        service = _service()
+
+        stats = service.refresh()
+
+        assert stats.document_count == 10
+        assert stats.facets.total == 10
+        assert stats.facets.counts["category"] == {"azure": 7, "aws": 3}
+        assert (stats.storage_size, stats.vector_index_size) == (2048, 512)
+        assert service.facets() is stats.facets
+        assert not service.stale
+
+    def test_alias_size_and_missing_size(self):
+        """Sizes should be read through an alias, are optional, and accept older SDK dicts."""
+        from azure.core.exceptions import ResourceNotFoundError
+
+        def statistics(name):
+            if name != "idx-v2":
+                raise ResourceNotFoundError("idx is an alias")
+            return _statistics(1, 2)
+
+        index_client = MagicMock()
+        index_client.get_index_statistics.side_effect = statistics
+        index_client.get_alias.return_value = SimpleNamespace(indexes=["idx-v2"])
+
+        assert _service(index_client=index_client).refresh().storage_size == 1
+
+        index_client.get_alias.side_effect = RuntimeError("forbidden")
+        stats = _service(index_client=index_client).refresh()
+        assert stats.document_count == 10
+        assert stats.storage_size is None
+
+        # Older SDKs returned a plain dict
+        index_client = MagicMock()
+        index_client.get_index_statistics.return_value = {"storage_size": 3, "vector_index_size": 4}
+        assert _service(index_client=index_client).refresh().vector_index_size == 4
+
+    def test_background_loop_keeps_last_snapshot_on_errors(self):
+        """The loop should refresh on its interval; failures keep the old snapshot until it is stale."""
+        search_client = _search_client()
+        service = _service(search_client=search_client, interval=0.01)
+
+        service.start()
+        time.sleep(0.1)
+        search_client.search.side_effect = RuntimeError("search down")
+        time.sleep(0.1)
+        service.stop()
+
+        assert service.get().document_count == 10
+        assert service.last_error == "search down"
+        assert service.stale
+
+
+class TestHealthEndpoints:
+    """Tests for the health, readiness and liveness endpoints."""
+
+    @pytest.fixture
+    def client_and_components(self):
+        from fastapi.testclient import TestClient
+
+        with patch("src.api.AppComponents") as mock_components:
+            from src.api import app
+
+            components = mock_components.return_value
+            components.index_stats = _service()
+            with TestClient(app) as client:
+                # Startup began the refresh loop; stop it so the tests control refreshes
+                components.index_stats.stop()
+                yield client, components
+
+    def test_health_uses_cached_stats(self, client_and_components):
+        """Probes should not query the search service once stats are cached."""
+        client, components = client_and_components
+        components.index_stats.refresh()
+        search_client = components.index_stats.search_client
+        search_client.search.reset_mock()
+
+        for _ in range(3):
+            response = client.get("/health")
+
+        assert response.status_code == 200
+        assert response.json()["document_count"] == 10
+        assert response.json()["status"] == "healthy"
+        search_client.search.assert_not_called()
+
+    def test_ready_and_live(self, client_and_components):
+        """Readiness should fail without fresh statistics; liveness never checks them."""
+        client, components = client_and_components
+        components.ready.is_set.return_value = True
+        components.index_stats.interval = 1e-6
+
+        assert client.get("/health/live").status_code == 200
+        assert client.get("/health/ready").status_code == 503
+
+        components.index_stats.interval = 60.0
+        components.index_stats.refresh()
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["checks"] == {"warm_up": True, "index_stats": True}
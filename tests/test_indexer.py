@@ -0,0 +1,162 @@
+"""
+Unit tests for document-level index operations.
+
+Run with: pytest tests/ -v
+"""
+from unittest.mock import MagicMock
+
+import pytest
+
+
+def _pipeline(chunks: list[dict]):
+    """Ingestion pipeline over an in-memory fake index holding ``chunks``."""
+    from benchmarks.fakes import FakeConfig, FakeIndex, FakeSearchClient
+    from src.indexer import DocumentIngestionPipeline, SearchIndexManager
+
+    index = FakeIndex("idx")
+    index.documents.update({chunk["id"]: dict(chunk) for chunk in chunks})
+    manager = SearchIndexManager.__new__(SearchIndexManager)
+    manager.index_name = "idx"
+    manager.search_client = FakeSearchClient(index, FakeConfig(latency_scale=0))
+
+    pipeline = DocumentIngestionPipeline.__new__(DocumentIngestionPipeline)
+    pipeline.index_manager = manager
+    pipeline.processor = MagicMock(deduplicator=None, embedding_service_v2=None)
+    pipeline.processor.embedding_service.embed_batch.side_effect = lambda texts: [[0.5] for _ in texts]
+    return pipeline, index.documents
+
+
+def _chunk(document_id: str, index: int, **fields) -> dict:
+    return {
+        "id": f"{document_id}_chunk_{index}",
+        "document_id": document_id,
+        "content": f"{document_id} text {index}",
+        "content_vector": [1.0],
+        "category": "old",
+        "chunk_index": index,
+    } | fields
+
+
+class TestUpdateMetadata:
+    """Tests for DocumentIngestionPipeline.update_metadata."""
+
+    def test_merges_metadata_without_vectors(self):
+        """Only the document's chunks change, and their content and vectors are kept."""
+        pipeline, documents = _pipeline([_chunk("a", 0), _chunk("a", 1), _chunk("b", 0)])
+
+        result = pipeline.update_metadata("a", {"category": "new", "title": "A"}, batch_size=1)
+
+        assert (result["chunks"], result["succeeded"], result["failed"]) == (2, 2, 0)
+        assert documents["a_chunk_1"] == _chunk("a", 1, category="new", title="A")
+        assert documents["b_chunk_0"]["category"] == "old"
+        pipeline.processor.embedding_service.embed_batch.assert_not_called()
+
+    def test_title_keeps_heading_paths(self):
+        """A new title should replace only the document title part of chunk titles."""
+        pipeline, documents = _pipeline([
+            _chunk("a", 0, title="guide.md"),
+            _chunk("a", 1, title="guide.md > Install > Linux"),
+            _chunk("b", 0),
+            _chunk("b", 1, title="Install"),
+        ])
+
+        pipeline.update_metadata("a", {"title": "Guide"})
+        assert documents["a_chunk_0"]["title"] == "Guide"
+        assert documents["a_chunk_1"]["title"] == "Guide > Install > Linux"
+
+        pipeline.update_metadata("a", {"title": None})
+        assert documents["a_chunk_0"]["title"] is None
+        assert documents["a_chunk_1"]["title"] == "Install > Linux"
+
+        # Untitled documents: heading paths get the new title as a prefix
+        pipeline.update_metadata("b", {"title": "B"})
+        assert documents["b_chunk_0"]["title"] == "B"
+        assert documents["b_chunk_1"]["title"] == "B > Install"
+
+    def test_unknown_fields_rejected(self):
+        """Fields other than metadata must not be merged."""
+        pipeline, _ = _pipeline([_chunk("a", 0)])
+
+        with pytest.raises(ValueError, match="content"):
+            pipeline.update_metadata("a", {"content": "x"})
+
+
+class TestDeleteDocument:
+    """Tests for DocumentIngestionPipeline.delete_document."""
+
+    def test_deletes_all_chunks(self):
+        """All chunks of the document should be deleted in batches."""
+        pipeline, documents = _pipeline([_chunk("a", i) for i in range(5)] + [_chunk("b", 0)])
+
+        result = pipeline.delete_document("a", batch_size=2, max_concurrent_uploads=2)
+
+        assert (result["chunks"], result["succeeded"], result["failed"]) == (5, 5, 0)
+        assert list(documents) == ["b_chunk_0"]
+
+    def test_missing_document(self):
+        """Deleting an unknown document should find no chunks."""
+        pipeline, _ = _pipeline([_chunk("a", 0)])
+
+        assert pipeline.delete_document("b")["chunks"] == 0
+
+    def test_references_are_repaired(self, monkeypatch):
+        """References to deleted chunks should be promoted and re-pointed."""
+        from src.config import get_settings
+
+        monkeypatch.setattr(get_settings(), "dedup_mode", "reference")
+        reference = {"content": "", "content_vector": None}
+        pipeline, documents = _pipeline([
+            _chunk("a", 0, title="a.md > Intro"),
+            _chunk("b", 0, duplicate_of="a_chunk_0", **reference),
+            _chunk("c", 0, duplicate_of="a_chunk_0", **reference),
+            _chunk("a", 1, duplicate_of="a_chunk_0", **reference),
+        ])
+
+        result = pipeline.delete_document("a")
+
+        assert (result["succeeded"], result["repaired"]) == (2, 2)
+        assert sorted(documents) == ["b_chunk_0", "c_chunk_0"]
+        assert documents["b_chunk_0"]["duplicate_of"] is None
+        assert documents["b_chunk_0"]["content"] == "a text 0"
+        assert documents["b_chunk_0"]["content_vector"] == [0.5]
+        assert documents["b_chunk_0"]["title"] == "a.md > Intro"
+        assert documents["c_chunk_0"]["duplicate_of"] == "b_chunk_0"
+
+
+class TestReingestReferences:
+    """Tests for reference repair when a canonical document is re-ingested."""
+
+    def test_reingest_repairs_references(self, monkeypatch):
+        """References should keep the old text when the chunks they point to are rewritten."""
+        from src.config import get_settings
+
+        monkeypatch.setattr(get_settings(), "dedup_mode", "reference")
+        pipeline, documents = _pipeline([
+            _chunk("a", 0),
+            _chunk("b", 0, duplicate_of="a_chunk_0", content="", content_vector=None),
+        ])
+        pipeline.processor.process_document.return_value = [_chunk("a", 0, content="a rewritten")]
+
+        result = pipeline.ingest_documents([{"id": "a", "content": "a rewritten"}])
+
+        assert (result["succeeded"], result["skipped"]) == (1, 0)
+        assert documents["a_chunk_0"]["content"] == "a rewritten"
+        assert documents["b_chunk_0"]["content"] == "a text 0"
+        assert documents["b_chunk_0"]["duplicate_of"] is None
+
+    def test_failed_repair_skips_document(self, monkeypatch):
+        """A document whose references cannot be repaired must not be overwritten."""
+        from src.config import get_settings
+
+        monkeypatch.setattr(get_settings(), "dedup_mode", "reference")
+        pipeline, documents = _pipeline([
+            _chunk("a", 0),
+            _chunk("b", 0, duplicate_of="a_chunk_0", content="", content_vector=None),
+        ])
+        pipeline.processor.embedding_service.embed_batch.side_effect = RuntimeError("embedding down")
+
+        result = pipeline.ingest_documents([{"id": "a", "content": "a rewritten"}])
+
+        assert result["skipped"] == 1
+        assert documents["a_chunk_0"]["content"] == "a text 0"
+        pipeline.processor.process_document.assert_not_called()
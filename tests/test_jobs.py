@@ -0,0 +1,148 @@
+"""
+Unit tests for background ingestion jobs.
+
+Run with: pytest tests/ -v
+"""
+import threading
+import time
+
+import pytest
+
+
+class FakePipeline:
+    """Ingestion pipeline stand-in: two chunks per document."""
+
+    def __init__(self, gate: threading.Event | None = None):
+        self.gate = gate
+        self.started = threading.Event()
+        self.ingested: list[str] = []
+
+    def ingest_documents(self, documents, progress=None):
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        for doc in documents:
+            self.ingested.append(doc["id"])
+            progress("chunks", 2)
+            progress("embeddings", 2)
+            progress("documents", 1)
+        progress("uploaded", 2 * len(documents))
+        return {"succeeded": 2 * len(documents), "failed": 0, "errors": []}
+
+
+def _documents(n: int) -> list[dict]:
+    return [{"id": f"doc-{i}", "content": f"text {i}", "metadata": {}} for i in range(n)]
+
+
+def _wait_for(manager, job_id: str, states: tuple, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in states:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job stayed {manager.get(job_id)['status']}")
+
+
+@pytest.fixture
+def store(tmp_path):
+    from src.jobs import JobStore
+
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    yield store
+    store.close()
+
+
+class TestIngestionJobManager:
+    """Tests for IngestionJobManager class."""
+
+    def test_job_completes_with_progress(self, store):
+        """Submitted jobs should run in the background and report counters."""
+        from src.jobs import IngestionJobManager
+
+        pipeline = FakePipeline()
+        manager = IngestionJobManager(lambda: pipeline, store, max_workers=1, batch_documents=2)
+
+        job_id = manager.submit(_documents(5))
+        job = _wait_for(manager, job_id, ("completed",))
+
+        progress = job["progress"]
+        assert progress["documents_total"] == 5
+        assert progress["documents_done"] == 5
+        assert progress["chunks"] == 10
+        assert progress["uploaded"] == 10
+        assert "documents_per_second" in progress
+        assert pipeline.ingested == [f"doc-{i}" for i in range(5)]
+
+    def test_cancel_and_resume(self, store):
+        """Cancelled jobs keep completed batches and resume with the rest."""
+        from src.jobs import IngestionJobManager
+
+        gate = threading.Event()
+        pipeline = FakePipeline(gate)
+        manager = IngestionJobManager(lambda: pipeline, store, max_workers=1, batch_documents=2)
+
+        job_id = manager.submit(_documents(6))
+        # Cancel while the first batch is in progress
+        assert pipeline.started.wait(timeout=5)
+        manager.cancel(job_id)
+        gate.set()
+
+        job = _wait_for(manager, job_id, ("cancelled",))
+        assert job["progress"]["documents_done"] == 2
+
+        manager.resume(job_id)
+        job = _wait_for(manager, job_id, ("completed",))
+        assert job["progress"]["documents_done"] == 6
+        assert sorted(pipeline.ingested) == sorted(f"doc-{i}" for i in range(6))
+
+    def test_resume_while_cancelled_batch_runs(self, store):
+        """A resume before the cancelled worker exits should still run the rest of the job."""
+        from src.jobs import IngestionJobManager
+
+        gate = threading.Event()
+        pipeline = FakePipeline(gate)
+        manager = IngestionJobManager(lambda: pipeline, store, max_workers=1, batch_documents=2)
+
+        job_id = manager.submit(_documents(6))
+        assert pipeline.started.wait(timeout=5)
+        manager.cancel(job_id)
+        manager.resume(job_id)
+        gate.set()
+
+        job = _wait_for(manager, job_id, ("completed",))
+        assert job["progress"]["documents_done"] == 6
+        assert store.pending_documents(job_id) == []
+
+    def test_completed_job_drops_payloads(self, store):
+        """Document payloads should be deleted once a job completes."""
+        from src.jobs import IngestionJobManager
+
+        manager = IngestionJobManager(FakePipeline, store, max_workers=1)
+        job_id = manager.submit(_documents(3))
+        _wait_for(manager, job_id, ("completed",))
+
+        count = store._conn.execute("SELECT COUNT(*) FROM job_documents WHERE job_id = ?", (job_id,))
+        assert count.fetchone()[0] == 0
+
+    def test_unfinished_jobs_resume_after_restart(self, store):
+        """Jobs left queued by a previous process should be picked up."""
+        from src.jobs import IngestionJobManager
+
+        job_id = store.create(_documents(3))
+
+        pipeline = FakePipeline()
+        manager = IngestionJobManager(lambda: pipeline, store, max_workers=1)
+        assert manager.resume_unfinished() == [job_id]
+
+        _wait_for(manager, job_id, ("completed",))
+        assert len(pipeline.ingested) == 3
+
+    def test_unknown_job(self, store):
+        """Unknown ids should raise JobNotFound."""
+        from src.jobs import IngestionJobManager, JobNotFound
+
+        manager = IngestionJobManager(FakePipeline, store, max_workers=1)
+
+        with pytest.raises(JobNotFound):
+            manager.get("missing")
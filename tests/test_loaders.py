@@ -0,0 +1,217 @@
+"""
+Unit tests for document loaders and streamed ingestion.
+
+Run with: pytest tests/ -v
+"""
+import io
+import zipfile
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+_W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def _paragraph(text: str, style: str | None = None) -> str:
+    properties = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f"<w:p>{properties}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def _docx(body: str) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", f"<w:document {_W}><w:body>{body}</w:body></w:document>")
+    return buffer.getvalue()
+
+
+def _pieces(data: bytes, size: int = 5) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class TestLoaderRegistry:
+    """Tests for loader lookup."""
+
+    def test_content_type_then_extension(self):
+        """Specific content types should win; generic ones defer to the extension."""
+        from src.loaders import get_loader
+
+        assert get_loader("text/html; charset=utf-8", "page.txt").name == "html"
+        assert get_loader("application/octet-stream", "guide.md").name == "markdown"
+        assert get_loader("text/plain", "report.docx").name == "docx"
+        assert get_loader("text/plain", "notes").name == "text"
+        assert get_loader(None, "image.png") is None
+
+
+class TestEncodingDetection:
+    """Tests for streamed decoding."""
+
+    def test_non_utf8_text(self):
+        """Shift_JIS text should decode, even when bytes arrive split mid-character."""
+        from src.loaders import get_loader, stream_text
+
+        text = "日本語の文書です。検索のテストをします。" * 20
+
+        decoded = "".join(stream_text(get_loader(None, "a.txt"), _pieces(text.encode("shift_jis"), 3)))
+
+        assert decoded == text
+
+    def test_bom_and_fallback(self, monkeypatch):
+        """A BOM should decide the encoding; without one, fallbacks are tried in order."""
+        from src import loaders
+
+        monkeypatch.setattr(loaders, "_charset_normalizer", lambda sample: None)
+
+        assert loaders.detect_encoding("héllo".encode("utf-16")) == "utf-16"
+        assert loaders.detect_encoding("héllo".encode("utf-8")) == "utf-8"
+        assert loaders.detect_encoding("café ½".encode("cp1252")) == "cp1252"
+
+
+class TestHTMLLoader:
+    """Tests for HTML to Markdown extraction."""
+
+    def test_structure_kept_and_scripts_dropped(self):
+        """Headings, lists, code and tables should become Markdown."""
+        from src.loaders import get_loader, stream_text
+
+        html = (
+            "<html><head><title>T</title><script>var x = 1;</script></head><body>"
+            "<h2>Setup</h2><p>Hello &amp; welcome.</p><ul><li>one</li><li>two</li></ul>"
+            "<pre>a = 1\nb = 2</pre><table><tr><th>k</th><th>v</th></tr><tr><td>x</td><td>1</td></tr></table>"
+            "</body></html>"
+        )
+
+        markdown = "".join(stream_text(get_loader("text/html"), _pieces(html.encode())))
+
+        assert markdown == (
+            "## Setup\n\nHello & welcome.\n\n- one\n- two\n\n```\na = 1\nb = 2\n```\n\n"
+            "| k | v |\n|---|---|\n| x | 1 |\n\n"
+        )
+
+
+class TestDOCXLoader:
+    """Tests for Word extraction."""
+
+    def test_headings_lists_and_tables(self):
+        """Heading styles and tables should become Markdown, paragraphs stay in order."""
+        from src.loaders import DOCXLoader
+
+        row = "<w:tr><w:tc>{}</w:tc><w:tc>{}</w:tc></w:tr>"
+        body = (
+            _paragraph("Guide", "Heading1") + _paragraph("Run it.")
+            + "<w:tbl>" + row.format(_paragraph("Key"), _paragraph("Value"))
+            + row.format(_paragraph("os"), _paragraph("linux")) + "</w:tbl>"
+        )
+
+        text = "".join(DOCXLoader().load(io.BytesIO(_docx(body))))
+
+        assert text == "# Guide\n\nRun it.\n\n| Key | Value |\n|---|---|\n| os | linux |\n\n"
+
+    def test_not_a_docx(self):
+        """Corrupt files should raise LoaderError."""
+        import pytest
+
+        from src.loaders import DOCXLoader, LoaderError
+
+        with pytest.raises(LoaderError):
+            list(DOCXLoader().load(io.BytesIO(b"not a zip")))
+
+
+class TestStreamedChunking:
+    """Tests for chunking text pieces."""
+
+    def test_pieces_match_whole_text(self):
+        """Chunkers should give the same chunks for text and for its pieces."""
+        from src.embedding import TextChunker
+        from src.markdown_chunker import MarkdownChunker
+
+        text = "One sentence here. Another one!\nA third? " * 40
+        markdown = "# Title\n\nIntro text. More text.\n\n- a\n- b\n\n```\ncode\n```\n" * 10
+
+        def split(value: str) -> list[str]:
+            return [value[i : i + 7] for i in range(0, len(value), 7)]
+
+        chunker = TextChunker(chunk_size=30, chunk_overlap=5)
+        markdown_chunker = MarkdownChunker(chunk_size=30, chunk_overlap=5)
+
+        assert list(chunker.chunk_text(split(text))) == list(chunker.chunk_text(text))
+        assert list(markdown_chunker.chunk_text(split(markdown))) == list(markdown_chunker.chunk_text(markdown))
+
+
+class TestBlobIngestion:
+    """Tests for loading blobs through the loader registry."""
+
+    def _pipeline(self, blobs: dict[str, bytes]):
+        from src.indexer import DocumentIngestionPipeline
+
+        container = MagicMock()
+        container.list_blobs.return_value = [SimpleNamespace(name=name) for name in blobs]
+        container.get_blob_client.side_effect = lambda name: SimpleNamespace(
+            download_blob=lambda: SimpleNamespace(chunks=lambda: iter(_pieces(blobs[name], 64)))
+        )
+        pipeline = DocumentIngestionPipeline.__new__(DocumentIngestionPipeline)
+        return pipeline, container
+
+    def test_documents_by_format(self, monkeypatch):
+        """Supported blobs should stream with their format; others are skipped."""
+        from src.config import get_settings
+
+        monkeypatch.setattr(get_settings(), "loader_processes", 0)
+        pipeline, container = self._pipeline({
+            "a.html": b"<h1>A</h1><p>Body.</p>",
+            "b.docx": _docx(_paragraph("Body text.")),
+            "c.png": b"\x89PNG",
+        })
+
+        with patch("src.indexer.get_blob_service_client") as mock_blob:
+            mock_blob.return_value.get_container_client.return_value = container
+            docs = [
+                (doc["id"], doc["format"], "".join(doc["content"]))
+                for doc in pipeline.iter_blob_documents("docs")
+            ]
+
+        assert docs == [
+            ("a_html", "markdown", "# A\n\nBody.\n\n"),
+            ("b_docx", "markdown", "Body text.\n\n"),
+        ]
+
+    def test_unreadable_documents_are_skipped(self, monkeypatch):
+        """A document whose extraction fails should be counted as skipped."""
+        from src.config import get_settings
+
+        monkeypatch.setattr(get_settings(), "loader_processes", 0)
+        pipeline, container = self._pipeline({"bad.docx": b"not a zip", "ok.txt": b"Fine text."})
+        pipeline.processor = MagicMock()
+        pipeline.processor.iter_process_document.side_effect = (
+            lambda document_id, text, metadata, progress, text_format: [
+                {"id": f"{document_id}_chunk_0", "content": "".join(text)}
+            ]
+        )
+        pipeline.index_manager = MagicMock()
+        pipeline.index_manager.upload_documents.side_effect = lambda batch, size, progress: {
+            "succeeded": len(batch), "failed": 0, "errors": []
+        }
+
+        with patch("src.indexer.get_blob_service_client") as mock_blob, \
+                patch("src.indexer.get_ingest_journal", return_value=None):
+            mock_blob.return_value.get_container_client.return_value = container
+            result = pipeline.ingest_from_blob("docs")
+
+        assert (result["documents"], result["skipped"]) == (1, 1)
+        assert result["succeeded"] == 1
+        uploaded = pipeline.index_manager.upload_documents.call_args.args[0]
+        assert uploaded == [{"id": "ok_txt_chunk_0", "content": "Fine text."}]
+
+    @pytest.mark.parametrize("processes", [0, 1])
+    def test_failed_download_is_skipped(self, processes):
+        """A spooled (PDF/DOCX) blob whose download fails should fail only when read."""
+        from src.loaders import ExtractionPool, LoaderError, get_loader
+
+        def chunks():
+            yield b"PK"
+            raise ConnectionError("connection reset")
+
+        with ExtractionPool(processes) as pool:
+            extraction = pool.submit(get_loader(None, "a.docx"), chunks(), "a.docx")
+            with pytest.raises(LoaderError, match="connection reset"):
+                list(extraction)
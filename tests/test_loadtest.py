@@ -0,0 +1,38 @@
+"""
+Unit tests for load-test reporting.
+
+Run with: pytest tests/ -v
+"""
+
+
+class TestStageSummary:
+    """Tests for load stage aggregation and SLO checks."""
+
+    def _result(self):
+        from benchmarks.loadtest import LoadProfile, RequestRecord, StageResult
+
+        records = [RequestRecord("query", 0.1 * (i + 1), status=200) for i in range(9)]
+        records.append(RequestRecord("stream", 0.2, ttft=0.05, status=200))
+        records.append(RequestRecord("query", 0.5, status=429, error="http_429"))
+        return StageResult(LoadProfile(rate=5.0), wall_seconds=2.0, records=records)
+
+    def test_summary_metrics(self):
+        """Summary should report throughput, error rate and TTFT."""
+        from benchmarks.loadtest import SLO
+
+        summary = self._result().summary(SLO(error_rate=None))
+
+        assert summary["requests"] == 11
+        assert summary["throughput_rps"] == 5.0
+        assert summary["status_counts"] == {"200": 10, "429": 1}
+        assert summary["ttft"]["count"] == 1
+        assert summary["slo_met"]
+
+    def test_slo_violations(self):
+        """Violated objectives should be listed."""
+        from benchmarks.loadtest import SLO
+
+        summary = self._result().summary(SLO(p99_ms=500, error_rate=0.05))
+
+        assert set(summary["slo_violations"]) == {"p99_latency", "error_rate"}
+        assert not summary["slo_met"]
@@ -0,0 +1,126 @@
+"""
+Unit tests for structure-aware Markdown chunking.
+
+Run with: pytest tests/ -v
+"""
+from unittest.mock import MagicMock, patch
+
+DOCUMENT = """Guide
+=====
+
+Intro paragraph. It has two sentences.
+
+## Install
+
+Run the installer. Version 1.2.3 is required.
+
+```python
+import os.path
+print(os.path.join("a", "b"))  # dots. everywhere.
+```
+
+| Name | Value |
+|------|-------|
+| a.b  | 1.5   |
+
+- item one
+- item two
+  continued
+
+### Linux
+
+Use apt.
+"""
+
+
+class TestIterBlocks:
+    """Tests for the Markdown block parser."""
+
+    def test_blocks_and_heading_paths(self):
+        """Blocks should be typed and nested under their headings."""
+        from src.markdown_chunker import iter_blocks
+
+        blocks = [(b.kind, b.headings) for b in iter_blocks(DOCUMENT.splitlines())]
+
+        assert blocks == [
+            ("heading", ("Guide",)),
+            ("paragraph", ("Guide",)),
+            ("heading", ("Guide", "Install")),
+            ("paragraph", ("Guide", "Install")),
+            ("code", ("Guide", "Install")),
+            ("table", ("Guide", "Install")),
+            ("list", ("Guide", "Install")),
+            ("heading", ("Guide", "Install", "Linux")),
+            ("paragraph", ("Guide", "Install", "Linux")),
+        ]
+
+    def test_code_is_not_parsed(self):
+        """Headings and blank lines inside a fence belong to the code block."""
+        from src.markdown_chunker import iter_blocks
+
+        blocks = list(iter_blocks(["~~~", "# not a heading", "", "x = 1", "~~~", "after"]))
+
+        assert [b.kind for b in blocks] == ["code", "paragraph"]
+        assert blocks[0].text == "~~~\n# not a heading\n\nx = 1\n~~~"
+
+
+class TestMarkdownChunker:
+    """Tests for MarkdownChunker."""
+
+    def test_small_document_keeps_blocks_whole(self):
+        """Code and tables should never be cut; the title is the common heading path."""
+        from src.markdown_chunker import MarkdownChunker
+
+        chunks = list(MarkdownChunker(chunk_size=500).chunk_text(DOCUMENT))
+
+        assert len(chunks) == 1
+        assert chunks[0]["title"] == "Guide"
+        assert 'print(os.path.join("a", "b"))  # dots. everywhere.\n```' in chunks[0]["text"]
+
+    def test_sections_get_heading_path(self):
+        """With small chunks, each chunk should be titled with its section path."""
+        from src.markdown_chunker import MarkdownChunker
+
+        chunker = MarkdownChunker(chunk_size=40, chunk_overlap=0)
+        chunks = list(chunker.chunk_text(DOCUMENT))
+
+        assert all(c["token_count"] <= 40 for c in chunks)
+        code = next(c for c in chunks if "import os.path" in c["text"])
+        assert code["title"] == "Guide > Install"
+        assert chunks[-1]["title"].startswith("Guide > Install")
+
+    def test_oversized_code_and_table_are_split_with_framing(self):
+        """Pieces of large code blocks and tables should repeat the fence and header."""
+        from src.markdown_chunker import MarkdownChunker
+
+        code = "```sh\n" + "\n".join(f"echo step {i} of the setup" for i in range(60)) + "\n```"
+        table = "| key | value |\n|---|---|\n" + "\n".join(f"| k{i} | v{i} |" for i in range(60))
+        chunker = MarkdownChunker(chunk_size=80, chunk_overlap=0)
+
+        chunks = list(chunker.chunk_text(f"# T\n\n{code}\n\n{table}"))
+        code_chunks = [c["text"] for c in chunks if "echo" in c["text"]]
+        table_chunks = [c["text"] for c in chunks if "| k" in c["text"]]
+
+        assert len(code_chunks) > 1 and len(table_chunks) > 1
+        assert all(c.count("```") == 2 and c.rstrip().endswith("```") for c in code_chunks)
+        assert all(c.startswith("| key | value |\n|---|---|") for c in table_chunks)
+        assert all(c["token_count"] <= 80 for c in chunks)
+
+
+class TestDocumentProcessorMarkdown:
+    """Tests for Markdown chunker selection in DocumentProcessor."""
+
+    @patch("src.embedding.get_embedding_service")
+    def test_markdown_documents_use_heading_titles(self, mock_embedding):
+        """Markdown sources should be chunked by structure with heading-path titles."""
+        from src.embedding import DocumentProcessor
+
+        mock_embedding.return_value = service = MagicMock()
+        service.embed_batch.side_effect = lambda texts: [[1.0] for _ in texts]
+        processor = DocumentProcessor()
+
+        markdown = processor.process_document("d", DOCUMENT, {"source": "blob://docs/guide.md", "title": "guide.md"})
+        text = processor.process_document("t", DOCUMENT, {"source": "blob://docs/guide.txt", "title": "guide.txt"})
+
+        assert markdown[0]["title"] == "guide.md > Guide"
+        assert text[0]["title"] == "guide.txt"
@@ -0,0 +1,152 @@
+"""
+Unit tests for per-query search routing.
+
+Run with: pytest tests/ -v
+"""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _router(**kwargs):
+    from src.query_router import QueryRouter
+
+    options = dict(
+        enabled=True,
+        keyword_max_terms=3,
+        vector_min_terms=32,
+        lexical_vector_weight=0.5,
+        hybrid_k_multiplier=2,
+        exhaustive_max_documents=100,
+        stats=MagicMock(),
+    )
+    return QueryRouter(**(options | kwargs))
+
+
+class TestQueryFeatures:
+    """Tests for query_features."""
+
+    def test_features(self):
+        """Code, ID, quote and question features should be counted per token."""
+        from src.query_router import query_features
+
+        features = query_features('why does get_client() fail with "error AADSTS50058"?')
+
+        assert features.terms == 7
+        assert (features.code_tokens, features.id_tokens) == (1, 1)
+        assert features.quoted and features.question
+
+    @pytest.mark.parametrize(
+        "token",
+        ["getClient", "os.path.join", "src/api.py", "/etc/hosts", "ValueError", "--verbose", "a::b"],
+    )
+    def test_code_tokens(self, token):
+        """Identifier-like tokens should count as code."""
+        from src.query_router import query_features
+
+        assert query_features(token).code_tokens == 1
+
+    @pytest.mark.parametrize(
+        "token", ["and/or", "TCP/IP", "e.g.", "i.e.", "Ph.D.", "iPhone", "macOS", "file(s)"]
+    )
+    def test_prose_is_not_code(self, token):
+        """Slashes, abbreviations and brand casing in prose should not count as code."""
+        from src.query_router import query_features
+
+        assert query_features(token).code_tokens == 0
+
+    def test_cjk_terms(self):
+        """CJK text has no spaces, so its characters are counted as terms."""
+        from src.query_router import query_features
+
+        assert query_features("料金").terms == 1
+        assert query_features("マネージドIDの設定方法を教えてください").terms == 9
+
+
+class TestQueryRouter:
+    """Tests for QueryRouter class."""
+
+    @pytest.mark.parametrize(
+        ("query", "mode", "reason"),
+        [
+            ("azure functions", "keyword", "short"),
+            ("KB5034441", "keyword", "identifier"),
+            ('"managed identity" setup steps for functions', "keyword", "phrase"),
+            ("料金", "keyword", "short"),
+            ("what is rag?", "hybrid", "natural"),
+            ("How do I configure a managed identity for a function app?", "hybrid", "natural"),
+            ("why does get_search_client() raise ResourceNotFoundError here", "hybrid", "lexical"),
+            (" ".join(["explain how the team handled the outage"] * 5), "vector", "long"),
+        ],
+    )
+    def test_auto_routes(self, query, mode, reason):
+        """Auto mode should pick the search mode from the query's features."""
+        route = _router().route(query)
+
+        assert (route.mode, route.reason) == (mode, reason)
+        assert route.needs_vector == (mode != "keyword")
+
+    def test_tuning(self):
+        """Lexical queries get a lower vector weight; natural ones oversample k."""
+        router = _router()
+
+        assert router.route("fix for get_client() ValueError please").vector_weight == 0.5
+        assert router.route("how are documents chunked before indexing?").k_multiplier == 2
+
+    def test_explicit_zero_settings(self):
+        """Explicit zeros should override settings instead of falling back to them."""
+        router = _router(keyword_max_terms=0, lexical_vector_weight=0.0)
+
+        assert router.keyword_max_terms == 0
+        assert router.route("azure functions").mode == "hybrid"
+        assert router.route("fix for get_client() ValueError please").vector_weight == 0.0
+
+    def test_explicit_and_disabled(self):
+        """Explicit modes are honored, and disabled routing runs auto as hybrid."""
+        assert _router().route("azure functions", "vector").mode == "vector"
+        assert _router(enabled=False).route("azure functions").mode == "hybrid"
+
+        with pytest.raises(ValueError):
+            _router().route("q", "semantic")
+
+    def test_exhaustive_for_small_prefilters(self):
+        """Pre-filters estimated to leave few documents should use exact kNN."""
+        from src.search_planner import SearchPlan
+
+        router = _router(stats=MagicMock(**{"facets.return_value": SimpleNamespace(total=1000)}))
+        selective = SearchPlan("category eq 'a'", 0.05, "preFilter", 5)
+        broad = SearchPlan("category eq 'a'", 0.2, "preFilter", 5)
+
+        assert router.route("q", "hybrid", selective).exhaustive
+        assert not router.route("q", "hybrid", broad).exhaustive
+        assert not router.route("q", "keyword", selective).exhaustive
+        assert not router.route("q", "hybrid", SearchPlan(None, 1.0, None, 5)).exhaustive
+
+
+class TestRoutedSearch:
+    """Tests for HybridRetriever.search with routing."""
+
+    @patch("src.retriever.get_embedding_service")
+    @patch("src.retriever.get_search_client")
+    def test_keyword_route_skips_embedding(self, mock_search_client, mock_embedding):
+        """Keyword-routed queries should not embed; hybrid ones send the tuned vector query."""
+        from src.retriever import HybridRetriever
+
+        client = mock_search_client.return_value
+        client.search.return_value = []
+        retriever = HybridRetriever()
+        retriever.router = _router()
+
+        retriever.search("KB5034441", mode="auto")
+
+        mock_embedding.return_value.embed_text.assert_not_called()
+        assert client.search.call_args.kwargs["search_text"] == "KB5034441"
+        assert "vector_queries" not in client.search.call_args.kwargs
+
+        retriever.search("fix for get_client() ValueError please", top_k=5, mode="auto")
+
+        vector_query = client.search.call_args.kwargs["vector_queries"][0]
+        assert vector_query.weight == 0.5
+        assert vector_query.k_nearest_neighbors == 5
+        mock_embedding.return_value.embed_text.assert_called_once()
@@ -22,6 +22,8 @@ def mock_settings():
             openai_api_version="2024-10-01-preview",
             rag_top_k=5,
             rag_score_threshold=0.7,
+            rag_keyword_score_threshold=0.0,
+            rag_hybrid_score_threshold=0.0,
             chunk_size=500,
             chunk_overlap=100,
         )
@@ -182,7 +184,7 @@ class TestRAGPipeline:
     """Tests for RAGPipeline class."""
 
     @patch("src.rag_pipeline.HybridRetriever")
-    @patch("src.rag_pipeline.AzureOpenAI")
+    @patch("src.rag_pipeline.get_openai_client")
     def test_build_messages(self, mock_openai, mock_retriever, mock_settings, mock_credential):
         """Message building should include system prompt and context."""
         from src.rag_pipeline import RAGPipeline
@@ -202,7 +204,7 @@ class TestRAGPipeline:
         assert "Test question?" in messages[1]["content"]
 
     @patch("src.rag_pipeline.HybridRetriever")
-    @patch("src.rag_pipeline.AzureOpenAI")
+    @patch("src.rag_pipeline.get_openai_client")
     def test_build_messages_with_history(self, mock_openai, mock_retriever, mock_settings, mock_credential):
         """Message building should include conversation history."""
         from src.rag_pipeline import RAGPipeline
@@ -224,6 +226,121 @@ class TestRAGPipeline:
         assert messages[1]["content"] == "Previous question"
         assert messages[2]["content"] == "Previous answer"
 
+    @patch("src.rag_pipeline.HybridRetriever")
+    @patch("src.rag_pipeline.get_openai_client")
+    def test_query_batch_embeds_once(self, mock_openai, mock_retriever, mock_settings, mock_credential):
+        """Batch queries should embed all questions together and report per-question errors."""
+        from src.admission import Priority
+        from src.rag_pipeline import RAGPipeline
+
+        pipeline = RAGPipeline()
+        embed_batch = pipeline.retriever.embedding_service.embed_batch
+        embed_batch.return_value = [[0.1], [0.2], [0.3]]
+
+        def fake_query(question, query_vector, priority, **kwargs):
+            assert priority == Priority.BATCH
+            if question == "bad":
+                raise RuntimeError("boom")
+            return MagicMock(answer=f"answer to {question}", vector=query_vector)
+
+        pipeline.query = MagicMock(side_effect=fake_query)
+
+        results = dict(pipeline.query_batch(["a", "bad", "c"], max_concurrency=2))
+
+        embed_batch.assert_called_once_with(["a", "bad", "c"])
+        assert results[0].vector == [0.1]
+        assert results[2].answer == "answer to c"
+        assert isinstance(results[1], RuntimeError)
+
+    @patch("src.rag_pipeline.HybridRetriever")
+    @patch("src.rag_pipeline.get_openai_client")
+    def test_retrieve_skips_generation(self, mock_openai, mock_retriever, mock_settings, mock_credential):
+        """Retrieval-only queries should search and pack context without calling the LLM."""
+        from src.query_router import Route
+        from src.rag_pipeline import RAGPipeline
+        from src.retriever import SearchPage, SearchResult
+
+        pipeline = RAGPipeline()
+        results = [SearchResult(id="1", document_id="doc1", content="Chunk", score=0.9, source="a.md")]
+        # One more result came back but fell below the score threshold
+        pipeline.retriever.search_page.return_value = SearchPage(results, 2, Route("vector", "requested"))
+        pipeline.context_builder = MagicMock()
+        pipeline.context_builder.pack_context.return_value = ("Chunk", [{"source": "a.md"}], 3)
+
+        response = pipeline.retrieve("Question?", top_k=3, skip=6, include_context=True)
+
+        assert response.results == results
+        assert response.ranked == 2
+        assert response.context == "Chunk"
+        assert response.context_tokens == 3
+        assert pipeline.retriever.search_page.call_args.kwargs["skip"] == 6
+        mock_openai.return_value.chat.completions.create.assert_not_called()
+
+
+class TestHybridRetriever:
+    """Tests for HybridRetriever class."""
+
+    @patch("src.retriever.get_embedding_service")
+    @patch("src.retriever.get_search_client")
+    def test_search_paging_and_vectors(self, mock_search_client, mock_embedding, mock_settings):
+        """Skip and include_vectors should reach the search request and results."""
+        from src.retriever import HybridRetriever
+
+        client = mock_search_client.return_value
+        client.search.return_value = [
+            {"id": "1", "document_id": "doc1", "content": "Chunk", "@search.score": 0.9, "content_vector": [0.5]}
+        ]
+        retriever = HybridRetriever()
+
+        results = retriever.search("q", top_k=5, mode="keyword", skip=10, include_vectors=True)
+
+        kwargs = client.search.call_args.kwargs
+        assert kwargs["skip"] == 10
+        assert "content_vector" in kwargs["select"]
+        assert results[0].vector == [0.5]
+
+    @pytest.mark.parametrize(
+        ("mode", "score", "kept"),
+        [("vector", 0.5, False), ("vector", 0.8, True), ("hybrid", 0.03, True), ("keyword", 4.2, True)],
+    )
+    @patch("src.retriever.get_embedding_service")
+    @patch("src.retriever.get_search_client")
+    def test_score_threshold_per_mode(self, mock_search_client, mock_embedding, mode, score, kept):
+        """Each executed mode should be filtered on its own score scale."""
+        from src.retriever import HybridRetriever
+
+        mock_search_client.return_value.search.return_value = [
+            {"id": "1", "document_id": "doc1", "content": "Chunk", "@search.score": score}
+        ]
+        retriever = HybridRetriever()
+        retriever.score_thresholds = {"vector": 0.7, "keyword": 0.0, "hybrid": 0.0}
+
+        page = retriever.search_page("q", mode=mode)
+
+        assert page.route.mode == mode
+        assert page.ranked == 1
+        assert len(page.results) == int(kept)
+
+    @patch("src.retriever.get_embedding_service")
+    @patch("src.retriever.get_search_client")
+    def test_search_vector_field(self, mock_search_client, mock_embedding, mock_settings):
+        """A per-request vector field should be embedded with its model and queried."""
+        from src.retriever import HybridRetriever
+
+        client = mock_search_client.return_value
+        client.search.return_value = []
+        retriever = HybridRetriever()
+
+        retriever.search("q", mode="vector", vector_field="content_vector_v2")
+
+        mock_embedding.assert_called_with(2)
+        vector_query = client.search.call_args.kwargs["vector_queries"][0]
+        assert vector_query.fields == "content_vector_v2"
+        mock_embedding.return_value.embed_text.assert_called_once_with("q")
+
+        with pytest.raises(ValueError):
+            retriever.search("q", vector_field="content_vector_v3")
+
 
 # ConversationManager Tests
 
@@ -285,7 +402,7 @@ class TestAPIEndpoints:
         """Create test client with mocked dependencies."""
         from fastapi.testclient import TestClient
 
-        with patch("src.api.RAGPipeline"), patch("src.api.SearchIndexManager"):
+        with patch("src.api.AppComponents"):
             from src.api import app
 
             with TestClient(app) as client:
@@ -0,0 +1,89 @@
+"""
+Unit tests for embedding migration (dual-write and re-embedding).
+
+Run with: pytest tests/ -v
+"""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+
+def _index(documents: dict, reject: set = frozenset()):
+    """Search client mock over ``documents`` that applies merges immediately."""
+    client = MagicMock()
+
+    def search(search_text=None, filter=None, select=None, top=None, **kwargs):
+        pending = [d for d in documents.values() if d.get("embedding_version") != 2]
+        return pending[:top]
+
+    def merge_documents(batch):
+        results = []
+        for doc in batch:
+            ok = doc["id"] not in reject
+            if ok:
+                documents[doc["id"]].update(doc)
+            results.append(SimpleNamespace(key=doc["id"], succeeded=ok, error_message=None if ok else "rejected"))
+        return results
+
+    client.search.side_effect = search
+    client.merge_documents.side_effect = merge_documents
+    return client
+
+
+class TestReEmbedder:
+    """Tests for ReEmbedder class."""
+
+    @patch("src.reembed.get_embedding_service")
+    @patch("src.reembed.get_search_client")
+    def test_fills_pending_chunks(self, mock_search_client, mock_embedding):
+        """Every pending chunk should get a v2 vector and version, in batches."""
+        from src.reembed import ReEmbedder
+
+        documents = {f"c{i}": {"id": f"c{i}", "content": f"text {i}"} for i in range(5)}
+        documents["c0"]["embedding_version"] = 2
+        mock_search_client.return_value = _index(documents)
+        mock_embedding.return_value.embed_batch.side_effect = lambda texts: [[float(len(t))] for t in texts]
+
+        status = ReEmbedder(rate=1000, batch_size=2, poll_interval=0).run()
+
+        mock_embedding.assert_called_with(2)
+        assert status["embedded"] == 4
+        assert mock_embedding.return_value.embed_batch.call_count == 2
+        assert documents["c3"]["content_vector_v2"] == [6.0]
+        assert all(d["embedding_version"] == 2 for d in documents.values())
+
+    @patch("src.reembed.get_embedding_service")
+    @patch("src.reembed.get_search_client")
+    def test_rejected_chunks_skipped(self, mock_search_client, mock_embedding):
+        """Chunks whose update fails should be reported once, not retried forever."""
+        from src.reembed import ReEmbedder
+
+        documents = {f"c{i}": {"id": f"c{i}", "content": "x"} for i in range(3)}
+        mock_search_client.return_value = _index(documents, reject={"c1"})
+        mock_embedding.return_value.embed_batch.side_effect = lambda texts: [[1.0] for _ in texts]
+
+        status = ReEmbedder(rate=1000, batch_size=10, poll_interval=0).run()
+
+        assert status["embedded"] == 2
+        assert status["failed"] == 1
+
+
+class TestDualWrite:
+    """Tests for dual-writing v2 embeddings during ingestion."""
+
+    @patch("src.embedding.get_embedding_service")
+    def test_process_document_writes_both_vectors(self, mock_embedding, monkeypatch):
+        """With a v2 deployment configured, chunks carry both vectors."""
+        from src.config import get_settings
+        from src.embedding import DocumentProcessor
+
+        monkeypatch.setattr(get_settings(), "embedding_v2_deployment", "embedding-v2")
+        services = {1: MagicMock(), 2: MagicMock()}
+        services[1].embed_batch.side_effect = lambda texts: [[1.0] for _ in texts]
+        services[2].embed_batch.side_effect = lambda texts: [[2.0, 2.0] for _ in texts]
+        mock_embedding.side_effect = lambda version=1: services[version]
+
+        chunks = DocumentProcessor().process_document("doc", "One sentence. Another sentence.")
+
+        assert chunks[0]["content_vector"] == [1.0]
+        assert chunks[0]["content_vector_v2"] == [2.0, 2.0]
+        assert chunks[0]["embedding_version"] == 2
@@ -0,0 +1,129 @@
+"""
+Unit tests for blue/green reindexing.
+
+Run with: pytest tests/ -v
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+VERSIONS = ["rag-20260101000000", "rag-20260201000000", "rag-20260301000000"]
+
+
+def _index_client(current: str | None, plain_indexes: tuple = ()):
+    from unittest.mock import MagicMock
+
+    from azure.core.exceptions import ResourceNotFoundError
+
+    client = MagicMock()
+    client.list_index_names.return_value = ["other-index", *reversed(VERSIONS)]
+    if current:
+        client.get_alias.return_value = SimpleNamespace(name="rag", indexes=[current])
+    else:
+        client.get_alias.side_effect = ResourceNotFoundError("missing")
+
+    def get_index(name):
+        if name not in plain_indexes:
+            raise ResourceNotFoundError(name)
+        return SimpleNamespace(name=name)
+
+    client.get_index.side_effect = get_index
+    return client
+
+
+class TestReindexer:
+    """Tests for Reindexer class."""
+
+    @patch("src.reindex.get_search_index_client")
+    def test_prune_keeps_previous_versions(self, mock_index_client):
+        """Only versions older than current plus keep_versions should be deleted."""
+        from src.reindex import Reindexer
+
+        client = mock_index_client.return_value = _index_client(current=VERSIONS[2])
+
+        deleted = Reindexer(alias="rag", keep_versions=1).prune()
+
+        assert deleted == [VERSIONS[0]]
+        client.delete_index.assert_called_once_with(VERSIONS[0])
+
+    @patch("src.reindex.get_chunk_store")
+    @patch("src.reindex.get_search_index_client")
+    def test_rollback_repoints_alias(self, mock_index_client, mock_chunk_store):
+        """Rollback should point the alias at the previous version and clear cached chunks."""
+        from src.reindex import Reindexer
+
+        client = mock_index_client.return_value = _index_client(current=VERSIONS[1])
+
+        assert Reindexer(alias="rag").rollback() == VERSIONS[0]
+        alias = client.create_or_update_alias.call_args.args[0]
+        assert (alias.name, alias.indexes) == ("rag", [VERSIONS[0]])
+        mock_chunk_store.return_value.clear.assert_called_once()
+
+    @patch("src.reindex.get_search_index_client")
+    def test_rollback_without_earlier_version(self, mock_index_client):
+        """Rollback from the oldest version should raise ReindexError."""
+        from src.reindex import Reindexer, ReindexError
+
+        mock_index_client.return_value = _index_client(current=VERSIONS[0])
+
+        with pytest.raises(ReindexError):
+            Reindexer(alias="rag").rollback()
+
+    @patch("src.reindex.get_search_index_client")
+    def test_run_refuses_plain_index_name(self, mock_index_client):
+        """An alias name taken by a plain index should fail before building anything."""
+        from src.reindex import Reindexer, ReindexError
+
+        client = mock_index_client.return_value = _index_client(current=None, plain_indexes=("rag",))
+
+        with pytest.raises(ReindexError, match="not an alias"):
+            Reindexer(alias="rag").run([{"id": "1", "content": "x"}])
+        client.create_or_update_index.assert_not_called()
+
+    @patch("src.reindex.SearchIndexManager")
+    @patch("src.reindex.get_search_index_client")
+    def test_validation_flags_short_index(self, mock_index_client, mock_manager):
+        """Failed uploads and a much smaller shadow than live should be reported."""
+        from src.reindex import Reindexer
+
+        mock_index_client.return_value = _index_client(current=VERSIONS[2])
+        counts = {VERSIONS[2]: 100, "rag": 100, "rag-new": 50}
+        mock_manager.side_effect = lambda name: SimpleNamespace(get_document_count=lambda: counts[name])
+
+        report = Reindexer(alias="rag", count_timeout=0).validate("rag-new", {"succeeded": 50, "failed": 2})
+
+        assert not report.ok
+        assert report.live_documents == 100
+        assert len(report.problems) == 2
+
+    @patch("src.retriever.get_embedding_service")
+    @patch("src.retriever.get_search_client")
+    @patch("src.reindex.SearchIndexManager")
+    @patch("src.reindex.get_search_index_client")
+    def test_validation_sample_queries(self, mock_index_client, mock_manager, mock_search_client, mock_embedding):
+        """Sample queries should be answered despite low hybrid scores and compared with live."""
+        from unittest.mock import MagicMock
+
+        from src.reindex import Reindexer
+
+        mock_index_client.return_value = _index_client(current=VERSIONS[2])
+        mock_manager.side_effect = lambda name: SimpleNamespace(get_document_count=lambda: 10)
+        # Hybrid (RRF) scores are far below RAG_SCORE_THRESHOLD
+        hits = {"rag": ["a", "b"], "rag-new": ["a", "c"]}
+        clients = {}
+
+        def search_client(index_name=None):
+            client = clients.setdefault(index_name, MagicMock())
+            client.search.return_value = [{"id": i, "@search.score": 0.03} for i in hits[index_name]]
+            return client
+
+        mock_search_client.side_effect = search_client
+
+        report = Reindexer(alias="rag", min_overlap=0.8, count_timeout=0).validate(
+            "rag-new", {"succeeded": 10, "failed": 0}, queries=["q1", "q2"]
+        )
+
+        assert (report.queries, report.answered) == (2, 2)
+        assert report.mean_overlap == 0.5
+        assert report.problems == ["mean top-5 overlap with live index 0.5 < 0.8"]
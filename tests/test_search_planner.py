@@ -0,0 +1,124 @@
+"""
+Unit tests for filter parsing and search planning.
+
+Run with: pytest tests/ -v
+"""
+import time
+
+import pytest
+
+
+def _snapshot(total: int = 1000, categories: dict | None = None):
+    from src.search_planner import FacetSnapshot
+
+    return FacetSnapshot(
+        total=total,
+        counts={"category": categories or {"azure": 900, "aws": 90, "gcp": 10}, "source": {}, "document_id": {}},
+        truncated=frozenset(),
+        fetched_at=time.monotonic(),
+    )
+
+
+class TestParseFilter:
+    """Tests for parse_filter and to_odata."""
+
+    def test_round_trip(self):
+        """Valid filters should parse and serialize canonically."""
+        from src.search_planner import parse_filter, to_odata
+
+        node = parse_filter("(category eq 'a''b') AND not search.in(source, 'x.md y.md')")
+
+        assert to_odata(node) == "category eq 'a''b' and not search.in(source, 'x.md,y.md', ',')"
+
+    @pytest.mark.parametrize(
+        "expression",
+        [
+            "category eq",
+            "category = 'x'",
+            "token_count gt 3",
+            "category eq 'x' or",
+            "(category eq 'x'",
+            "category eq 'x'; drop",
+            "search.in(category, 3)",
+        ],
+    )
+    def test_invalid_filters_rejected(self, expression):
+        """Malformed filters and unfilterable fields should raise FilterError."""
+        from src.search_planner import FilterError, parse_filter
+
+        with pytest.raises(FilterError):
+            parse_filter(expression)
+
+
+class TestSelectivity:
+    """Tests for estimate_selectivity."""
+
+    def test_facet_estimates(self):
+        """Faceted predicates should use counts; others the default."""
+        from src.search_planner import DEFAULT_SELECTIVITY, estimate_selectivity, parse_filter
+
+        snapshot = _snapshot()
+
+        assert estimate_selectivity(parse_filter("category eq 'gcp'"), snapshot) == pytest.approx(0.01)
+        assert estimate_selectivity(parse_filter("category ne 'azure'"), snapshot) == pytest.approx(0.1)
+        assert estimate_selectivity(parse_filter("search.in(category, 'aws,gcp')"), snapshot) == pytest.approx(0.1)
+        assert estimate_selectivity(parse_filter("category eq 'none'"), snapshot) == 0.0
+        assert estimate_selectivity(parse_filter("category eq 'gcp'"), None) == DEFAULT_SELECTIVITY
+
+
+class TestSearchPlanner:
+    """Tests for SearchPlanner class."""
+
+    def _planner(self, snapshot):
+        from unittest.mock import MagicMock
+
+        from src.search_planner import SearchPlanner
+
+        stats = MagicMock()
+        stats.facets.return_value = snapshot
+        return SearchPlanner(stats=stats, post_filter_min_selectivity=0.5, max_k=200)
+
+    def test_selective_filter_prefilters(self):
+        """Selective filters should pre-filter without oversampling."""
+        plan = self._planner(_snapshot()).plan("category eq 'gcp'", k=10)
+
+        assert plan.vector_filter_mode == "preFilter"
+        assert plan.k_nearest_neighbors == 10
+        assert plan.filter == "category eq 'gcp'"
+
+    def test_broad_filter_postfilters_with_oversampling(self):
+        """Broad filters should post-filter with k scaled by the expected loss."""
+        plan = self._planner(_snapshot()).plan("category eq 'azure'", k=10)
+
+        assert plan.vector_filter_mode == "postFilter"
+        assert plan.k_nearest_neighbors == 17  # ceil(10 * 1.5 / 0.9)
+
+    def test_oversampling_capped(self):
+        """Oversampled k should not exceed max_k."""
+        snapshot = _snapshot(categories={"azure": 600, "aws": 400})
+
+        plan = self._planner(snapshot).plan("category eq 'azure'", k=100)
+
+        assert plan.k_nearest_neighbors == 200
+
+    def test_zero_selectivity_postfilter(self):
+        """A zero threshold post-filters filters matching nothing at max_k."""
+        from unittest.mock import MagicMock
+
+        from src.search_planner import SearchPlanner
+
+        stats = MagicMock(**{"facets.return_value": _snapshot()})
+        planner = SearchPlanner(stats=stats, post_filter_min_selectivity=0, max_k=200)
+
+        plan = planner.plan("category eq 'missing'", k=10)
+
+        assert plan.selectivity == 0
+        assert (plan.vector_filter_mode, plan.k_nearest_neighbors) == ("postFilter", 200)
+
+    def test_no_filter(self):
+        """Unfiltered searches keep k and set no filter mode."""
+        plan = self._planner(_snapshot()).plan(None, k=5)
+
+        assert plan.filter is None
+        assert plan.vector_filter_mode is None
+        assert plan.k_nearest_neighbors == 5
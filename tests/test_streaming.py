@@ -0,0 +1,172 @@
+"""
+Unit tests for streaming (NDJSON) ingestion.
+
+Run with: pytest tests/ -v
+"""
+import gzip
+import json
+import threading
+from unittest.mock import MagicMock
+
+
+def _ndjson(n: int) -> bytes:
+    return b"".join(
+        json.dumps({"id": f"doc-{i}", "content": f"text {i}"}).encode() + b"\n" for i in range(n)
+    )
+
+
+class TestNDJSONDecoder:
+    """Tests for NDJSONDecoder class."""
+
+    def test_documents_split_across_chunks(self):
+        """Lines split at arbitrary byte boundaries should decode once complete."""
+        from src.streaming import NDJSONDecoder
+
+        body = _ndjson(20)
+        decoder = NDJSONDecoder()
+        docs = []
+        for i in range(0, len(body), 7):
+            docs.extend(decoder.feed(body[i : i + 7]))
+        docs.extend(decoder.close())
+
+        assert [d["id"] for d in docs] == [f"doc-{i}" for i in range(20)]
+        assert docs[0]["metadata"] == {}
+
+    def test_gzip_body(self):
+        """Gzip bodies should be decompressed incrementally."""
+        from src.streaming import NDJSONDecoder
+
+        body = gzip.compress(_ndjson(50))
+        decoder = NDJSONDecoder(gzipped=True)
+        docs = []
+        for i in range(0, len(body), 64):
+            docs.extend(decoder.feed(body[i : i + 64]))
+        docs.extend(decoder.close())
+
+        assert len(docs) == 50
+
+    def test_invalid_lines_reported(self):
+        """Malformed lines should be skipped with line numbers."""
+        from src.streaming import NDJSONDecoder
+
+        decoder = NDJSONDecoder()
+        docs = decoder.feed(b'{"id": "a", "content": "x"}\nnot json\n\n[1]\n{"id": 2, "content": "y"}\n')
+        docs += decoder.feed(b'{"id": "b", "content": "z"}')
+        docs += decoder.close()
+
+        assert [d["id"] for d in docs] == ["a", "b"]
+        assert decoder.error_count == 3
+        assert [e["line"] for e in decoder.errors] == [2, 4, 5]
+
+    def test_oversized_line_skipped(self):
+        """A line above the limit should be dropped without buffering all of it."""
+        from src.streaming import NDJSONDecoder
+
+        decoder = NDJSONDecoder(max_line_bytes=100)
+        docs = decoder.feed(b'{"id": "big", "content": "' + b"x" * 150)
+        docs += decoder.feed(b"x" * 150 + b'"}\n{"id": "ok", "content": "y"}\n')
+        docs += decoder.close()
+
+        assert [d["id"] for d in docs] == ["ok"]
+        assert decoder.error_count == 1
+
+    def test_compressed_oversized_line_bounded(self):
+        """A highly compressed chunk should not inflate far past the line limit."""
+        import tracemalloc
+
+        from src.streaming import NDJSONDecoder
+
+        line = b'{"id": "big", "content": "' + b"x" * 5_000_000 + b'"}\n'
+        body = gzip.compress(line + b'{"id": "ok", "content": "y"}\n')
+        decoder = NDJSONDecoder(gzipped=True, max_line_bytes=1000)
+
+        tracemalloc.start()
+        try:
+            docs = decoder.feed(body) + decoder.close()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        assert [d["id"] for d in docs] == ["ok"]
+        assert decoder.error_count == 1
+        assert peak < 1_000_000
+
+
+class TestStreamBuffer:
+    """Tests for StreamBuffer class."""
+
+    def test_put_waits_for_consumer(self):
+        """put() on a full buffer should resume once the worker takes an item."""
+        import asyncio
+
+        from src.streaming import END_OF_STREAM, StreamBuffer
+
+        async def run():
+            buffer = StreamBuffer(1)
+            assert await buffer.put("a")
+            blocked = asyncio.ensure_future(buffer.put("b"))
+            for _ in range(3):
+                await asyncio.sleep(0)
+            assert not blocked.done()
+
+            worker = asyncio.get_running_loop().run_in_executor(None, list, buffer)
+            assert await blocked
+            await buffer.put(END_OF_STREAM)
+            return await worker
+
+        assert asyncio.run(run()) == ["a", "b"]
+
+    def test_close_releases_producer(self):
+        """Closing a full buffer should drop the waiting item instead of hanging."""
+        import asyncio
+
+        from src.streaming import StreamBuffer
+
+        async def run():
+            buffer = StreamBuffer(1)
+            await buffer.put("a")
+            blocked = asyncio.ensure_future(buffer.put("b"))
+            await asyncio.sleep(0)
+            buffer.close()
+            return await blocked, await buffer.put("c")
+
+        assert asyncio.run(run()) == (False, False)
+
+
+class TestIngestStream:
+    """Tests for DocumentIngestionPipeline.ingest_stream."""
+
+    def test_uploads_in_batches_with_bounded_concurrency(self):
+        """Chunks should be uploaded in fixed batches with limited parallelism."""
+        from src.indexer import DocumentIngestionPipeline
+
+        pipeline = DocumentIngestionPipeline.__new__(DocumentIngestionPipeline)
+        pipeline.processor = MagicMock()
+        pipeline.processor.process_document.side_effect = lambda document_id, text, metadata, progress=None: [
+            {"id": f"{document_id}_chunk_{i}"} for i in range(3)
+        ]
+
+        lock = threading.Lock()
+        in_flight = {"now": 0, "max": 0}
+        batch_sizes = []
+
+        def upload(batch, batch_size, progress):
+            with lock:
+                in_flight["now"] += 1
+                in_flight["max"] = max(in_flight["max"], in_flight["now"])
+                batch_sizes.append(len(batch))
+            threading.Event().wait(0.01)
+            with lock:
+                in_flight["now"] -= 1
+            return {"succeeded": len(batch), "failed": 0, "errors": []}
+
+        pipeline.index_manager = MagicMock()
+        pipeline.index_manager.upload_documents.side_effect = upload
+
+        documents = ({"id": f"doc-{i}", "content": "text"} for i in range(20))
+        result = pipeline.ingest_stream(documents, upload_batch_size=10, max_concurrent_uploads=2)
+
+        assert result["documents"] == 20
+        assert result["succeeded"] == 60
+        assert sorted(batch_sizes) == [10] * 6
+        assert in_flight["max"] <= 2
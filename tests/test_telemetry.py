@@ -0,0 +1,83 @@
+"""
+Unit tests for telemetry instrumentation.
+
+Run with: pytest tests/ -v
+"""
+import time
+
+import pytest
+
+
+class TestHistogram:
+    """Tests for Histogram metric."""
+
+    def test_observe_and_render(self):
+        """Observations should land in cumulative buckets."""
+        from src.telemetry import Histogram
+
+        histogram = Histogram("test_latency_seconds", "Test", buckets=(0.1, 1.0))
+        histogram.observe(0.05, stage="a")
+        histogram.observe(0.5, stage="a")
+        histogram.observe(5.0, stage="a")
+
+        lines = histogram.collect()
+
+        assert 'test_latency_seconds_bucket{stage="a",le="0.1"} 1' in lines
+        assert 'test_latency_seconds_bucket{stage="a",le="1.0"} 2' in lines
+        assert 'test_latency_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+        assert 'test_latency_seconds_count{stage="a"} 3' in lines
+        assert histogram.count(stage="a") == 3
+
+
+class TestSpan:
+    """Tests for span context manager."""
+
+    def test_span_records_duration(self):
+        """Span should record into the stage histogram."""
+        from src.telemetry import get_metrics, span
+
+        before = get_metrics().stage_duration.count(stage="test.span")
+        with span("test.span") as s:
+            time.sleep(0.001)
+
+        assert s.duration >= 0.001
+        assert get_metrics().stage_duration.count(stage="test.span") == before + 1
+
+    def test_span_counts_errors(self):
+        """Exceptions inside a span should increment the error counter."""
+        from src.telemetry import get_metrics, span
+
+        before = get_metrics().errors.value(stage="test.error")
+        with pytest.raises(ValueError):
+            with span("test.error"):
+                raise ValueError("boom")
+
+        assert get_metrics().errors.value(stage="test.error") == before + 1
+
+    def test_span_overhead(self):
+        """Span overhead should stay in the low microseconds."""
+        from src.telemetry import span
+
+        iterations = 20000
+        start = time.perf_counter()
+        for _ in range(iterations):
+            with span("test.overhead"):
+                pass
+        per_span = (time.perf_counter() - start) / iterations
+
+        # Generous bound to keep CI stable; typical overhead is ~2-3us
+        assert per_span < 50e-6
+
+
+class TestPrometheusExport:
+    """Tests for Prometheus text exposition."""
+
+    def test_render_includes_metadata(self):
+        """Rendered output should include HELP/TYPE lines and counters."""
+        from src.telemetry import get_metrics, record_cache
+
+        record_cache("test-cache", hit=True)
+        text = get_metrics().render_prometheus()
+
+        assert "# TYPE rag_cache_requests_total counter" in text
+        assert 'rag_cache_requests_total{cache="test-cache",result="hit"}' in text
@@ -0,0 +1,96 @@
+"""
+Unit tests for shared HTTP transports.
+
+Run with: pytest tests/ -v
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    """Local keep-alive HTTP server; yields its base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fresh_transports():
+    """Drop shared pools before and after each test."""
+    from src.transport import reset_transports
+
+    reset_transports()
+    yield
+    reset_transports()
+
+
+def _stats(client: str, url: str) -> dict:
+    from src.transport import pool_stats
+
+    host = url.split("//", 1)[1]
+    return next(s for s in pool_stats() if s["client"] == client and s["host"] == host)
+
+
+class TestTransportRegistry:
+    """Tests for per-host transport sharing."""
+
+    def test_httpx_client_shared_per_host(self, fresh_transports):
+        """Endpoints on the same host should share one pool."""
+        from src.transport import get_httpx_client
+
+        a = get_httpx_client("https://example.openai.azure.com/")
+        b = get_httpx_client("https://example.openai.azure.com/openai")
+        c = get_httpx_client("https://other.openai.azure.com/")
+
+        assert a is b
+        assert a is not c
+
+    def test_httpx_connections_reused(self, local_server, fresh_transports):
+        """Sequential requests should reuse one keep-alive connection."""
+        from src.transport import get_httpx_client
+
+        client = get_httpx_client(local_server)
+        for _ in range(5):
+            assert client.get(f"{local_server}/").status_code == 200
+
+        stats = _stats("httpx", local_server)
+        assert stats["opened"] == 1
+        assert stats["idle"] == 1
+
+    def test_azure_transport_connections_reused(self, local_server, fresh_transports):
+        """Azure clients for one host should share a pooled session."""
+        from azure.core.rest import HttpRequest
+
+        from src.transport import get_azure_transport
+
+        transport = get_azure_transport(local_server)
+        assert get_azure_transport(local_server + "/indexes") is transport
+
+        for _ in range(5):
+            response = transport.send(HttpRequest("GET", f"{local_server}/"))
+            response.read()
+            assert response.status_code == 200
+
+        stats = _stats("azure", local_server)
+        assert stats["opened"] == 1
+        assert stats["active"] == 0
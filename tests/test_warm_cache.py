@@ -0,0 +1,97 @@
+"""
+Unit tests for the warm query embedding cache.
+
+Run with: pytest tests/ -v
+"""
+import json
+from unittest.mock import MagicMock, patch
+
+
+class FakeEmbeddingService:
+    """Embedding service stand-in: vector derived from text length."""
+
+    deployment = "text-embedding-ada-002"
+
+    def __init__(self):
+        self.embedded: list[str] = []
+
+    def embed_batch(self, texts, batch_size=16):
+        self.embedded.extend(texts)
+        return [[float(len(t)), 0.5, -1.0] for t in texts]
+
+
+class TestQueryMining:
+    """Tests for query log mining."""
+
+    def test_normalize_query(self):
+        """Width variants and extra whitespace should map to the same query."""
+        from src.warm_cache import normalize_query
+
+        assert normalize_query("  Azure　AI\tSearch  ") == "Azure AI Search"
+        assert normalize_query("ＡＢＣ") == "ABC"
+
+    def test_mine_top_queries(self, tmp_path):
+        """Frequent queries should be counted after normalization."""
+        from src.warm_cache import iter_log_queries, mine_queries
+
+        log = tmp_path / "queries.jsonl"
+        lines = [{"question": "What is RAG?"}] * 3 + [{"query": "what  is RAG? "}] * 2
+        lines += [{"question": "pricing"}, {"other": "ignored"}]
+        log.write_text("\n".join(json.dumps(line) for line in lines) + "\nplain text query\n")
+
+        top = mine_queries(iter_log_queries(str(log)), top_n=2)
+
+        assert top == [("What is RAG?", 3), ("what is RAG?", 2)]
+
+
+class TestWarmCache:
+    """Tests for WarmCache file building and lookup."""
+
+    def test_build_and_lookup(self, tmp_path):
+        """Cached queries should be found by normalized text; others miss."""
+        from src.warm_cache import WarmCache, build_warm_cache
+
+        path = str(tmp_path / "warm.bin")
+        service = FakeEmbeddingService()
+        count = build_warm_cache(["alpha", "beta query", "alpha ", "gamma"], path, service)
+
+        cache = WarmCache(path)
+
+        assert count == 3
+        assert service.embedded == ["alpha", "beta query", "gamma"]
+        assert cache.model == "text-embedding-ada-002"
+        assert cache.get("beta  query") == [10.0, 0.5, -1.0]
+        assert cache.get("alpha") == [5.0, 0.5, -1.0]
+        assert cache.get("delta") is None
+
+    def test_embed_text_uses_cache(self, tmp_path):
+        """EmbeddingService should skip the API call on a cache hit."""
+        from src.embedding import EmbeddingService
+        from src.warm_cache import WarmCache, build_warm_cache
+
+        path = str(tmp_path / "warm.bin")
+        build_warm_cache(["cached question"], path, FakeEmbeddingService())
+
+        with patch("src.embedding.get_openai_client") as mock_client, patch(
+            "src.embedding.get_warm_cache", return_value=WarmCache(path)
+        ):
+            client = mock_client.return_value
+            client.embeddings.create.return_value = MagicMock(data=[MagicMock(embedding=[1.0])])
+            service = EmbeddingService()
+
+            assert service.embed_text("cached question") == [15.0, 0.5, -1.0]
+            client.embeddings.create.assert_not_called()
+            assert service.embed_text("new question") == [1.0]
+            client.embeddings.create.assert_called_once()
+
+    def test_rejects_other_files(self, tmp_path):
+        """Files that are not warm caches should raise ValueError."""
+        import pytest
+
+        from src.warm_cache import WarmCache
+
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"x" * 200)
+
+        with pytest.raises(ValueError):
+            WarmCache(str(path))